@@ -2,6 +2,8 @@
 from playwright.async_api import async_playwright, BrowserContext, Page, Browser, Playwright # Import Playwright para type hint
 from app.core.logger import logger
 from app.core.errors import AutomationError
+from app.core.app_config import AppConfig
+from app.automation.trace_recorder import TraceRecorder
 from pathlib import Path
 import asyncio
 import os # Importar os para manipulação de variáveis de ambiente
@@ -15,13 +17,18 @@ class BrowserManager:
         self._browser: Browser = None
         self._context: BrowserContext = None
         self._page: Page = None
+        self._launch_options: dict = None # Parâmetros do último launch_browser (usados no relaunch_browser)
+        self._crashed = False # Sinalizado pelos eventos 'crash' da página e 'disconnected' do navegador
+        self._trace_recorder: TraceRecorder = None # Trace em anel das últimas linhas (enable_trace)
 
     async def launch_browser(self, headless=False, enable_trace: bool = True, use_chrome: bool = False) -> Page:
         """
         Inicia o navegador Playwright e cria um novo contexto e página.
         Retorna a instância da página.
         """
-        logger.info(f"Lançando navegador Playwright (headless={headless}, Chrome={use_chrome})...")
+        logger.info("Lançando navegador Playwright (headless=%s, Chrome=%s)...", headless, use_chrome)
+        self._launch_options = {"headless": headless, "enable_trace": enable_trace, "use_chrome": use_chrome}
+        self._crashed = False
         try:
             self._playwright = await async_playwright().start()
             
@@ -36,7 +43,7 @@ class BrowserManager:
                 browser_name_for_log = "Mozilla Firefox"
             
         
-            logger.info(f"Tentando lançar {browser_name_for_log}...")
+            logger.info("Tentando lançar %s...", browser_name_for_log)
 
             # --- MODIFICAÇÃO CHAVE: Chamar launch() SEM 'executable_path' ---
             # O Playwright irá procurar o executável em:
@@ -59,15 +66,22 @@ class BrowserManager:
             self._context = await self._browser.new_context() # Contexto padrão sem vídeo
 
             self._page = await self._context.new_page()
+            self._browser.on("disconnected", self._on_crash)
+            self._page.on("crash", self._on_crash)
+
+            # Trace em anel: a BaseTask abre/fecha um trecho por linha (AppConfig.trace_keep_rows; 0 desliga)
+            if enable_trace:
+                self._trace_recorder = await TraceRecorder.attach(self._page, self._context)
             
 
-            # Adicione um listener para erros no console do navegador (opcional)
-            self._page.on("console", lambda msg: logger.debug(f"Browser console [{msg.type}]: {msg.text}"))
+            # Listener do console do navegador (opcional: cada mensagem cruza o protocolo e vira log)
+            if AppConfig.browser_console_logging:
+                self._page.on("console", lambda msg: logger.debug("Browser console [%s]: %s", msg.type, msg.text))
 
             logger.info("Navegador e página criados com sucesso.")
             return self._page
         except Exception as e:
-            logger.critical(f"Erro ao iniciar o navegador Playwright: {e}", exc_info=True)
+            logger.critical("Erro ao iniciar o navegador Playwright: %s", e, exc_info=True)
             # A mensagem de erro pode ser genérica agora, mas a causa raiz ainda será
             # que o navegador não foi encontrado ou não pôde ser iniciado.
             # A instrução para o usuário ainda é válida.
@@ -77,8 +91,46 @@ class BrowserManager:
                                   "Se estiver usando Chrome e tiver problemas, tente desmarcar 'Usar Navegador Chrome' para usar Firefox.") from e
         
 
+    def _on_crash(self, *_):
+        if not self._crashed:
+            logger.critical("Navegador desconectado ou página travou (crash).")
+        self._crashed = True
+
+    def is_crashed(self) -> bool:
+        """True se a página/navegador morreu (crash, desconexão ou página fechada sem close_browser)."""
+        if self._crashed:
+            return True
+        if self._browser is None or self._page is None:
+            return False
+        return self._page.is_closed() or not self._browser.is_connected()
+
+    async def relaunch_browser(self) -> Page:
+        """
+        Descarta o navegador morto (ignorando erros ao fechar) e lança outro com os mesmos parâmetros.
+        Retorna a nova página; a sessão do e-SUS precisa ser refeita (login) por quem chamou.
+        """
+        logger.warning("Reiniciando o navegador após queda...")
+        await self.close_browser()
+        self._browser = None
+        self._context = None
+        self._page = None
+        self._playwright = None
+        return await self.launch_browser(**(self._launch_options or {}))
+
+    def _detach_crash_listeners(self):
+        # Fechar o navegador de propósito também dispara 'disconnected'; isso não é uma queda
+        if self._browser:
+            try:
+                self._browser.remove_listener("disconnected", self._on_crash)
+            except Exception:
+                pass
+
     async def close_browser(self):
         """Fecha o navegador e o contexto Playwright."""
+        self._detach_crash_listeners()
+        if self._trace_recorder:
+            await self._trace_recorder.close()
+            self._trace_recorder = None
         if self._browser:
             logger.info("Fechando navegador Playwright...")
             try:
@@ -88,7 +140,7 @@ class BrowserManager:
                 self._page = None
                 logger.info("Navegador fechado.")
             except Exception as e:
-                logger.error(f"Erro ao fechar o navegador Playwright: {e}")
+                logger.error("Erro ao fechar o navegador Playwright: %s", e)
 
         if self._playwright:
             logger.info("Parando Playwright...")
@@ -97,4 +149,4 @@ class BrowserManager:
                 self._playwright = None
                 logger.info("Playwright parado.")
             except Exception as e:
-                 logger.error(f"Erro ao parar Playwright: {e}")
\ No newline at end of file
+                 logger.error("Erro ao parar Playwright: %s", e)
\ No newline at end of file
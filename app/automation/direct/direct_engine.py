@@ -0,0 +1,153 @@
+# Arquivo: app/automation/direct/direct_engine.py
+import asyncio
+import json
+import sys
+from pathlib import Path
+from playwright.async_api import Page
+from app.core.logger import logger
+from app.core.app_config import AppConfig
+from app.data.run_journal import RunJournal
+from app.automation.direct.recorder import MutationRecorder
+from app.automation.direct.template import MutationTemplate, TemplateError, learn_template
+
+
+class DirectSubmitEngine:
+    """
+    Modo de envio direto (opcional, AppConfig.direct_submit_enabled).
+
+    1. Calibração: o primeiro arquivo de uma tarefa é feito pela interface, como sempre, com o
+       MutationRecorder ligado. Ao finalizar, o modelo da mutação é aprendido a partir das linhas
+       confirmadas e salvo em resources/config/direct_templates/<Tarefa>.json (por versão do PEC).
+    2. Envio: nos arquivos seguintes, as linhas viram mutações montadas pelo modelo e são enviadas
+       em lote pelo APIRequestContext do contexto autenticado (mesmos cookies da sessão), com
+       'direct_submit_concurrency' requisições simultâneas. Cada resposta é conferida e o resultado
+       de cada linha vai para o RunJournal; o que não for aceito volta para a interface.
+    """
+    if getattr(sys, 'frozen', False):
+        BASE_DIR = Path(sys.executable).parent
+    else:
+        BASE_DIR = Path(__file__).resolve().parents[3]
+
+    TEMPLATES_DIR = BASE_DIR / "resources" / "config" / "direct_templates"
+
+    def __init__(self, page: Page, task_name: str, journal: RunJournal):
+        self._page = page
+        self._task_name = task_name
+        self._journal = journal
+        self._recorder = MutationRecorder(page)
+        self.template_file = self.TEMPLATES_DIR / f"{task_name}.json"
+        self.template: MutationTemplate = self._load_template()
+
+    @property
+    def ready(self) -> bool:
+        # A versão lida da página no login pode diferir da configurada quando o modelo foi carregado
+        return self.template is not None and self.template.pec_version == AppConfig.current_pec_version()
+
+    def _load_template(self) -> MutationTemplate | None:
+        if not self.template_file.exists():
+            return None
+        try:
+            with open(self.template_file, 'r', encoding='utf-8') as f:
+                template = MutationTemplate.from_dict(json.load(f))
+        except (json.JSONDecodeError, IOError, KeyError) as e:
+            logger.error("Erro ao carregar modelo de envio direto %s: %s. Será recalibrado.", self.template_file, e)
+            return None
+        if template.pec_version != AppConfig.current_pec_version():
+            logger.warning("Modelo de envio direto de '%s' é do PEC %s (atual: %s). Será recalibrado.", self._task_name, template.pec_version, AppConfig.current_pec_version())
+            return None
+        logger.info("Modelo de envio direto carregado para '%s' (modo '%s').", self._task_name, template.mode)
+        return template
+
+    def _save_template(self):
+        try:
+            self.TEMPLATES_DIR.mkdir(parents=True, exist_ok=True)
+            with open(self.template_file, 'w', encoding='utf-8') as f:
+                json.dump(self.template.to_dict(), f, indent=4, ensure_ascii=False)
+        except IOError as e:
+            logger.error("Erro ao salvar modelo de envio direto %s: %s", self.template_file, e)
+
+    # --- Calibração (durante um arquivo feito pela interface) ---
+
+    def start_calibration(self):
+        logger.info("Envio direto: calibrando '%s' neste arquivo (gravando as mutações da interface).", self._task_name)
+        self._recorder.start()
+
+    def finish_calibration(self, confirmed_rows: list, main_date: str):
+        """confirmed_rows: linhas (na ordem) que foram confirmadas e finalizadas pela interface."""
+        mutations = self._recorder.stop()
+        try:
+            self.template = learn_template(self._task_name, AppConfig.current_pec_version(), mutations, confirmed_rows, main_date)
+        except TemplateError as e:
+            logger.warning("Envio direto: não foi possível aprender o modelo de '%s': %s A tarefa continua pela interface.", self._task_name, e)
+            return
+        self._save_template()
+        logger.info("Envio direto: modelo de '%s' aprendido (modo '%s', %s campo(s) do CSV). "
+                    "Próximos arquivos serão enviados diretamente.", self._task_name, self.template.mode, len(self.template.bindings))
+
+    # --- Envio ---
+
+    def _batches(self, rows: list) -> list:
+        if self.template.mode == "registro":
+            return [[r] for r in rows]
+        size = max(1, AppConfig.direct_submit_batch_size)
+        return [rows[i:i + size] for i in range(0, len(rows), size)]
+
+    @staticmethod
+    def _response_error(status: int, body) -> str | None:
+        """Motivo da recusa, ou None se o servidor aceitou a mutação."""
+        if status >= 400:
+            return f"HTTP {status}"
+        if not isinstance(body, dict):
+            return "resposta não é JSON"
+        if body.get("errors"):
+            return "; ".join(str(err.get("message", err)) for err in body["errors"])
+        data = body.get("data")
+        if not data or any(value is None for value in data.values()):
+            return "resposta sem dados"
+        return None
+
+    async def _post(self, semaphore: asyncio.Semaphore, batch: list, file_name: str, main_date: str, fingerprint: str) -> int:
+        mutation = self.template.mutation
+        url = AppConfig.direct_submit_endpoint or mutation.url
+        payload = {"operationName": mutation.operation_name, "query": mutation.query,
+                   "variables": self.template.render_variables([row for _, row in batch], main_date)}
+        async with semaphore:
+            try:
+                response = await self._page.context.request.post(url, data=payload, headers=mutation.headers, timeout=30000)
+                try:
+                    body = await response.json()
+                except Exception:
+                    body = None
+                error = self._response_error(response.status, body)
+            except Exception as e:
+                error = f"falha na requisição: {e}"
+
+        status = RunJournal.STATUS_FAILED if error else RunJournal.STATUS_OK
+        for index, row in batch:
+            self._journal.record(self._task_name, file_name, index, status, mode="direto", row_data=row, detail=error,
+                                 fingerprint=fingerprint)
+        if error:
+            logger.error("Envio direto recusado para %s registro(s) de %s: %s", len(batch), file_name, error)
+            return 0
+        return len(batch)
+
+    async def submit_file(self, file_name: str, rows: list, main_date: str, fingerprint: str = None) -> int:
+        """
+        Envia as linhas [(índice, linha)] de um arquivo. Se alguma linha não couber no modelo, nada é
+        enviado e o arquivo inteiro segue pela interface. Retorna quantas linhas o servidor aceitou.
+        'fingerprint' (RunJournal.file_fingerprint) identifica o conteúdo do arquivo no diário.
+        """
+        for index, row in rows:
+            reason = self.template.check_row(row)
+            if reason:
+                logger.warning("Envio direto: registro %s de %s fora do modelo (%s). Arquivo seguirá pela interface.", index + 1, file_name, reason)
+                return 0
+
+        batches = self._batches(rows)
+        concurrency = max(1, AppConfig.direct_submit_concurrency)
+        logger.info("Envio direto: %s registro(s) de %s em %s requisição(ões), %s por vez.", len(rows), file_name, len(batches), concurrency)
+        semaphore = asyncio.Semaphore(concurrency)
+        accepted = await asyncio.gather(*(self._post(semaphore, batch, file_name, main_date, fingerprint) for batch in batches))
+        accepted = sum(accepted)
+        logger.info("Envio direto de %s: %s/%s registro(s) aceitos.", file_name, accepted, len(rows))
+        return accepted
@@ -0,0 +1,70 @@
+# Arquivo: app/automation/direct/recorder.py
+from dataclasses import dataclass
+from playwright.async_api import Page, Request
+from app.core.logger import logger
+
+
+# Cabeçalhos que não devem ser repetidos no reenvio: o APIRequestContext calcula os de transporte
+# e envia os cookies da sessão autenticada por conta própria.
+_SKIPPED_HEADERS = {"content-length", "host", "cookie", "connection", "accept-encoding", "origin", "referer"}
+
+
+@dataclass
+class RecordedMutation:
+    url: str
+    operation_name: str
+    query: str
+    variables: dict
+    headers: dict
+
+    def to_dict(self) -> dict:
+        return {"url": self.url, "operation_name": self.operation_name, "query": self.query,
+                "variables": self.variables, "headers": self.headers}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RecordedMutation":
+        return cls(data["url"], data.get("operation_name"), data["query"], data.get("variables") or {}, data.get("headers") or {})
+
+
+class MutationRecorder:
+    """
+    Grava as mutações GraphQL que a interface do PEC envia enquanto a automação preenche e
+    finaliza as fichas (é o mesmo tráfego que o navegador já faz; nada é alterado).
+    Só guarda POSTs com corpo JSON cuja query começa com 'mutation'.
+    """
+
+    def __init__(self, page: Page):
+        self._page = page
+        self._recording = False
+        self.mutations: list = []
+
+    def start(self):
+        self.mutations = []
+        if not self._recording:
+            self._page.on("request", self._on_request)
+            self._recording = True
+        logger.debug("Gravação de mutações GraphQL iniciada.")
+
+    def stop(self) -> list:
+        if self._recording:
+            self._page.remove_listener("request", self._on_request)
+            self._recording = False
+        logger.debug("Gravação de mutações GraphQL encerrada: %s mutação(ões).", len(self.mutations))
+        return list(self.mutations)
+
+    def _on_request(self, request: Request):
+        if request.method != "POST":
+            return
+        try:
+            body = request.post_data_json
+        except Exception:
+            return # Corpo não-JSON (upload, formulário)
+        if not isinstance(body, dict):
+            return # Lotes GraphQL (lista de operações) não são usados pelo PEC nas fichas
+        query = body.get("query") or ""
+        if not query.lstrip().startswith("mutation"):
+            return
+        headers = {k: v for k, v in request.headers.items() if k.lower() not in _SKIPPED_HEADERS}
+        mutation = RecordedMutation(request.url, body.get("operationName"), query, body.get("variables") or {}, headers)
+        self.mutations.append(mutation)
+        logger.debug("Mutação GraphQL gravada: %s (%s)", mutation.operation_name, request.url)
@@ -0,0 +1,294 @@
+# Arquivo: app/automation/direct/template.py
+import copy
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from app.core.logger import logger
+from app.automation.direct.recorder import RecordedMutation
+
+
+class TemplateError(ValueError):
+    """A mutação gravada não pôde ser explicada pelas linhas do CSV (ou a linha não cabe no modelo)."""
+    pass
+
+
+def _digits(value) -> str:
+    return re.sub(r"\D", "", str(value))
+
+
+def _br_date(value) -> datetime:
+    return datetime.strptime(str(value).strip(), "%d/%m/%Y")
+
+
+def _is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+# Como o valor de uma célula do CSV pode aparecer nas variáveis da mutação.
+# nome -> (confere(valor_na_mutação, célula), gera(célula))
+TRANSFORMS = {
+    "raw": (lambda leaf, cell: isinstance(leaf, str) and leaf.strip() == str(cell).strip(),
+            lambda cell: str(cell).strip()),
+    "int": (lambda leaf, cell: _is_int(leaf) and str(cell).strip().isdigit() and int(str(cell).strip()) == leaf,
+            lambda cell: int(str(cell).strip())),
+    "digits": (lambda leaf, cell: isinstance(leaf, str) and len(_digits(cell)) >= 6 and leaf == _digits(cell),
+               lambda cell: _digits(cell)),
+    "date_iso": (lambda leaf, cell: isinstance(leaf, str) and leaf == _br_date(cell).strftime("%Y-%m-%d"),
+                 lambda cell: _br_date(cell).strftime("%Y-%m-%d")),
+    "date_epoch_ms": (lambda leaf, cell: _is_int(leaf) and leaf == int(_br_date(cell).timestamp() * 1000),
+                      lambda cell: int(_br_date(cell).timestamp() * 1000)),
+}
+
+
+def _matches(transform: str, leaf, cell) -> bool:
+    if cell is None or isinstance(leaf, (dict, list)):
+        return False
+    try:
+        return TRANSFORMS[transform][0](leaf, cell)
+    except (ValueError, TypeError):
+        return False
+
+
+def _flatten(obj, path=()) -> dict:
+    """{caminho: folha} para todas as folhas de um JSON (listas e dicts vazios contam como folha)."""
+    if isinstance(obj, dict) and obj:
+        result = {}
+        for key, value in obj.items():
+            result.update(_flatten(value, path + (key,)))
+        return result
+    if isinstance(obj, list) and obj:
+        result = {}
+        for index, value in enumerate(obj):
+            result.update(_flatten(value, path + (index,)))
+        return result
+    return {path: obj}
+
+
+def _get_path(obj, path):
+    for key in path:
+        obj = obj[key]
+    return obj
+
+
+def _set_path(obj, path, value):
+    for key in path[:-1]:
+        obj = obj[key]
+    obj[path[-1]] = value
+
+
+def _find_row_lists(obj, size: int, path=()) -> list:
+    """Caminhos de listas de objetos com exatamente 'size' itens (candidatas à lista de registros do lote)."""
+    found = []
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            found += _find_row_lists(value, size, path + (key,))
+    elif isinstance(obj, list):
+        if len(obj) == size and all(isinstance(item, dict) for item in obj):
+            found.append(path)
+        for index, value in enumerate(obj):
+            found += _find_row_lists(value, size, path + (index,))
+    return found
+
+
+def _learn_bindings(items: list, rows: list, main_date: str) -> tuple:
+    """
+    Compara cada item da mutação com a linha que o gerou e descobre, para cada folha, de onde vem o valor:
+    uma coluna (com transformação), a data principal, um mapa de valores (ex: sexo 2 -> 'FEMININO')
+    ou uma constante. Levanta TemplateError se alguma folha que varia entre os registros não puder
+    ser explicada: nesse caso o envio direto não é seguro e a tarefa segue pela interface.
+    Retorna (bindings, guards); guards são as colunas que não variaram na calibração e não estão ligadas
+    a nenhum campo: o modelo não sabe como outro valor nelas mudaria a mutação (ex: turno 'Manhã' que
+    virou a constante 'MANHA'), então só linhas com o mesmo valor podem ser enviadas diretamente.
+    """
+    flats = [_flatten(item) for item in items]
+    paths = list(flats[0].keys())
+    if any(set(flat.keys()) != set(paths) for flat in flats[1:]):
+        raise TemplateError("A estrutura da mutação varia entre os registros (campos opcionais?).")
+
+    bindings, guards = [], {}
+    for path in paths:
+        values = [flat[path] for flat in flats]
+        candidates = None
+        for leaf, row in zip(values, rows):
+            matched = {(column, t) for column, cell in enumerate(row) for t in TRANSFORMS if _matches(t, leaf, cell)}
+            candidates = matched if candidates is None else candidates & matched
+        order = list(TRANSFORMS)
+        candidates = sorted(candidates, key=lambda c: (order.index(c[1]), c[0]))
+
+        date_match = next((t for t in TRANSFORMS if all(_matches(t, leaf, main_date) for leaf in values)), None)
+        if date_match:
+            bindings.append({"path": list(path), "source": "main_date", "transform": date_match})
+            continue
+
+        if all(value == values[0] for value in values):
+            continue # Constante: fica como está no esqueleto
+
+        if candidates:
+            column, transform = candidates[0]
+            bindings.append({"path": list(path), "source": "column", "column": column, "transform": transform})
+            continue
+
+        value_map = _learn_value_map(values, rows)
+        if value_map:
+            column, mapping = value_map
+            bindings.append({"path": list(path), "source": "map", "column": column, "map": mapping})
+            continue
+
+        raise TemplateError(f"O campo {'.'.join(str(p) for p in path)} varia entre os registros e não corresponde a nenhuma coluna do CSV.")
+
+    bound_columns = {b["column"] for b in bindings if "column" in b}
+    for column in range(min(len(row) for row in rows)):
+        cells = {None if row[column] is None else str(row[column]).strip() for row in rows}
+        if column not in bound_columns and len(cells) == 1:
+            guards[str(column)] = cells.pop()
+    return bindings, guards
+
+
+def _learn_value_map(values: list, rows: list):
+    """Procura uma coluna cujos valores se traduzem um-para-um nos valores da folha (a de menos valores distintos)."""
+    best = None
+    for column in range(min(len(row) for row in rows)):
+        mapping, consistent = {}, True
+        for leaf, row in zip(values, rows):
+            cell = row[column]
+            if cell is None or isinstance(leaf, (dict, list)):
+                consistent = False
+                break
+            key = str(cell).strip()
+            if mapping.setdefault(key, leaf) != leaf:
+                consistent = False
+                break
+        if not consistent or len(mapping) < 2:
+            continue
+        if len(set(map(repr, mapping.values()))) != len(mapping):
+            continue # Não é um-para-um
+        if best is None or len(mapping) < len(best[1]):
+            best = (column, mapping)
+    return best
+
+
+@dataclass
+class MutationTemplate:
+    """
+    Modelo aprendido de como uma mutação de ficha é montada a partir das linhas do CSV.
+    mode 'registro': uma mutação por linha (variáveis inteiras são o item).
+    mode 'lote': uma mutação com a lista de registros em 'items_path'.
+    """
+    task: str
+    pec_version: str
+    mode: str
+    mutation: RecordedMutation
+    item_skeleton: dict
+    bindings: list
+    items_path: list = None
+    header_bindings: list = field(default_factory=list)
+    guards: dict = field(default_factory=dict)
+
+    def check_row(self, row: list) -> str | None:
+        """Retorna o motivo pelo qual a linha não pode ser enviada por este modelo (ou None)."""
+        for column, expected in self.guards.items():
+            column = int(column)
+            cell = row[column] if column < len(row) else None
+            if (None if cell is None else str(cell).strip()) != expected:
+                return f"coluna {column} = '{cell}', mas o modelo foi aprendido com '{expected}'"
+        for binding in self.bindings:
+            if binding["source"] == "map":
+                cell = row[binding["column"]] if binding["column"] < len(row) else None
+                if cell is None or str(cell).strip() not in binding["map"]:
+                    return f"valor '{cell}' da coluna {binding['column']} não foi visto na calibração"
+            elif binding["source"] == "column":
+                cell = row[binding["column"]] if binding["column"] < len(row) else None
+                try:
+                    TRANSFORMS[binding["transform"]][1](cell)
+                except (ValueError, TypeError):
+                    return f"valor '{cell}' da coluna {binding['column']} inválido para '{binding['transform']}'"
+        return None
+
+    def _apply(self, target, bindings: list, row: list, main_date: str):
+        for binding in bindings:
+            source = binding["source"]
+            if source == "main_date":
+                value = TRANSFORMS[binding["transform"]][1](main_date)
+            elif source == "map":
+                value = binding["map"][str(row[binding["column"]]).strip()]
+            else:
+                value = TRANSFORMS[binding["transform"]][1](row[binding["column"]])
+            _set_path(target, tuple(binding["path"]), value)
+
+    def render_item(self, row: list, main_date: str) -> dict:
+        item = copy.deepcopy(self.item_skeleton)
+        self._apply(item, self.bindings, row, main_date)
+        return item
+
+    def render_variables(self, rows: list, main_date: str) -> dict:
+        """Variáveis da mutação para 'rows' (uma linha no modo 'registro'; várias no modo 'lote')."""
+        if self.mode == "registro":
+            return self.render_item(rows[0], main_date)
+        variables = copy.deepcopy(self.mutation.variables)
+        self._apply(variables, self.header_bindings, rows[0], main_date)
+        _set_path(variables, tuple(self.items_path), [self.render_item(row, main_date) for row in rows])
+        return variables
+
+    def to_dict(self) -> dict:
+        return {"task": self.task, "pec_version": self.pec_version, "mode": self.mode,
+                "mutation": self.mutation.to_dict(), "item_skeleton": self.item_skeleton,
+                "bindings": self.bindings, "items_path": self.items_path,
+                "header_bindings": self.header_bindings, "guards": self.guards}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "MutationTemplate":
+        return cls(task=data["task"], pec_version=data["pec_version"], mode=data["mode"],
+                   mutation=RecordedMutation.from_dict(data["mutation"]), item_skeleton=data["item_skeleton"],
+                   bindings=data["bindings"], items_path=data.get("items_path"),
+                   header_bindings=data.get("header_bindings", []), guards=data.get("guards", {}))
+
+
+def learn_template(task: str, pec_version: str, mutations: list, rows: list, main_date: str) -> MutationTemplate:
+    """
+    Aprende o modelo a partir das mutações gravadas durante uma execução pela interface
+    e das linhas (na mesma ordem) que as produziram. São necessárias pelo menos 2 linhas,
+    para distinguir campos que vêm do CSV de constantes da tarefa.
+    """
+    if len(rows) < 2:
+        raise TemplateError("São necessários pelo menos 2 registros na calibração.")
+    if not mutations:
+        raise TemplateError("Nenhuma mutação GraphQL foi gravada.")
+
+    # Modo 'registro': a mesma operação repetida uma vez por linha (ex: no 'Confirmar')
+    by_operation = {}
+    for mutation in mutations:
+        by_operation.setdefault(mutation.operation_name, []).append(mutation)
+    for operation, group in by_operation.items():
+        if len(group) != len(rows):
+            continue
+        try:
+            bindings, guards = _learn_bindings([m.variables for m in group], rows, main_date)
+        except TemplateError as e:
+            logger.debug("Operação '%s' não explicada como uma mutação por registro: %s", operation, e)
+            continue
+        if not any(b["source"] in ("column", "map") for b in bindings):
+            continue # Nada vem do CSV: não é a mutação da ficha
+        return MutationTemplate(task, pec_version, "registro", group[-1], copy.deepcopy(group[0].variables), bindings, guards=guards)
+
+    # Modo 'lote': uma mutação (ex: no 'Finalizar registros') com a lista de todos os registros
+    for mutation in reversed(mutations):
+        for items_path in _find_row_lists(mutation.variables, len(rows)):
+            items = _get_path(mutation.variables, items_path)
+            try:
+                bindings, guards = _learn_bindings(items, rows, main_date)
+            except TemplateError as e:
+                logger.debug("Lista %s de '%s' não explicada pelas linhas: %s", items_path, mutation.operation_name, e)
+                continue
+            if not any(b["source"] in ("column", "map") for b in bindings):
+                continue
+            header = copy.deepcopy(mutation.variables)
+            _set_path(header, items_path, [])
+            header_bindings = [
+                {"path": list(path), "source": "main_date", "transform": t}
+                for path, leaf in _flatten(header).items()
+                for t in TRANSFORMS if _matches(t, leaf, main_date)
+            ]
+            return MutationTemplate(task, pec_version, "lote", mutation, copy.deepcopy(items[0]), bindings,
+                                    items_path=list(items_path), header_bindings=header_bindings, guards=guards)
+
+    raise TemplateError("Nenhuma mutação gravada corresponde às linhas da calibração.")
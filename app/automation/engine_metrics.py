@@ -0,0 +1,218 @@
+# Arquivo: app/automation/engine_metrics.py
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from app.core.logger import logger
+from app.core.app_config import AppConfig
+
+
+def _label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class EngineMetrics:
+    """
+    Métricas do processo para monitoramento externo das estações sem operador:
+
+    - endpoint local /metrics no formato texto do Prometheus (AppConfig.metrics_port / metrics_host);
+    - arquivo .prom para o textfile collector do node_exporter (AppConfig.metrics_textfile);
+    - batimento em JSON (AppConfig.heartbeat_file), reescrito a cada linha e a cada pausa.
+
+    Linhas processadas/puladas, erros, ritmo, histograma de latência por passo, sessão pausada em
+    intervenção, idade da sessão e memória da página (última amostra do PageHealthMonitor).
+    Alimentado pelo ProgressTracker (linhas e passos), pelo AutomationErrorHandler (pausa) e pelo
+    PageHealthMonitor; pode ser lido da thread do servidor HTTP, por isso o lock.
+    """
+    if getattr(sys, 'frozen', False):
+        BASE_DIR = Path(sys.executable).parent
+    else:
+        BASE_DIR = Path(__file__).resolve().parents[2]
+
+    STEP_BUCKETS = (0.25, 0.5, 1, 2, 5, 10, 30, 60) # Segundos (o +Inf é implícito)
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows = {} # tarefa -> {"processadas", "puladas", "erros", "ritmo", "ultima_linha", "inicio", "arquivo", "status"}
+        self._steps = {} # (tarefa, passo) -> [contagens por bucket..., +Inf], soma
+        self._paused = 0
+        self._paused_since: float = None
+        self._page_health = {}
+        self._started = time.time()
+        self._httpd: ThreadingHTTPServer = None
+        textfile = AppConfig.metrics_textfile
+        self._textfile = self._resolve(textfile) if textfile else None
+        heartbeat = AppConfig.heartbeat_file
+        self._heartbeat = self._resolve(heartbeat) if heartbeat else None
+        if AppConfig.metrics_port:
+            self._start_server(AppConfig.metrics_host, AppConfig.metrics_port)
+
+    @classmethod
+    def get(cls) -> "EngineMetrics | None":
+        """Instância do processo, ou None se endpoint, textfile e batimento estiverem todos desativados."""
+        if not (AppConfig.metrics_port or AppConfig.metrics_textfile or AppConfig.heartbeat_file):
+            return None
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def _resolve(self, path: str) -> Path:
+        path = Path(path)
+        return path if path.is_absolute() else self.BASE_DIR / path
+
+    # --- Eventos ---
+
+    def session_started(self, task: str):
+        with self._lock:
+            self._rows[task] = {"processadas": 0, "puladas": 0, "erros": 0, "ritmo": 0.0, "ultima_linha": None,
+                                "inicio": time.time(), "arquivo": None, "status": "executando"}
+        self._publish()
+
+    def row_finished(self, task: str, skipped: bool, rows_per_minute: float, current_file: str = None):
+        with self._lock:
+            row = self._rows.setdefault(task, {"processadas": 0, "puladas": 0, "erros": 0, "ritmo": 0.0,
+                                               "ultima_linha": None, "inicio": time.time(), "arquivo": None, "status": "executando"})
+            row["processadas"] += 1
+            row["puladas"] += 1 if skipped else 0
+            row["ritmo"] = rows_per_minute
+            row["ultima_linha"] = time.time()
+            row["arquivo"] = current_file
+        self._publish()
+
+    def row_error(self, task: str):
+        with self._lock:
+            if task in self._rows:
+                self._rows[task]["erros"] += 1
+
+    def observe_step(self, task: str, step: str, seconds: float):
+        with self._lock:
+            entry = self._steps.get((task, step))
+            if entry is None:
+                entry = self._steps[(task, step)] = [[0] * (len(self.STEP_BUCKETS) + 1), 0.0]
+            buckets = entry[0]
+            for index, bound in enumerate(self.STEP_BUCKETS):
+                if seconds <= bound:
+                    buckets[index] += 1
+            buckets[-1] += 1
+            entry[1] += seconds
+
+    def session_finished(self, task: str, status: str):
+        with self._lock:
+            if task in self._rows:
+                self._rows[task]["status"] = status
+        self._publish()
+
+    def set_paused(self, paused: bool):
+        """Sessão parada esperando intervenção (ErrorDialog / fila de intervenções)."""
+        with self._lock:
+            self._paused = max(0, self._paused + (1 if paused else -1))
+            self._paused_since = (self._paused_since or time.time()) if self._paused else None
+        self._publish()
+
+    def set_page_health(self, sample: dict):
+        with self._lock:
+            self._page_health = dict(sample or {})
+
+    # --- Formato Prometheus ---
+
+    def render(self) -> str:
+        with self._lock:
+            now = time.time()
+            lines = [
+                "# HELP botcds_up Processo do bot em execução.", "# TYPE botcds_up gauge", "botcds_up 1",
+                "# HELP botcds_process_age_seconds Tempo desde o início do processo.", "# TYPE botcds_process_age_seconds gauge",
+                f"botcds_process_age_seconds {now - self._started:.0f}",
+                "# HELP botcds_paused Sessões paradas esperando intervenção do operador.", "# TYPE botcds_paused gauge",
+                f"botcds_paused {self._paused}",
+                "# HELP botcds_paused_seconds Há quanto tempo há sessão parada em intervenção.", "# TYPE botcds_paused_seconds gauge",
+                f"botcds_paused_seconds {now - self._paused_since if self._paused_since else 0:.0f}",
+            ]
+            series = (
+                ("botcds_rows_processed_total", "counter", "Linhas concluídas (inclui puladas).", lambda r: r["processadas"]),
+                ("botcds_rows_skipped_total", "counter", "Linhas puladas/enviadas à quarentena.", lambda r: r["puladas"]),
+                ("botcds_row_errors_total", "counter", "Erros recuperáveis durante as linhas (linha refeita).", lambda r: r["erros"]),
+                ("botcds_rows_per_minute", "gauge", "Ritmo nas últimas linhas.", lambda r: r["ritmo"]),
+                ("botcds_session_age_seconds", "gauge", "Tempo desde o início da sessão da tarefa.", lambda r: now - r["inicio"]),
+                ("botcds_last_row_timestamp_seconds", "gauge", "Instante (epoch) da última linha concluída.", lambda r: r["ultima_linha"] or 0),
+            )
+            for name, kind, help_text, getter in series:
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+                lines += [f'{name}{{tarefa="{_label(task)}"}} {getter(row):g}' for task, row in self._rows.items()]
+
+            lines += ["# HELP botcds_step_duration_seconds Duração dos passos do registro.", "# TYPE botcds_step_duration_seconds histogram"]
+            for (task, step), (buckets, total) in self._steps.items():
+                labels = f'tarefa="{_label(task)}",passo="{_label(step)}"'
+                for bound, count in zip(self.STEP_BUCKETS, buckets):
+                    lines.append(f'botcds_step_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'botcds_step_duration_seconds_bucket{{{labels},le="+Inf"}} {buckets[-1]}')
+                lines.append(f"botcds_step_duration_seconds_sum{{{labels}}} {total:.3f}")
+                lines.append(f"botcds_step_duration_seconds_count{{{labels}}} {buckets[-1]}")
+
+            if self._page_health:
+                lines += ["# HELP botcds_browser_js_heap_bytes Heap JS da página do e-SUS (última amostra).", "# TYPE botcds_browser_js_heap_bytes gauge",
+                          f"botcds_browser_js_heap_bytes {self._page_health.get('js_heap_mb', 0) * 1024 * 1024:.0f}",
+                          "# HELP botcds_browser_dom_nodes Nós no DOM da página do e-SUS (última amostra).", "# TYPE botcds_browser_dom_nodes gauge",
+                          f"botcds_browser_dom_nodes {self._page_health.get('dom_nodes', 0)}"]
+        return "\n".join(lines) + "\n"
+
+    # --- Saídas ---
+
+    def _publish(self):
+        """Reescreve o textfile e o batimento (escrita atômica: o coletor nunca lê arquivo pela metade)."""
+        if self._textfile:
+            self._write_atomic(self._textfile, self.render())
+        if self._heartbeat:
+            with self._lock:
+                heartbeat = {
+                    "timestamp": time.time(), "horario": time.strftime("%Y-%m-%d %H:%M:%S"), "pid": os.getpid(),
+                    "maquina": socket.gethostname(), "pausado": bool(self._paused),
+                    "sessoes": {task: {key: row[key] for key in ("processadas", "puladas", "erros", "ritmo", "arquivo", "status")}
+                                for task, row in self._rows.items()},
+                }
+            self._write_atomic(self._heartbeat, json.dumps(heartbeat, ensure_ascii=False, indent=2))
+
+    @staticmethod
+    def _write_atomic(path: Path, content: str):
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = path.with_name(path.name + ".tmp")
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.debug("Não foi possível gravar %s: %s", path, e)
+
+    def _start_server(self, host: str, port: int):
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass # Coletas do Prometheus não vão para o log
+
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        try:
+            self._httpd = ThreadingHTTPServer((host, port), Handler)
+        except OSError as e:
+            logger.error("Não foi possível abrir o endpoint de métricas em %s:%s: %s. Seguindo sem ele.", host, port, e)
+            return
+        self._httpd.daemon_threads = True
+        threading.Thread(target=self._httpd.serve_forever, name="metrics", daemon=True).start()
+        logger.info("Métricas disponíveis em http://%s:%s/metrics", host, port)
@@ -9,13 +9,16 @@ from datetime import datetime # Importa datetime
 from playwright._impl._errors import TargetClosedError
 import json
 from app.core.app_config import AppConfig
+from app.automation.recovery_policy import RecoveryPolicy
+from app.automation.span_tracer import traced
+from app.automation.engine_metrics import EngineMetrics
 
 
 class AutomationErrorHandler:
     """
     Gerencia erros durante a automação, permitindo pausar, continuar ou pular.
     """
-    def __init__(self, page: Page, pause_callback=None):
+    def __init__(self, page: Page, pause_callback=None, relaunch_on_crash: bool = False):
         super().__init__() # Adicionado super().__init__() para QObject base, embora aqui não seja QObject.
         self._page = page # A instância da página Playwright
         self._is_paused = False
@@ -24,6 +27,67 @@ class AutomationErrorHandler:
         self._last_error: AutomationError = None # Armazena o último erro capturado
         self._error_screenshots_dir = Path("error_screenshots") # Define um diretório para salvar screenshots de erros
         self._error_screenshots_dir.mkdir(parents=True, exist_ok=True) # Cria a pasta se não existir
+        # Recuperação automática por classe de erro (antes de pedir intervenção humana)
+        self._policy = RecoveryPolicy.load() if AppConfig.recovery_policies_enabled else None
+        self._recovery_attempts = {} # classe do erro -> tentativas no registro atual
+        self._recovery_hooks = {} # ação ('renavigate', 'refill', 'relogin') -> corrotina registrada pela tarefa
+        self.last_error_class: str = None
+        self.last_action_automatic = False # A última ação devolvida por handle_error veio da política (não de um humano)
+        self._relaunch_on_crash = relaunch_on_crash # Página/navegador morto: o Worker reinicia o navegador em vez de abortar
+
+    def register_recovery_hook(self, action: str, hook):
+        """A tarefa registra como executar 'renavigate', 'refill' e 'relogin' (o handler não conhece a navegação)."""
+        self._recovery_hooks[action] = hook
+
+    def reset_recovery_attempts(self):
+        """Zera as tentativas automáticas (chamado no início de cada registro)."""
+        self._recovery_attempts.clear()
+
+    async def _read_message_box_text(self) -> str:
+        """Texto do message-box do PEC, se estiver aberto (ajuda a distinguir duplicidade/validação)."""
+        # O PEC abre o message-box dentro do iframe da ficha ou, em alguns alertas, na página principal
+        for context in (self._page.frame_locator('iframe[title="e-sus"]'), self._page):
+            try:
+                box = context.locator('div[peid="message-box"]')
+                if await box.count() > 0:
+                    return await box.first.inner_text(timeout=1000)
+            except Exception:
+                continue
+        return ""
+
+    async def _apply_recovery_policy(self, e: Exception, step_description: str, retryable: bool):
+        """
+        Classifica o erro e aplica a ação configurada. Retorna a ação para o chamador ('retry' ou
+        'continue'), levanta SkipRecordException (quarentena) ou retorna None para escalar ao humano.
+        """
+        error_class = RecoveryPolicy.classify(e, await self._read_message_box_text(), self._page.url)
+        self.last_error_class = error_class
+        attempt = self._recovery_attempts[error_class] = self._recovery_attempts.get(error_class, 0) + 1
+        action, delay = self._policy.decide(error_class, attempt)
+        logger.info("Política de recuperação: erro '%s' em '%s' (tentativa %s) -> %s.", error_class, step_description, attempt, action)
+
+        if action == "quarantine":
+            raise SkipRecordException(f"Registro enviado à quarentena ({error_class}).", error_class=error_class, error=self._last_error)
+        if action == "escalate":
+            return None
+
+        if delay:
+            await asyncio.sleep(delay)
+        if action in ("renavigate", "refill", "relogin"):
+            hook = self._recovery_hooks.get(action)
+            if hook is None:
+                logger.debug("Nenhum gancho registrado para '%s'. Repetindo o registro.", action)
+                return "continue"
+            try:
+                await hook()
+            except (SkipRecordException, AbortAutomationException, SessionRecoveredException):
+                raise
+            except Exception as hook_error:
+                logger.error("Recuperação '%s' falhou: %s. Escalando para intervenção humana.", action, hook_error)
+                return None
+            return "continue" # O registro é refeito do início
+        # retry: repete o passo se o chamador suportar; senão o registro inteiro
+        return "retry" if retryable else "continue"
     
     def _load_user_ubs_info(self) -> dict:
         """Carrega as informações do usuário e UBS do arquivo name_UBS.json."""
@@ -33,14 +97,23 @@ class AutomationErrorHandler:
                 with open(file_path, 'r', encoding='utf-8') as f:
                     return json.load(f)
             except Exception as e:
-                logger.error(f"Erro ao carregar name_UBS.json: {e}", exc_info=True)
+                logger.error("Erro ao carregar name_UBS.json: %s", e, exc_info=True)
                 return {}
         else:
-            logger.warning(f"Arquivo name_UBS.json não encontrado em: {file_path}")
+            logger.warning("Arquivo name_UBS.json não encontrado em: %s", file_path)
             return {}
 
-    async def handle_error(self, e: Exception, step_description: str = "Passo desconhecido", data_row=None) -> str:
-        logger.error(f"Erro capturado durante o passo: '{step_description}'", exc_info=True)
+    @traced("intervencao")
+    async def handle_error(self, e: Exception, step_description: str = "Passo desconhecido", data_row=None, retryable: bool = False,
+                           automatic_recovery: bool = True) -> str:
+        """
+        Trata um erro de um passo. Primeiro tenta a política de recuperação automática; se ela escalar,
+        pausa e pede a ação ao usuário. Retorna "continue" (o registro será refeito), "retry" (apenas se
+        retryable=True: o chamador deve repetir só o passo) ou levanta Skip/Abort.
+        Com automatic_recovery=False vai direto ao usuário (o chamador precisa de uma decisão humana).
+        """
+        logger.error("Erro capturado durante o passo: '%s'", step_description, exc_info=True)
+        self.last_action_automatic = False
         screenshot_path = None
         
         # --- INÍCIO DA MODIFICAÇÃO PARA CHECAR `TargetClosedError` ---
@@ -48,7 +121,7 @@ class AutomationErrorHandler:
         # Verifique se a exceção original já é um TargetClosedError
         if isinstance(e, TargetClosedError):
             is_page_closed = True
-            logger.warning(f"Erro original é TargetClosedError. A página já está fechada.")
+            logger.warning("Erro original é TargetClosedError. A página já está fechada.")
         elif self._page and self._page.is_closed(): # Verifica se a página já está marcada como fechada
             is_page_closed = True
             logger.warning("Page.is_closed() retornou True. A página está fechada.")
@@ -59,13 +132,13 @@ class AutomationErrorHandler:
                 screenshot_filename = f"error_{timestamp}.png"
                 screenshot_path = self._error_screenshots_dir / screenshot_filename
                 await self._page.screenshot(path=screenshot_path)
-                logger.info(f"Screenshot de erro salvo em: {screenshot_path}")
+                logger.info("Screenshot de erro salvo em: %s", screenshot_path)
         except TargetClosedError as screenshot_e:
             is_page_closed = True # Confirma que foi fechado durante a tentativa de screenshot
-            logger.error(f"Não foi possível tirar screenshot de erro: Page/Context já fechado ({screenshot_e})")
+            logger.error("Não foi possível tirar screenshot de erro: Page/Context já fechado (%s)", screenshot_e)
             screenshot_path = "Não disponível (Target Closed)"
         except Exception as screenshot_e:
-            logger.error(f"Não foi possível tirar screenshot de erro: {screenshot_e}", exc_info=True)
+            logger.error("Não foi possível tirar screenshot de erro: %s", screenshot_e, exc_info=True)
             screenshot_path = "Não disponível"
         # --- FIM DA MODIFICAÇÃO PARA CHECAR `TargetClosedError` ---
 
@@ -78,19 +151,36 @@ class AutomationErrorHandler:
             screenshot_path=str(screenshot_path) if screenshot_path != "Não disponível" else None
         )
 
+        if self._policy and automatic_recovery and not is_page_closed:
+            automatic_action = await self._apply_recovery_policy(e, step_description, retryable)
+            if automatic_action is not None:
+                self.last_action_automatic = True
+                return automatic_action
+
         self._is_paused = True
         logger.warning("Automação pausada devido ao erro.")
 
         action = "abort" # Ação padrão
         # Se a página está fechada, não há como continuar, força abortar.
+        if is_page_closed and self._relaunch_on_crash:
+            self._is_paused = False
+            logger.critical("Browser/Page está fechado. Solicitando reinício do navegador ao Worker.")
+            raise BrowserCrashedException(f"Navegador fechado durante '{step_description}'.")
         if is_page_closed:
             logger.critical("Browser/Page está fechado. Forçando ABORTAR Automação, pois não é possível continuar.")
             action = "abort"
         else:
             if self._pause_callback:
                  user_info = self._load_user_ubs_info()
-                 action = await self._pause_callback(self._last_error, user_info)
-                 logger.info(f"GUI solicitou ação: {action}")
+                 metrics = EngineMetrics.get()
+                 if metrics:
+                     metrics.set_paused(True) # Monitoramento externo: sessão parada esperando o operador
+                 try:
+                     action = await self._pause_callback(self._last_error, user_info)
+                 finally:
+                     if metrics:
+                         metrics.set_paused(False)
+                 logger.info("GUI solicitou ação: %s", action)
 
         # Com base na ação do usuário, ou levantamos uma exceção de controle ou retornamos "continue"
         if action == "continue":
@@ -106,7 +196,7 @@ class AutomationErrorHandler:
             self._pause_event.set() # Sinaliza para continuar (o TaskRunner lidará com o 'abort')
             raise AbortAutomationException("Automação abortada pelo usuário.")
         else:
-            logger.error(f"Ação desconhecida recebida do callback: {action}. Abortando.")
+            logger.error("Ação desconhecida recebida do callback: %s. Abortando.", action)
             raise AbortAutomationException("Ação de controle desconhecida.")
 
     # Os métodos `resume`, `skip_record` e `abort` permanecem inalterados.
@@ -155,12 +245,29 @@ class AutomationErrorHandler:
 # Definimos exceções internas para controle de fluxo do ErrorHandler para o TaskRunner
 class SkipRecordException(Exception):
     """Exceção interna para sinalizar que o registro atual deve ser pulado."""
-    pass
+    def __init__(self, message: str = "", error_class: str = None, error: AutomationError = None):
+        super().__init__(message)
+        self.error_class = error_class # Classe do erro (política de recuperação), se houver
+        self.error = error # AutomationError com passo e screenshot, se houver
 
 class AbortAutomationException(Exception):
     """Exceção interna para sinalizar que a automação deve ser abortada."""
     pass
 
+class BrowserCrashedException(AbortAutomationException):
+    """
+    Exceção interna: a página/navegador morreu. Herda de AbortAutomationException para atravessar
+    os mesmos caminhos do abort até o Worker, que reinicia o navegador e retoma pelo diário.
+    """
+    pass
+
+class SessionRecoveredException(Exception):
+    """
+    Exceção interna: a sessão do e-SUS foi restabelecida (re-login) no meio do arquivo.
+    A ficha em construção se perdeu; a tarefa reabre o arquivo a partir do próximo registro não confirmado.
+    """
+    pass
+
 
 # Exemplo de uso (somente para teste do módulo - simula um erro e o callback da GUI)
 if __name__ == '__main__':
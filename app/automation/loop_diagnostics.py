@@ -0,0 +1,136 @@
+# Arquivo: app/automation/loop_diagnostics.py
+import asyncio
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime
+from pathlib import Path
+from app.core.logger import logger
+from app.core.app_config import AppConfig
+
+try:
+    from pyinstrument import Profiler # Opcional: perfilador por amostragem (com ele o perfil sai em HTML, com as corrotinas)
+except ImportError:
+    Profiler = None
+
+
+if getattr(sys, 'frozen', False):
+    BASE_DIR = Path(sys.executable).parent
+else:
+    BASE_DIR = Path(__file__).resolve().parents[2]
+
+PROFILE_DIR = BASE_DIR / "logs" / "perfis"
+
+
+class LoopLagMonitor:
+    """
+    Detecta callbacks que seguram o loop asyncio do Worker (leitura de CSV, json.dump, shutil.move, escrita de log...):
+    um tique reagendado a cada 'interval' mede o próprio atraso, e uma thread de vigia guarda a pilha da thread do
+    loop enquanto ele está parado. Atrasos acima de AppConfig.loop_lag_threshold_ms vão para o log com essa pilha.
+    start() e stop() são chamados na thread do loop (antes e depois do run_until_complete).
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, threshold_s: float, interval_s: float = 0.05):
+        self._loop = loop
+        self.threshold_s = threshold_s
+        self.interval_s = interval_s
+        self._loop_thread_id: int = None
+        self._handle: asyncio.TimerHandle = None
+        self._expected = 0.0 # Quando o próximo tique deveria rodar (monotonic)
+        self._stall_stack: str = None # Pilha capturada pela vigia durante o bloqueio atual
+        self._stop = threading.Event()
+        self._watcher: threading.Thread = None
+        self.stalls = 0
+        self.worst_s = 0.0
+
+    def start(self):
+        self._loop_thread_id = threading.get_ident()
+        self._schedule()
+        self._watcher = threading.Thread(target=self._watch, name="loop-lag", daemon=True)
+        self._watcher.start()
+        logger.info("Monitor de atraso do loop ativo (limite %.0f ms).", self.threshold_s * 1000)
+
+    def stop(self):
+        self._stop.set()
+        if self._handle:
+            self._handle.cancel()
+        if self._watcher:
+            self._watcher.join(timeout=1)
+        logger.info("Monitor de atraso do loop: %s bloqueio(s) acima de %.0f ms, pior %.0f ms.",
+                    self.stalls, self.threshold_s * 1000, self.worst_s * 1000)
+
+    def _schedule(self):
+        self._expected = time.monotonic() + self.interval_s
+        self._handle = self._loop.call_later(self.interval_s, self._tick)
+
+    def _tick(self):
+        lag = time.monotonic() - self._expected
+        if lag >= self.threshold_s:
+            self.stalls += 1
+            self.worst_s = max(self.worst_s, lag)
+            stack = self._stall_stack or "  (pilha não capturada: o bloqueio terminou antes da vigia olhar)\n"
+            logger.warning("Loop do Worker bloqueado por %.0f ms. Pilha durante o bloqueio:\n%s", lag * 1000, stack.rstrip())
+        self._stall_stack = None
+        if not self._stop.is_set():
+            self._schedule()
+
+    def _watch(self):
+        # Olha com metade do limite: o bloqueio é visto enquanto acontece, com a pilha de quem está segurando o loop
+        while not self._stop.wait(max(0.01, self.threshold_s / 2)):
+            if self._stall_stack is None and time.monotonic() - self._expected >= self.threshold_s / 2:
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is not None:
+                    self._stall_stack = "".join(traceback.format_stack(frame, limit=25))
+
+
+class LoopProfiler:
+    """
+    Perfil da thread do Worker durante a automação, salvo em logs/perfis ao final.
+    Com o pyinstrument instalado, é por amostragem (AppConfig.profiler_interval_ms) e gera HTML com as corrotinas;
+    sem ele, usa o cProfile da biblioteca padrão (determinístico, mais lento) e grava .prof + resumo em texto.
+    """
+
+    def __init__(self, label: str):
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        safe_label = "".join(char if char.isalnum() else "_" for char in label)
+        self._base_path = PROFILE_DIR / f"perfil_{safe_label}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        self._profiler = None
+
+    def start(self):
+        if Profiler is not None:
+            self._profiler = Profiler(interval=AppConfig.profiler_interval_ms / 1000, async_mode="enabled")
+            self._profiler.start()
+        else:
+            logger.info("pyinstrument não instalado: perfil com cProfile (determinístico). Para amostragem: pip install pyinstrument")
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        logger.info("Perfilador ativo; o perfil será salvo em %s.*", self._base_path)
+
+    def stop(self) -> Path | None:
+        """Para o perfilador e grava o resultado. Retorna o caminho do arquivo principal."""
+        if self._profiler is None:
+            return None
+        try:
+            if Profiler is not None:
+                self._profiler.stop()
+                path = self._base_path.with_suffix(".html")
+                path.write_text(self._profiler.output_html(), encoding="utf-8")
+                self._base_path.with_suffix(".txt").write_text(self._profiler.output_text(unicode=True), encoding="utf-8")
+            else:
+                self._profiler.disable()
+                path = self._base_path.with_suffix(".prof")
+                self._profiler.dump_stats(str(path))
+                summary = io.StringIO()
+                pstats.Stats(self._profiler, stream=summary).sort_stats("cumulative").print_stats(60)
+                self._base_path.with_suffix(".txt").write_text(summary.getvalue(), encoding="utf-8")
+        except Exception as e:
+            logger.error("Não foi possível gravar o perfil de desempenho: %s", e)
+            return None
+        finally:
+            self._profiler = None
+        logger.info("Perfil de desempenho salvo em %s", path)
+        return path
@@ -0,0 +1,78 @@
+# Arquivo: app/automation/page_health.py
+from playwright.async_api import Page
+from app.core.logger import logger
+from app.core.app_config import AppConfig
+from app.automation.engine_metrics import EngineMetrics
+
+
+class PageHealthMonitor:
+    """
+    Acompanha o crescimento da página do e-SUS em execuções longas (nós do DOM e heap JS).
+
+    No Chromium usa o CDP (Performance.getMetrics, que cobre o iframe do e-SUS no mesmo processo);
+    no Firefox conta os nós dentro do iframe por evaluate (o heap não está disponível lá).
+    A amostra é só leitura: quem decide reciclar a página, e quando, é a BaseTask, em um ponto
+    seguro (logo após 'Finalizar registros', sem lote aberto).
+    """
+    _ESUS_IFRAME_SELECTOR = 'iframe[title="e-sus"]'
+
+    def __init__(self, page: Page):
+        self._page = page
+        self._cdp = None
+        self._cdp_unavailable = False
+        self.last_sample: dict = {}
+        self.needs_recycle = False
+
+    async def _cdp_metrics(self) -> dict | None:
+        if self._cdp_unavailable:
+            return None
+        try:
+            if self._cdp is None:
+                self._cdp = await self._page.context.new_cdp_session(self._page)
+                await self._cdp.send("Performance.enable")
+            result = await self._cdp.send("Performance.getMetrics")
+            metrics = {m["name"]: m["value"] for m in result.get("metrics", [])}
+            return {"dom_nodes": int(metrics.get("Nodes", 0)), "js_heap_mb": metrics.get("JSHeapUsedSize", 0) / (1024 * 1024)}
+        except Exception as e:
+            # Firefox (ou CDP indisponível): usa o evaluate daqui em diante
+            logger.debug("Métricas CDP indisponíveis (%s). Usando contagem de nós no iframe.", e)
+            self._cdp_unavailable = True
+            self._cdp = None
+            return None
+
+    async def _frame_metrics(self) -> dict | None:
+        try:
+            handle = await self._page.locator(self._ESUS_IFRAME_SELECTOR).element_handle(timeout=2000)
+            frame = await handle.content_frame() if handle else None
+            target = frame or self._page.main_frame
+            return await target.evaluate(
+                "() => ({dom_nodes: document.getElementsByTagName('*').length,"
+                " js_heap_mb: (performance.memory ? performance.memory.usedJSHeapSize : 0) / 1048576})")
+        except Exception as e:
+            logger.debug("Não foi possível amostrar o iframe do e-SUS: %s", e)
+            return None
+
+    async def sample(self) -> dict:
+        """Lê as métricas atuais, atualiza 'needs_recycle' e retorna {'dom_nodes', 'js_heap_mb'} (vazio se falhar)."""
+        metrics = await self._cdp_metrics() or await self._frame_metrics() or {}
+        self.last_sample = metrics
+        if not metrics:
+            return metrics
+        engine_metrics = EngineMetrics.get()
+        if engine_metrics:
+            engine_metrics.set_page_health(metrics)
+        dom_limit = AppConfig.page_recycle_dom_nodes
+        heap_limit = AppConfig.page_recycle_heap_mb
+        over_dom = bool(dom_limit) and metrics["dom_nodes"] >= dom_limit
+        over_heap = bool(heap_limit) and metrics["js_heap_mb"] >= heap_limit
+        logger.debug("Saúde da página: %s nós no DOM, %.0f MB de heap JS.", metrics['dom_nodes'], metrics['js_heap_mb'])
+        if (over_dom or over_heap) and not self.needs_recycle:
+            logger.warning("Página do e-SUS acima do limite (%s nós / %.0f MB). Será recarregada no próximo ponto seguro.",
+                           metrics['dom_nodes'], metrics['js_heap_mb'])
+        self.needs_recycle = self.needs_recycle or over_dom or over_heap
+        return metrics
+
+    def reset(self):
+        """Chamado depois que a página foi recarregada."""
+        self.needs_recycle = False
+        self._cdp = None # A sessão CDP não sobrevive de forma confiável a um reload; recria na próxima amostra
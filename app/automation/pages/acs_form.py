@@ -38,7 +38,7 @@ class AcsForm(BasePage):
         """
         Localiza o contêiner de Microárea pelo peid e preenche o campo de input interno.
         """
-        logger.info(f"Preenchendo Microárea com: {micro_area_value}")
+        logger.info("Preenchendo Microárea com: %s", micro_area_value)
         try:
             # Localiza o contêiner e, a partir dele, o campo de input
             container_locator = iframe_frame.locator(self._MICRO_AREA_CONTAINER_SELECTOR)
@@ -48,7 +48,7 @@ class AcsForm(BasePage):
             await self._safe_fill(input_locator, micro_area_value, "Campo Microárea")
 
         except Exception as e:
-            logger.error(f"Erro ao preencher o campo de Microárea: {e}", exc_info=True)
+            logger.error("Erro ao preencher o campo de Microárea: %s", e, exc_info=True)
             # O _safe_fill já chama o handler, mas podemos adicionar um contexto extra se quisermos
             raise AutomationError(f"Falha ao preencher Microárea com valor '{micro_area_value}'.") from e
 
@@ -58,7 +58,7 @@ class AcsForm(BasePage):
         com as teclas de seta e Enter.
         """
         full_suggestion_text = f"{imovel_code} - {imovel_description.upper()}"
-        logger.info(f"Selecionando Tipo de Imóvel: {full_suggestion_text}")
+        logger.info("Selecionando Tipo de Imóvel: %s", full_suggestion_text)
         
         try:
             # 1. Localiza o contêiner e o campo de input
@@ -72,7 +72,7 @@ class AcsForm(BasePage):
             # A lista de sugestões geralmente aparece no contexto da página principal, não do iframe
             suggestion_locator = iframe_frame.locator(self._SUGGESTION_ITEM_SELECTOR_TEMPLATE.format(full_suggestion_text)).last
             await suggestion_locator.wait_for(state="visible", timeout=7000)
-            logger.debug(f"Sugestão '{full_suggestion_text}' visível. Selecionando...")
+            logger.debug("Sugestão '%s' visível. Selecionando...", full_suggestion_text)
 
             await self._safe_click(suggestion_locator, f"Sugestão Tipo de Imóvel: {full_suggestion_text}")
 
@@ -83,10 +83,10 @@ class AcsForm(BasePage):
             # await asyncio.sleep(1) # Pausa para garantir que o valor foi processado
 
         except TimeoutError:
-            logger.error(f"Timeout: A sugestão '{full_suggestion_text}' não apareceu após digitar '{imovel_code}'.")
+            logger.error("Timeout: A sugestão '%s' não apareceu após digitar '%s'.", full_suggestion_text, imovel_code)
             raise AutomationError(f"Timeout ao buscar a sugestão para o tipo de imóvel '{full_suggestion_text}'.")
         except Exception as e:
-            logger.error(f"Erro ao selecionar o Tipo de Imóvel: {e}", exc_info=True)
+            logger.error("Erro ao selecionar o Tipo de Imóvel: %s", e, exc_info=True)
             raise AutomationError(f"Falha ao selecionar o tipo de imóvel '{full_suggestion_text}'.") from e
         
     async def select_motivo_visita_periodica(self, iframe_frame: Locator):
@@ -96,7 +96,7 @@ class AcsForm(BasePage):
             label_locator = iframe_frame.locator(self._VISITA_PERIODICA_LABEL_SELECTOR)
             await self._safe_click(label_locator, "Checkbox Motivo da Visita: Visita periódica")
         except Exception as e:
-            logger.error(f"Erro ao selecionar 'Visita periódica': {e}", exc_info=True)
+            logger.error("Erro ao selecionar 'Visita periódica': %s", e, exc_info=True)
             raise AutomationError("Falha ao selecionar o motivo da visita 'Visita periódica'.") from e
 
     async def select_acompanhamento_hipertensao(self, iframe_frame: Locator):
@@ -106,7 +106,7 @@ class AcsForm(BasePage):
             label_locator = iframe_frame.locator(self._PESSOA_HIPERTENSAO_LABEL_SELECTOR)
             await self._safe_click(label_locator, "Checkbox Acompanhamento: Pessoa com hipertensão")
         except Exception as e:
-            logger.error(f"Erro ao selecionar 'Pessoa com hipertensão': {e}", exc_info=True)
+            logger.error("Erro ao selecionar 'Pessoa com hipertensão': %s", e, exc_info=True)
             raise AutomationError("Falha ao selecionar o acompanhamento 'Pessoa com hipertensão'.") from e
         
     async def select_desfecho_visita_realizada(self, iframe_frame: Locator):
@@ -117,17 +117,46 @@ class AcsForm(BasePage):
             label_locator = container_locator.locator(self._VISITA_REALIZADA_LABEL_SELECTOR)
             await self._safe_click(label_locator, "Checkbox Desfecho: Visita realizada")
         except Exception as e:
-            logger.error(f"Erro ao selecionar 'Visita realizada': {e}", exc_info=True)
+            logger.error("Erro ao selecionar 'Visita realizada': %s", e, exc_info=True)
             raise AutomationError("Falha ao selecionar o desfecho 'Visita realizada'.") from e
         
+    async def select_checkboxes_visita_hipertensao(self, iframe_frame: Locator):
+        """
+        Marca 'Visita periódica', 'Pessoa com hipertensão' e o desfecho 'Visita realizada'
+        em uma única chamada ao navegador (ActionBatch), em vez de três cliques separados.
+        Antes do lote espera o label do desfecho (o último da ficha) ficar visível; se o lote não
+        encontrar todos os labels, os que faltaram são marcados com os cliques individuais (_safe_click).
+        """
+        logger.info("Marcando checkboxes da visita (periódica / hipertensão / realizada) em lote.")
+        desfecho_label = iframe_frame.locator(self._DESFECHO_CONTAINER_SELECTOR).locator(self._VISITA_REALIZADA_LABEL_SELECTOR).first
+        await self._safe_wait_for_locator(desfecho_label, state="visible", timeout=10000,
+                                          step_description="Label 'Visita realizada' (seção Desfecho) renderizado")
+
+        batch = self._new_batch(iframe_frame.locator("body"), "Checkboxes Visita Domiciliar - Hipertensão")
+        batch.check("label", text="Visita periódica")
+        batch.check("label", text="Pessoa com hipertensão")
+        batch.check(f'{self._DESFECHO_CONTAINER_SELECTOR} label', text="Visita realizada")
+        fallbacks = [self.select_motivo_visita_periodica, self.select_acompanhamento_hipertensao, self.select_desfecho_visita_realizada]
+        try:
+            self._roundtrips.hit("batch")
+            done = await batch.flush(raise_on_failure=False)
+        except Exception as e:
+            logger.warning("Lote de checkboxes da visita falhou (%s). Marcando um a um.", e)
+            done = []
+        if len(done) < len(fallbacks):
+            logger.warning("Lote de checkboxes da visita marcou %s/%s. Marcando os restantes um a um.", len(done), len(fallbacks))
+            for select in fallbacks[len(done):]:
+                await select(iframe_frame)
+
     async def click_confirm_button_acs(self, iframe_frame: Locator):
          """Clica no botão 'Confirmar' da ficha de Atendimento Individual."""
          # Seletor para o botão Confirmar dentro do contêiner específico
          confirm_button_locator = iframe_frame.locator(self._CONFIRM_BUTTON_FICHA_SELECTOR) # Usa o novo seletor
+         grid_rows_before = await self._count_lot_grid_rows(iframe_frame)
          logger.info("Clicando no botão 'Confirmar' do Atendimento.")
          await self._safe_click(confirm_button_locator, step_description="Botão 'Confirmar' Atendimento")
-         # Pode ser necessário esperar por alguma validação ou carregamento após confirmar
-         await asyncio.sleep(1) # Pequena pausa
+         # Retorna assim que o formulário fecha (registro aceito); message-box do PEC vira erro classificado
+         await self._wait_for_commit(iframe_frame, confirm_button_locator, "Confirmar Visita Domiciliar", grid_rows_before)
 
     async def select_gender_acs(self, iframe_frame: Locator, gender_value: int):
         """
@@ -137,10 +166,10 @@ class AcsForm(BasePage):
         gender_text = gender_map.get(gender_value)
 
         if not gender_text:
-            logger.warning(f"Valor de gênero desconhecido: {gender_value}. Pulando seleção.")
+            logger.warning("Valor de gênero desconhecido: %s. Pulando seleção.", gender_value)
             return
 
-        logger.info(f"Selecionando gênero (ACS): {gender_text}")
+        logger.info("Selecionando gênero (ACS): %s", gender_text)
         
         try:
             # 1. Localiza o campo de input para "Sexo"
@@ -160,8 +189,8 @@ class AcsForm(BasePage):
             await asyncio.sleep(1) # Pausa para garantir que o valor foi processado
 
         except TimeoutError:
-            logger.error(f"Timeout: A sugestão '{gender_text}' não apareceu após a digitação.")
+            logger.error("Timeout: A sugestão '%s' não apareceu após a digitação.", gender_text)
             raise AutomationError(f"Timeout ao buscar a sugestão para o gênero '{gender_text}'.")
         except Exception as e:
-            logger.error(f"Erro ao selecionar o gênero '{gender_text}': {e}", exc_info=True)
+            logger.error("Erro ao selecionar o gênero '%s': %s", gender_text, e, exc_info=True)
             raise AutomationError(f"Falha ao selecionar o gênero '{gender_text}'.") from e
\ No newline at end of file
@@ -0,0 +1,107 @@
+# Arquivo: app/automation/pages/action_batch.py
+from playwright.async_api import Locator
+from app.core.logger import logger
+
+
+class ActionBatch:
+    """
+    Fila de ações que são executadas no navegador em UMA única chamada (um round trip),
+    via `locator.evaluate`. Útil para sequências de cliques/preenchimentos em elementos que
+    já estão renderizados (ex: marcar vários checkboxes de uma mesma seção da ficha).
+
+    Limitações:
+      - Os seletores são resolvidos pelo próprio navegador: apenas CSS e XPath ('//' ou 'xpath=').
+        Pseudo-seletores do Playwright (ex: ':has-text') NÃO funcionam; use o parâmetro 'text'
+        (comparado sem diferenciar maiúsculas/minúsculas).
+      - Não há espera de acionabilidade: quem monta o lote espera a seção renderizar antes. Só elementos
+        visíveis contam, e um checkbox desabilitado não é clicado; se um elemento não for encontrado, o
+        lote para nele e a falha é reportada (ou devolvida com flush(raise_on_failure=False) para o
+        chamador completar as ações restantes com os _safe_ da BasePage).
+    """
+
+    _BATCH_SCRIPT = """
+    (root, actions) => {
+        const doc = root.ownerDocument || root;
+        const visible = (n) => !!(n.offsetWidth || n.offsetHeight || n.getClientRects().length);
+        const find = (a) => {
+            let nodes = [];
+            if (a.selector.startsWith('//') || a.selector.startsWith('xpath=')) {
+                const xp = a.selector.replace(/^xpath=/, '');
+                const snap = doc.evaluate(xp, doc, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+                for (let i = 0; i < snap.snapshotLength; i++) nodes.push(snap.snapshotItem(i));
+            } else {
+                nodes = Array.from(root.querySelectorAll(a.selector));
+            }
+            nodes = nodes.filter(visible);
+            if (a.text) nodes = nodes.filter(n => (n.textContent || '').toLowerCase().includes(a.text.toLowerCase()));
+            return a.last ? nodes[nodes.length - 1] : nodes[0];
+        };
+        const results = [];
+        for (const a of actions) {
+            const el = find(a);
+            if (!el) {
+                results.push({ok: false, error: `Elemento não encontrado: ${a.selector} ${a.text || ''}`});
+                break;
+            }
+            const control = el.matches('input') ? el : (el.control || el.querySelector('input'));
+            if (control && control.disabled) {
+                results.push({ok: false, error: `Elemento desabilitado: ${a.selector} ${a.text || ''}`});
+                break;
+            }
+            el.scrollIntoView({block: 'center'});
+            if (a.op === 'click') {
+                el.click();
+            } else if (a.op === 'check') {
+                if (!control || !control.checked) el.click();
+            } else if (a.op === 'fill') {
+                el.focus();
+                el.value = a.value;
+                el.dispatchEvent(new Event('input', {bubbles: true}));
+                el.dispatchEvent(new Event('change', {bubbles: true}));
+            }
+            results.push({ok: true});
+        }
+        return results;
+    }
+    """
+
+    def __init__(self, root: Locator, description: str = "Lote de ações"):
+        self._root = root # Normalmente o <body> do iframe do e-SUS
+        self._actions = []
+        self.description = description
+
+    def click(self, selector: str, text: str = None, last: bool = False) -> "ActionBatch":
+        self._actions.append({"op": "click", "selector": selector, "text": text, "last": last})
+        return self
+
+    def check(self, selector: str, text: str = None) -> "ActionBatch":
+        """Clica apenas se o checkbox ainda não estiver marcado."""
+        self._actions.append({"op": "check", "selector": selector, "text": text, "last": False})
+        return self
+
+    def fill(self, selector: str, value: str) -> "ActionBatch":
+        self._actions.append({"op": "fill", "selector": selector, "value": value, "text": None, "last": False})
+        return self
+
+    def __len__(self):
+        return len(self._actions)
+
+    async def flush(self, raise_on_failure: bool = True) -> list:
+        """
+        Executa todas as ações enfileiradas em uma única chamada ao navegador.
+        Retorna a lista de resultados ({'ok': bool, 'error': str}) e esvazia a fila.
+        Levanta RuntimeError se alguma ação falhar; com raise_on_failure=False, retorna só os
+        resultados das ações concluídas (as seguintes não foram executadas).
+        """
+        actions, self._actions = self._actions, []
+        if not actions:
+            return []
+        logger.debug("Executando lote '%s' com %s ações em uma única chamada.", self.description, len(actions))
+        results = await self._root.evaluate(self._BATCH_SCRIPT, actions)
+        failures = [r for r in results if not r.get("ok")]
+        if not raise_on_failure:
+            return [r for r in results if r.get("ok")]
+        if failures or len(results) < len(actions):
+            error = failures[0].get("error") if failures else "Lote interrompido"
+            raise RuntimeError(f"Lote '{self.description}' falhou após {len(results) - len(failures)} ações: {error}")
+        return results
@@ -80,36 +80,36 @@ class AtendimentoForm(BasePage):
 
     async def select_tipo_atendimento(self, iframe_frame: Locator, tipo_atendimento: str):
         """Seleciona o Tipo de Atendimento (Inicial, Consulta de Retorno, etc.) clicando no label associado."""
-        logger.info(f"Selecionando Tipo de Atendimento: {tipo_atendimento}")
+        logger.info("Selecionando Tipo de Atendimento: %s", tipo_atendimento)
 
         # ** CORREÇÃO: Use a Opção 1 (label:has-text) - FINALMENTE! **
         try:
             label_selector = self._TIPO_ATENDIMENTO_LABEL_SELECTOR_TEMPLATE.format(tipo_atendimento)
-            label_locator = iframe_frame.locator(label_selector)
-            logger.debug(f"Tentando clicar no label para Tipo de Atendimento: {tipo_atendimento} (Selector: {label_locator.locator})")
+            label_locator = await self._cached_locator(iframe_frame, f"tipo_atendimento:{tipo_atendimento}", label_selector)
+            logger.debug("Tentando clicar no label para Tipo de Atendimento: %s (Selector: %s)", tipo_atendimento, label_locator.locator)
             await self._safe_click(label_locator, step_description=f"Label Rádio Tipo Atendimento: {tipo_atendimento}")
-            logger.debug(f"Label para Tipo de Atendimento '{tipo_atendimento}' clicado com sucesso.")
+            logger.debug("Label para Tipo de Atendimento '%s' clicado com sucesso.", tipo_atendimento)
 
         except Exception as e:
             # Se chegamos aqui, significa que _safe_click falhou.
             # _safe_click já chamou o handler e re-levantou.
             # Capturamos E re-levantamos como AutomationError.
-            logger.error(f"Erro ao selecionar Tipo de Atendimento '{tipo_atendimento}': {e}")
+            logger.error("Erro ao selecionar Tipo de Atendimento '%s': %s", tipo_atendimento, e)
             raise AutomationError(f"Falha ao selecionar Tipo de Atendimento '{tipo_atendimento}' no iframe.") from e
     
     async def select_tipo_atendimento_fixo(self, iframe_frame: Locator, tipo_atendimento: str):
         """Seleciona o Tipo de Atendimento clicando no label com o texto exato."""
-        logger.info(f"Selecionando Tipo de Atendimento: {tipo_atendimento}")
+        logger.info("Selecionando Tipo de Atendimento: %s", tipo_atendimento)
 
         try:
             label_locator = iframe_frame.get_by_text(tipo_atendimento, exact=True)
 
-            logger.debug(f"Tentando clicar no label exato para Tipo de Atendimento: {tipo_atendimento}")
+            logger.debug("Tentando clicar no label exato para Tipo de Atendimento: %s", tipo_atendimento)
             await self._safe_click(label_locator, step_description=f"Label Rádio Tipo Atendimento: {tipo_atendimento}")
-            logger.debug(f"Label para Tipo de Atendimento '{tipo_atendimento}' clicado com sucesso.")
+            logger.debug("Label para Tipo de Atendimento '%s' clicado com sucesso.", tipo_atendimento)
 
         except Exception as e:
-            logger.error(f"Erro ao selecionar Tipo de Atendimento '{tipo_atendimento}': {e}", exc_info=True)
+            logger.error("Erro ao selecionar Tipo de Atendimento '%s': %s", tipo_atendimento, e, exc_info=True)
             raise AutomationError(f"Falha ao selecionar Tipo de Atendimento '{tipo_atendimento}' no iframe.") from e
 
     async def select_condicao_avaliada(self, iframe_frame: Locator, condicao: str):
@@ -117,17 +117,25 @@ class AtendimentoForm(BasePage):
         Seleciona uma Condição Avaliada (checkbox).
         Busca por todos os labels na área relevante, normaliza o texto e compara com o valor do CSV normalizado.
         """
-        logger.info(f"Selecionando Condição Avaliada: {condicao}")
+        logger.info("Selecionando Condição Avaliada: %s", condicao)
 
         if not isinstance(condicao, str) or not condicao:
-             logger.warning(f"Valor inválido ou vazio para Condição Avaliada: '{condicao}'. Pulando seleção.")
+             logger.warning("Valor inválido ou vazio para Condição Avaliada: '%s'. Pulando seleção.", condicao)
              return
 
         # ** NORMALIZA O TEXTO BUSCADO DO CSV PARA COMPARAÇÃO **
         condicao_normalized = normalize_text_for_selection(condicao)
-        logger.debug(f"Condição Avaliada normalizada do CSV: '{condicao_normalized}'")
+        logger.debug("Condição Avaliada normalizada do CSV: '%s'", condicao_normalized)
 
 
+        # Se o label desta condição já foi encontrado nesta ficha, clica direto, sem varrer os labels.
+        cache_key = f"condicao_avaliada:{condicao_normalized}"
+        cached_label_locator = self._selector_cache.get(iframe_frame, cache_key)
+        if cached_label_locator is not None:
+            logger.debug("Label da Condição Avaliada '%s' obtido do cache de seletores.", condicao)
+            await self._safe_click(cached_label_locator, step_description=f"Label Checkbox Condição Avaliada: {condicao}")
+            return
+
         try:
             # 1. Encontrar o contêiner da área de Condições Avaliadas (para limitar a busca)
             condition_container_locator = iframe_frame.locator(self._CONDICAO_AVALIADA_CONTAINER_SELECTOR)
@@ -140,7 +148,7 @@ class AtendimentoForm(BasePage):
 
             found_and_clicked = False
             if labels_count > 0:
-                 logger.debug(f"Encontrados {labels_count} labels na área de Condição Avaliada. Comparando textos...")
+                 logger.debug("Encontrados %s labels na área de Condição Avaliada. Comparando textos...", labels_count)
                  for i in range(labels_count):
                      label_locator = all_labels_locator.nth(i) # Pega o i-ésimo label
                      try:
@@ -148,30 +156,31 @@ class AtendimentoForm(BasePage):
                          # ** NORMALIZA O TEXTO DO ITEM DA LISTA PARA COMPARAÇÃO **
                          label_text_normalized = normalize_text_for_selection(label_text)
 
-                         logger.debug(f"  Comparando label '{label_text}' (Normalizado: '{label_text_normalized}') com '{condicao_normalized}'...")
+                         logger.debug("  Comparando label '%s' (Normalizado: '%s') com '%s'...", label_text, label_text_normalized, condicao_normalized)
 
                          if label_text_normalized == condicao_normalized:
-                             logger.info(f"Label '{label_text}' encontrado para Condição Avaliada: '{condicao}'. Clicando.")
+                             logger.info("Label '%s' encontrado para Condição Avaliada: '%s'. Clicando.", label_text, condicao)
+                             label_locator = await self._selector_cache.remember(iframe_frame, cache_key, label_locator)
                              await self._safe_click(label_locator, step_description=f"Label Checkbox Condição Avaliada: {label_text}")
-                             logger.debug(f"Label para Condição Avaliada '{label_text}' clicado com sucesso.")
+                             logger.debug("Label para Condição Avaliada '%s' clicado com sucesso.", label_text)
                              found_and_clicked = True
                              break # Sai do loop for
 
                      except Exception as e:
-                         logger.warning(f"Erro ao processar label {i}: {e}. Ignorando este label.")
+                         logger.warning("Erro ao processar label %s: %s. Ignorando este label.", i, e)
                          # Continua para o próximo label no loop
 
             if not found_and_clicked:
-                logger.warning(f"Não foi possível encontrar e clicar no label para Condição Avaliada: '{condicao}' (Normalizado: '{condicao_normalized}').")
+                logger.warning("Não foi possível encontrar e clicar no label para Condição Avaliada: '%s' (Normalizado: '%s').", condicao, condicao_normalized)
                 raise AutomationError(f"Condição Avaliada '{condicao}' não encontrada na lista.")
 
 
         except (AutomationError, SkipRecordException, AbortAutomationException) as e:
-            logger.debug(f"Propagando exceção de controle/automação de select_condicao_avaliada: {e}")
+            logger.debug("Propagando exceção de controle/automação de select_condicao_avaliada: %s", e)
             raise e
         except Exception as e:
             # Este é um erro verdadeiramente inesperado que nenhuma das chamadas _safe_X ou blocos internos trataram.
-            logger.critical(f"Erro inesperado durante seleção da Condição Avaliada '{condicao}': {e}", exc_info=True)
+            logger.critical("Erro inesperado durante seleção da Condição Avaliada '%s': %s", condicao, e, exc_info=True)
             # Ainda chama o handler para feedback ao usuário
             user_action = await self._handler.handle_error(e, step_description=f"Erro inesperado na seleção de Condição Avaliada '{condicao}'")
             if user_action == "continue":
@@ -184,7 +193,7 @@ class AtendimentoForm(BasePage):
 
     async def fill_ciap(self, iframe_frame: Locator, ciap_code: str):
         """Preenche o campo CIAP2 - 01 e seleciona o código."""
-        logger.info(f"Preenchendo campo 'CIAP2 - 01' com: {ciap_code}")
+        logger.info("Preenchendo campo 'CIAP2 - 01' com: %s", ciap_code)
         ciap_field_locator = iframe_frame.locator(self._CIAP_01_FIELD_XPATH)
         await self._safe_fill(ciap_field_locator, ciap_code, step_description="Campo CIAP2 - 01")
         await asyncio.sleep(2) # Espera para a lista de busca aparecer
@@ -227,10 +236,10 @@ class AtendimentoForm(BasePage):
         Seleciona um checkbox "S" específico (pela posição) dentro da seção de exames.
         O 'exame_text' é usado para logar qual exame estamos marcando o "S" para.
         """
-        logger.info(f"Selecionando o {s_checkbox_position}º checkbox 'S' para o exame: {exame_text}.")
+        logger.info("Selecionando o %sº checkbox 'S' para o exame: %s.", s_checkbox_position, exame_text)
 
         if not isinstance(exame_text, str) or not exame_text:
-             logger.warning(f"Valor inválido ou vazio para Exame: '{exame_text}'. Pulando seleção.")
+             logger.warning("Valor inválido ou vazio para Exame: '%s'. Pulando seleção.", exame_text)
              # Não levanta erro fatal aqui, apenas warning. A tarefa Diabético continua.
              return
 
@@ -246,23 +255,23 @@ class AtendimentoForm(BasePage):
             s_labels_count = await all_s_labels_locator.count()
 
             if s_labels_count == 0:
-                 logger.warning(f"Nenhum label 'S' encontrado na seção de Exames. Não é possível selecionar o {s_checkbox_position}º 'S'.")
+                 logger.warning("Nenhum label 'S' encontrado na seção de Exames. Não é possível selecionar o %sº 'S'.", s_checkbox_position)
                  raise AutomationError(f"Nenhum checkbox 'S' encontrado na seção de Exames.")
 
             if s_checkbox_position <= 0 or s_checkbox_position > s_labels_count:
-                 logger.warning(f"Posição {s_checkbox_position} para checkbox 'S' está fora do range (1 a {s_labels_count}). Não é possível selecionar.")
+                 logger.warning("Posição %s para checkbox 'S' está fora do range (1 a %s). Não é possível selecionar.", s_checkbox_position, s_labels_count)
                  raise AutomationError(f"Posição {s_checkbox_position} para checkbox 'S' é inválida.")
 
             # 3. Clicar no N-ésimo label "S"
             target_s_label_locator = all_s_labels_locator.nth(s_checkbox_position - 1) # nth é 0-indexed
             
             await self._safe_click(target_s_label_locator, step_description=f"Checkbox 'S' na posição {s_checkbox_position} para Exame: {exame_text}")
-            logger.debug(f"Checkbox 'S' na posição {s_checkbox_position} clicado com sucesso para Exame '{exame_text}'.")
+            logger.debug("Checkbox 'S' na posição %s clicado com sucesso para Exame '%s'.", s_checkbox_position, exame_text)
             await asyncio.sleep(1) # Pausa após clicar no S
 
 
         except Exception as e:
-            logger.error(f"Erro durante seleção do {s_checkbox_position}º checkbox 'S' para o exame '{exame_text}': {e}", exc_info=True)
+            logger.error("Erro durante seleção do %sº checkbox 'S' para o exame '%s': %s", s_checkbox_position, exame_text, e, exc_info=True)
             raise AutomationError(f"Falha ao selecionar {s_checkbox_position}º checkbox 'S' para Exame '{exame_text}' no iframe.") from e
 
 
@@ -287,7 +296,7 @@ class AtendimentoForm(BasePage):
         Seleciona a Conduta fixa "Retorno para consulta agendada".
         """
         fixed_conduta_text = "Retorno para consulta agendada"
-        logger.info(f"Selecionando Conduta FIXA: {fixed_conduta_text}")
+        logger.info("Selecionando Conduta FIXA: %s", fixed_conduta_text)
 
         # ** OPCIONAL: Se quiser que o parâmetro 'conduta' ainda seja verificado ou logado **
         # logger.debug(f"Conduta recebida do CSV (ignorada): '{conduta}'")
@@ -296,23 +305,24 @@ class AtendimentoForm(BasePage):
 
         try:
             # ** 1. BUSCAR E CLICAR NO LABEL DA CONDUTA FIXA **
-            label_locator = iframe_frame.locator(self._CONDUTA_FIXA_LABEL_SELECTOR)
-            logger.debug(f"Tentando clicar no label para Conduta FIXA: {fixed_conduta_text} (Selector: {label_locator.locator})")
+            label_locator = await self._cached_locator(iframe_frame, "conduta_fixa", self._CONDUTA_FIXA_LABEL_SELECTOR)
+            logger.debug("Tentando clicar no label para Conduta FIXA: %s (Selector: %s)", fixed_conduta_text, label_locator.locator)
             await self._safe_click(label_locator, step_description=f"Checkbox Conduta: {fixed_conduta_text}")
-            logger.debug(f"Label para Conduta FIXA '{fixed_conduta_text}' clicado com sucesso.")
+            logger.debug("Label para Conduta FIXA '%s' clicado com sucesso.", fixed_conduta_text)
 
         except Exception as e:
-            logger.error(f"Erro ao selecionar Conduta FIXA '{fixed_conduta_text}': {e}", exc_info=True)
+            logger.error("Erro ao selecionar Conduta FIXA '%s': %s", fixed_conduta_text, e, exc_info=True)
             raise AutomationError(f"Falha ao selecionar Conduta FIXA '{fixed_conduta_text}' no iframe.") from e
 
     async def click_confirm_button(self, iframe_frame: Locator):
          """Clica no botão 'Confirmar' da ficha de Atendimento Individual."""
          # Seletor para o botão Confirmar dentro do contêiner específico
-         confirm_button_locator = iframe_frame.locator(self._CONFIRM_BUTTON_FICHA_SELECTOR) # Usa o novo seletor
+         confirm_button_locator = await self._cached_locator(iframe_frame, "confirmar_atendimento", self._CONFIRM_BUTTON_FICHA_SELECTOR)
+         grid_rows_before = await self._count_lot_grid_rows(iframe_frame)
          logger.info("Clicando no botão 'Confirmar' do Atendimento.")
          await self._safe_click(confirm_button_locator, step_description="Botão 'Confirmar' Atendimento")
-         # Pode ser necessário esperar por alguma validação ou carregamento após confirmar
-         await asyncio.sleep(1) # Pequena pausa
+         # Retorna assim que o formulário fecha (registro aceito); message-box do PEC vira erro classificado
+         await self._wait_for_commit(iframe_frame, confirm_button_locator, "Confirmar Atendimento", grid_rows_before)
 
 
     # --- NOVA FUNÇÃO COMPLETA PARA O BLOCO SIGTAP ---
@@ -323,10 +333,10 @@ class AtendimentoForm(BasePage):
         2. Marca o status "S".
         3. Clica no botão "Confirmar" do bloco.
         """
-        logger.info(f"Preenchendo bloco 'Outros exames' com SIGTAP: {sigtap_code}")
+        logger.info("Preenchendo bloco 'Outros exames' com SIGTAP: %s", sigtap_code)
         try:
             # 1. Encontrar o campo, digitar e selecionar a sugestão
-            sigtap_field_locator = iframe_frame.locator(self._OUTROS_EXAMES_INPUT_XPATH)
+            sigtap_field_locator = await self._cached_locator(iframe_frame, "outros_exames_sigtap", self._OUTROS_EXAMES_INPUT_XPATH)
             await self._safe_fill_simule(sigtap_field_locator, sigtap_code, "Campo SIGTAP (Outros Exames)")
             
             # Espera e clica na sugestão que aparece
@@ -351,5 +361,5 @@ class AtendimentoForm(BasePage):
             logger.info("Bloco 'Outros exames' preenchido e confirmado com sucesso.")
 
         except Exception as e:
-            logger.error(f"Erro ao processar o bloco 'Outros exames' com SIGTAP {sigtap_code}: {e}", exc_info=True)
+            logger.error("Erro ao processar o bloco 'Outros exames' com SIGTAP %s: %s", sigtap_code, e, exc_info=True)
             raise AutomationError(f"Falha ao preencher o bloco 'Outros exames' com SIGTAP {sigtap_code}.") from e
\ No newline at end of file
@@ -1,8 +1,14 @@
-# Arquivo: app/automation/pages/base_page.py (CORRIGIDO 64)
+# Arquivo: app/automation/pages/base_page.py (CORRIGIDO 65)
 from playwright.async_api import Page, Locator
 from app.core.logger import logger
+from app.core.app_config import AppConfig
 from app.core.errors import ElementNotFoundError, ElementNotInteractableError, AutomationError
 from app.automation.error_handler import AutomationErrorHandler, SkipRecordException, AbortAutomationException
+from app.automation.roundtrip_counter import RoundTripCounter
+from app.automation.pages.action_batch import ActionBatch
+from app.automation.pages.selector_cache import SelectorCache
+from app.automation.pages.selector_registry import SelectorRegistry
+from app.automation.span_tracer import traced
 import asyncio # Importamos asyncio para await sleeps controlados
 from playwright._impl._errors import TimeoutError # Importa TimeoutError
 
@@ -14,12 +20,21 @@ class BasePage:
     def __init__(self, page: Page, error_handler: AutomationErrorHandler):
         self._page = page # A instância da página Playwright
         self._handler = error_handler # A instância do gerenciador de erros
+        self._roundtrips = RoundTripCounter.for_page(page) # Contador compartilhado por página
+        self._selector_cache = SelectorCache.for_page(page) # Seletores resolvidos da ficha atual
+
+    # Timeout das ações. As ações do Playwright (click, fill, press...) já esperam o elemento
+    # ficar visível/habilitado/estável (actionability), então não fazemos um wait_for separado
+    # antes de cada uma: isso custava um round trip extra por interação.
+    _ACTION_TIMEOUT = 10000
     
     # ** ATRIBUTOS E MÉTODOS PARA MÁSCARA DE CARREGAMENTO E POPUPS **
     _LOADING_MASK_SELECTOR = 'div.ext-el-mask' # Seletor para a máscara de carregamento ExtJS
     _MESSAGE_BOX_POPUP_SELECTOR = 'div[peid="message-box"]' # Seletor padrão para o popup message-box
     _MESSAGE_BOX_OK_BUTTON_SELECTOR = f'{_MESSAGE_BOX_POPUP_SELECTOR} button:has-text("OK")' # Botão OK
+    _COMMIT_TIMEOUT = 15000 # Tempo máximo para o e-SUS aceitar um Confirmar/Finalizar
 
+    @traced("espera")
     async def _wait_for_loading_mask_to_disappear(self, timeout=5000):
         """
         Espera a máscara de carregamento (div.ext-el-mask) desaparecer.
@@ -27,95 +42,210 @@ class BasePage:
         """
         mask_locator = self._page.locator(self._LOADING_MASK_SELECTOR)
         try:
-            logger.debug(f"Esperando a máscara de carregamento desaparecer (Selector: {mask_locator.locator})...")
-            await mask_locator.wait_for(state="hidden", timeout=timeout)
-            logger.debug("Máscara de carregamento desapareceu.")
-        except TimeoutError:
-            logger.warning("Timeout esperando a máscara de carregamento desaparecer.")
-            # Chamamos o handler com um erro sobre a máscara.
-            # O handler pausará. Se o usuário continuar, o _safe_... tentará o clique mesmo assim.
-            await self._handler.handle_error(TimeoutError("Máscara de carregamento não desapareceu."),
-                                              step_description="Esperando máscara de carregamento sumir")
+            while True:
+                logger.debug("Esperando a máscara de carregamento desaparecer (Selector: %s)...", mask_locator.locator)
+                self._roundtrips.hit("wait")
+                try:
+                    await mask_locator.wait_for(state="hidden", timeout=timeout)
+                    logger.debug("Máscara de carregamento desapareceu.")
+                    return
+                except TimeoutError:
+                    logger.warning("Timeout esperando a máscara de carregamento desaparecer.")
+                    # Chamamos o handler com um erro sobre a máscara. A política pode mandar esperar de novo
+                    # ("retry"); se o usuário continuar, o _safe_... tentará o clique mesmo assim.
+                    user_action = await self._handler.handle_error(TimeoutError("Máscara de carregamento não desapareceu."),
+                                                                   step_description="Esperando máscara de carregamento sumir",
+                                                                   retryable=True)
+                    if user_action != "retry":
+                        return
+        except (SkipRecordException, AbortAutomationException):
+            raise
         except Exception as e:
-            logger.error(f"Erro inesperado ao esperar máscara de carregamento: {e}", exc_info=True)
+            logger.error("Erro inesperado ao esperar máscara de carregamento: %s", e, exc_info=True)
             user_action = await self._handler.handle_error(e, step_description="Erro inesperado esperando máscara de carregamento")
             if user_action == "continue":
                 logger.info("Usuário optou por continuar apesar do erro na máscara de carregamento.")
             raise AutomationError("Retentando registro devido à máscara de carregamento após intervenção manual.") from e
 
+    async def _count_lot_grid_rows(self, iframe_frame: Locator) -> int:
+        """
+        Quantas linhas a lista do lote mostra agora (0 se a lista não for encontrada). None quando o seletor
+        das linhas não foi configurado (AppConfig.lot_grid_row_selector): a conferência da lista fica desligada
+        e o Confirmar é detectado só pelo botão/formulário fechado e pelo message-box.
+        """
+        if not AppConfig.lot_grid_row_selector:
+            return None
+        try:
+            return await iframe_frame.locator(AppConfig.lot_grid_row_selector).count()
+        except Exception:
+            return 0
+
+    @traced("espera")
+    async def _wait_for_commit(self, iframe_frame: Locator, closed_locator: Locator, step_description: str,
+                               grid_rows_before: int = None, success_text: str = None, dismiss_text: str = None):
+        """
+        Espera o efeito real de um Confirmar/Finalizar em vez de uma pausa fixa: retorna assim que
+        'closed_locator' (o botão clicado / o formulário) some. Se antes disso abrir um message-box do PEC
+        (dentro do iframe ou na página principal), o texto dele vira um erro classificável (duplicidade,
+        validação...) tratado pelo handler; um message-box contendo 'success_text' conta como sucesso e um
+        contendo 'dismiss_text' é só fechado com OK (aviso que não impede o registro). Com 'grid_rows_before'
+        (AppConfig.lot_grid_row_selector), o formulário fechado sem a lista do lote crescer também é erro.
+        Sem nenhum deles até o timeout, é timeout; outra falha da espera é repassada como veio.
+        Quando o handler manda continuar, levanta AutomationError para o registro ser retentado.
+        """
+        # O PEC abre alguns alertas fora do iframe (ex.: 'Campos duplicados'): os dois contextos são observados
+        message_boxes = [iframe_frame.locator(self._MESSAGE_BOX_POPUP_SELECTOR).first,
+                         self._page.locator(self._MESSAGE_BOX_POPUP_SELECTOR).first]
+        self._roundtrips.hit("wait")
+        closed_wait = asyncio.ensure_future(closed_locator.wait_for(state="hidden", timeout=self._COMMIT_TIMEOUT))
+        popup_waits = {asyncio.ensure_future(box.wait_for(state="visible", timeout=self._COMMIT_TIMEOUT)): box for box in message_boxes}
+        is_timeout = lambda exc: isinstance(exc, (TimeoutError, asyncio.TimeoutError))
+        pending, done = {closed_wait, *popup_waits}, set()
+        while pending:
+            finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            done |= finished
+            # Um message-box que só expirou não decide nada: segue esperando o formulário fechar
+            if closed_wait in done or any(task.exception() is None or not is_timeout(task.exception()) for task in finished):
+                break
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+        error = None
+        message_box = next((box for wait, box in popup_waits.items() if wait in done and wait.exception() is None), None)
+        if message_box is not None:
+            try:
+                popup_text = (await message_box.inner_text(timeout=2000)).strip()
+            except Exception:
+                popup_text = ""
+            try:
+                await message_box.locator('button:has-text("OK")').click(timeout=2000)
+            except Exception:
+                pass
+            if dismiss_text and dismiss_text.lower() in popup_text.lower():
+                logger.info("%s: alerta '%s' fechado com OK. Seguindo.", step_description, dismiss_text)
+                return
+            if success_text and success_text.lower() in popup_text.lower():
+                logger.debug("%s: e-SUS confirmou (%s).", step_description, popup_text.splitlines()[0] if popup_text else '')
+                return
+            error = AutomationError(f"{step_description} não foi aceito pelo e-SUS: {popup_text or 'mensagem sem texto'}")
+        elif closed_wait in done and closed_wait.exception() is None:
+            grid_rows_after = None if grid_rows_before is None else await self._count_lot_grid_rows(iframe_frame)
+            if grid_rows_after and grid_rows_after <= grid_rows_before:
+                error = AutomationError(f"{step_description} fechou o formulário mas a lista do lote não cresceu "
+                                        f"({grid_rows_before} -> {grid_rows_after}).", step=step_description)
+            else:
+                logger.debug("%s: confirmado pelo e-SUS.", step_description)
+                return
+        else:
+            # Só é timeout quando o formulário não fechou no prazo; outra falha (ex.: frame desanexado) segue como veio
+            failure = next((task.exception() for task in done if task.exception() is not None and not is_timeout(task.exception())), None)
+            error = failure or TimeoutError(f"Timeout {self._COMMIT_TIMEOUT}ms: {step_description} sem confirmação do e-SUS (formulário continua aberto).")
+
+        await self._handler.handle_error(error, step_description=f"Confirmação: {step_description}")
+        raise AutomationError(f"Retentando registro: {step_description} não foi confirmado.", step=step_description) from error
+
+    def _raise_if_automatic(self, user_action: str, step_description: str, error: Exception):
+        """
+        "continue" de um humano após um clique/tecla que falhou quer dizer que ele fez o passo na mão; vindo da
+        política de recuperação (renavigate/refill/relogin, retry sem repetição do passo), nada fez o passo:
+        o registro precisa ser retentado.
+        """
+        if user_action == "continue" and self._handler.last_action_automatic:
+            raise AutomationError(f"Retentando registro: '{step_description}' não foi executado (recuperação automática).",
+                                  step=step_description) from error
+
+    @traced("primitiva")
     async def _safe_click(self, locator: Locator, step_description: str):
      """Clica em um elemento com tratamento de erro."""
      # ** CORREÇÃO: Use apenas locator.locator no log síncrono **
-     logger.debug(f"Tentando clicar no elemento: {step_description} (Selector: {locator.locator})")
-     try:
-         await locator.wait_for(state="visible", timeout=10000)
-         await locator.click()
-         logger.debug(f"Clicado com sucesso em: {step_description}")
-     except Exception as e:
-         await self._handler.handle_error(e, step_description=f"Clicar: {step_description}")
+     logger.debug("Tentando clicar no elemento: %s (Selector: %s)", step_description, locator.locator)
+     while True:
+         try:
+             self._roundtrips.hit("click")
+             await locator.click(timeout=self._ACTION_TIMEOUT)
+             logger.debug("Clicado com sucesso em: %s", step_description)
+             return
+         except Exception as e:
+             user_action = await self._handler.handle_error(e, step_description=f"Clicar: {step_description}", retryable=True)
+             if user_action != "retry": # "retry" = política de recuperação pediu para repetir só este clique
+                 self._raise_if_automatic(user_action, step_description, e)
+                 return
         #  raise e # Re-levanta a exceção original
 
+    @traced("primitiva")
     async def _safe_fill(self, locator: Locator, text: str, step_description: str):
      """Preenche um campo de texto com tratamento de erro."""
      # ** CORREÇÃO: Use apenas locator.locator no log síncrono **
-     logger.debug(f"Tentando preencher campo: '{step_description}' com texto: '{text}' (Selector: {locator.locator})")
-     try:
-         await locator.wait_for(state="visible", timeout=10000)
-         await locator.fill(text)
-         logger.debug(f"Campo '{step_description}' preenchido com sucesso.")
-     except Exception as e:
-            user_action = await self._handler.handle_error(e, step_description=f"Preencher: {step_description}", data_row={"text_to_fill": text})
+     logger.debug("Tentando preencher campo: '%s' com texto: '%s' (Selector: %s)", step_description, text, locator.locator)
+     while True:
+        try:
+            self._roundtrips.hit("fill")
+            await locator.fill(text, timeout=self._ACTION_TIMEOUT)
+            logger.debug("Campo '%s' preenchido com sucesso.", step_description)
+            return
+        except Exception as e:
+            user_action = await self._handler.handle_error(e, step_description=f"Preencher: {step_description}", data_row={"text_to_fill": text}, retryable=True)
+            if user_action == "retry":
+                continue
             if user_action == "continue":
                 raise AutomationError(f"Retentando registro devido ao preenchimento de '{step_description}' após intervenção manual.") from e
+            return
     
+    @traced("primitiva")
     async def _safe_fill_simule(self, locator: Locator, text: str, step_description: str, delay_ms: int = 20): #Padrão 100ms testado
         """
-        Simula digitação realista em um campo de texto, usando `.type()` com delay entre teclas.
+        Simula digitação realista em um campo de texto, com delay entre teclas.
         Útil para campos que disparam eventos como autocomplete apenas com interação humana.
+        São só duas chamadas: o fill("") já espera o campo, foca e limpa; em seguida
+        press_sequentially digita as teclas (antes eram wait_for + click + fill + type e duas pausas).
         """
-        logger.debug(f"Tentando simular preenchimento do campo: '{step_description}' com texto: '{text}' (Selector: {locator.locator})")
-        try:
-            # Aguarda o campo estar visível
-            await locator.wait_for(state="visible", timeout=10000)
-
-            # Clica no campo para focar
-            await locator.click()
-            await asyncio.sleep(0.1)
-
-            # Limpa o campo antes de digitar
-            await locator.fill("")  # Opcional: use select_all + Backspace se necessário
-
-            # Digita simulando usuário real
-            await locator.type(text, delay=delay_ms)
-            await asyncio.sleep(0.1) # Pequena pausa após digitar
-
-            logger.debug(f"Campo '{step_description}' preenchido com sucesso usando digitação simulada.")
-
-        except Exception as e:
-            user_action = await self._handler.handle_error(e, step_description=f"Preencher (simulado): {step_description}", data_row={"text_to_fill": text})
-            if user_action == "continue":
-                raise AutomationError(f"Retentando registro devido ao preenchimento simulado de '{step_description}' após intervenção manual.") from e
-
-
+        logger.debug("Tentando simular preenchimento do campo: '%s' com texto: '%s' (Selector: %s)", step_description, text, locator.locator)
+        while True:
+            try:
+                # Espera acionabilidade, foca e limpa o campo em um único round trip
+                # (por isso repetir o passo é seguro: o campo é sempre limpo antes de digitar)
+                self._roundtrips.hit("fill")
+                await locator.fill("", timeout=self._ACTION_TIMEOUT)
+
+                # Digita simulando usuário real (dispara keydown/keyup para o autocomplete)
+                self._roundtrips.hit("type")
+                await locator.press_sequentially(text, delay=delay_ms, timeout=self._ACTION_TIMEOUT)
+
+                logger.debug("Campo '%s' preenchido com sucesso usando digitação simulada.", step_description)
+                return
+
+            except Exception as e:
+                user_action = await self._handler.handle_error(e, step_description=f"Preencher (simulado): {step_description}", data_row={"text_to_fill": text}, retryable=True)
+                if user_action == "retry":
+                    continue
+                if user_action == "continue":
+                    raise AutomationError(f"Retentando registro devido ao preenchimento simulado de '{step_description}' após intervenção manual.") from e
+                return
+
+
+    @traced("primitiva")
     async def _safe_select_option(self, locator: Locator, value: str, step_description: str):
          """Seleciona uma opção em um dropdown (seletor <select>) com tratamento de erro."""
-         logger.debug(f"Tentando selecionar '{value}' no dropdown: '{step_description}' (Selector: {locator.all_text_contents() or locator.locator})")
+         logger.debug("Tentando selecionar '%s' no dropdown: '%s' (Selector: %s)", value, step_description, locator.locator)
          try:
-             await locator.wait_for(state="visible", timeout=10000)
-             await locator.select_option(value)
-             logger.debug(f"Opção '{value}' selecionada com sucesso no dropdown '{step_description}'.")
+             self._roundtrips.hit("select")
+             await locator.select_option(value, timeout=self._ACTION_TIMEOUT)
+             logger.debug("Opção '%s' selecionada com sucesso no dropdown '%s'.", value, step_description)
          except Exception as e:
             user_action = await self._handler.handle_error(e, step_description=f"Selecionar opção '{value}' no dropdown: {step_description}", data_row={"value_to_select": value})
             if user_action == "continue":
                 raise AutomationError(f"Retentando registro devido à seleção de opção em '{step_description}' após intervenção manual.") from e
 
+    @traced("espera")
     async def _safe_wait_for_selector(self, selector: str, state="visible", timeout=10000, step_description: str = None):
         """Espera por um seletor com tratamento de erro."""
         desc = step_description if step_description else f"Esperar por seletor: {selector}"
-        logger.debug(f"Tentando esperar por: {desc}")
+        logger.debug("Tentando esperar por: %s", desc)
         try:
+            self._roundtrips.hit("wait")
             await self._page.wait_for_selector(selector, state=state, timeout=timeout)
-            logger.debug(f"Seletor encontrado: {desc}")
+            logger.debug("Seletor encontrado: %s", desc)
             return self._page.locator(selector) # Retorna o locator para uso posterior
         except Exception as e:
             await self._handler.handle_error(e, step_description=f"Esperar por: {desc}")
@@ -127,13 +257,14 @@ class BasePage:
             # e o TaskRunner capturar apenas AutomationError, SkipRecordException, AbortAutomationException.
             # Vamos seguir com a segunda abordagem: handle_error levanta suas exceções de controle.
     
+    @traced("espera")
     async def _safe_wait_for_selector_for_2(self, locator_or_selector: Locator | str, state="visible", timeout=10000, step_description: str = None) -> Locator | str:
         """
         Espera por um elemento usando um Locator ou uma string de seletor.
         Retorna o Locator encontrado ou a string da ação do usuário em caso de erro.
         """
         desc = step_description if step_description else f"Esperar por seletor: {locator_or_selector}"
-        logger.debug(f"Tentando esperar por: {desc}")
+        logger.debug("Tentando esperar por: %s", desc)
         
         # Determina se recebemos um Locator ou uma string de seletor
         if isinstance(locator_or_selector, str):
@@ -142,8 +273,9 @@ class BasePage:
             locator = locator_or_selector # Já é um Locator
         
         try:
+            self._roundtrips.hit("wait")
             await locator.wait_for(state=state, timeout=timeout)
-            logger.debug(f"Seletor encontrado: {desc}")
+            logger.debug("Seletor encontrado: %s", desc)
             return locator # Retorna o Locator em caso de sucesso
         except (SkipRecordException, AbortAutomationException):
             raise
@@ -152,65 +284,131 @@ class BasePage:
             return user_action # Retorna a ação (o chamador saberá que o locator não foi obtido)
     # --- FIM DA CORREÇÃO ---
         
+    @traced("espera")
     async def _safe_wait_for_locator(self, locator: Locator, state="visible", timeout=10000, step_description: str = None):
         """Espera por um Locator específico com tratamento de erro."""
         desc = step_description if step_description else f"Esperar por locator: {locator.locator}"
-        logger.debug(f"Tentando esperar por: {desc}")
-        try:
-            await locator.wait_for(state=state, timeout=timeout)
-            logger.debug(f"Locator encontrado: {desc}")
-        except Exception as e:
-            user_action = await self._handler.handle_error(e, step_description=f"Esperar por: {desc}")
-            if user_action == "continue":
-                raise AutomationError(f"Retentando registro devido à espera por '{desc}' após intervenção manual.") from e
+        logger.debug("Tentando esperar por: %s", desc)
+        while True:
+            try:
+                self._roundtrips.hit("wait")
+                await locator.wait_for(state=state, timeout=timeout)
+                logger.debug("Locator encontrado: %s", desc)
+                return
+            except Exception as e:
+                user_action = await self._handler.handle_error(e, step_description=f"Esperar por: {desc}", retryable=True)
+                if user_action == "retry":
+                    continue
+                if user_action == "continue":
+                    raise AutomationError(f"Retentando registro devido à espera por '{desc}' após intervenção manual.") from e
+                return
     
     
 
+    @traced("primitiva")
     async def _safe_goto(self, url: str, step_description: str = "Navegar para URL"):
          """Navega para uma URL com tratamento de erro."""
-         logger.debug(f"Tentando navegar para: {url}")
+         logger.debug("Tentando navegar para: %s", url)
          try:
               await self._page.goto(url, wait_until="domcontentloaded", timeout=30000) # Espera 30s pela URL
-              logger.info(f"Navegado com sucesso para: {url}")
+              logger.info("Navegado com sucesso para: %s", url)
          except Exception as e:
               await self._handler.handle_error(e, step_description=f"Navegar para: {step_description}")
               # Re-levantar implicitamente
 
+    @traced("primitiva")
     async def _safe_press(self, locator: Locator, key: str, step_description: str):
         """Pressiona uma tecla em um elemento com tratamento de erro."""
-        logger.debug(f"Tentando pressionar tecla '{key}' no elemento: '{step_description}'")
+        logger.debug("Tentando pressionar tecla '%s' no elemento: '%s'", key, step_description)
         try:
-             await locator.wait_for(state="visible", timeout=10000)
-             await locator.press(key)
-             logger.debug(f"Tecla '{key}' pressionada com sucesso em '{step_description}'.")
+             self._roundtrips.hit("press")
+             await locator.press(key, timeout=self._ACTION_TIMEOUT)
+             logger.debug("Tecla '%s' pressionada com sucesso em '%s'.", key, step_description)
         except Exception as e:
-             await self._handler.handle_error(e, step_description=f"Pressionar tecla '{key}': {step_description}")
-             # Re-levantar implicitamente
+             user_action = await self._handler.handle_error(e, step_description=f"Pressionar tecla '{key}': {step_description}")
+             self._raise_if_automatic(user_action, step_description, e)
 
+    @traced("primitiva")
     async def _safe_type_with_delay(self, locator: Locator, text: str, delay_ms: int = 100, step_description: str = "Preencher campo com delay"):
         """Preenche um campo de texto digitando caractere por caractere com delay."""
-        logger.debug(f"Tentando digitar em: '{step_description}' com texto: '{text}' (Delay: {delay_ms}ms)")
+        logger.debug("Tentando digitar em: '%s' com texto: '%s' (Delay: %sms)", step_description, text, delay_ms)
         try:
-            await locator.wait_for(state="visible", timeout=10000)
-            await locator.wait_for(state="enabled", timeout=5000)
-            await locator.type(text, delay=delay_ms) # Usa page.type com delay
-            logger.debug(f"Digitação em '{step_description}' completa.")
+            # press_sequentially já espera o elemento visível e habilitado
+            self._roundtrips.hit("type")
+            await locator.press_sequentially(text, delay=delay_ms, timeout=self._ACTION_TIMEOUT)
+            logger.debug("Digitação em '%s' completa.", step_description)
         except Exception as e:
-            await self._handler.handle_error(e, step_description=f"Digitar com delay: {step_description}", data_row={"text_to_fill": text})
+            user_action = await self._handler.handle_error(e, step_description=f"Digitar com delay: {step_description}", data_row={"text_to_fill": text})
+            self._raise_if_automatic(user_action, step_description, e)
 
 
     async def _safe_click_by_text(self, text: str, step_description: str = "Clicar por texto"):
         """Procura e clica em um elemento pelo seu texto visível com tratamento de erro."""
         # Cria um locator que procura qualquer elemento com o texto especificado
         locator = self._page.locator(f"text='{text}'")
-        logger.debug(f"Tentando clicar no elemento com texto: '{text}' ({step_description})")
+        logger.debug("Tentando clicar no elemento com texto: '%s' (%s)", text, step_description)
         await self._safe_click(locator, step_description=f"Clicar texto: '{text}' ({step_description})")
 
 
+    # --- Cache de seletores resolvidos (por ficha) ---
+    async def _cached_locator(self, root: Locator, key: str, selector: str) -> Locator:
+        """
+        Retorna o locator do campo lógico 'key' dentro de 'root'.
+        O 'selector' (normalmente um XPath de texto) só é avaliado na primeira linha da ficha;
+        depois disso o campo é encontrado pelo atributo gerado, até o formulário ser reconstruído.
+        """
+        misses_before = self._selector_cache.misses
+        locator = await self._selector_cache.resolve(root, key, selector)
+        if self._selector_cache.misses != misses_before: # Só a resolução pelo seletor custa uma ida ao navegador
+            self._roundtrips.hit("resolve")
+        return locator
+
+    # --- Registro de seletores com candidatos ranqueados ---
+    @traced("espera")
+    async def _safe_registry_locator(self, root, name: str, step_description: str, state: str = "visible", timeout: int = 10000) -> Locator:
+        """
+        Resolve o elemento lógico 'name' pelo SelectorRegistry (tenta todos os candidatos em uma só espera).
+        Se nenhum candidato aparecer, aciona o handler (mesma semântica do _safe_wait_for_locator).
+        """
+        logger.debug("Resolvendo elemento lógico '%s' pelo registro de seletores (%s).", name, step_description)
+        try:
+            self._roundtrips.hit("wait")
+            return await SelectorRegistry.get().resolve(root, name, state=state, timeout=timeout)
+        except (SkipRecordException, AbortAutomationException):
+            raise
+        except Exception as e:
+            user_action = await self._handler.handle_error(e, step_description=f"Localizar: {step_description} (nenhum candidato de '{name}' encontrado)")
+            if user_action == "continue":
+                raise AutomationError(f"Retentando após intervenção manual na localização de '{step_description}'.") from e
+
+    # --- Lote de ações (um único round trip) ---
+    def _new_batch(self, root: Locator, description: str = "Lote de ações") -> ActionBatch:
+        """
+        Cria uma fila de ações a ser executada em uma única chamada ao navegador.
+        'root' é o locator a partir do qual os seletores CSS são resolvidos (ex: iframe_frame.locator("body")).
+        """
+        return ActionBatch(root, description)
+
+    @traced("primitiva")
+    async def _safe_run_batch(self, batch: ActionBatch, step_description: str = None):
+        """Executa um ActionBatch com tratamento de erro (mesma semântica do _safe_fill)."""
+        desc = step_description or batch.description
+        logger.debug("Tentando executar lote de ações: '%s' (%s ações)", desc, len(batch))
+        try:
+            self._roundtrips.hit("batch")
+            await batch.flush()
+            logger.debug("Lote '%s' executado com sucesso.", desc)
+        except Exception as e:
+            user_action = await self._handler.handle_error(e, step_description=f"Lote de ações: {desc}")
+            if user_action == "continue":
+                raise AutomationError(f"Retentando registro devido ao lote de ações '{desc}' após intervenção manual.") from e
+
+
     # --- Métodos para interagir com IFrames ---
+    @traced("espera")
     async def _safe_switch_to_iframe(self, iframe_selector: str, step_description: str = "Mudar para Iframe"):
         """Espera por um iframe e muda o contexto da página para ele."""
-        logger.debug(f"Tentando mudar para iframe: {iframe_selector}")
+        logger.debug("Tentando mudar para iframe: %s", iframe_selector)
         try:
             # Espera pelo iframe estar presente e visível
             iframe_locator = self._page.locator(iframe_selector)
@@ -221,7 +419,7 @@ class BasePage:
             if not frame:
                  raise ElementNotFoundError(f"Iframe encontrado mas não foi possível obter a instância do frame com seletor: {iframe_selector}")
 
-            logger.info(f"Contexto mudado para iframe: {iframe_selector}")
+            logger.info("Contexto mudado para iframe: %s", iframe_selector)
             return frame # Retorna a instância FrameLocator
         except Exception as e:
             await self._handler.handle_error(e, step_description=f"Mudar para iframe: {step_description}")
@@ -269,7 +467,7 @@ class BasePage:
             logger.debug("Popup de alerta padrão (message-box) NÃO detectado.")
             return "not_detected"
         except Exception as e:
-            logger.error(f"Erro inesperado ao tentar tratar popup de alerta padrão: {e}", exc_info=True)
+            logger.error("Erro inesperado ao tentar tratar popup de alerta padrão: %s", e, exc_info=True)
             # Não levanta exceção aqui, pois já estamos dentro de um handler ou chamando como utilitário.
             return "error" # Sinaliza que houve um erro no tratamento.
 
@@ -1,6 +1,7 @@
 # Arquivo: app/automation/pages/common_forms.py (VERSÃO v1g - Seletor Local Atendimento Corrigido)
 import asyncio
 from playwright.async_api import Page, Locator
+from playwright._impl._errors import TimeoutError
 from app.automation.pages.base_page import BasePage
 from app.core.logger import logger
 from app.core.errors import AutomationError, ElementNotFoundError
@@ -51,12 +52,22 @@ class CommonForms(BasePage):
     _LOCAL_ATENDIMENTO_INPUT_SELECTOR = '//label[contains(text(), "Local de atendimento")]/following-sibling::input'
     _SUGGESTION_ITEM_SELECTOR_TEMPLATE = "div.x-combo-list-item:has-text('{}')"
 
+    # Reinício da ficha do cidadão (recuperação 'refill' e retentativas repetidas no mesmo passo)
+    _CLEAR_TRIGGER_SELECTOR = 'span.x-form-clear-trigger:visible' # Mesmo 'x' usado em select_gender
+    # Formulário do cidadão, sem o cabeçalho da ficha: o menor contêiner que tem o 'Confirmar' da ficha
+    # (Ficha*DetailChildViewImpl.Confirmar) e os campos Ficha*ChildForm.* usados pelas páginas
+    _PATIENT_FORM_SCOPE_SELECTOR = 'xpath=//div[contains(@peid, "DetailChildViewImpl.Confirmar")]/ancestor::div[.//*[contains(@peid, "ChildForm.")]][1]'
+    _CHECKED_CHECKBOX_SELECTOR = 'input[type="checkbox"]:checked'
+    # Itens já adicionados às listas da ficha (SIGTAP, outros exames): botão de excluir de cada item
+    _ADDED_ITEM_REMOVE_SELECTOR = 'button[title="Excluir"]:visible, button[title="Remover"]:visible, [role="button"][title="Excluir"]:visible'
+    _REMOVE_CONFIRM_BUTTON_SELECTOR = 'div[peid="message-box"] button:has-text("Sim"), div[peid="message-box"] button:has-text("OK")'
+
     def __init__(self, page: Page, error_handler: AutomationErrorHandler):
         super().__init__(page, error_handler)
 
     async def fill_date_field(self, iframe_frame: Locator, date_str: str):
         """Preenche o campo de data de atendimento/procedimento."""
-        logger.info(f"Preenchendo campo 'Data' com: {date_str}")
+        logger.info("Preenchendo campo 'Data' com: %s", date_str)
         # Usa o frame_locator para interagir dentro do iframe
         date_field_locator = iframe_frame.locator(self._DATE_FIELD_XPATH)
         await self._safe_fill(date_field_locator, date_str, step_description="Campo Data")
@@ -66,7 +77,7 @@ class CommonForms(BasePage):
 
     async def select_period(self, iframe_frame: Locator, periodo: str):
         """Seleciona o período (Manhã, Tarde, Noite)."""
-        logger.info(f"Selecionando período: {periodo}")
+        logger.info("Selecionando período: %s", periodo)
         periodo_lower = periodo.lower()
         # radio_locator = None # Não precisamos mais disso como variável temporária
 
@@ -80,7 +91,7 @@ class CommonForms(BasePage):
         elif periodo_lower == "noite":
             label_xpath = self._PERIODO_RADIO_NOITE + "/following-sibling::label"
         else:
-             logger.warning(f"Período desconhecido: '{periodo}'. Não foi possível determinar o seletor do label.")
+             logger.warning("Período desconhecido: '%s'. Não foi possível determinar o seletor do label.", periodo)
              # ** Opcional: Se quiser usar o locator direto do rádio como fallback **
              # try:
              #      radio_locator = iframe_frame.locator(f'//label[text()="{periodo}"]/preceding-sibling::input[@type="radio"]')
@@ -93,20 +104,21 @@ class CommonForms(BasePage):
 
         # Se um label_xpath foi determinado
         if label_xpath:
-             logger.debug(f"Tentando clicar no label para Período: {periodo} (XPath: {label_xpath})")
-             label_locator = iframe_frame.locator(label_xpath) # Cria o locator para o label
+             logger.debug("Tentando clicar no label para Período: %s (XPath: %s)", periodo, label_xpath)
+             # Resolvido uma vez por ficha; nas linhas seguintes não reavalia o XPath de texto
+             label_locator = await self._cached_locator(iframe_frame, f"periodo:{periodo_lower}", label_xpath)
 
              # Usa o _safe_click no locator do label. Se falhar, o handler será chamado.
              await self._safe_click(label_locator, step_description=f"Label Rádio Período: {periodo}")
-             logger.debug(f"Label para Período '{periodo}' clicado com sucesso.")
+             logger.debug("Label para Período '%s' clicado com sucesso.", periodo)
 
         # Se label_xpath não foi determinado (período desconhecido), o 'return' anterior já saiu.
 
 
     async def fill_cpf_cns(self, iframe_frame: Locator, cpf_cns: str):
         """Preenche o campo CPF / CNS do cidadão."""
-        logger.info(f"Preenchendo campo 'CPF / CNS' com: {cpf_cns}")
-        cpf_field_locator = iframe_frame.locator(self._CPF_CNS_FIELD_XPATH)
+        logger.info("Preenchendo campo 'CPF / CNS' com: %s", cpf_cns)
+        cpf_field_locator = await self._cached_locator(iframe_frame, "cpf_cns", self._CPF_CNS_FIELD_XPATH)
         await self._safe_fill(cpf_field_locator, cpf_cns, step_description="Campo CPF / CNS")
         # Pode ser necessário enviar ENTER ou TAB para validar o CPF/CNS e carregar dados do cidadão
         await self._safe_press(cpf_field_locator, 'Tab', step_description="Campo CPF / CNS - Tab")
@@ -118,8 +130,8 @@ class CommonForms(BasePage):
 
     async def fill_date_of_birth(self, iframe_frame: Locator, dob_str: str):
         """Preenche o campo Data de nascimento."""
-        logger.info(f"Preenchendo campo 'Data de nascimento' com: {dob_str}")
-        dob_field_locator = iframe_frame.locator(self._DOB_FIELD_XPATH)
+        logger.info("Preenchendo campo 'Data de nascimento' com: %s", dob_str)
+        dob_field_locator = await self._cached_locator(iframe_frame, "data_nascimento", self._DOB_FIELD_XPATH)
         await self._safe_fill(dob_field_locator, dob_str, step_description="Campo Data de nascimento")
         await self._safe_press(dob_field_locator, 'Enter', step_description="Campo Data de nascimento - Enter")
         await asyncio.sleep(1) # Pequena pausa após Enter
@@ -135,10 +147,10 @@ class CommonForms(BasePage):
         gender_text = gender_map.get(gender_value)
 
         if not gender_text:
-            logger.warning(f"Valor de gênero desconhecido: {gender_value}. Não foi possível selecionar o gênero.")
+            logger.warning("Valor de gênero desconhecido: %s. Não foi possível selecionar o gênero.", gender_value)
             return
 
-        logger.info(f"Selecionando gênero: {gender_text} (Valor: {gender_value})")
+        logger.info("Selecionando gênero: %s (Valor: %s)", gender_text, gender_value)
         gender_field_locator = iframe_frame.locator(self._GENDER_FIELD_XPATH)
 
         try:
@@ -149,7 +161,7 @@ class CommonForms(BasePage):
                 await asyncio.sleep(0.5) # Pausa após limpar
 
             # Preenche o campo com o texto
-            logger.debug(f"Preenchendo campo Sexo com '{gender_text}'...")
+            logger.debug("Preenchendo campo Sexo com '%s'...", gender_text)
             await self._safe_fill(gender_field_locator, gender_text, step_description="Campo Sexo - Preencher")
             await asyncio.sleep(1)
 
@@ -169,20 +181,20 @@ class CommonForms(BasePage):
                     item_class = await item.get_attribute("class")
 
                     if "x-combo-selected" in item_class and item_text == gender_text:
-                        logger.debug(f"Item encontrado e selecionado: '{item_text}'. Pressionando Enter.")
+                        logger.debug("Item encontrado e selecionado: '%s'. Pressionando Enter.", item_text)
                         await self._safe_press(gender_field_locator, 'Enter', step_description="Campo Sexo - Confirmar seleção")
                         await asyncio.sleep(1)
-                        logger.info(f"Gênero '{gender_text}' selecionado com sucesso.")
+                        logger.info("Gênero '%s' selecionado com sucesso.", gender_text)
                         return
 
                 # Se ainda não encontrou, tenta avançar mais
                 await self._safe_press(gender_field_locator, 'ArrowDown', step_description="Campo Sexo - Avançar item")
                 await asyncio.sleep(1)
 
-            logger.warning(f"Não foi possível encontrar e selecionar o gênero '{gender_text}' após várias tentativas.")
+            logger.warning("Não foi possível encontrar e selecionar o gênero '%s' após várias tentativas.", gender_text)
 
         except Exception as e:
-            logger.error(f"Erro ao selecionar gênero '{gender_text}': {e}")
+            logger.error("Erro ao selecionar gênero '%s': %s", gender_text, e)
             raise AutomationError("Navegação Seleciona o gênero (Sexo) a partir de um valor numérico (1:Masculino, 2:Feminino, 3:Indeterminado).") from e
 
 
@@ -194,14 +206,14 @@ class CommonForms(BasePage):
         gender_text = gender_map.get(gender_value)
 
         if not gender_text:
-            logger.warning(f"Valor de gênero desconhecido: {gender_value}. Pulando seleção.")
+            logger.warning("Valor de gênero desconhecido: %s. Pulando seleção.", gender_value)
             return
 
-        logger.info(f"Selecionando gênero (ACS): {gender_text}")
+        logger.info("Selecionando gênero (ACS): %s", gender_text)
         
         try:
-            # 1. Localiza o campo de input para "Sexo"
-            gender_field_locator = iframe_frame.locator(self._GENDER_FIELD_SELECTOR)
+            # 1. Localiza o campo de input para "Sexo" (cache por ficha)
+            gender_field_locator = await self._cached_locator(iframe_frame, "sexo", self._GENDER_FIELD_SELECTOR)
 
             # 2. Simula a digitação do texto (ex: "Feminino")
             await self._safe_fill_simule(gender_field_locator, gender_text, f"Campo Sexo - Digitar '{gender_text}'")
@@ -217,10 +229,10 @@ class CommonForms(BasePage):
             await asyncio.sleep(1) # Pausa para garantir que o valor foi processado
 
         except TimeoutError:
-            logger.error(f"Timeout: A sugestão '{gender_text}' não apareceu após a digitação.")
+            logger.error("Timeout: A sugestão '%s' não apareceu após a digitação.", gender_text)
             raise AutomationError(f"Timeout ao buscar a sugestão para o gênero '{gender_text}'.")
         except Exception as e:
-            logger.error(f"Erro ao selecionar o gênero '{gender_text}': {e}", exc_info=True)
+            logger.error("Erro ao selecionar o gênero '%s': %s", gender_text, e, exc_info=True)
             raise AutomationError(f"Falha ao selecionar o gênero '{gender_text}'.") from e
 
     async def select_local_atendimento(self, iframe_frame: Locator, local_atendimento: str):
@@ -232,12 +244,12 @@ class CommonForms(BasePage):
             logger.warning("Valor vazio para Local de atendimento. Pulando seleção.")
             return
 
-        logger.info(f"Selecionando Local de atendimento: {local_atendimento}")
+        logger.info("Selecionando Local de atendimento: %s", local_atendimento)
         local_field = iframe_frame.locator(self._LOCAL_ATENDIMENTO_FIELD_XPATH)
 
         try:
             # Preencher o campo com o texto do local
-            logger.debug(f"Preenchendo campo com '{local_atendimento}'...")
+            logger.debug("Preenchendo campo com '%s'...", local_atendimento)
             await self._safe_fill(local_field, local_atendimento, step_description="Campo Local de atendimento - Preencher")
             await asyncio.sleep(1.5)
 
@@ -251,17 +263,17 @@ class CommonForms(BasePage):
             # Tenta localizar a opção selecionada com a classe x-combo-selected
             max_attempts = 10
             for attempt in range(max_attempts):
-                logger.debug(f"Tentativa {attempt + 1} de localizar item selecionado...")
+                logger.debug("Tentativa %s de localizar item selecionado...", attempt + 1)
                 selected_item = iframe_frame.locator('//div[contains(@class, "x-combo-list-item") and contains(@class, "x-combo-selected")]')
 
                 if await selected_item.count() > 0:
                     selected_text = (await selected_item.first.inner_text()).strip()
-                    logger.debug(f"Item selecionado visualmente: {selected_text}")
+                    logger.debug("Item selecionado visualmente: %s", selected_text)
 
                     if selected_text.lower() == local_atendimento.lower():
-                        logger.info(f"Item '{selected_text}' corresponde ao valor desejado. Clicando...")
+                        logger.info("Item '%s' corresponde ao valor desejado. Clicando...", selected_text)
                         await selected_item.first.click()
-                        logger.info(f"Local de atendimento '{local_atendimento}' selecionado com sucesso.")
+                        logger.info("Local de atendimento '%s' selecionado com sucesso.", local_atendimento)
                         return
                     else:
                         # Avança na lista se não bateu
@@ -270,10 +282,10 @@ class CommonForms(BasePage):
                 else:
                     await asyncio.sleep(1)
 
-            logger.warning(f"Não foi possível encontrar e selecionar o Local de atendimento: '{local_atendimento}'.")
+            logger.warning("Não foi possível encontrar e selecionar o Local de atendimento: '%s'.", local_atendimento)
 
         except Exception as e:
-            logger.error(f"Erro ao selecionar Local de atendimento '{local_atendimento}': {e}")
+            logger.error("Erro ao selecionar Local de atendimento '%s': %s", local_atendimento, e)
             raise AutomationError("Falha na Navegação ao Selecionar Local de Atendiemnto")  from e
     
     # --- NOVA FUNÇÃO OTIMIZADA ---
@@ -286,11 +298,11 @@ class CommonForms(BasePage):
             logger.warning("Valor vazio para Local de atendimento. Pulando seleção.")
             return
 
-        logger.info(f"Selecionando Local de atendimento (rápido): {local_atendimento_text}")
+        logger.info("Selecionando Local de atendimento (rápido): %s", local_atendimento_text)
         
         try:
             # 1. Localiza o campo de input
-            local_field_locator = iframe_frame.locator(self._LOCAL_ATENDIMENTO_INPUT_SELECTOR)
+            local_field_locator = await self._cached_locator(iframe_frame, "local_atendimento", self._LOCAL_ATENDIMENTO_INPUT_SELECTOR)
 
             # 2. Simula a digitação do texto para acionar o autocomplete
             await self._safe_fill_simule(local_field_locator, local_atendimento_text, f"Campo Local de Atendimento - Digitar '{local_atendimento_text}'")
@@ -305,12 +317,74 @@ class CommonForms(BasePage):
             await self._safe_click(suggestion_locator, f"Item da lista de sugestão: {local_atendimento_text}")
             
             await asyncio.sleep(1) # Pequena pausa para garantir que o valor foi processado
-            logger.info(f"Local de atendimento '{local_atendimento_text}' selecionado com sucesso.")
+            logger.info("Local de atendimento '%s' selecionado com sucesso.", local_atendimento_text)
 
         except TimeoutError:
-            logger.error(f"Timeout: A sugestão '{local_atendimento_text}' não apareceu após a digitação.")
+            logger.error("Timeout: A sugestão '%s' não apareceu após a digitação.", local_atendimento_text)
             raise AutomationError(f"Timeout ao buscar a sugestão para o Local de atendimento '{local_atendimento_text}'.")
         except Exception as e:
-            logger.error(f"Erro ao selecionar o Local de atendimento '{local_atendimento_text}': {e}", exc_info=True)
+            logger.error("Erro ao selecionar o Local de atendimento '%s': %s", local_atendimento_text, e, exc_info=True)
             raise AutomationError(f"Falha ao selecionar o Local de atendimento '{local_atendimento_text}'.") from e
 
+    async def reset_patient_form(self, iframe_frame: Locator):
+        """
+        Deixa o formulário do cidadão limpo para preencher o registro de novo, sem tocar no cabeçalho
+        (data, profissional) nem nos registros já confirmados: apaga CPF/CNS e data de nascimento,
+        clica os botões Limpar ('x') dos combos, desmarca as caixas marcadas e exclui os itens já
+        adicionados às listas (SIGTAP, outros exames), que seriam adicionados de novo no reenvio.
+        Não passa pelo handler: uma falha aqui é relatada como AutomationError para quem chamou.
+        """
+        logger.info("Reiniciando o formulário do cidadão (limpando campos preenchidos).")
+        try:
+            for field_selector in (self._CPF_CNS_FIELD_XPATH, self._DOB_FIELD_XPATH):
+                field_locator = iframe_frame.locator(field_selector).first
+                if await field_locator.count() > 0:
+                    await field_locator.fill("", timeout=5000)
+
+            scope = iframe_frame.locator(self._PATIENT_FORM_SCOPE_SELECTOR).first
+            if await scope.count() == 0:
+                # Sem o contêiner do formulário, limpa só os combos conhecidos (Sexo e Local de atendimento)
+                logger.debug("Contêiner do formulário do cidadão não encontrado. Limpando apenas Sexo e Local de atendimento.")
+                for clear_selector in (self._GENDER_CLEAR_BUTTON_SELECTOR, self._LOCAL_ATENDIMENTO_CLEAR_BUTTON_SELECTOR):
+                    clear_button_locator = iframe_frame.locator(clear_selector)
+                    if await clear_button_locator.count() > 0:
+                        await clear_button_locator.first.click(timeout=5000)
+                        await asyncio.sleep(0.3)
+                return
+
+            # Limpar um combo esconde o 'x' dele (sai do ':visible'), por isso sempre pega o primeiro ainda visível
+            clear_triggers = scope.locator(self._CLEAR_TRIGGER_SELECTOR)
+            for _ in range(20):
+                if await clear_triggers.count() == 0:
+                    break
+                await clear_triggers.first.click(timeout=5000)
+                await asyncio.sleep(0.3)
+            if await clear_triggers.count() > 0:
+                raise AutomationError("Combos da ficha não puderam ser limpos.")
+
+            # Desmarcar muda a lista, por isso sempre pega a primeira caixa ainda marcada
+            checked = scope.locator(self._CHECKED_CHECKBOX_SELECTOR)
+            for _ in range(50):
+                if await checked.count() == 0:
+                    break
+                await checked.first.click(timeout=5000)
+                await asyncio.sleep(0.2)
+
+            # Excluir também muda a lista; o PEC pode pedir confirmação da exclusão
+            remove_buttons = scope.locator(self._ADDED_ITEM_REMOVE_SELECTOR)
+            for _ in range(50):
+                if await remove_buttons.count() == 0:
+                    break
+                await remove_buttons.first.click(timeout=5000)
+                confirm_locator = iframe_frame.locator(self._REMOVE_CONFIRM_BUTTON_SELECTOR).first
+                try:
+                    await confirm_locator.wait_for(state="visible", timeout=1000)
+                    await confirm_locator.click(timeout=5000)
+                except TimeoutError:
+                    pass
+                await asyncio.sleep(0.2)
+            if await remove_buttons.count() > 0:
+                raise AutomationError("Itens adicionados às listas da ficha não puderam ser excluídos.")
+        except Exception as e:
+            raise AutomationError(f"Falha ao reiniciar o formulário do cidadão: {e}", step="Reiniciar formulário do cidadão") from e
+        logger.info("Formulário do cidadão reiniciado.")
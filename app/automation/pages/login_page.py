@@ -5,7 +5,9 @@ from app.core.logger import logger
 from app.core.errors import AutomationError, ElementNotFoundError
 # **ADICIONE OU VERIFIQUE ESTA IMPORTAÇÃO**
 from app.automation.error_handler import AutomationErrorHandler
+from app.core.app_config import AppConfig
 import asyncio 
+import re
 
 class LoginPage(BasePage):
     """
@@ -19,6 +21,7 @@ class LoginPage(BasePage):
     # Seletor para o campo de usuário. Tente usar algo mais específico se possível.
     # Exemplo: input[placeholder="Usuário"], input[name="usuario"], input#login-username
     # Vamos usar o XPath do seu código original por enquanto, mas teste e refine!
+    # OBS: o login agora usa os candidatos de 'login.*' em selector_registry.py (este XPath é o primeiro deles).
     _USERNAME_FIELD_XPATH = '//*[@id="root"]/div/div[3]/div[1]/div/div[2]/div/form/div/div[1]/div/div[1]/div/div/input'
     # Seletor para o campo de senha
     _PASSWORD_FIELD_XPATH = '//*[@id="root"]/div/div[3]/div[1]/div/div[2]/div/form/div/div[2]/div/div/div/div[1]/div/div/input'
@@ -47,12 +50,15 @@ class LoginPage(BasePage):
     _CONFIRM_PROFILE_BUTTON_SELECTOR = 'button:has-text("Confirmar")'
     # --- FIM DOS SELETORES ---
 
+    # Versão exibida pelo PEC (rodapé do login / tela inicial), ex.: "Versão 5.4.22"
+    _PEC_VERSION_PATTERN = re.compile(r"vers[aã]o\s*:?\s*(\d+\.\d+(?:\.\d+){0,2})", re.IGNORECASE)
+
     def __init__(self, page: Page, error_handler: AutomationErrorHandler):
         super().__init__(page, error_handler) # Inicializa a BasePage
 
     async def navigate_and_login(self, url: str, username: str, password: str):
         """Navega para a URL de login, lida com popups e realiza o login."""
-        logger.info(f"Navegando para a URL: {url}")
+        logger.info("Navegando para a URL: %s", url)
         await self._safe_goto(url, step_description=f"Navegar para {url}")
 
         # Lidar com popup de cookies (se existir e aparecer rapidamente)
@@ -70,15 +76,20 @@ class LoginPage(BasePage):
              logger.debug("Popup de cookies não encontrado ou erro ao clicar.")
              # Continua mesmo que não tenha clicado no popup
 
+        # A versão define o ranking de seletores usado a seguir (SelectorRegistry) e entra no histórico de execuções
+        await self.detect_pec_version()
+
         logger.info("Preenchendo credenciais de login...")
         # Preenche usuário e senha usando os métodos seguros da BasePage
+        # Os campos são localizados pelo SelectorRegistry: o XPath absoluto é só o primeiro candidato,
+        # seguido de name/autocomplete, texto do label e estrutura do formulário.
         await self._safe_fill(
-            self._page.locator(self._USERNAME_FIELD_XPATH),
+            await self._safe_registry_locator(self._page, "login.usuario", "Campo Usuário"),
             username,
             step_description="Campo Usuário"
         )
         await self._safe_fill(
-            self._page.locator(self._PASSWORD_FIELD_XPATH),
+            await self._safe_registry_locator(self._page, "login.senha", "Campo Senha"),
             password,
             step_description="Campo Senha"
         )
@@ -86,7 +97,7 @@ class LoginPage(BasePage):
         logger.info("Clicando no botão de Login...")
         # Clica no botão de login
         await self._safe_click(
-            self._page.locator(self._LOGIN_BUTTON_SELECTOR),
+            await self._safe_registry_locator(self._page, "login.botao_acessar", "Botão Login"),
             step_description="Botão Login"
         )
 
@@ -108,15 +119,39 @@ class LoginPage(BasePage):
             logger.debug("Popup 'Continuar' pós-login não encontrado ou erro ao clicar. Continuando.")
 
 
+        if not AppConfig.detected_pec_version:
+            await self.detect_pec_version() # Algumas versões só mostram a versão depois do login
+
         # A lógica de seleção de perfil agora é responsabilidade exclusiva da BaseTask.
         logger.info("Login concluído. A tarefa continuará com a seleção de perfil, se necessário.")
         
+    async def detect_pec_version(self) -> str:
+        """
+        Lê a versão do PEC no texto da página e guarda em AppConfig.detected_pec_version.
+        Sem versão na página, mantém a configurada (AppConfig.pec_version). Retorna a versão em uso.
+        """
+        try:
+            page_text = await self._page.locator("body").inner_text(timeout=3000)
+        except Exception as e:
+            logger.debug("Não foi possível ler o texto da página para detectar a versão do PEC: %s", e)
+            page_text = ""
+        match = self._PEC_VERSION_PATTERN.search(page_text)
+        if match:
+            AppConfig.detected_pec_version = match.group(1)
+            if AppConfig.detected_pec_version != AppConfig.pec_version:
+                logger.warning("Versão do PEC na página (%s) difere da configurada (%s). Usando a da página.", AppConfig.detected_pec_version, AppConfig.pec_version)
+            else:
+                logger.info("Versão do PEC detectada: %s.", AppConfig.detected_pec_version)
+        else:
+            logger.debug("Versão do PEC não encontrada na página. Usando a configurada (%s).", AppConfig.pec_version)
+        return AppConfig.current_pec_version()
+
     async def select_profile_and_unidade_optional(self, profile_name_to_select: str = "Enfermeiro") -> bool:
         """
         Função unificada e robusta para selecionar perfil e unidade na tela de cartões.
         Aceita o nome do perfil como argumento para ser flexível.
         """
-        logger.info(f"Tentando selecionar o perfil via card: '{profile_name_to_select}'...")
+        logger.info("Tentando selecionar o perfil via card: '%s'...", profile_name_to_select)
 
         # Mapeia o nome curto para o texto completo no card
         profile_text_map = {
@@ -130,7 +165,7 @@ class LoginPage(BasePage):
             await profile_locator.wait_for(state="visible", timeout=5000)
             
             await self._safe_click(profile_locator, f"Cartão '{full_profile_text}'")
-            logger.info(f"Perfil '{full_profile_text}' selecionado com sucesso.")
+            logger.info("Perfil '%s' selecionado com sucesso.", full_profile_text)
 
             # Espera a navegação para a tela de unidades ser concluída
             logger.info("Aguardando a tela de seleção de unidade carregar...")
@@ -145,10 +180,10 @@ class LoginPage(BasePage):
             return True
 
         except TimeoutError:
-            logger.warning(f"Tela de seleção de perfil por card não encontrada para '{full_profile_text}'. A automação continuará.")
+            logger.warning("Tela de seleção de perfil por card não encontrada para '%s'. A automação continuará.", full_profile_text)
             return False
         except Exception as e:
-            logger.error(f"Erro inesperado durante a seleção de perfil/unidade: {e}", exc_info=True)
+            logger.error("Erro inesperado durante a seleção de perfil/unidade: %s", e, exc_info=True)
             return False
 
     async def select_enfermeiro_and_unidade(self):
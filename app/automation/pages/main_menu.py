@@ -8,6 +8,7 @@ import time # Ainda usaremos time.sleep para pausas longas onde não há um elem
 from playwright._impl._errors import TimeoutError # Importa TimeoutError para capturar específico
 import json
 from app.core.app_config import AppConfig
+from app.automation.pages.selector_registry import SelectorRegistry
 
 class MainMenu(BasePage):
     """
@@ -34,6 +35,8 @@ class MainMenu(BasePage):
     # Seletor genérico para itens desta lista (pode ser '.x-menu-item', '.dropdown-item', etc.)
     _TYPE_FICHA_OPTIONS_SELECTOR = '.alguma-classe-do-item-de-menu' # Placeholder
     _FINALIZE_RECORDS_BUTTON_SELECTOR = 'button:has-text("Finalizar registros")'
+    # Campo que indica o formulário do registro aberto (mesmo XPath do CPF/CNS em CommonForms)
+    _RECORD_FORM_READY_XPATH = '//label[contains(text(), "CPF / CNS do cidadão")]/following-sibling::input'
 
     # --- NOVOS SELETORES PARA CAPTURAR INFORMAÇÕES DO USUÁRIO E UBS ---
     _USER_NAME_SELECTOR = 'div.css-vy5qqd p.css-1ejlzhz' # Selector para o nome do profissional
@@ -54,14 +57,14 @@ class MainMenu(BasePage):
         center_x = page_width // 2
         center_y = page_height // 2
 
-        logger.debug(f"Clicando no centro da tela ({center_x}, {center_y}) para {step_description}...")
+        logger.debug("Clicando no centro da tela (%s, %s) para %s...", center_x, center_y, step_description)
         try:
              await self._page.mouse.move(center_x, center_y)
              await self._page.mouse.click(center_x, center_y)
-             logger.debug(f"Clique no centro da tela realizado para {step_description}.")
+             logger.debug("Clique no centro da tela realizado para %s.", step_description)
              await asyncio.sleep(0.5) # Pequena pausa após o clique
         except Exception as e:
-             logger.warning(f"Falha ao clicar no centro da tela para {step_description}: {e}")
+             logger.warning("Falha ao clicar no centro da tela para %s: %s", step_description, e)
              # Esta falha não é crítica, apenas loga e continua.
 
     async def _perform_menu_navigation_steps(self, target_item_selector: str, target_item_desc: str) -> bool:
@@ -71,7 +74,7 @@ class MainMenu(BasePage):
          Retorna True se bem-sucedido, False caso contrário. Não chama o handler em caso de falha.
          """
          try:
-             logger.debug(f"Executando passos internos de navegação do menu lateral para {target_item_desc}...")
+             logger.debug("Executando passos internos de navegação do menu lateral para %s...", target_item_desc)
              cds_item_locator = self._page.locator(self._CDS_MENU_ITEM_SELECTOR)
              await cds_item_locator.wait_for(state="visible", timeout=5000)
              await self._safe_click(cds_item_locator, f"Item Menu Lateral CDS (antes de {target_item_desc})")
@@ -81,11 +84,11 @@ class MainMenu(BasePage):
              await target_item_locator.wait_for(state="visible", timeout=5000)
              await self._safe_click(target_item_locator, target_item_desc)
 
-             logger.debug(f"Passos internos de navegação do menu lateral para {target_item_desc} bem-sucedidos.")
+             logger.debug("Passos internos de navegação do menu lateral para %s bem-sucedidos.", target_item_desc)
              return True # Sucesso
 
          except Exception as e:
-              logger.warning(f"Falha nos passos internos de navegação do menu lateral para {target_item_desc}: {e}")
+              logger.warning("Falha nos passos internos de navegação do menu lateral para %s: %s", target_item_desc, e)
               return False
 
 
@@ -95,7 +98,7 @@ class MainMenu(BasePage):
          Assume que o robô ESTÁ NA TELA "Lista de atendimentos" e o menu lateral está fechado.
          Chama o handler se falhar.
          """
-         logger.info(f"Clicando no botão 'Adicionar' e selecionando '{option_desc}'.")
+         logger.info("Clicando no botão 'Adicionar' e selecionando '%s'.", option_desc)
          try:
              # Clicar no botão "Adicionar" na Lista de Atendimentos
              add_button_locator = self._page.locator(self._ADD_BUTTON_IN_FICHA_SELECTOR) # Usamos o seletor genérico para "Adicionar"
@@ -109,7 +112,7 @@ class MainMenu(BasePage):
              await self._safe_click(option_locator, f"Opção '{option_desc}' na lista de tipos de ficha")
              await asyncio.sleep(2) # Espera o formulário carregar dentro do iframe
 
-             logger.debug(f"Seleção do tipo de ficha '{option_desc}' bem-sucedida.")
+             logger.debug("Seleção do tipo de ficha '%s' bem-sucedida.", option_desc)
 
          except Exception as e:
              await self._handler.handle_error(e, step_description=f"Falha ao clicar 'Adicionar' ou selecionar '{option_desc}'.")
@@ -130,8 +133,8 @@ class MainMenu(BasePage):
         # --- Estratégia Única: Acessar o menu lateral que deve estar sempre visível ---
         logger.debug("Tentando estratégia de hover para abrir menu lateral...")
         try:
-            menu_container_locator = self._page.locator(self._MENU_LATERAL_CONTAINER_SELECTOR)
-            await menu_container_locator.wait_for(state="visible", timeout=5000) # Espera o menu lateral estar escondido
+            # O contêiner é resolvido pelo SelectorRegistry (a classe css-* gerada muda a cada versão do PEC)
+            await SelectorRegistry.get().resolve(self._page, "menu.lateral", timeout=5000)
             logger.debug("Contêiner do menu lateral visível. Clicando nos itens...")
 
             # Executa os passos internos de navegação do menu lateral (CDS -> Atendimento Individual)
@@ -145,7 +148,7 @@ class MainMenu(BasePage):
 
         except Exception as e:
             # Se a navegação no menu lateral falhar, loga e levanta erro.
-            logger.error(f"Falha na navegação do menu lateral para Atendimento Individual: {e}.")
+            logger.error("Falha na navegação do menu lateral para Atendimento Individual: %s.", e)
             await self._handler.handle_error(e, step_description="Navegação para formulário de Atendimento Individual (Menu Lateral).")
             raise AutomationError(f"Navegação inicial para a tela da ficha falhou (menu lateral inacessível): {e}") from e
 
@@ -184,8 +187,7 @@ class MainMenu(BasePage):
         # --- Estratégia Única: Acessar o menu lateral que deve estar sempre visível ---
         logger.debug("Tentando acessar o menu lateral que deve estar sempre visível (Procedimentos).")
         try:
-            menu_container_locator = self._page.locator(self._MENU_LATERAL_CONTAINER_SELECTOR)
-            await menu_container_locator.wait_for(state="visible", timeout=10000)
+            await SelectorRegistry.get().resolve(self._page, "menu.lateral", timeout=10000)
             logger.debug("Contêiner do menu lateral visível (Procedimentos). Prosseguindo...")
 
             menu_navigation_successful = await self._perform_menu_navigation_steps(
@@ -196,7 +198,7 @@ class MainMenu(BasePage):
                  logger.debug("Navegação do menu lateral bem-sucedida (Procedimentos).")
 
         except Exception as e:
-            logger.error(f"Falha na navegação do menu lateral para Procedimentos: {e}.")
+            logger.error("Falha na navegação do menu lateral para Procedimentos: %s.", e)
             await self._handler.handle_error(e, step_description="Navegação para formulário de Procedimentos (Menu Lateral).")
             raise AutomationError(f"Navegação inicial para a tela da ficha (Procedimentos) falhou (menu lateral inacessível): {e}") from e
 
@@ -310,8 +312,7 @@ class MainMenu(BasePage):
         menu_navigation_successful = False
 
         try:
-            menu_container_locator = self._page.locator(self._MENU_LATERAL_CONTAINER_SELECTOR)
-            await menu_container_locator.wait_for(state="visible", timeout=10000)
+            await SelectorRegistry.get().resolve(self._page, "menu.lateral", timeout=10000)
             logger.debug("Contêiner do menu lateral visível. Clicando nos itens do ACS...")
 
             # Usa o seletor do menu ACS
@@ -323,7 +324,7 @@ class MainMenu(BasePage):
                 logger.debug("Navegação do menu lateral para Visita Domiciliar bem-sucedida.")
 
         except Exception as e:
-            logger.error(f"Falha na navegação do menu lateral para Visita Domiciliar do ACS: {e}.")
+            logger.error("Falha na navegação do menu lateral para Visita Domiciliar do ACS: %s.", e)
             await self._handler.handle_error(e, step_description="Navegação para formulário de Visita Domiciliar (Menu Lateral).")
             raise AutomationError(f"Navegação inicial para a ficha de Visita Domiciliar falhou (menu lateral inacessível): {e}") from e
 
@@ -358,6 +359,24 @@ class MainMenu(BasePage):
          finalize_button_locator = iframe_frame.locator(self._FINALIZE_RECORDS_BUTTON_SELECTOR)
          logger.info("Clicando no botão 'Finalizar registros' dentro do iframe.")
          await self._safe_click(finalize_button_locator, "Botão 'Finalizar registros' no Iframe")
+         # A ficha fecha quando o lote é gravado; um message-box de sucesso também conta
+         await self._wait_for_commit(iframe_frame, finalize_button_locator, "Finalizar registros", success_text="sucesso")
+
+    async def is_finalize_pending(self, iframe_frame: Locator, timeout: int = None) -> bool:
+         """True se o botão 'Finalizar registros' continua visível depois de 'timeout' ms (o lote ainda não foi gravado)."""
+         finalize_button_locator = iframe_frame.locator(self._FINALIZE_RECORDS_BUTTON_SELECTOR).first
+         self._roundtrips.hit("wait")
+         try:
+             await finalize_button_locator.wait_for(state="hidden", timeout=timeout or self._COMMIT_TIMEOUT)
+             return False
+         except Exception:
+             return True
+
+    async def wait_for_record_form(self, iframe_frame: Locator):
+         """Espera o formulário do próximo registro abrir após 'Adicionar' (campo CPF/CNS visível)."""
+         record_field_locator = iframe_frame.locator(self._RECORD_FORM_READY_XPATH).first
+         await self._safe_wait_for_locator(record_field_locator, state="visible", timeout=10000,
+                                           step_description="Formulário do registro aberto após 'Adicionar'")
 
     async def get_and_save_user_info(self):
         """
@@ -370,26 +389,23 @@ class MainMenu(BasePage):
 
         try:
             # Capturar Nome do Profissional
-            user_name_locator = self._page.locator(self._USER_NAME_SELECTOR)
-            # Use _safe_wait_for_locator para aguardar o elemento
-            await self._safe_wait_for_locator(user_name_locator, timeout=10000, step_description="Nome do Profissional")
+            # Os seletores css-* são hashes gerados: resolvemos pelos candidatos do SelectorRegistry
+            user_name_locator = await self._safe_registry_locator(self._page, "usuario.nome_profissional", "Nome do Profissional")
             user_name = await user_name_locator.inner_text()
             user_name = user_name.strip()
-            logger.info(f"Nome do Profissional capturado: '{user_name}'")
+            logger.info("Nome do Profissional capturado: '%s'", user_name)
 
             # Capturar Nome Completo da UBS (e.g., Unidade Basica de Saude da Familia Acude dos Pinheiros)
-            ubs_name_locator = self._page.locator(self._UBS_NAME_SELECTOR)
-            await self._safe_wait_for_locator(ubs_name_locator, timeout=10000, step_description="Nome Completo da UBS")
+            ubs_name_locator = await self._safe_registry_locator(self._page, "usuario.nome_ubs", "Nome Completo da UBS")
             ubs_name = await ubs_name_locator.inner_text()
             ubs_name = ubs_name.strip()
-            logger.info(f"Nome completo da UBS capturado: '{ubs_name}'")
+            logger.info("Nome completo da UBS capturado: '%s'", ubs_name)
 
             # Capturar Código/Nome Curto da UBS (OPCIONAL)
-            ubs_code_locator = self._page.locator(self._UBS_CODE_SELECTOR)
             try:
-                await ubs_code_locator.wait_for(state="visible", timeout=3000)
+                ubs_code_locator = await SelectorRegistry.get().resolve(self._page, "usuario.codigo_ubs", timeout=3000)
                 ubs_code = (await ubs_code_locator.inner_text()).strip()
-                logger.info(f"Código/Nome curto da UBS capturado: '{ubs_code}'")
+                logger.info("Código/Nome curto da UBS capturado: '%s'", ubs_code)
             except TimeoutError:
                 # Se não achou o "curto", usa o nome completo (se existir); senão, vazio
                 ubs_code = ubs_name if ubs_name not in (None, "", "Não encontrada") else ""
@@ -403,7 +419,7 @@ class MainMenu(BasePage):
             # Se um _safe_X lançou essas exceções, re-lança para ser tratado no nível da BaseTask
             raise
         except Exception as e:
-            logger.error(f"Erro inesperado ao capturar informações do usuário/UBS: {e}", exc_info=True)
+            logger.error("Erro inesperado ao capturar informações do usuário/UBS: %s", e, exc_info=True)
             # Chama o handler. Se o usuário clicar 'continuar', re-lança AutomationError para que BaseTask retente.
             user_action = await self._handler.handle_error(e, step_description="Capturar nome do profissional/UBS.")
             if user_action == "continue":
@@ -425,9 +441,9 @@ class MainMenu(BasePage):
         try:
             with open(file_path, 'w', encoding='utf-8') as f:
                 json.dump(info_data, f, ensure_ascii=False, indent=4)
-            logger.info(f"Informações do usuário e UBS salvas com sucesso em '{file_path}'.")
+            logger.info("Informações do usuário e UBS salvas com sucesso em '%s'.", file_path)
         except Exception as e:
-            logger.critical(f"Erro ao salvar informações do usuário e UBS em JSON: {e}", exc_info=True)
+            logger.critical("Erro ao salvar informações do usuário e UBS em JSON: %s", e, exc_info=True)
             # Este erro é crítico para a persistência. Não há como retentar facilmente aqui.
             raise AutomationError(f"Falha crítica ao salvar name_UBS.json: {e}") from e
     # --- FIM NOVO MÉTODO ---
@@ -8,6 +8,7 @@ import re # Pode ser útil para procurar labels por texto parcial ou case-insens
 # from app.automation.pages.atendimento_form import AtendimentoForm # Importa AtendimentoForm
 from app.core.utils import normalize_text_for_selection
 import asyncio
+import logging
 
 class ProcedimentoForm(BasePage):
     """
@@ -61,8 +62,8 @@ class ProcedimentoForm(BasePage):
         
 
     async def fill_sigtap_code(self, iframe_frame: Locator, sigtap_code: str):
-        logger.info(f"Preenchendo campo 'Código do SIGTAP' com: {sigtap_code}")
-        sigtap_field_locator = iframe_frame.locator(self._SIGTAP_FIELD_XPATH)
+        logger.info("Preenchendo campo 'Código do SIGTAP' com: %s", sigtap_code)
+        sigtap_field_locator = await self._cached_locator(iframe_frame, "procedimento_sigtap", self._SIGTAP_FIELD_XPATH)
 
         try:
             # ** 1. PREENCHER USANDO _safe_fill_simule (digitação lenta) **
@@ -89,22 +90,24 @@ class ProcedimentoForm(BasePage):
             # elif popup_status == "error":
             #     logger.warning("Erro ao tratar popup de alerta SIGTAP.")
 
-            logger.info(f"Código SIGTAP '{sigtap_code}' selecionado com sucesso.")
+            logger.info("Código SIGTAP '%s' selecionado com sucesso.", sigtap_code)
 
         except TimeoutError as e:
             # Captura TimeoutError se a sugestão EXATA não aparecer.
-            html_dump = await iframe_frame.content()
-            logger.error(f"Erro ao localizar sugestão para SIGTAP '{sigtap_code}'. Timeout de 7s excedido. DOM parcial:\n{html_dump[:3000]}")
+            logger.error("Erro ao localizar sugestão para SIGTAP '%s'. Timeout de 7s excedido.", sigtap_code)
+            if logger.isEnabledFor(logging.DEBUG): # O DOM só é lido (ida e volta ao navegador) e gravado em DEBUG
+                html_dump = await iframe_frame.content()
+                logger.debug("DOM parcial:\n%s", html_dump[:3000])
             raise AutomationError(f"Timeout ao localizar sugestão do SIGTAP '{sigtap_code}'.") from e
 
         except Exception as e:
-            logger.error(f"Erro ao preencher e selecionar Código do SIGTAP '{sigtap_code}': {e}", exc_info=True)
+            logger.error("Erro ao preencher e selecionar Código do SIGTAP '%s': %s", sigtap_code, e, exc_info=True)
             raise AutomationError(f"Falha ao preencher/selecionar Código do SIGTAP '{sigtap_code}'.") from e
 
 
     async def fill_outros_sia_exame(self, iframe_frame: Locator, exame_code_or_text: str):
         """Preenche o campo Exame/Procedimento (Outros SIA) e seleciona na busca (Saúde Sexual)."""
-        logger.info(f"Preenchendo campo 'Exame/Procedimento (Outros SIA)' com: {exame_code_or_text}")
+        logger.info("Preenchendo campo 'Exame/Procedimento (Outros SIA)' com: %s", exame_code_or_text)
         exame_field_locator = iframe_frame.locator(self._OUTROS_SIA_EXAME_FIELD_XPATH)
         await self._safe_fill(exame_field_locator, exame_code_or_text, step_description="Campo Exame/Procedimento (Outros SIA)")
         await asyncio.sleep(2) # Espera para a lista de busca aparecer
@@ -120,10 +123,10 @@ class ProcedimentoForm(BasePage):
          """Seleciona o status (S/N) após escolher o Exame/Procedimento (Outros SIA)."""
          # Assume que o status desejado é "S" como no seu código original
          if status.upper() != "S":
-              logger.warning(f"Status diferente de 'S' solicitado para Outros SIA ({status}). Apenas 'S' é suportado nesta função.")
+              logger.warning("Status diferente de 'S' solicitado para Outros SIA (%s). Apenas 'S' é suportado nesta função.", status)
               return
 
-         logger.info(f"Selecionando Status '{status}' para Outros SIA.")
+         logger.info("Selecionando Status '%s' para Outros SIA.", status)
          # Encontra o container de status
          status_container_locator = iframe_frame.locator(self._OUTROS_SIA_STATUS_CONTAINER_SELECTOR)
          # Encontra o rádio 'S' dentro do container e clica no label associado
@@ -147,42 +150,14 @@ class ProcedimentoForm(BasePage):
         """Clica no botão 'Confirmar' da ficha de Procedimentos."""
         # Seletor para o botão Confirmar da ficha de Procedimentos (PEID no seu código)
         confirm_button_locator = iframe_frame.locator('div[peid="FichaProcedimentosDetailChildViewImpl.Confirmar"] button:has-text("Confirmar")')
+        grid_rows_before = await self._count_lot_grid_rows(iframe_frame)
         logger.info("Clicando no botão 'Confirmar' de Procedimentos.")
         await self._safe_click(confirm_button_locator, step_description="Botão 'Confirmar' Procedimentos")
 
-        # Lida com o alerta de "Campos duplicados" (baseado no seu button_loop_confir_Proced)
-        await self._handle_duplicate_fields_alert(self._page) # Alerta pode aparecer no contexto principal
-
-    async def _handle_duplicate_fields_alert(self, page_or_frame: Page | Locator):
-         """Lida com o popup de alerta 'Campos duplicados' que pode aparecer."""
-         alert_container_locator = page_or_frame.locator('div[peid="message-box"]') # Reutiliza o seletor do alerta genérico
-         ok_button_locator = alert_container_locator.locator('button:has-text("OK")')
-
-         logger.debug("Verificando por popup 'Campos duplicados'...")
-         try:
-             # Espera um curto período pela visibilidade do contêiner do alerta E pelo texto "Campos duplicados" dentro dele
-             await alert_container_locator.filter(has_text="Campos duplicados").wait_for(state="visible", timeout=3000)
-             logger.info("Popup 'Campos duplicados' encontrado. Clicando em 'OK'.")
-             await self._safe_click(ok_button_locator, step_description="Botão 'OK' no popup 'Campos duplicados'")
-             await alert_container_locator.wait_for(state="hidden", timeout=3000) # Espera o popup desaparecer
-             logger.info("Popup 'Campos duplicados' fechado.")
-
-             # IMPORTANTE: No seu código original, se aparecia "Campos duplicados", ele tentava CLICAR NO CONFIRMAR novamente.
-             # Isso é uma lógica de RETENTATIVA APÓS ERRO. Esta lógica deve estar no TaskRunner,
-             # que é quem chama o click_confirm_button e captura a exceção (se _safe_click falhar)
-             # ou lida com o retorno do handle_error.
-             # Se _handle_duplicate_fields_alert for chamado *dentro* do _safe_click,
-             # e o _safe_click falhar na primeira vez (por causa do popup bloqueando a interação,
-             # mas ele não é um erro de elemento não encontrado), então o handle_error é chamado,
-             # o callback é chamado. Se o usuário clica em 'Continuar', o handle_error retorna,
-             # e o _safe_click original tenta novamente (o que pode ainda falhar se o popup não sumiu ou outro erro ocorreu).
-             # Uma abordagem MELHOR é o TaskRunner capturar a exceção (que foi tratada pelo handler
-             # e o usuário clicou 'Continuar'), e o TaskRunner decidir se tenta o passo novamente.
-             # POR ORA, a lógica de retentar o Confirmar após "Campos Duplicados" NÃO está aqui,
-             # ela precisará ser adicionada no TaskRunner que chama este método.
-
-         except Exception: # Captura TimeoutError se não aparecer ou erro ao clicar/fechar
-             logger.debug("Nenhum popup 'Campos duplicados' encontrado.")
+        # Retorna assim que o formulário fecha. O alerta de "Campos duplicados" (aparece, por exemplo, quando
+        # um item SIGTAP é adicionado de novo numa retentativa) é fechado com OK e o fluxo segue, como antes.
+        await self._wait_for_commit(iframe_frame, confirm_button_locator, "Confirmar Procedimentos", grid_rows_before,
+                                    dismiss_text="Campos duplicados")
 
     async def _select_dropdown_option(self, locator, step_description=""):
         await self._safe_press(locator, 'ArrowDown', step_description=f"{step_description} - ArrowDown")
@@ -193,7 +168,7 @@ class ProcedimentoForm(BasePage):
     async def select_exame_do_pe_diabetico(self, iframe_frame: Locator):
         """Seleciona o checkbox de 'Exame do pé diabético' na seção Procedimentos / Pequenas cirurgias"""
         try:
-            logger.info(f"Selecionando checkbox: '{self._EXAME_PE_DIABETICO_TEXT}' na seção 'Procedimentos / Pequenas cirurgias'.")
+            logger.info("Selecionando checkbox: '%s' na seção 'Procedimentos / Pequenas cirurgias'.", self._EXAME_PE_DIABETICO_TEXT)
 
             # Aguarda o contêiner da seção ficar visível
             container_locator = iframe_frame.locator(self._PEQUENAS_CIRURGIAS_CONTAINER_XPATH)
@@ -208,7 +183,7 @@ class ProcedimentoForm(BasePage):
                 label = all_labels.nth(i)
                 label_text = (await label.inner_text()).strip().lower()
                 if "exame do pé diabético" in label_text or "exame do pe diabetico" in label_text:
-                    logger.debug(f"Label encontrado: '{label_text}'. Clicando...")
+                    logger.debug("Label encontrado: '%s'. Clicando...", label_text)
                     await self._safe_click(label, f"Label Checkbox Exame: {label_text}")
                     return
 
@@ -216,13 +191,13 @@ class ProcedimentoForm(BasePage):
             raise AutomationError(f"'{self._EXAME_PE_DIABETICO_TEXT}' não encontrado na lista.")
 
         except Exception as e:
-            logger.error(f"Erro durante seleção do checkbox '{self._EXAME_PE_DIABETICO_TEXT}': {e}", exc_info=True)
+            logger.error("Erro durante seleção do checkbox '%s': %s", self._EXAME_PE_DIABETICO_TEXT, e, exc_info=True)
             raise
 
     async def select_exame_do_colo_uterino(self, iframe_frame: Locator):
         """Seleciona o checkbox de 'Coleta de citopatológico de colo uterino' na seção Procedimentos / Pequenas cirurgias"""
         try:
-            logger.info(f"Selecionando checkbox: '{self._EXAME_DE_COLO_UTERINO_TEXT}' na seção 'Procedimentos / Pequenas cirurgias'.")
+            logger.info("Selecionando checkbox: '%s' na seção 'Procedimentos / Pequenas cirurgias'.", self._EXAME_DE_COLO_UTERINO_TEXT)
 
             # Aguarda o contêiner da seção ficar visível
             container_locator = iframe_frame.locator(self._PEQUENAS_CIRURGIAS_CONTAINER_XPATH)
@@ -237,7 +212,7 @@ class ProcedimentoForm(BasePage):
                 label = all_labels.nth(i)
                 label_text = (await label.inner_text()).strip().lower()
                 if "coleta de citopatológico de colo uterino" in label_text or "coleta de citopatológico de colo uterino" in label_text:
-                    logger.debug(f"Label encontrado: '{label_text}'. Clicando...")
+                    logger.debug("Label encontrado: '%s'. Clicando...", label_text)
                     await self._safe_click(label, f"Label Checkbox Exame: {label_text}")
                     return
 
@@ -245,7 +220,7 @@ class ProcedimentoForm(BasePage):
             raise AutomationError(f"'{self._EXAME_DE_COLO_UTERINO_TEXT}' não encontrado na lista.")
 
         except Exception as e:
-            logger.error(f"Erro durante seleção do checkbox '{self._EXAME_DE_COLO_UTERINO_TEXT}': {e}", exc_info=True)
+            logger.error("Erro durante seleção do checkbox '%s': %s", self._EXAME_DE_COLO_UTERINO_TEXT, e, exc_info=True)
             raise
 
 
@@ -0,0 +1,137 @@
+# Arquivo: app/automation/pages/selector_cache.py
+import itertools
+import weakref
+from playwright.async_api import Page, Locator
+from app.core.logger import logger
+
+
+class SelectorCache:
+    """
+    Cache de seletores resolvidos por ficha.
+
+    Os campos da ficha são localizados por XPaths de texto (ex: '//label[contains(text(), "CPF / CNS do cidadão")]...'),
+    que são caros de avaliar em um DOM grande do ExtJS. Na primeira vez que um campo lógico é resolvido,
+    o elemento recebe um atributo 'data-botcds-key' com um id gerado; nas linhas seguintes usamos apenas
+    o seletor de atributo, sem reavaliar o XPath.
+
+    Um MutationObserver instalado no documento do iframe avisa o Python (via expose_binding) quando algum
+    elemento marcado é removido do DOM (formulário reconstruído). Só então a entrada é descartada.
+    Uma navegação do frame também limpa o cache inteiro.
+    """
+    _instances = weakref.WeakKeyDictionary() # Page -> SelectorCache
+
+    _ATTR = "data-botcds-key"
+    _BINDING_NAME = "__botcdsSelectorInvalidated"
+    _RESOLVE_TIMEOUT = 10000
+
+    _TAG_SCRIPT = """
+    (el, args) => {
+        el.setAttribute(args.attr, args.value);
+        const doc = el.ownerDocument;
+        const win = doc.defaultView;
+        if (!win.__botcdsSelectorObserver) {
+            const observer = new MutationObserver((mutations) => {
+                const lost = new Set();
+                for (const m of mutations) {
+                    for (const n of m.removedNodes) {
+                        if (n.nodeType !== 1) continue;
+                        if (n.hasAttribute(args.attr)) lost.add(n.getAttribute(args.attr));
+                        n.querySelectorAll(`[${args.attr}]`).forEach(x => lost.add(x.getAttribute(args.attr)));
+                    }
+                }
+                if (!lost.size) return;
+                // Elementos apenas movidos (removidos e reinseridos) continuam válidos
+                const gone = [...lost].filter(v => !doc.querySelector(`[${args.attr}="${v}"]`));
+                if (gone.length && typeof win[args.binding] === 'function') win[args.binding](gone);
+            });
+            observer.observe(doc.body, {childList: true, subtree: true});
+            win.__botcdsSelectorObserver = observer;
+        }
+        return true;
+    }
+    """
+
+    def __init__(self, page: Page):
+        self._page = page
+        self._entries = {} # chave lógica -> id gerado (valor do atributo)
+        self._keys_by_id = {} # id gerado -> chave lógica
+        self._id_counter = itertools.count(1)
+        self._binding_installed = False
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def for_page(cls, page: Page) -> "SelectorCache":
+        """Retorna o cache associado à página (cria um se ainda não existir)."""
+        cache = cls._instances.get(page)
+        if cache is None:
+            cache = cls(page)
+            cls._instances[page] = cache
+        return cache
+
+    async def _ensure_binding(self):
+        """Expõe a função de invalidação para todos os frames (inclusive o iframe do e-SUS)."""
+        if self._binding_installed:
+            return
+        self._binding_installed = True
+        try:
+            await self._page.expose_binding(self._BINDING_NAME, self._on_invalidated)
+            self._page.on("framenavigated", self._on_frame_navigated)
+        except Exception as e:
+            # Sem o binding o cache ainda funciona, mas a invalidação depende de clear() explícito.
+            logger.warning("Não foi possível instalar a invalidação do cache de seletores: %s", e)
+
+    def _on_invalidated(self, source, generated_ids):
+        for generated_id in generated_ids:
+            key = self._keys_by_id.pop(generated_id, None)
+            if key is not None:
+                self._entries.pop(key, None)
+                logger.debug("Cache de seletores: '%s' invalidado (elemento removido do DOM).", key)
+
+    def _on_frame_navigated(self, frame):
+        if self._entries:
+            logger.debug("Cache de seletores limpo após navegação do frame '%s'.", frame.name or frame.url)
+            self.clear()
+
+    def clear(self):
+        """Descarta todas as entradas (ex: ao abrir uma nova ficha)."""
+        self._entries.clear()
+        self._keys_by_id.clear()
+
+    def get(self, root: Locator, key: str) -> Locator | None:
+        """Retorna o locator já resolvido para 'key', ou None se não estiver no cache."""
+        generated_id = self._entries.get(key)
+        if generated_id is None:
+            return None
+        self.hits += 1
+        return root.locator(f'[{self._ATTR}="{generated_id}"]')
+
+    async def remember(self, root: Locator, key: str, locator: Locator) -> Locator:
+        """
+        Marca o elemento apontado por 'locator' com um id gerado e guarda a chave no cache.
+        Retorna o locator por atributo. Se a marcação falhar, retorna o próprio 'locator'.
+        """
+        await self._ensure_binding()
+        generated_id = f"k{next(self._id_counter)}"
+        try:
+            await locator.evaluate(
+                self._TAG_SCRIPT,
+                {"attr": self._ATTR, "value": generated_id, "binding": self._BINDING_NAME},
+                timeout=self._RESOLVE_TIMEOUT,
+            )
+        except Exception as e:
+            # Deixa a primitiva _safe_* tratar o erro com o seletor original
+            logger.debug("Cache de seletores: não foi possível resolver '%s': %s", key, e)
+            return locator
+        self._entries[key] = generated_id
+        self._keys_by_id[generated_id] = key
+        return root.locator(f'[{self._ATTR}="{generated_id}"]')
+
+    async def resolve(self, root: Locator, key: str, selector: str) -> Locator:
+        """Retorna o locator do campo lógico 'key', avaliando 'selector' apenas na primeira vez."""
+        cached = self.get(root, key)
+        if cached is not None:
+            return cached
+        self.misses += 1
+        logger.debug("Cache de seletores: resolvendo '%s' (%s).", key, selector)
+        return await self.remember(root, key, root.locator(selector).first)
@@ -0,0 +1,171 @@
+# Arquivo: app/automation/pages/selector_registry.py
+import json
+import sys
+from pathlib import Path
+from playwright.async_api import Locator
+from app.core.logger import logger
+from app.core.app_config import AppConfig
+
+
+# Candidatos para cada elemento lógico, do mais específico para o mais genérico.
+# A ordem aqui é apenas a inicial: o registro promove o candidato que funcionar
+# e salva a ordem por versão do PEC em selector_ranking.json.
+DEFAULT_CANDIDATES = {
+    "login.usuario": [
+        '//*[@id="root"]/div/div[3]/div[1]/div/div[2]/div/form/div/div[1]/div/div[1]/div/div/input', # XPath absoluto original
+        'form input[name="username"]', # Nome do campo no formulário
+        'form input[autocomplete="username"]',
+        'form label:has-text("CPF") >> xpath=following::input[1]', # Texto do label
+        'form input:not([type="password"]):not([type="hidden"]) >> nth=0', # Estrutural
+    ],
+    "login.senha": [
+        '//*[@id="root"]/div/div[3]/div[1]/div/div[2]/div/form/div/div[2]/div/div/div/div[1]/div/div/input',
+        'form input[name="password"]',
+        'form input[autocomplete="current-password"]',
+        'form label:has-text("Senha") >> xpath=following::input[1]',
+        'form input[type="password"]',
+    ],
+    "login.botao_acessar": [
+        '[data-cy="LoginForm.access-button"]',
+        'form button[type="submit"]',
+        'form button:has-text("Acessar")',
+    ],
+    "menu.lateral": [
+        'nav.css-1csmvn1', # Classe gerada (muda a cada versão do PEC)
+        'nav:has([data-cy^="SideMenu."])', # Contêiner que contém os itens data-cy do menu
+        'nav[aria-label*="menu" i]',
+        '[role="navigation"]',
+    ],
+    "usuario.nome_profissional": [
+        'div.css-vy5qqd p.css-1ejlzhz',
+        '[data-cy="HeaderUserInfo.nome"]',
+        'header [data-cy*="nome" i]',
+        'header button[aria-haspopup] p >> nth=0',
+    ],
+    "usuario.nome_ubs": [
+        'div.css-vy5qqd div.css-150qhdu p.css-qk00ku',
+        '[data-cy="HeaderUserInfo.unidade"]',
+        'header [data-cy*="unidade" i]',
+        'header button[aria-haspopup] p >> nth=1',
+    ],
+    "usuario.codigo_ubs": [
+        'div.css-vy5qqd div.css-glh0q2 p.css-qk00ku',
+        '[data-cy="HeaderUserInfo.equipe"]',
+        'header button[aria-haspopup] p >> nth=2',
+    ],
+}
+
+
+class SelectorRegistry:
+    """
+    Registro de seletores com candidatos ranqueados e auto-correção.
+
+    Cada elemento lógico (ex: 'login.usuario') tem uma lista de candidatos (data-cy, texto do label,
+    ARIA, estrutural). Na resolução, todos são combinados com Locator.or_() e aguardados em uma única
+    espera; o primeiro candidato da ordem atual que existir é usado. Se não for o primeiro da lista,
+    ele é promovido e a nova ordem é salva para a versão do PEC em uso (AppConfig.current_pec_version()).
+    Assim, após uma atualização do e-SUS, um seletor quebrado custa uma espera, não uma pausa manual.
+    """
+    if getattr(sys, 'frozen', False):
+        BASE_DIR = Path(sys.executable).parent
+    else:
+        BASE_DIR = Path(__file__).resolve().parents[3]
+
+    RANKING_FILE = BASE_DIR / "resources" / "config" / "selector_ranking.json"
+
+    _instance = None
+
+    def __init__(self, pec_version: str = None):
+        self.pec_version = pec_version or AppConfig.current_pec_version()
+        self._state = self._load_state()
+        self._ranking = self._initial_ranking()
+
+    @classmethod
+    def get(cls) -> "SelectorRegistry":
+        """Instância única do processo (o ranking é compartilhado entre as sessões)."""
+        if cls._instance is None or cls._instance.pec_version != AppConfig.current_pec_version():
+            cls._instance = cls()
+        return cls._instance
+
+    def _load_state(self) -> dict:
+        """Carrega o ranking salvo (todas as versões do PEC)."""
+        if not self.RANKING_FILE.exists():
+            return {}
+        try:
+            with open(self.RANKING_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            logger.error("Erro ao carregar ranking de seletores em %s: %s. Usando ordem padrão.", self.RANKING_FILE, e)
+            return {}
+
+    def _save_state(self):
+        self._state[self.pec_version] = self._ranking
+        try:
+            self.RANKING_FILE.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.RANKING_FILE, 'w', encoding='utf-8') as f:
+                json.dump(self._state, f, indent=4, ensure_ascii=False)
+        except IOError as e:
+            logger.error("Erro ao salvar ranking de seletores em %s: %s", self.RANKING_FILE, e)
+
+    def _initial_ranking(self) -> dict:
+        """
+        Ordem inicial para a versão atual: a salva para esta versão; senão a da última versão
+        conhecida (a melhor aposta após uma atualização); senão a ordem padrão.
+        Candidatos novos do DEFAULT_CANDIDATES entram no fim; removidos são descartados.
+        """
+        saved = self._state.get(self.pec_version)
+        if saved is None and self._state:
+            last_version = sorted(self._state.keys(), key=self._version_key)[-1]
+            saved = self._state[last_version]
+            logger.info("Sem ranking de seletores para o PEC %s. Partindo do ranking do PEC %s.", self.pec_version, last_version)
+        saved = saved or {}
+
+        ranking = {}
+        for name, defaults in DEFAULT_CANDIDATES.items():
+            ordered = [c for c in saved.get(name, []) if c in defaults]
+            ordered += [c for c in defaults if c not in ordered]
+            ranking[name] = ordered
+        return ranking
+
+    @staticmethod
+    def _version_key(version: str):
+        return [int(p) if p.isdigit() else 0 for p in version.replace("-", ".").split(".")]
+
+    def candidates(self, name: str) -> list:
+        if name not in self._ranking:
+            raise KeyError(f"Elemento lógico '{name}' não registrado no SelectorRegistry.")
+        return list(self._ranking[name])
+
+    def promote(self, name: str, selector: str):
+        """Move 'selector' para o topo do ranking de 'name' e persiste."""
+        ranked = self._ranking[name]
+        if ranked[0] == selector:
+            return
+        logger.warning("Seletor principal de '%s' falhou (%s). Promovendo '%s' para o PEC %s.", name, ranked[0], selector, self.pec_version)
+        ranked.remove(selector)
+        ranked.insert(0, selector)
+        self._save_state()
+
+    async def resolve(self, root, name: str, state: str = "visible", timeout: int = 10000) -> Locator:
+        """
+        Aguarda qualquer candidato de 'name' atingir 'state' dentro de 'root' (Page ou FrameLocator)
+        e retorna o locator do primeiro candidato (na ordem do ranking) que atende 'state' ('visible': um
+        nó visível; 'attached': um nó no DOM). Só esse candidato é promovido: um candidato melhor ranqueado
+        que só acha um nó oculto/antigo não volta nem vai para o ranking.
+        Levanta o TimeoutError do Playwright se nenhum candidato aparecer.
+        """
+        ranked = self.candidates(name)
+        combined = root.locator(ranked[0])
+        for selector in ranked[1:]:
+            combined = combined.or_(root.locator(selector))
+        await combined.first.wait_for(state=state, timeout=timeout)
+        if state not in ("visible", "attached"):
+            return root.locator(ranked[0]).first # 'hidden'/'detached': nenhum candidato a promover
+
+        for selector in ranked:
+            locator = root.locator(f"{selector} >> visible=true") if state == "visible" else root.locator(selector)
+            if await locator.count() > 0:
+                self.promote(name, selector)
+                return locator.first
+        # O elemento sumiu entre a espera e a contagem: devolve o principal para o chamador tratar.
+        return root.locator(ranked[0]).first
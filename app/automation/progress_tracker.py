@@ -0,0 +1,156 @@
+# Arquivo: app/automation/progress_tracker.py
+import time
+from collections import Counter, deque
+from datetime import datetime
+from app.core.app_config import AppConfig
+from app.automation.engine_metrics import EngineMetrics
+
+
+class ProgressTracker:
+    """
+    Progresso de uma sessão para o painel da GUI: linhas feitas/total, arquivo e data atuais, ritmo
+    (reg/min) nas últimas AppConfig.progress_window_rows linhas, previsão de término, pulos, erros e os
+    passos mais lentos dessas linhas. A BaseTask alimenta os eventos; o callback (sinal do Worker) recebe
+    um snapshot em dict no máximo a cada AppConfig.progress_update_interval_s, exceto nas mudanças de arquivo
+    e no fim, que sempre são enviadas. Os mesmos eventos alimentam o EngineMetrics (monitoramento externo).
+    Guarda também o tempo de todos os passos e os erros/pulos por classe da execução inteira, que a
+    BaseTask grava no RunHistory ao terminar.
+    """
+
+    def __init__(self, task_name: str):
+        self.task_name = task_name
+        self.callback = None # Recebe o snapshot (dict); chamado na thread do Worker
+        window = max(1, AppConfig.progress_window_rows)
+        self._finish_times = deque(maxlen=window + 1) # time.monotonic() das últimas linhas concluídas
+        self._row_steps = deque(maxlen=window) # {passo: segundos} das últimas linhas
+        self._current_steps = {}
+        self._last_emit = 0.0
+        self.total_rows = 0
+        self.done_rows = 0
+        self.skipped_rows = 0
+        self.errors = 0
+        self.total_files = 0
+        self.file_number = 0
+        self.current_file: str = None
+        self.current_date: str = None
+        self.status = "iniciando"
+        self.started = time.monotonic()
+        self.started_at = datetime.now()
+        self.run_rows = 0 # Linhas tratadas nesta execução (done_rows inclui as já aceitas em execuções anteriores)
+        self.step_durations = {} # passo -> [segundos] de toda a execução
+        self.errors_by_class = Counter()
+        self.skips_by_class = Counter()
+        self._metrics = EngineMetrics.get()
+
+    # --- Eventos da BaseTask ---
+
+    def start_run(self, total_rows: int, total_files: int):
+        self.total_rows = total_rows
+        self.total_files = total_files
+        self.status = "executando"
+        if self._metrics:
+            self._metrics.session_started(self.task_name)
+        self._emit(force=True)
+
+    def start_file(self, file_name: str, main_date: str, already_done: int = 0):
+        """Novo arquivo; 'already_done' são as linhas dele que o diário já registra como aceitas."""
+        if file_name != self.current_file:
+            self.file_number += 1
+            self.done_rows += already_done
+        self.current_file = file_name
+        self.current_date = main_date
+        self._emit(force=True)
+
+    def start_row(self):
+        self._current_steps = {}
+
+    def step_finished(self, name: str, seconds: float):
+        self._current_steps[name] = self._current_steps.get(name, 0.0) + seconds
+        self.step_durations.setdefault(name, []).append(seconds)
+        if self._metrics:
+            self._metrics.observe_step(self.task_name, name, seconds)
+
+    def error(self, error_class: str = None):
+        self.errors += 1
+        self.errors_by_class[error_class or "desconhecido"] += 1
+        if self._metrics:
+            self._metrics.row_error(self.task_name)
+        self._emit()
+
+    def finish_row(self, skipped: bool = False, skip_class: str = None):
+        self.done_rows += 1
+        self.run_rows += 1
+        if skipped:
+            self.skipped_rows += 1
+            self.skips_by_class[skip_class or "desconhecido"] += 1
+        self._finish_times.append(time.monotonic())
+        self._row_steps.append(self._current_steps)
+        self._current_steps = {}
+        if self._metrics:
+            self._metrics.row_finished(self.task_name, skipped, self.rows_per_minute, self.current_file)
+        self._emit()
+
+    def rewind_rows(self, count: int):
+        """Desconta 'count' linhas já contadas que serão refeitas (retomada após re-login)."""
+        count = max(0, min(count, self.run_rows))
+        self.done_rows -= count
+        self.run_rows -= count
+
+    def finish_run(self, status: str):
+        self.status = status
+        if self._metrics:
+            self._metrics.session_finished(self.task_name, status)
+        self._emit(force=True)
+
+    # --- Métricas ---
+
+    @property
+    def rows_per_minute(self) -> float:
+        if len(self._finish_times) < 2:
+            return 0.0
+        elapsed = self._finish_times[-1] - self._finish_times[0]
+        return (len(self._finish_times) - 1) / elapsed * 60 if elapsed > 0 else 0.0
+
+    @property
+    def eta_seconds(self) -> float | None:
+        rate = self.rows_per_minute
+        if not rate:
+            return None
+        return max(0, self.total_rows - self.done_rows) / rate * 60
+
+    def slowest_steps(self, limit: int = 5) -> list:
+        """[(passo, média em segundos)] dos passos mais lentos nas últimas linhas."""
+        totals, counts = {}, {}
+        for steps in self._row_steps:
+            for name, seconds in steps.items():
+                totals[name] = totals.get(name, 0.0) + seconds
+                counts[name] = counts.get(name, 0) + 1
+        averages = [(name, totals[name] / counts[name]) for name in totals]
+        return sorted(averages, key=lambda item: item[1], reverse=True)[:limit]
+
+    def snapshot(self) -> dict:
+        return {
+            "tarefa": self.task_name,
+            "status": self.status,
+            "linhas_feitas": self.done_rows,
+            "linhas_total": self.total_rows,
+            "arquivo": self.current_file,
+            "arquivo_numero": self.file_number,
+            "arquivos_total": self.total_files,
+            "data": self.current_date,
+            "registros_por_minuto": round(self.rows_per_minute, 1),
+            "eta_segundos": round(self.eta_seconds) if self.eta_seconds is not None else None,
+            "pulados": self.skipped_rows,
+            "erros": self.errors,
+            "decorrido_segundos": round(time.monotonic() - self.started),
+            "passos_lentos": [(name, round(seconds, 2)) for name, seconds in self.slowest_steps()],
+        }
+
+    def _emit(self, force: bool = False):
+        if self.callback is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_emit < AppConfig.progress_update_interval_s:
+            return
+        self._last_emit = now
+        self.callback(self.snapshot())
@@ -0,0 +1,239 @@
+# Arquivo: app/automation/recipes/compiler.py
+from dataclasses import dataclass, field
+from app.core.logger import logger
+
+
+class RecipeError(ValueError):
+    """Receita inválida (campo obrigatório ausente, primitiva desconhecida, coluna inválida...)."""
+    pass
+
+
+# Catálogo das primitivas de formulário que uma receita pode usar.
+# nome -> (atributo da página na BaseTask, método, recebe valor?, provoca re-renderização da ficha?)
+# "rerender" marca primitivas que fazem o ExtJS redesenhar parte do formulário (busca do cidadão,
+# inclusão de item em lista); só depois delas uma espera explícita faz sentido.
+PRIMITIVES = {
+    "common.select_period":                ("_common_forms", "select_period", True, False),
+    "common.fill_cpf_cns":                 ("_common_forms", "fill_cpf_cns", True, True),
+    "common.fill_date_of_birth":           ("_common_forms", "fill_date_of_birth", True, False),
+    "common.select_gender":                ("_common_forms", "select_gender_02", True, False),
+    "common.select_local_atendimento":     ("_common_forms", "select_local_atendimento_02", True, False),
+    "atendimento.select_tipo_atendimento": ("_atendimento_form", "select_tipo_atendimento", True, False),
+    "atendimento.select_tipo_atendimento_fixo": ("_atendimento_form", "select_tipo_atendimento_fixo", True, False),
+    "atendimento.select_condicao_avaliada": ("_atendimento_form", "select_condicao_avaliada", True, False),
+    "atendimento.fill_ciap":               ("_atendimento_form", "fill_ciap", True, True),
+    "atendimento.select_exame":            ("_atendimento_form", "select_exame", True, False),
+    "atendimento.fill_outros_exames_sigtap": ("_atendimento_form", "fill_outros_exames_sigtap", True, True),
+    "atendimento.select_conduta":          ("_atendimento_form", "select_conduta", True, False),
+    "atendimento.click_confirm_button":    ("_atendimento_form", "click_confirm_button", False, True),
+    "procedimento.fill_sigtap_code":       ("_procedimento_form", "fill_sigtap_code", True, True),
+    "procedimento.select_exame_do_pe_diabetico": ("_procedimento_form", "select_exame_do_pe_diabetico", False, True),
+    "procedimento.select_exame_do_colo_uterino": ("_procedimento_form", "select_exame_do_colo_uterino", False, True),
+    "procedimento.click_confirm_button":   ("_procedimento_form", "click_confirm_button", False, True),
+    "acs.fill_micro_area":                 ("_acs_form", "fill_micro_area", True, False),
+    "acs.select_gender":                   ("_acs_form", "select_gender_acs", True, False),
+    "acs.select_checkboxes_visita_hipertensao": ("_acs_form", "select_checkboxes_visita_hipertensao", False, False),
+    "acs.click_confirm_button":            ("_acs_form", "click_confirm_button_acs", False, True),
+}
+
+# Campos comuns do paciente, expandidos em passos normais (colunas 0 a 4 do CSV, como em _fill_common_patient_data)
+COMMON_PATIENT_STEPS = [
+    {"field": "periodo", "primitive": "common.select_period", "source": {"column": 0}},
+    {"field": "cpf_cns", "primitive": "common.fill_cpf_cns", "source": {"column": 1}},
+    {"field": "data_nascimento", "primitive": "common.fill_date_of_birth", "source": {"column": 2}},
+    {"field": "sexo", "primitive": "common.select_gender", "source": {"column": 3, "type": "int"}},
+    {"field": "local_atendimento", "primitive": "common.select_local_atendimento", "source": {"column": 4}},
+]
+
+AREAS = ("atendimento_individual", "procedimentos", "acs_visita_domiciliar")
+
+
+@dataclass
+class CompiledStep:
+    field: str
+    form_attr: str
+    method: str
+    takes_value: bool
+    rerender: bool
+    value_key: str = None # Chave no dicionário de valores lido da linha (None = primitiva sem valor)
+    wait_after: float = 0.0
+    optional: bool = False # Se o valor estiver vazio, o passo é pulado
+
+    def describe(self) -> str:
+        wait = f" +{self.wait_after:.1f}s" if self.wait_after else ""
+        return f"{self.field}: {self.form_attr}.{self.method}({self.value_key or ''}){wait}"
+
+
+@dataclass
+class StepPlan:
+    name: str
+    area: str
+    profile: str
+    steps: list
+    columns: dict # value_key -> (índice da coluna, tipo)
+    constants: dict # value_key -> valor fixo
+    finalize_wait: float = 0.0 # Pausa extra após 'Finalizar registros' (a finalização já é detectada)
+    optimizations: list = field(default_factory=list)
+
+    def read_row(self, row_data: list) -> dict:
+        """
+        Lê da linha, em uma única passada, todos os valores que o plano usa (colunas repetidas
+        são lidas uma vez só) e junta as constantes.
+        """
+        values = dict(self.constants)
+        for value_key, (column, value_type) in self.columns.items():
+            raw = row_data[column] if column < len(row_data) else None
+            if raw is None or (isinstance(raw, str) and not raw.strip()):
+                values[value_key] = None
+                continue
+            try:
+                values[value_key] = int(raw) if value_type == "int" else str(raw)
+            except (ValueError, TypeError):
+                logger.warning("Valor inválido para a coluna %s ('%s', esperado %s). Campo ignorado.", column, raw, value_type)
+                values[value_key] = None
+        return values
+
+    def describe(self) -> str:
+        lines = [f"Plano '{self.name}' ({self.area}, {len(self.steps)} passos):"]
+        lines += [f"  {i + 1}. {step.describe()}" for i, step in enumerate(self.steps)]
+        if self.optimizations:
+            lines.append("  Otimizações: " + "; ".join(self.optimizations))
+        return "\n".join(lines)
+
+
+def _parse_steps(recipe: dict) -> list:
+    """Valida e normaliza os passos da receita (incluindo a expansão dos campos comuns)."""
+    raw_steps = []
+    if recipe.get("common_fields") == "patient":
+        raw_steps += [dict(s) for s in COMMON_PATIENT_STEPS]
+    elif recipe.get("common_fields") not in (None, "none"):
+        raise RecipeError(f"common_fields desconhecido: {recipe.get('common_fields')}")
+    raw_steps += recipe.get("steps", [])
+    if not raw_steps:
+        raise RecipeError(f"Receita '{recipe.get('name')}' não tem passos.")
+
+    parsed = []
+    for index, raw in enumerate(raw_steps):
+        primitive = raw.get("primitive")
+        if primitive not in PRIMITIVES:
+            raise RecipeError(f"Passo {index + 1}: primitiva desconhecida '{primitive}'. Disponíveis: {', '.join(sorted(PRIMITIVES))}")
+        form_attr, method, takes_value, rerender = PRIMITIVES[primitive]
+        source = raw.get("source")
+        if takes_value and not source:
+            raise RecipeError(f"Passo {index + 1} ({primitive}): 'source' é obrigatório (column ou const).")
+        parsed.append({
+            "field": raw.get("field") or f"passo_{index + 1}",
+            "form_attr": form_attr, "method": method, "takes_value": takes_value,
+            "rerender": raw.get("rerender", rerender),
+            "source": source if takes_value else None,
+            "wait_after": float(raw.get("wait_after", 0) or 0),
+            "keep_wait": bool(raw.get("keep_wait", False)),
+            "reorderable": bool(raw.get("reorderable", False)),
+            "optional": bool(raw.get("optional", takes_value and "column" in (source or {}))),
+        })
+    return parsed
+
+
+def _reorder_to_avoid_rerender_stalls(steps: list, notes: list) -> list:
+    """
+    Dentro de cada bloco contínuo de passos marcados como 'reorderable', executa primeiro os que não
+    provocam re-renderização e por último os que provocam, para que cliques simples não fiquem
+    esperando o ExtJS redesenhar o formulário. Passos não reordenáveis funcionam como barreiras.
+    """
+    result, block = [], []
+
+    def flush_block():
+        ordered = [s for s in block if not s["rerender"]] + [s for s in block if s["rerender"]]
+        if [s["field"] for s in ordered] != [s["field"] for s in block]:
+            notes.append("reordenado: " + ", ".join(s["field"] for s in ordered))
+        result.extend(ordered)
+        block.clear()
+
+    for step in steps:
+        if step["reorderable"]:
+            block.append(step)
+        else:
+            flush_block()
+            result.append(step)
+    flush_block()
+    return result
+
+
+def _drop_redundant_waits(steps: list, notes: list):
+    """
+    As primitivas _safe_* já esperam o elemento ficar acionável, então uma pausa fixa só é útil depois
+    de um passo que re-renderiza a ficha. Remove as demais (a menos que 'keep_wait') e a pausa do
+    último passo (o BaseTask segue com 'Adicionar', que também espera o botão).
+    """
+    dropped = 0
+    for i, step in enumerate(steps):
+        if not step["wait_after"] or step["keep_wait"]:
+            continue
+        is_last = i == len(steps) - 1
+        if is_last or not step["rerender"]:
+            dropped += 1
+            step["wait_after"] = 0.0
+    if dropped:
+        notes.append(f"{dropped} pausa(s) redundante(s) removida(s)")
+
+
+def _merge_reads(steps: list, notes: list):
+    """Dá a cada coluna/constante uma única chave de leitura, compartilhada entre os passos."""
+    columns, constants, keys_by_source = {}, {}, {}
+    for step in steps:
+        source = step["source"]
+        if source is None:
+            step["value_key"] = None
+            continue
+        if "column" in source:
+            column = int(source["column"])
+            if column < 0:
+                raise RecipeError(f"Passo '{step['field']}': coluna inválida {column}.")
+            value_type = source.get("type", "str")
+            signature = ("column", column, value_type)
+            if signature not in keys_by_source:
+                keys_by_source[signature] = f"col{column}" + ("_int" if value_type == "int" else "")
+                columns[keys_by_source[signature]] = (column, value_type)
+        elif "const" in source:
+            signature = ("const", str(source["const"]))
+            if signature not in keys_by_source:
+                keys_by_source[signature] = f"const{len(constants)}"
+                constants[keys_by_source[signature]] = source["const"]
+        else:
+            raise RecipeError(f"Passo '{step['field']}': 'source' deve ter 'column' ou 'const'.")
+        step["value_key"] = keys_by_source[signature]
+    reads = sum(1 for s in steps if s["source"] and "column" in s["source"])
+    if reads > len(columns):
+        notes.append(f"{reads} leituras de coluna unificadas em {len(columns)}")
+    return columns, constants
+
+
+def compile_recipe(recipe: dict) -> StepPlan:
+    """Valida a receita e gera o plano de passos otimizado."""
+    name = recipe.get("name")
+    if not name:
+        raise RecipeError("Receita sem 'name'.")
+    area = recipe.get("area")
+    if area not in AREAS:
+        raise RecipeError(f"Receita '{name}': 'area' deve ser uma de {AREAS}.")
+
+    notes = []
+    steps = _parse_steps(recipe)
+    steps = _reorder_to_avoid_rerender_stalls(steps, notes)
+    _drop_redundant_waits(steps, notes)
+    columns, constants = _merge_reads(steps, notes)
+
+    plan = StepPlan(
+        name=name,
+        area=area,
+        profile=recipe.get("profile", "ENFERMEIRO"),
+        steps=[CompiledStep(field=s["field"], form_attr=s["form_attr"], method=s["method"],
+                            takes_value=s["takes_value"], rerender=s["rerender"], value_key=s["value_key"],
+                            wait_after=s["wait_after"], optional=s["optional"]) for s in steps],
+        columns=columns,
+        constants=constants,
+        finalize_wait=float(recipe.get("finalize_wait", 0)),
+        optimizations=notes,
+    )
+    logger.debug(plan.describe())
+    return plan
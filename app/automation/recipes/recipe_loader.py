@@ -0,0 +1,61 @@
+# Arquivo: app/automation/recipes/recipe_loader.py
+import json
+import sys
+from pathlib import Path
+from app.core.logger import logger
+from app.automation.recipes.compiler import compile_recipe, RecipeError, StepPlan
+
+# Diretório base do aplicativo (mesma lógica do AppConfig/FileManager)
+if getattr(sys, 'frozen', False):
+    BASE_DIR = Path(sys.executable).parent
+else:
+    BASE_DIR = Path(__file__).resolve().parents[3]
+
+RECIPES_DIR = BASE_DIR / "resources" / "recipes"
+
+
+def _read_recipe_file(path: Path) -> dict:
+    """Lê uma receita JSON (ou YAML, se o PyYAML estiver instalado)."""
+    if path.suffix.lower() == ".json":
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    try:
+        import yaml
+    except ImportError:
+        raise RecipeError(f"Receita '{path.name}' é YAML, mas o PyYAML não está instalado. Use JSON ou instale 'pyyaml'.")
+    with open(path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+
+def load_recipe_plans(recipes_dir: Path = None) -> dict:
+    """
+    Carrega e compila todas as receitas de resources/recipes.
+    Retorna {nome exibido na GUI: StepPlan}. Receitas inválidas são logadas e ignoradas;
+    receitas com "enabled": false não são carregadas.
+    """
+    recipes_dir = recipes_dir or RECIPES_DIR
+    plans = {}
+    if not recipes_dir.exists():
+        return plans
+
+    for path in sorted(recipes_dir.iterdir()):
+        if path.suffix.lower() not in (".json", ".yaml", ".yml"):
+            continue
+        try:
+            recipe = _read_recipe_file(path)
+            if not recipe.get("enabled", True):
+                logger.debug("Receita '%s' desativada. Ignorando.", path.name)
+                continue
+            plan: StepPlan = compile_recipe(recipe)
+        except (RecipeError, json.JSONDecodeError, IOError) as e:
+            logger.error("Receita inválida em '%s': %s", path.name, e)
+            continue
+        except Exception as e:
+            logger.error("Erro inesperado ao carregar a receita '%s': %s", path.name, e, exc_info=True)
+            continue
+        if plan.name in plans:
+            logger.warning("Receita duplicada '%s' em '%s'. Mantendo a primeira.", plan.name, path.name)
+            continue
+        plans[plan.name] = plan
+        logger.info("Receita '%s' carregada de '%s' (%s passos).", plan.name, path.name, len(plan.steps))
+    return plans
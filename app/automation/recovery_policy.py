@@ -0,0 +1,102 @@
+# Arquivo: app/automation/recovery_policy.py
+import asyncio
+import json
+import re
+import sys
+from pathlib import Path
+from playwright._impl._errors import TimeoutError
+from app.core.logger import logger
+
+
+# Classes de erro, na ordem em que são testadas (a primeira que casar vence).
+# Cada regra: (classe, regex sobre a mensagem do erro + texto do message-box do PEC)
+CLASSIFICATION_RULES = [
+    ("servidor_indisponivel", r"servidor .*indispon|net::err_|econnrefused|connection refused|bad gateway|service unavailable|\b50[234]\b"),
+    ("sessao_perdida", r"sess[aã]o (expirou|expirada|encerrada)|n[aã]o autenticad|unauthorized|\b401\b"),
+    ("duplicado", r"j[aá] (existe|cadastrad|registrad|foi adicionad)|duplicad"),
+    # Só o texto de validação do PEC (message-box da ficha): um 'invalid' genérico do Playwright não é validação
+    ("validacao_rejeitada", r"existem campos|campos? obrigat[oó]rios? n[aã]o preenchid|preenchid[oa]s? (de forma )?incorret|preencha o campo"),
+    ("iframe_obsoleto", r"detached|execution context was destroyed|not attached to the dom|frame was navigated"),
+    ("timeout_transitorio", r"timeout|timed out|excedido"),
+]
+
+ERROR_CLASSES = [name for name, _ in CLASSIFICATION_RULES] + ["desconhecido"]
+
+# Ações disponíveis:
+#   retry      -> espera (backoff exponencial) e repete o passo (ou o registro, se o passo não suportar repetição)
+#   renavigate -> readquire o iframe da ficha (gancho registrado pela tarefa) e repete o registro
+#   refill     -> limpa/reinicia a ficha (gancho registrado pela tarefa) e preenche o registro de novo
+#   relogin    -> espera o servidor, loga de novo e reabre a ficha (gancho da tarefa); o arquivo é retomado
+#                 no próximo registro ainda não confirmado
+#   quarantine -> pula o registro (SkipRecordException com a classe do erro)
+#   escalate   -> pausa e pede intervenção humana (comportamento original)
+ACTIONS = ("retry", "renavigate", "refill", "relogin", "quarantine", "escalate")
+
+DEFAULT_POLICIES = {
+    "timeout_transitorio": {"action": "retry", "max_attempts": 3, "backoff_seconds": 2, "then": "escalate"},
+    "iframe_obsoleto": {"action": "renavigate", "max_attempts": 2, "backoff_seconds": 1, "then": "escalate"},
+    "duplicado": {"action": "quarantine"},
+    "validacao_rejeitada": {"action": "quarantine"},
+    "sessao_perdida": {"action": "relogin", "max_attempts": 3, "backoff_seconds": 5, "then": "escalate"},
+    "servidor_indisponivel": {"action": "relogin", "max_attempts": 3, "backoff_seconds": 5, "then": "escalate"},
+    "desconhecido": {"action": "escalate"},
+}
+
+
+class RecoveryPolicy:
+    """
+    Política de recuperação automática: classifica o erro e decide a ação de acordo com a
+    tentativa atual. Os padrões podem ser sobrescritos por classe em
+    resources/config/recovery_policies.json (mesmas chaves de DEFAULT_POLICIES).
+    """
+    if getattr(sys, 'frozen', False):
+        BASE_DIR = Path(sys.executable).parent
+    else:
+        BASE_DIR = Path(__file__).resolve().parents[2]
+
+    POLICIES_FILE = BASE_DIR / "resources" / "config" / "recovery_policies.json"
+
+    def __init__(self, policies: dict = None):
+        self.policies = {name: dict(policy) for name, policy in DEFAULT_POLICIES.items()}
+        for name, policy in (policies or {}).items():
+            if name not in ERROR_CLASSES:
+                logger.warning("Política de recuperação para classe desconhecida '%s' ignorada.", name)
+                continue
+            if policy.get("action", "escalate") not in ACTIONS or policy.get("then", "escalate") not in ACTIONS:
+                logger.warning("Ação inválida na política de '%s': %s. Mantendo o padrão.", name, policy)
+                continue
+            self.policies[name].update(policy)
+
+    @classmethod
+    def load(cls) -> "RecoveryPolicy":
+        if not cls.POLICIES_FILE.exists():
+            return cls()
+        try:
+            with open(cls.POLICIES_FILE, 'r', encoding='utf-8') as f:
+                return cls(json.load(f))
+        except (json.JSONDecodeError, IOError) as e:
+            logger.error("Erro ao carregar políticas de recuperação em %s: %s. Usando padrões.", cls.POLICIES_FILE, e)
+            return cls()
+
+    @staticmethod
+    def classify(e: Exception, context_text: str = "", page_url: str = "") -> str:
+        """Classifica o erro pela mensagem, pelo texto do message-box do PEC e pela URL atual."""
+        if "/login" in (page_url or "").lower():
+            return "sessao_perdida"
+        text = f"{e}\n{context_text or ''}".lower()
+        for name, pattern in CLASSIFICATION_RULES:
+            if re.search(pattern, text):
+                return name
+        if isinstance(e, (TimeoutError, asyncio.TimeoutError)):
+            return "timeout_transitorio"
+        return "desconhecido"
+
+    def decide(self, error_class: str, attempt: int) -> tuple:
+        """Retorna (ação, segundos de espera antes dela) para a tentativa 'attempt' (1, 2, ...) desta classe."""
+        policy = self.policies.get(error_class, self.policies["desconhecido"])
+        action = policy.get("action", "escalate")
+        if action in ("retry", "renavigate", "refill", "relogin") and attempt > int(policy.get("max_attempts", 1)):
+            action = policy.get("then", "escalate")
+        delay = float(policy.get("backoff_seconds", 0)) * (2 ** (attempt - 1))
+        return action, delay
+
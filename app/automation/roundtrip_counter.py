@@ -0,0 +1,55 @@
+# Arquivo: app/automation/roundtrip_counter.py
+import weakref
+from collections import Counter
+from app.core.logger import logger
+
+
+class RoundTripCounter:
+    """
+    Conta as idas e voltas (round trips) ao navegador feitas pelas primitivas da BasePage.
+    Existe uma instância por página Playwright, compartilhada por todas as classes de página
+    (LoginPage, CommonForms, AtendimentoForm...), para que a contagem por registro seja única.
+    """
+    _instances = weakref.WeakKeyDictionary() # Page -> RoundTripCounter
+
+    def __init__(self):
+        self._row_counts = Counter() # Contagem do registro atual, por tipo de chamada
+        self._total_counts = Counter() # Contagem acumulada da sessão
+        self._rows_finished = 0
+
+    @classmethod
+    def for_page(cls, page) -> "RoundTripCounter":
+        """Retorna o contador associado à página (cria um se ainda não existir)."""
+        counter = cls._instances.get(page)
+        if counter is None:
+            counter = cls()
+            cls._instances[page] = counter
+        return counter
+
+    def hit(self, kind: str, count: int = 1):
+        """Registra 'count' round trips do tipo 'kind' (ex: 'click', 'fill', 'batch')."""
+        self._row_counts[kind] += count
+        self._total_counts[kind] += count
+
+    def start_row(self):
+        """Zera a contagem do registro atual."""
+        self._row_counts.clear()
+
+    def end_row(self) -> int:
+        """Fecha a contagem do registro atual, loga o detalhamento e retorna o total."""
+        row_total = sum(self._row_counts.values())
+        self._rows_finished += 1
+        details = ", ".join(f"{kind}={qtd}" for kind, qtd in sorted(self._row_counts.items()))
+        logger.info("Round trips no registro: %s (%s)", row_total, details or 'nenhum')
+        return row_total
+
+    @property
+    def row_total(self) -> int:
+        return sum(self._row_counts.values())
+
+    @property
+    def average_per_row(self) -> float:
+        """Média de round trips por registro concluído na sessão."""
+        if not self._rows_finished:
+            return 0.0
+        return sum(self._total_counts.values()) / self._rows_finished
@@ -0,0 +1,113 @@
+# Arquivo: app/automation/session_watchdog.py
+import asyncio
+from urllib.parse import urlsplit
+from playwright.async_api import Page
+from app.core.logger import logger
+from app.core.app_config import AppConfig
+from app.core.errors import AutomationError
+
+
+class SessionWatchdog:
+    """
+    Vigia a sessão do e-SUS enquanto a tarefa roda:
+    - sessão perdida: resposta 401 do servidor do e-SUS ou o frame principal voltou para /login;
+    - servidor indisponível: a sonda periódica (GET na URL do e-SUS) falhou ou respondeu 5xx.
+
+    Só vigia entre arm() e disarm() (o login inicial passa por /login e não deve disparar nada).
+    Quem consulta 'problem' é a BaseTask, antes de cada passo, para não continuar enviando ações
+    a uma sessão morta; a recuperação em si (esperar o servidor e logar de novo) fica na tarefa.
+    """
+    def __init__(self, page: Page, base_url: str):
+        self._page = page
+        self._base_url = base_url
+        self._origin = "{0.scheme}://{0.netloc}".format(urlsplit(base_url)) if base_url else ""
+        self._armed = False
+        self._probe_task: asyncio.Task = None
+        self.session_lost = False
+        self.server_unreachable = False
+        self._page.on("response", self._on_response)
+        self._page.on("framenavigated", self._on_frame_navigated)
+
+    @property
+    def problem(self) -> str | None:
+        """Descrição do problema detectado (usada como mensagem do erro), ou None se está tudo bem."""
+        if self.server_unreachable:
+            return "Servidor do e-SUS indisponível (detectado pelo watchdog de sessão)."
+        if self.session_lost:
+            return "Sessão expirada (detectada pelo watchdog de sessão)."
+        return None
+
+    def arm(self):
+        """Começa (ou volta) a vigiar, com o estado limpo. Chamado depois de logar e abrir a ficha."""
+        self.session_lost = False
+        self.server_unreachable = False
+        self._armed = True
+        interval = AppConfig.session_watchdog_interval_seconds
+        if interval and (self._probe_task is None or self._probe_task.done()):
+            self._probe_task = asyncio.create_task(self._probe_loop(interval))
+
+    def disarm(self):
+        """Para de vigiar (durante o re-login e ao fim da tarefa)."""
+        self._armed = False
+        if self._probe_task and not self._probe_task.done():
+            self._probe_task.cancel()
+        self._probe_task = None
+
+    def _on_response(self, response):
+        if not self._armed or response.status != 401:
+            return
+        if self._origin and not response.url.startswith(self._origin):
+            return
+        if not self.session_lost:
+            logger.warning("Watchdog: resposta 401 do e-SUS (%s). Sessão considerada perdida.", response.url)
+        self.session_lost = True
+
+    def _on_frame_navigated(self, frame):
+        if not self._armed or frame != self._page.main_frame:
+            return
+        if "/login" in frame.url.lower():
+            if not self.session_lost:
+                logger.warning("Watchdog: página redirecionada para o login (%s). Sessão considerada perdida.", frame.url)
+            self.session_lost = True
+
+    async def is_server_available(self) -> bool:
+        """Uma sonda: GET na URL do e-SUS pelo contexto do navegador (mesmos cookies/proxy)."""
+        if not self._base_url:
+            return True
+        try:
+            response = await self._page.context.request.get(self._base_url, timeout=10000)
+            return response.status < 500
+        except Exception as e:
+            logger.debug("Watchdog: sonda ao servidor falhou: %s", e)
+            return False
+
+    async def _probe_loop(self, interval: float):
+        while self._armed:
+            await asyncio.sleep(interval)
+            if not self._armed:
+                break
+            available = await self.is_server_available()
+            if not available and not self.server_unreachable:
+                logger.warning("Watchdog: servidor do e-SUS não respondeu à sonda.")
+            elif available and self.server_unreachable:
+                logger.info("Watchdog: servidor do e-SUS voltou a responder.")
+            self.server_unreachable = not available
+
+    async def wait_for_server(self):
+        """
+        Espera o servidor voltar, sondando com backoff exponencial (5 s, 10 s, ... até 2 min entre sondas).
+        Desiste após AppConfig.session_watchdog_max_wait_minutes (0 = sem limite) com AutomationError.
+        """
+        max_wait = AppConfig.session_watchdog_max_wait_minutes * 60
+        waited = 0.0
+        delay = 5.0
+        while not await self.is_server_available():
+            if max_wait and waited >= max_wait:
+                raise AutomationError(f"Servidor do e-SUS continua indisponível após {AppConfig.session_watchdog_max_wait_minutes} min.",
+                                      step="Watchdog - Esperar servidor")
+            logger.warning("Watchdog: servidor indisponível. Nova sonda em %.0f s.", delay)
+            await asyncio.sleep(delay)
+            waited += delay
+            delay = min(delay * 2, 120.0)
+        self.server_unreachable = False
+        logger.info("Watchdog: servidor do e-SUS disponível.")
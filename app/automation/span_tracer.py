@@ -0,0 +1,256 @@
+# Arquivo: app/automation/span_tracer.py
+import contextvars
+import functools
+import inspect
+import json
+import os
+import sys
+import time
+from contextlib import nullcontext
+from datetime import datetime
+from pathlib import Path
+from app.core.logger import logger
+from app.core.app_config import AppConfig
+
+
+class Span:
+    """Um trecho medido (execução, arquivo, linha, passo ou primitiva da BasePage)."""
+    __slots__ = ("id", "name", "kind", "tags", "parent", "start", "wait_s", "retries", "outcome", "handled")
+
+    def __init__(self, span_id: int, name: str, kind: str, tags: dict, parent: "Span"):
+        self.id = span_id
+        self.name = name
+        self.kind = kind
+        self.tags = tags
+        self.parent = parent
+        self.start = time.perf_counter()
+        self.wait_s = 0.0 # Tempo dos filhos que são espera (elementos, máscara, confirmação, intervenções)
+        self.retries = 0
+        self.outcome: str = None # Definido pelo chamador (ex: 'pulado') ou pela exceção no fechamento
+        self.handled: str = None # Última resposta do handler de erro dentro deste trecho
+
+
+class SpanTracer:
+    """
+    Grava spans de tempo por execução, arquivo, linha, passo (BaseTask._step) e primitiva (_safe_* da BasePage),
+    com duração, tempo de espera x ação, retentativas e resultado. Cada span herda as tags do pai
+    (tarefa, arquivo, linha, passo), então dá para somar onde vão os segundos de cada linha.
+
+    Formatos (AppConfig.span_trace_format): 'jsonl' (um span por linha) ou 'chrome' (Trace Event Format,
+    abre no chrome://tracing ou no Perfetto). Os spans ficam em memória e são acrescentados ao arquivo em
+    blocos; desativado, SpanTracer.get() retorna None e o custo é uma checagem por chamada.
+    """
+    if getattr(sys, 'frozen', False):
+        BASE_DIR = Path(sys.executable).parent
+    else:
+        BASE_DIR = Path(__file__).resolve().parents[2]
+
+    TRACE_DIR = BASE_DIR / "logs" / "spans"
+    FORMATS = ("jsonl", "chrome")
+    FLUSH_EVERY = 256 # Spans em memória antes de gravar
+    WAIT_KINDS = ("espera", "intervencao") # Tipos cujo tempo inteiro conta como espera no pai
+
+    _instance = None
+    _current = contextvars.ContextVar("botcds_span", default=None) # Span aberto mais interno da tarefa asyncio atual
+
+    def __init__(self, trace_format: str):
+        self.format = trace_format
+        self.TRACE_DIR.mkdir(parents=True, exist_ok=True)
+        suffix = "jsonl" if trace_format == "jsonl" else "json"
+        self.path = self.TRACE_DIR / f"spans_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}.{suffix}"
+        self._perf0 = time.perf_counter()
+        self._epoch0 = time.time()
+        self._next_id = 1
+        self._buffer = []
+        self._events_written = 0
+        logger.info("Spans de tempo ativados (%s): %s", trace_format, self.path)
+
+    @classmethod
+    def get(cls) -> "SpanTracer | None":
+        """Tracer do processo, ou None se os spans estiverem desativados (AppConfig.span_trace_format)."""
+        trace_format = AppConfig.span_trace_format
+        if not trace_format:
+            return None
+        if cls._instance is None or cls._instance.format != trace_format:
+            if trace_format not in cls.FORMATS:
+                logger.warning("Formato de spans desconhecido '%s'. Use %s. Spans desativados.", trace_format, cls.FORMATS)
+                AppConfig.span_trace_format = ""
+                return None
+            if cls._instance:
+                cls._instance.close()
+            cls._instance = cls(trace_format)
+        return cls._instance
+
+    # --- Abertura e fechamento ---
+
+    def start(self, name: str, kind: str, **tags) -> Span:
+        """Abre um span filho do span atual (herda as tags dele) e o torna o atual."""
+        parent = self._current.get()
+        if parent is not None:
+            tags = {**parent.tags, **tags} if tags else parent.tags
+        span = Span(self._next_id, name, kind, tags, parent)
+        self._next_id += 1
+        self._current.set(span)
+        return span
+
+    def finish(self, span: Span, error: BaseException = None):
+        """
+        Fecha o span (e os filhos ainda abertos, como 'interrompido'), soma a espera no pai e grava.
+        O resultado vem de span.outcome, da exceção ou da resposta do handler.
+        """
+        if span is None:
+            return
+        current = self._current.get()
+        while current is not None and current is not span and self._is_descendant(current, span):
+            current.outcome = current.outcome or "interrompido"
+            self._close(current, None)
+            current = current.parent
+        self._close(span, error)
+        self._current.set(span.parent)
+
+    @staticmethod
+    def _is_descendant(span: Span, ancestor: Span) -> bool:
+        while span is not None:
+            if span.parent is ancestor:
+                return True
+            span = span.parent
+        return False
+
+    def _close(self, span: Span, error: BaseException):
+        duration = time.perf_counter() - span.start
+        wait = duration if span.kind in self.WAIT_KINDS else min(span.wait_s, duration)
+        if span.parent is not None:
+            span.parent.wait_s += wait
+        outcome = span.outcome or self._outcome_from(error, span)
+        record = {
+            "id": span.id, "pai": span.parent.id if span.parent else None, "nome": span.name, "tipo": span.kind,
+            "inicio": round(self._epoch0 + (span.start - self._perf0), 3),
+            "duracao_ms": round(duration * 1000, 1), "espera_ms": round(wait * 1000, 1),
+            "acao_ms": round((duration - wait) * 1000, 1), "retentativas": span.retries, "resultado": outcome,
+        }
+        record.update(span.tags)
+        self._buffer.append(record)
+        if len(self._buffer) >= self.FLUSH_EVERY:
+            self.flush()
+
+    @staticmethod
+    def _outcome_from(error: BaseException, span: Span) -> str:
+        if error is None:
+            if span.handled == "continue":
+                return "continuado" # O handler deixou seguir depois de um erro
+            return "retentado" if span.retries else "ok"
+        error_name = type(error).__name__
+        if error_name == "SkipRecordException":
+            return "pulado"
+        if error_name in ("AbortAutomationException", "BrowserCrashedException"):
+            return "abortado"
+        if error_name == "SessionRecoveredException":
+            return "sessao_restabelecida"
+        return "erro"
+
+    def span(self, name: str, kind: str, **tags) -> "_SpanContext":
+        return _SpanContext(self, name, kind, tags)
+
+    def note_handler_result(self, result: str):
+        """Chamado ao sair do handler: 'retry' conta como retentativa do trecho que chamou o handler."""
+        current = self._current.get()
+        if current is None:
+            return
+        target = current.parent if current.kind == "intervencao" else current
+        if target is not None:
+            target.handled = result
+            if result == "retry":
+                target.retries += 1
+
+    # --- Gravação ---
+
+    def flush(self):
+        if not self._buffer:
+            return
+        records, self._buffer = self._buffer, []
+        try:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                if self.format == "jsonl":
+                    f.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+                    return
+                for record in records:
+                    # Trace Event Format em array: o ']' final é opcional, então o arquivo abre mesmo se o processo cair
+                    f.write(("[\n" if self._events_written == 0 else ",\n") + json.dumps(self._chrome_event(record), ensure_ascii=False))
+                    self._events_written += 1
+        except IOError as e:
+            logger.error("Erro ao gravar spans em %s: %s", self.path, e)
+
+    def _chrome_event(self, record: dict) -> dict:
+        args = {key: value for key, value in record.items() if key not in ("nome", "tipo", "inicio", "duracao_ms")}
+        return {"name": record["nome"], "cat": record["tipo"], "ph": "X", "pid": os.getpid(), "tid": 1,
+                "ts": round((record["inicio"] - self._epoch0) * 1_000_000), "dur": round(record["duracao_ms"] * 1000), "args": args}
+
+    def close(self):
+        """Fecha os spans ainda abertos na tarefa atual e grava o que está em memória."""
+        current = self._current.get()
+        while current is not None:
+            current.outcome = current.outcome or "interrompido"
+            self._close(current, None)
+            current = current.parent
+        self._current.set(None)
+        self.flush()
+        if self.format == "chrome" and self._events_written:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write("\n]\n")
+            self._events_written = 0
+
+
+class _SpanContext:
+    """'with tracer.span(...)': fecha o span com a exceção que saiu do bloco."""
+    __slots__ = ("_tracer", "_args", "span")
+
+    def __init__(self, tracer: SpanTracer, name: str, kind: str, tags: dict):
+        self._tracer = tracer
+        self._args = (name, kind, tags)
+        self.span: Span = None
+
+    def __enter__(self) -> Span:
+        name, kind, tags = self._args
+        self.span = self._tracer.start(name, kind, **tags)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self._tracer.finish(self.span, exc)
+        return False
+
+
+def trace_span(name: str, kind: str, **tags):
+    """Context manager de span que não faz nada com os spans desativados."""
+    tracer = SpanTracer.get()
+    return tracer.span(name, kind, **tags) if tracer else nullcontext()
+
+
+def traced(kind: str = "primitiva"):
+    """
+    Decorador das primitivas assíncronas da BasePage (e do handler de erro, kind 'intervencao'): um span
+    por chamada, com o 'step_description' da chamada como tag 'descricao'. Com os spans desativados, só chama a função.
+    """
+    def decorator(func):
+        parameters = list(inspect.signature(func).parameters)
+        description_index = parameters.index("step_description") if "step_description" in parameters else None
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            tracer = SpanTracer.get()
+            if tracer is None:
+                return await func(*args, **kwargs)
+            description = kwargs.get("step_description")
+            if description is None and description_index is not None and len(args) > description_index:
+                description = args[description_index]
+            span = tracer.start(func.__name__, kind, descricao=description) if description else tracer.start(func.__name__, kind)
+            try:
+                result = await func(*args, **kwargs)
+            except BaseException as e:
+                tracer.finish(span, e)
+                raise
+            if kind == "intervencao":
+                tracer.note_handler_result(result)
+            tracer.finish(span)
+            return result
+        return wrapper
+    return decorator
@@ -2,7 +2,6 @@
 from playwright.async_api import Locator
 from app.automation.tasks.base_task import BaseTask
 from app.core.logger import logger
-import asyncio
 
 class AcsAtdHipertensoTask(BaseTask):
     """
@@ -38,20 +37,19 @@ class AcsAtdHipertensoTask(BaseTask):
         NOTA: Atualmente, reutiliza a lógica de preenchimento do atendimento de hipertensão.
         Isso deve ser adaptado quando os campos da ficha de Visita Domiciliar forem mapeados.
         """
-        logger.debug(f"Processando linha para Visita Domiciliar (Hipertensão): {row_data}")
+        logger.debug("Processando linha para Visita Domiciliar (Hipertensão): %s", row_data)
 
         # 1. Preenche dados comuns do paciente
         await self._fill_common_patient_acs(iframe_frame, row_data)
 
         # 2. Preenche campos específicos do formulário
         # ATENÇÃO: A ficha de Visita Domiciliar pode ter campos diferentes.
-        await self._acs_form.select_motivo_visita_periodica(iframe_frame)
-        await self._acs_form.select_acompanhamento_hipertensao(iframe_frame)
-        await self._acs_form.select_desfecho_visita_realizada(iframe_frame)
+        # Os três checkboxes são marcados em um único round trip (ver AcsForm).
+        await self._step("motivos_visita", self._acs_form.select_checkboxes_visita_hipertensao, iframe_frame)
 
         # 3. Confirma o registro do paciente
         # A ficha de Visita pode ter um botão de confirmar diferente. Usando o de Atendimento por enquanto.
-        await self._acs_form.click_confirm_button_acs(iframe_frame)
+        await self._step("confirmar", self._acs_form.click_confirm_button_acs, iframe_frame)
 
         logger.debug("Linha da Visita Domiciliar processada e confirmada.")
 
@@ -61,4 +59,3 @@ class AcsAtdHipertensoTask(BaseTask):
         """
         logger.info("Finalizando tarefa de Visita Domiciliar (clicando em 'Finalizar registros').")
         await self._main_menu.click_finalize_records_button_in_iframe(self._current_iframe_frame)
-        await asyncio.sleep(3)
\ No newline at end of file
@@ -1,5 +1,4 @@
 # Arquivo: app/automation/tasks/atend_a97_task.py
-import asyncio
 from playwright.async_api import Locator
 from app.automation.tasks.base_task import BaseTask
 from app.core.logger import logger
@@ -25,7 +24,7 @@ class AtendimentoA97Task(BaseTask):
         Implementa o método abstrato da BaseTask.
         Recebe o FrameLocator do iframe e os dados da linha.
         """
-        logger.debug(f"Processando linha para Atendimento A97: {row_data}")
+        logger.debug("Processando linha para Atendimento A97: %s", row_data)
 
         # Preenche os campos comuns do paciente (Período, CPF, Data Nasc, Gênero, Local)
         # Usamos a função auxiliar _fill_common_patient_data da BaseTask
@@ -66,4 +65,3 @@ class AtendimentoA97Task(BaseTask):
         # Usa o botão "Salvar" do iframe principal
         await self._main_menu.click_finalize_records_button_in_iframe(self._current_iframe_frame)
         # Pode ser necessário adicionar uma espera ou lidar com popup após finalizar.
-        await asyncio.sleep(3) # Ajuste conforme necessário
\ No newline at end of file
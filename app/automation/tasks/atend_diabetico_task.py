@@ -1,5 +1,4 @@
 # Arquivo: app/automation/tasks/atend_diabetico_task.py
-import asyncio
 from playwright.async_api import Locator
 from app.automation.tasks.base_task import BaseTask
 from app.core.logger import logger
@@ -25,7 +24,7 @@ class AtendimentoDiabeticoTask(BaseTask):
         Implementa o método abstrato da BaseTask.
         Recebe o FrameLocator do iframe e os dados da linha.
         """
-        logger.debug(f"Processando linha para Atendimento Diabético: {row_data}")
+        logger.debug("Processando linha para Atendimento Diabético: %s", row_data)
 
         # Preenche os campos comuns do paciente (Período, CPF, Data Nasc, Gênero, Local)
         # Usamos a função auxiliar _fill_common_patient_data da BaseTask
@@ -43,14 +42,14 @@ class AtendimentoDiabeticoTask(BaseTask):
         exame_text = "S - Hemoglobina glicada" # Texto fixo ou talvez venha do CSV? Assumindo fixo por enquanto.
 
         # Chama os métodos da classe AtendimentoForm para preencher estes campos
-        await self._atendimento_form.select_tipo_atendimento(iframe_frame, tipo_atendimento)
-        await self._atendimento_form.select_condicao_avaliada(iframe_frame, condicao_avaliada_text)
-        await self._atendimento_form.select_exame(iframe_frame, exame_text) # Seleciona o exame específico para Diabético
-        await self._atendimento_form.select_conduta(iframe_frame, conduta)
+        await self._step("tipo_atendimento", self._atendimento_form.select_tipo_atendimento, iframe_frame, tipo_atendimento)
+        await self._step("condicao_avaliada", self._atendimento_form.select_condicao_avaliada, iframe_frame, condicao_avaliada_text)
+        await self._step("exame", self._atendimento_form.select_exame, iframe_frame, exame_text) # Seleciona o exame específico para Diabético
+        await self._step("conduta", self._atendimento_form.select_conduta, iframe_frame, conduta)
 
         # Clica no botão "Confirmar" da ficha de Atendimento Individual
         # Este método já lida com possíveis alertas (como "Campos duplicados" se aplicável)
-        await self._atendimento_form.click_confirm_button(iframe_frame)
+        await self._step("confirmar", self._atendimento_form.click_confirm_button, iframe_frame)
 
         logger.debug("Campos específicos de Atendimento Diabético preenchidos e Confirmar clicado.")
 
@@ -65,4 +64,3 @@ class AtendimentoDiabeticoTask(BaseTask):
         logger.info("Finalizando tarefa de Atendimento Diabético.")
         # Usa o botão "Salvar" do iframe principal
         await self._main_menu.click_finalize_records_button_in_iframe(self._current_iframe_frame)
-        await asyncio.sleep(3) # Ajuste conforme necessário
\ No newline at end of file
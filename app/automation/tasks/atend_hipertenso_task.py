@@ -1,5 +1,4 @@
 # Arquivo: app/automation/tasks/atend_hipertenso_task.py
-import asyncio
 from playwright.async_api import Locator
 from app.automation.tasks.base_task import BaseTask
 from app.core.logger import logger
@@ -25,7 +24,7 @@ class AtendimentoHipertensoTask(BaseTask):
         Implementa o método abstrato da BaseTask.
         Recebe o FrameLocator do iframe e os dados da linha.
         """
-        logger.debug(f"Processando linha para Atendimento Hipertensão: {row_data}")
+        logger.debug("Processando linha para Atendimento Hipertensão: %s", row_data)
 
         # Preenche os campos comuns do paciente (Período, CPF, Data Nasc, Gênero, Local)
         # Usamos a função auxiliar que podemos adicionar na BaseTask ou chamar os métodos diretamente
@@ -44,14 +43,14 @@ class AtendimentoHipertensoTask(BaseTask):
         # O Atendimento Hipertenso no seu código não selecionava Exames nem CIAP, apenas Condição e Conduta.
 
         # Chama os métodos da classe AtendimentoForm para preencher estes campos
-        await self._atendimento_form.select_tipo_atendimento(iframe_frame, tipo_atendimento)
-        await self._atendimento_form.select_condicao_avaliada(iframe_frame, condicao_avaliada)
+        await self._step("tipo_atendimento", self._atendimento_form.select_tipo_atendimento, iframe_frame, tipo_atendimento)
+        await self._step("condicao_avaliada", self._atendimento_form.select_condicao_avaliada, iframe_frame, condicao_avaliada)
         # O atendimento Hipertenso não tem campo de Exame no seu código original
-        await self._atendimento_form.select_conduta(iframe_frame, conduta)
+        await self._step("conduta", self._atendimento_form.select_conduta, iframe_frame, conduta)
 
         # Clica no botão "Confirmar" da ficha de Atendimento Individual
         # Este método já lida com possíveis alertas (como "Campos duplicados" se aplicável)
-        await self._atendimento_form.click_confirm_button(iframe_frame)
+        await self._step("confirmar", self._atendimento_form.click_confirm_button, iframe_frame)
 
         logger.debug("Campos específicos de Atendimento Hipertensão preenchidos e Confirmar clicado.")
 
@@ -64,4 +63,3 @@ class AtendimentoHipertensoTask(BaseTask):
         """
         logger.info("Finalizando tarefa de Atendimento Hipertensão (clicando Finalizar registros).")
         await self._main_menu.click_finalize_records_button_in_iframe(self._current_iframe_frame)   
-        await asyncio.sleep(3) # Ajuste conforme necessário
@@ -26,7 +26,7 @@ class AtendimentoSaudeReproTask(BaseTask):
         Implements the abstract method from BaseTask.
         Receives the FrameLocator of the iframe and the row data.
         """
-        logger.debug(f"Processing row for Reproductive Health Attendance: {row_data}")
+        logger.debug("Processing row for Reproductive Health Attendance: %s", row_data)
 
         # Fill common patient fields (Period, CPF, DOB, Gender, Location)
         # Use the helper function _fill_common_patient_data from BaseTask
@@ -48,22 +48,22 @@ class AtendimentoSaudeReproTask(BaseTask):
 
 
         # Call methods from the AtendimentoForm class for Attendance fields
-        await self._atendimento_form.select_tipo_atendimento_fixo(iframe_frame, tipo_atendimento)
+        await self._step("tipo_atendimento", self._atendimento_form.select_tipo_atendimento_fixo, iframe_frame, tipo_atendimento)
         # Select the specific condition using the text
-        await self._atendimento_form.select_condicao_avaliada(iframe_frame, condicao_avaliada_text)
+        await self._step("condicao_avaliada", self._atendimento_form.select_condicao_avaliada, iframe_frame, condicao_avaliada_text)
 
 
         # --- ALTERAÇÃO PRINCIPAL: Chamando a nova função centralizada ---
         # A função abaixo agora cuida de digitar, selecionar, marcar 'S' e confirmar o bloco.
-        await self._atendimento_form.fill_outros_exames_sigtap(iframe_frame, exame_sia_code)
+        await self._step("outros_exames_sigtap", self._atendimento_form.fill_outros_exames_sigtap, iframe_frame, exame_sia_code)
         await asyncio.sleep(1) # Pausa após confirmar o bloco
         # --- FIM DA ALTERAÇÃO ---
 
         # Select the Conduta
-        await self._atendimento_form.select_conduta(iframe_frame, conduta)
+        await self._step("conduta", self._atendimento_form.select_conduta, iframe_frame, conduta)
 
         # Clica no botão "Confirmar" da ficha de Atendimento Individual
-        await self._atendimento_form.click_confirm_button(iframe_frame)
+        await self._step("confirmar", self._atendimento_form.click_confirm_button, iframe_frame)
 
         logger.debug("Campos específicos de Atendimento Saúde Sexual preenchidos e Confirmar clicado.")
 
@@ -80,7 +80,6 @@ class AtendimentoSaudeReproTask(BaseTask):
         # Use the "Salvar" button from the main iframe
         await self._main_menu.click_finalize_records_button_in_iframe(self._current_iframe_frame)
         # Pode ser necessário adicionar uma espera ou lidar com popup após finalizar.
-        await asyncio.sleep(3) # Adjust as needed
 
         # Finalize records logic (for the batch) should be in the GUI Worker.
         # await self._main_menu.click_finalize_records_button_in_iframe(self._current_iframe_frame)
@@ -2,11 +2,12 @@
 from abc import ABC, abstractmethod # Usamos ABC para criar classes abstratas
 from playwright.async_api import Page, Locator
 import pandas as pd
-from app.core.logger import logger
+from app.core.logger import logger, set_log_context
 from app.core.errors import AutomationError # Capturaremos AutomationError também
-from app.automation.error_handler import AutomationErrorHandler, SkipRecordException, AbortAutomationException # Importamos o handler e as exceções de controle
+from app.automation.error_handler import AutomationErrorHandler, SkipRecordException, AbortAutomationException, SessionRecoveredException # Importamos o handler e as exceções de controle
 import asyncio
 import sys
+import time
 from datetime import datetime # Importa datetime para fallback
 
 # Importa as classes de páginas que serão usadas pelas tarefas filhas (no topo)
@@ -16,10 +17,22 @@ from app.automation.pages.common_forms import CommonForms
 from app.automation.pages.atendimento_form import AtendimentoForm
 from app.automation.pages.procedimento_form import ProcedimentoForm
 from app.automation.pages.acs_form import AcsForm
+from app.automation.roundtrip_counter import RoundTripCounter
+from app.automation.pages.selector_cache import SelectorCache
+from app.automation.direct.direct_engine import DirectSubmitEngine
+from app.automation.session_watchdog import SessionWatchdog
+from app.automation.page_health import PageHealthMonitor
+from app.automation.span_tracer import SpanTracer, trace_span, traced
+from app.automation.progress_tracker import ProgressTracker
+from app.automation.trace_recorder import TraceRecorder
+from app.core.app_config import AppConfig
 
 # Importar FileManager e DateSequencer (no topo)
 from app.data.file_manager import FileManager
 from app.data.date_sequencer import DateSequencer
+from app.data.run_journal import RunJournal
+from app.data.quarantine import QuarantineStore
+from app.data.run_history import RunHistory
 
 # Importar a função de normalização (no topo)
 from app.core.utils import normalize_text_for_selection
@@ -32,6 +45,8 @@ class BaseTask(ABC): # Herda de ABC para ser uma classe abstrata
     Controla o fluxo de processamento de múltiplos arquivos de dados.
     """
     
+    _FINALIZE_MAX_ATTEMPTS = 3 # Cliques em 'Finalizar registros' antes de pedir a confirmação do operador
+
     def __init__(self, page: Page, error_handler: AutomationErrorHandler, manual_login: bool):
         # Contadores totais da sessão (acumulados em todos os arquivos)
         self._processed_count_total = 0
@@ -50,6 +65,56 @@ class BaseTask(ABC): # Herda de ABC para ser uma classe abstrata
         self._acs_form = AcsForm(self._page, self._handler)
         # Variável para guardar a instância do iframe (será definida após navegação inicial)
         self._current_iframe_frame: Locator = None
+        # Contador de round trips ao navegador (compartilhado com as classes de página)
+        self._roundtrips = RoundTripCounter.for_page(self._page)
+        # Cache de seletores resolvidos, válido enquanto a ficha atual não for reconstruída
+        self._selector_cache = SelectorCache.for_page(self._page)
+        # Trace em anel do Playwright (None se o navegador foi lançado sem trace ou AppConfig.trace_keep_rows = 0)
+        self._trace = TraceRecorder.for_page(self._page)
+        # Diário por linha (retomada sem reenvio) e envio direto opcional das fichas
+        self._task_name = self.__class__.__name__
+        self._journal = RunJournal()
+        self._quarantine = QuarantineStore() # Linhas puladas/com falha, com classe do erro, para os lotes dados_retry_<tarefa>_*.csv
+        self._current_main_date: str = None
+        self._direct_engine = DirectSubmitEngine(self._page, self._task_name, self._journal) if AppConfig.direct_submit_enabled else None
+        self._current_file_name: str = None
+        self._current_file_fingerprint: str = None # Conteúdo do arquivo atual no diário (o nome pode ser reaproveitado)
+        self._file_row_indexes: list = [] # Índice original (no CSV) de cada linha enviada ao _process_all_rows
+        self._confirmed_rows: list = [] # (índice original, linha) confirmadas no arquivo atual
+        self._lot_start = 0 # Posição em _confirmed_rows do primeiro registro do lote ainda não finalizado
+        self._progress_rows_kept = 0 # progress.run_rows que uma retomada após re-login não refaz (anteriores ao arquivo + finalizadas nele)
+        self._calibrating = False # Calibrando o envio direto: o arquivo é finalizado inteiro, sem lotes parciais
+        # Pontos de controle por passo dentro do registro: ao retentar, os passos já concluídos não são refeitos
+        self._row_checkpoints: set = set()
+        self._current_step: str = None # Passo em execução (ou o que falhou) no registro atual
+        self._form_was_reset = False # A ficha foi limpa (ação 'refill') durante o passo em execução
+        # Ações das políticas de recuperação: readquirir o iframe da ficha / limpar a ficha e preencher de novo
+        self._handler.register_recovery_hook("renavigate", self._reacquire_task_iframe)
+        self._handler.register_recovery_hook("refill", self._reset_current_form)
+        # Watchdog de sessão (criado no run, quando a URL é conhecida) e re-login automático
+        self._watchdog: SessionWatchdog = None
+        self._login_config: dict = None
+        self._recovering_session = False
+        self._handler.register_recovery_hook("relogin", self._recover_session)
+        # Saúde da página (DOM/heap) em execuções longas; a reciclagem acontece só em ponto seguro
+        self._page_health = PageHealthMonitor(self._page)
+        self._rows_since_health_sample = 0
+        # Spans de tempo (execução > arquivo > linha > passo > primitiva), se AppConfig.span_trace_format estiver ativo
+        self._tracer = SpanTracer.get()
+        self._file_span = None
+        # Progresso para o painel da GUI (o Worker liga o callback ao seu sinal)
+        self._progress = ProgressTracker(self._task_name)
+
+    def set_progress_callback(self, callback):
+        """'callback(snapshot: dict)' recebe o progresso da sessão (com intervalo mínimo entre chamadas)."""
+        self._progress.callback = callback
+
+    def _start_span(self, name: str, kind: str, **tags):
+        return self._tracer.start(name, kind, **tags) if self._tracer else None
+
+    def _finish_span(self, span, error: BaseException = None):
+        if self._tracer and span:
+            self._tracer.finish(span, error)
 
     async def _perform_pre_navigation_steps(self):
         """
@@ -70,11 +135,13 @@ class BaseTask(ABC): # Herda de ABC para ser uma classe abstrata
         Executa a tarefa de automação para todos os arquivos de dados não processados.
         Gerencia o login, a navegação inicial, o loop pelos arquivos e o loop pelos registros.
         """
-        logger.info(f"Iniciando execução da tarefa: {self.__class__.__name__}")
+        logger.info("Iniciando execução da tarefa: %s", self.__class__.__name__)
 
         # Instanciar FileManager e DateSequencer (aqui no run, pois são específicos do fluxo de arquivos)
-        file_manager = FileManager()
+        file_manager = FileManager(self._task_name)
         date_sequencer = DateSequencer()
+        run_span = self._start_span("execucao", "execucao", tarefa=self._task_name)
+        set_log_context(session=self._task_name, file=None, row=None) # Contexto dos registros de log (JSON)
 
 
         try:
@@ -84,6 +151,8 @@ class BaseTask(ABC): # Herda de ABC para ser uma classe abstrata
             config = config_loader.load_config()
             if not config:
                 raise AutomationError("Falha ao carregar configurações de login.")
+            self._login_config = config
+            self._watchdog = SessionWatchdog(self._page, config["url"])
 
             await self._login_page.navigate_and_login(config["url"], config["usuario"], config["senha"])
             # profile_and_unidade_selected = await self._login_page.select_profile_and_unidade_optional() # <--- REMOVER ESTA LINHA
@@ -107,7 +176,7 @@ class BaseTask(ABC): # Herda de ABC para ser uma classe abstrata
             try:
                 await self._main_menu.get_and_save_user_info()
             except AutomationError as e:
-                logger.critical(f"Falha ao capturar e salvar informações do usuário/UBS: {e}. Abortando automação.")
+                logger.critical("Falha ao capturar e salvar informações do usuário/UBS: %s. Abortando automação.", e)
                 raise AbortAutomationException(f"Falha na inicialização: {e.message}") from e
             except (SkipRecordException, AbortAutomationException):
                 raise # Propaga abort/skip se vier de dentro da função
@@ -121,6 +190,7 @@ class BaseTask(ABC): # Herda de ABC para ser uma classe abstrata
 
             if not self._current_iframe_frame:
                  raise AutomationError("Falha ao navegar para a área específica da tarefa.")
+            self._watchdog.arm() # A partir daqui, 401/volta ao login/servidor fora do ar disparam o re-login
 
 
             # --- Passo 3: Gerenciar a Sequência de Arquivos e Datas ---
@@ -134,15 +204,16 @@ class BaseTask(ABC): # Herda de ABC para ser uma classe abstrata
             num_unprocessed_files_total = file_manager.count_all_unprocessed_files() # Método em FileManager
 
             if num_unprocessed_files_total > 0:
+                 self._progress.start_run(file_manager.count_all_unprocessed_rows(), num_unprocessed_files_total)
                  # GERA a sequência de datas. O PRIMEIRO item da sequência PODE SER o main_date_initial_from_file.
                  date_sequence_for_session = date_sequencer.generate_sequence_dates(
                      num_dates=num_unprocessed_files_total,
                      start_date_override=main_date_initial_from_file # Passa a data do data.csv para a geração
                  )
-                 logger.info(f"Sequência de datas gerada/obtida para {num_unprocessed_files_total} arquivos: {date_sequence_for_session}")
+                 logger.info("Sequência de datas gerada/obtida para %s arquivos: %s", num_unprocessed_files_total, date_sequence_for_session)
 
                  if len(date_sequence_for_session) < num_unprocessed_files_total:
-                      logger.warning(f"Número de datas geradas/obtidas ({len(date_sequence_for_session)}) é menor que o número de arquivos ({num_unprocessed_files_total}). Alguns arquivos podem não ter data.")
+                      logger.warning("Número de datas geradas/obtidas (%s) é menor que o número de arquivos (%s). Alguns arquivos podem não ter data.", len(date_sequence_for_session), num_unprocessed_files_total)
 
             else:
                  logger.info("Nenhum arquivo de dados a processar nesta sessão.")
@@ -154,114 +225,136 @@ class BaseTask(ABC): # Herda de ABC para ser uma classe abstrata
             # --- Passo 4: Loop WHILE encontrar arquivos a processar ---
             # Este loop continua ENQUANTO find_next_file_to_process encontrar arquivos.
             current_data_file_path = file_manager.find_next_file_to_process() # Pega o primeiro arquivo real
+            resume_date_for_file = None # Data do arquivo reaberto após re-login (não consome a sequência de novo)
 
 
             while current_data_file_path: # Loop principal por arquivos
-                 logger.info(f"Iniciando processamento do arquivo: {current_data_file_path.name}")
+                 logger.info("Iniciando processamento do arquivo: %s", current_data_file_path.name)
+                 # Um span por arquivo: o do arquivo anterior (ou da mesma reabertura) é fechado aqui
+                 self._finish_span(self._file_span)
+                 self._file_span = self._start_span("arquivo", "arquivo", arquivo=current_data_file_path.name)
+                 set_log_context(file=current_data_file_path.name, row=None)
+                 self._current_file_fingerprint = RunJournal.file_fingerprint(current_data_file_path)
 
                  # 4a. Obter a data correspondente para ESTE arquivo.
-                 current_main_date_for_file = date_sequencer.get_next_sequence_date()
+                 # Arquivo já aberto antes (re-login, navegador reiniciado após queda): mantém a data registrada no diário.
+                 # Só vale o mesmo conteúdo ainda não concluído: um 'dados1.csv' novo recebe a próxima data da sequência.
+                 journaled_date = self._journal.file_main_date(current_data_file_path.name, self._task_name, self._current_file_fingerprint)
+                 if journaled_date and not resume_date_for_file:
+                     logger.info("Arquivo %s retomado do diário com a data '%s'.", current_data_file_path.name, journaled_date)
+                 current_main_date_for_file = resume_date_for_file or journaled_date or date_sequencer.get_next_sequence_date()
+                 resume_date_for_file = None
                  if not current_main_date_for_file:
-                     logger.error(f"Sequência de datas esgotada inesperadamente para o arquivo {current_data_file_path.name}. Pulando este e próximos arquivos.")
+                     logger.error("Sequência de datas esgotada inesperadamente para o arquivo %s. Pulando este e próximos arquivos.", current_data_file_path.name)
                      break # Sai do loop de arquivos
 
-                 logger.info(f"Usando a data '{current_main_date_for_file}' para o arquivo '{current_data_file_path.name}'.")
+                 logger.info("Usando a data '%s' para o arquivo '%s'.", current_main_date_for_file, current_data_file_path.name)
 
 
                  # 4b. Carregar os dados do arquivo CSV atual
                  data_df_current_file = file_manager.load_data_file(current_data_file_path) # Usar novo nome para data_df
                  if data_df_current_file is None or data_df_current_file.empty:
-                     logger.warning(f"Arquivo de dados vazio ou com erro: {current_data_file_path.name}. Pulando.")
-                     file_manager.mark_file_as_processed(current_data_file_path)
+                     logger.warning("Arquivo de dados vazio ou com erro: %s. Pulando.", current_data_file_path.name)
+                     self._mark_file_as_processed(file_manager, current_data_file_path)
                      current_data_file_path = file_manager.find_next_file_to_process()
                      continue # Pula para a próxima iteração do loop while (próximo arquivo)
 
-
-                 # --- 4c. CLICAR NO BOTÃO "Adicionar" para abrir a primeira ficha DESTE ARQUIVO ---
-                 # Este clique acontece UMA VEZ POR ARQUIVO (após entrar na tela da ficha).
-                 logger.info("Clicando no botão 'Adicionar' na tela da ficha para abrir a primeira ficha vazia deste arquivo.")
-                 add_initial_clicked_successful = False # Flag para retentativa manual deste clique
-                 while not add_initial_clicked_successful:
-                      try:
-                          await self._main_menu.click_add_button_in_iframe(self._current_iframe_frame) # CLICA ADICIONAR INICIAL
-                          await asyncio.sleep(1.5) # Espera após o clique Adicionar
-                          add_initial_clicked_successful = True # Sucesso
-
-                      except SkipRecordException: raise # Propaga Skip
-                      except AbortAutomationException: raise # Propaga Abort
-                      except Exception as e:
-                           logger.error(f"Erro no clique inicial em 'Adicionar' para o arquivo {current_data_file_path.name}. Tentando novamente após possível correção manual: {e}")
-                           await self._handler.handle_error(e, step_description=f"Clique inicial em 'Adicionar' para arquivo {current_data_file_path.name}")
-                           # O loop while continuará.
-
-
-                 # --- 4d. Preencher Data Principal PARA ESTE ARQUIVO ---
-                 logger.info(f"Iniciando preenchimento da data principal para este arquivo: {current_main_date_for_file}")
-                 # Mover o mouse (opcional, mas útil)
-                 page_width = self._page.viewport_size['width'] if self._page.viewport_size else 1280
-                 page_height = self._page.viewport_size['height'] if self._page.viewport_size else 720
-                 center_x = page_width // 2
-                 center_y = page_height // 2
-                 logger.debug(f"Movendo mouse para o centro da tela ({center_x}, {center_y})...")
-                 await self._page.mouse.move(center_x, center_y)
-                 await asyncio.sleep(0.5)
-                 logger.debug("Mouse movido.")
-
-                 # Preencher a data
-                 await self._common_forms.fill_date_field(self._current_iframe_frame, current_main_date_for_file)
-                 logger.info(f"Data principal '{current_main_date_for_file}' preenchida com sucesso para este arquivo.")
-
-                 # ** NOVO PASSO: CLICAR NO BOTÃO "Adicionar" APÓS PREENCHER A DATA PRINCIPAL **
-                 # Isso faz o sistema entender que o cabeçalho da ficha foi preenchido
-                 # e prepara a área para os dados do PRIMEIRO PACIENTE.
-                 logger.info("Clicando em 'Adicionar' para preparar o formulário para o primeiro registro do arquivo.")
-                 add_for_first_record_successful = False # Flag para retentativa
-                 while not add_for_first_record_successful:
-                      try:
-                           await self._main_menu.click_add_button_in_iframe(self._current_iframe_frame) # CLICA ADICIONAR
-                           await asyncio.sleep(1.5) # Espera o formulário do paciente aparecer
-                           add_for_first_record_successful = True
-                      except SkipRecordException: raise
-                      except AbortAutomationException: raise
-                      except Exception as e:
-                           logger.error(f"Erro no clique em 'Adicionar' após data principal para arquivo {current_data_file_path.name}. Tentando novamente: {e}")
-                           await self._handler.handle_error(e, step_description=f"Clique 'Adicionar' após data principal para arquivo {current_data_file_path.name}")
-
-
-                 # --- 4e. Loop Principal pelos Registros DESTE ARQUIVO ---
-                 # Este loop chama process_row para cada linha do data_df_current_file DESTE arquivo.
-                 # E clica "Adicionar" entre os registros (exceto após o último DESTE arquivo).
-                 logger.info(f"Iniciando loop de processamento para {len(data_df_current_file)} registros DESTE arquivo.")
-                 # Passamos o DataFrame DESTE arquivo para o _process_all_rows.
-                 # O _process_all_rows lidará com a iteração pelas linhas e cliques Adicionar entre registros.
-                 await self._process_all_rows(data_df_current_file) # Passa o DataFrame DESTE arquivo
-
-
-                 # --- 4f. Marcar arquivo como processado (após processar TODAS as linhas DESTE arquivo) ---
-                 logger.info(f"Todas as linhas do arquivo {current_data_file_path.name} processadas (ou puladas/abortadas).")
-                 file_manager.mark_file_as_processed(current_data_file_path)
-
-                 # ** NOVO PASSO: CLICAR EM "FINALIZAR REGISTROS" PARA ESTE ARQUIVO **
-                 logger.info(f"Finalizando registros para o arquivo {current_data_file_path.name} (clicando Finalizar registros).")
-                 await self._finalize_task() # Chama o método abstrato que clica Finalizar registros
-                 logger.info(f"Finalização para o arquivo {current_data_file_path.name} concluída.")
+                 # 4b'. Linhas já aceitas em execuções anteriores (diário) não são reenviadas.
+                 # Com o envio direto ativo e calibrado, o restante vai por GraphQL; o que não for aceito segue pela interface.
+                 self._current_file_name = current_data_file_path.name
+                 self._current_main_date = current_main_date_for_file
+                 pending_rows = self._pending_rows(data_df_current_file)
+                 if pending_rows and self._direct_engine and self._direct_engine.ready:
+                     self._processed_count_total += await self._direct_engine.submit_file(
+                         self._current_file_name, pending_rows, current_main_date_for_file, self._current_file_fingerprint)
+                     pending_rows = self._pending_rows(data_df_current_file)
+                 if not pending_rows:
+                     logger.info("Todos os registros de %s já foram enviados. Marcando arquivo como processado.", self._current_file_name)
+                     self._mark_file_as_processed(file_manager, current_data_file_path)
+                     current_data_file_path = file_manager.find_next_file_to_process()
+                     continue
+                 self._journal.record(self._task_name, self._current_file_name, None, RunJournal.STATUS_OPENED, main_date=current_main_date_for_file,
+                                      fingerprint=self._current_file_fingerprint)
+                 self._file_row_indexes = [index for index, _ in pending_rows]
+                 self._progress.start_file(self._current_file_name, current_main_date_for_file, len(data_df_current_file) - len(pending_rows))
+                 data_df_current_file = data_df_current_file.loc[self._file_row_indexes].reset_index(drop=True)
+                 self._confirmed_rows = []
+                 self._lot_start = 0
+                 self._progress_rows_kept = self._progress.run_rows
+                 calibrating = self._direct_engine is not None and not self._direct_engine.ready
+                 self._calibrating = calibrating
+                 if calibrating:
+                     self._direct_engine.start_calibration()
+
+
+                 # Nova ficha: os seletores resolvidos na ficha anterior não valem mais
+                 self._selector_cache.clear()
+
+                 try:
+                     # --- 4c/4d. Abrir a ficha deste arquivo e preencher a data principal ---
+                     await self._open_ficha_for_file(current_data_file_path.name, current_main_date_for_file)
+
+                     # --- 4e. Loop Principal pelos Registros DESTE ARQUIVO ---
+                     # Este loop chama process_row para cada linha do data_df_current_file DESTE arquivo.
+                     # E clica "Adicionar" entre os registros (exceto após o último DESTE arquivo).
+                     logger.info("Iniciando loop de processamento para %s registros DESTE arquivo.", len(data_df_current_file))
+                     # Passamos o DataFrame DESTE arquivo para o _process_all_rows.
+                     # O _process_all_rows lidará com a iteração pelas linhas e cliques Adicionar entre registros.
+                     await self._process_all_rows(data_df_current_file) # Passa o DataFrame DESTE arquivo
+
+
+                     # --- 4f. Finalizar registros e marcar arquivo como processado (após processar TODAS as linhas DESTE arquivo) ---
+                     logger.info("Todas as linhas do arquivo %s processadas (ou puladas/abortadas).", current_data_file_path.name)
+
+                     # ** NOVO PASSO: CLICAR EM "FINALIZAR REGISTROS" PARA ESTE ARQUIVO **
+                     logger.info("Finalizando registros para o arquivo %s (clicando Finalizar registros).", current_data_file_path.name)
+                     await self._finalize_lot() # Clica Finalizar registros e registra o último lote no diário
+                     logger.info("Finalização para o arquivo %s concluída.", current_data_file_path.name)
+                     if calibrating:
+                         self._direct_engine.finish_calibration([row_values for _, row_values in self._confirmed_rows], current_main_date_for_file)
+                     await self._maybe_recycle_page()
+                 except SessionRecoveredException:
+                     # A ficha em construção se perdeu com a sessão: reabre o mesmo arquivo com a mesma data.
+                     # As linhas já finalizadas estão no diário; as demais (inclusive as confirmadas e não finalizadas) são refeitas.
+                     logger.warning("Sessão restabelecida. Reabrindo %s a partir do próximo registro não confirmado.", current_data_file_path.name)
+                     # As linhas não finalizadas (confirmadas ou puladas) voltam a ser pendentes e serão contadas de novo
+                     self._progress.rewind_rows(self._progress.run_rows - self._progress_rows_kept)
+                     resume_date_for_file = current_main_date_for_file
+                     continue
+                 # Só depois de 'Finalizar registros': se a sessão cair antes, o arquivo ainda está na fila para ser reaberto
+                 self._mark_file_as_processed(file_manager, current_data_file_path)
 
                  # --- 4g. Encontrar o Próximo arquivo para a PRÓXIMA iteração do loop while ---
                  current_data_file_path = file_manager.find_next_file_to_process()
 
 
             # --- Passo 5: Finalizar Lote (Após TODOS os arquivos serem processados) ---
-            logger.info(f"Loop principal de arquivos finalizado. Total de registros processados na sessão: {self._processed_count_total}, pulados: {self._skipped_count_total}.")
+            logger.info("Loop principal de arquivos finalizado. Total de registros processados na sessão: %s, pulados: %s.", self._processed_count_total, self._skipped_count_total)
             logger.info("Sessão de automação concluída. Todos os arquivos foram processados e finalizados.")
+            if AppConfig.quarantine_retry_lot_at_end:
+                for retry_lot in self._quarantine.generate_retry_lots(self._task_name, self._journal):
+                    logger.warning("Registros em quarentena reunidos em %s. Execute a tarefa novamente para reprocessá-los.", retry_lot.name)
             # await self._finalize_task() # Chama o método abstrato que agora clicará Finalizar registros
 
-            logger.info(f"Execução da tarefa '{self.__class__.__name__}' concluída.")        
+            logger.info("Execução da tarefa '%s' concluída.", self.__class__.__name__)
 
         except (AbortAutomationException, Exception) as e:
-            logger.critical(f"Automação abortada ou erro fatal durante a tarefa '{self.__class__.__name__}': {e}", exc_info=True)
+            logger.critical("Automação abortada ou erro fatal durante a tarefa '%s': %s", self.__class__.__name__, e, exc_info=True)
             if not isinstance(e, (AbortAutomationException, SkipRecordException)):
                 raise AutomationError(f"Erro fatal inesperado no nível da tarefa: {e}") from e
             raise
+        finally:
+            if self._watchdog:
+                self._watchdog.disarm()
+            self._progress.finish_run("concluída" if sys.exc_info()[1] is None else "interrompida")
+            if self._trace and sys.exc_info()[1] is not None:
+                # Execução interrompida no meio de uma linha: salva o trecho dela e os das linhas anteriores
+                await self._trace.finish_row(failed=True, reason=f"Execução interrompida: {sys.exc_info()[1]}")
+            self._record_run_history()
+            if self._tracer:
+                self._tracer.finish(run_span, sys.exc_info()[1]) # Fecha também o arquivo/linha ainda abertos
+                self._file_span = None
+                self._tracer.flush()
 
     # --- _process_all_rows AGORA RECEBE data_df COMO PARÂMETRO ---
     async def _process_all_rows(self, data_df_this_file: pd.DataFrame):
@@ -272,72 +365,403 @@ class BaseTask(ABC): # Herda de ABC para ser uma classe abstrata
         total_rows_this_file = len(data_df_this_file)
 
         for index, row in data_df_this_file.iterrows():
-            logger.info(f"Iniciando processamento do registro {index + 1}/{total_rows_this_file} do arquivo atual.")
+            logger.info("Iniciando processamento do registro %s/%s do arquivo atual.", index + 1, total_rows_this_file)
             data_row = [None if pd.isna(x) else x for x in row.tolist()]
+            row_span = self._start_span("linha", "linha", linha=int(self._file_row_indexes[index]))
+            set_log_context(row=int(self._file_row_indexes[index]))
+            self._progress.start_row()
+            row_skipped = False
+            row_had_error = False
+            skip_class = None
+            self._roundtrips.start_row()
+            if self._trace:
+                await self._trace.start_row(f"{self._task_name}_{self._current_file_name}_linha{int(self._file_row_indexes[index]) + 1}")
+            self._handler.reset_recovery_attempts()
+            self._row_checkpoints = set()
+            self._current_step = None
+            failed_step_attempts = {} # passo -> quantas vezes falhou neste registro
 
             # ** NOVO LOOP DE RETENTATIVA PARA O REGISTRO COMPLETO (await self.process_row) **
             record_processed_successfully = False
             while not record_processed_successfully:
                 try:
-                    logger.debug(f"Tentativa para processar (preencher e confirmar) registro {index + 1}.")
+                    logger.debug("Tentativa para processar (preencher e confirmar) registro %s.", index + 1)
                     # Chama o método abstrato da tarefa filha (preenche e clica Confirmar)
                     await self.process_row(self._current_iframe_frame, data_row)
-                    logger.info(f"Processamento da linha {index + 1} concluído com sucesso.")
+                    logger.info("Processamento da linha %s concluído com sucesso.", index + 1)
                     record_processed_successfully = True # Sucesso, sai deste loop while
+                    self._confirmed_rows.append((self._file_row_indexes[index], data_row))
 
                 except AutomationError as e:
-                    # Capturado quando o usuário clicou "Continuar" no ErrorDialog.
-                    # Isso significa que o usuário corrigiu algo e quer REFAZER ESTE REGISTRO.
-                    logger.warning(f"Erro recuperável para registro {index + 1} (usuário clicou 'Continuar'). Retentando o processamento COMPLETO do registro: {e}")
+                    # Capturado quando o usuário clicou "Continuar" no ErrorDialog (ou a política de recuperação
+                    # mandou repetir). O registro é retentado a partir do passo que falhou: os passos com ponto de
+                    # controle não são refeitos. Se o mesmo passo falhar de novo, a ficha é limpa automaticamente
+                    # e o registro é preenchido do zero (sem depender de limpeza manual na UI).
+                    failed_step = self._current_step
+                    failed_step_attempts[failed_step] = failed_step_attempts.get(failed_step, 0) + 1
+                    if row_span:
+                        row_span.retries += 1
+                    row_had_error = True
+                    self._progress.error(type(e).__name__)
+                    if not AppConfig.row_step_checkpoints_enabled or failed_step_attempts[failed_step] > 1:
+                        logger.warning("Erro recuperável para registro %s no passo '%s'. Limpando a ficha e retentando o registro COMPLETO: %s", index + 1, failed_step, e)
+                        try:
+                            await self._reset_current_form()
+                        except AutomationError as reset_error:
+                            logger.error("Não foi possível limpar a ficha automaticamente: %s. Retentando mesmo assim.", reset_error)
+                            self._row_checkpoints = set()
+                        failed_step_attempts.clear()
+                    else:
+                        logger.warning("Erro recuperável para registro %s. Retomando a partir do passo '%s' (%s passo(s) já concluído(s)): %s", index + 1, failed_step, len(self._row_checkpoints), e)
                     # O loop 'while not record_processed_successfully' continuará para este mesmo registro.
                     await asyncio.sleep(1) # Pequena pausa antes de retentar.
-                    # É CRÍTICO que o usuário tenha limpado os campos manualmente na UI,
-                    # pois `process_row` irá tentar preencher tudo do zero novamente.
 
-                except SkipRecordException:
+                except SkipRecordException as skip:
                     self._skipped_count_total += 1
-                    logger.warning(f"Registro {index + 1} pulado conforme solicitação do usuário.")
+                    logger.warning("Registro %s pulado conforme solicitação do usuário.", index + 1)
+                    self._journal.record(self._task_name, self._current_file_name, self._file_row_indexes[index], RunJournal.STATUS_SKIPPED, row_data=data_row,
+                                        fingerprint=self._current_file_fingerprint)
+                    skip_class = skip.error_class or "pulado_pelo_operador"
+                    self._quarantine_row(index, data_row, skip_class, skip.error or self._handler.last_error)
+                    if row_span:
+                        row_span.outcome = "pulado"
+                    row_skipped = True
                     record_processed_successfully = True # Pulado, sai deste loop while para ir para o próximo registro.
 
                 except AbortAutomationException:
-                    logger.error(f"Automação abortada pelo usuário no registro {index + 1}.")
+                    logger.error("Automação abortada pelo usuário no registro %s.", index + 1)
                     raise # Re-levanta para sair do loop de arquivos principal.
 
+                except SessionRecoveredException:
+                    logger.warning("Sessão restabelecida durante o registro %s. O arquivo será reaberto.", index + 1)
+                    raise # O loop de arquivos reabre o arquivo a partir do próximo registro não confirmado.
+
                 except Exception as e:
                     # Captura qualquer outra exceção inesperada dentro de process_row.
-                    logger.critical(f"Erro INESPERADO durante processamento do registro {index + 1}: {e}", exc_info=True)
+                    logger.critical("Erro INESPERADO durante processamento do registro %s: %s", index + 1, e, exc_info=True)
+                    self._quarantine_row(index, data_row, "erro_inesperado", message=str(e))
                     # Não podemos simplesmente continuar aqui, pois é um erro não gerenciado pelo handler.
                     # É um erro fatal para este registro e possivelmente para a automação.
                     raise AutomationError(f"Erro inesperado e fatal no processamento do registro {index + 1}. Abortando.") from e
 
 
+            # --- Lote cheio: finaliza o que já foi confirmado e reabre a ficha com a mesma data (em vez de 'Adicionar') ---
+            lot_size = AppConfig.lot_finalize_every_rows
+            lot_full = bool(lot_size) and not self._calibrating and len(self._confirmed_rows) - self._lot_start >= lot_size
+            if record_processed_successfully and index < total_rows_this_file - 1 and lot_full:
+                logger.info("Lote de %s registro(s) completo no registro %s/%s. Finalizando antes de continuar.", lot_size, index + 1, total_rows_this_file)
+                await self._finalize_lot()
+                await self._maybe_recycle_page()
+                self._selector_cache.clear()
+                await self._open_ficha_for_file(self._current_file_name, self._current_main_date)
+
             # --- Clicar no botão "Adicionar" para o próximo registro (SE process_row FOI BEM-SUCEDIDO E NÃO É O ÚLTIMO DESTE ARQUIVO) ---
-            if record_processed_successfully and index < total_rows_this_file - 1:
+            elif record_processed_successfully and index < total_rows_this_file - 1:
                 try:
-                    logger.info(f"Registro {index + 1}/{total_rows_this_file} processado com sucesso. Tentando clicar em 'Adicionar' para o próximo registro ({index + 2}).")
-                    await self._main_menu.click_add_button_in_iframe(self._current_iframe_frame) # CLICA ADICIONAR ENTRE REGISTROS
-                    await asyncio.sleep(2)
-                    self._processed_count_total += 1 # Incrementa apenas após o clique Adicionar bem-sucedido.
+                    logger.info("Registro %s/%s processado com sucesso. Tentando clicar em 'Adicionar' para o próximo registro (%s).", index + 1, total_rows_this_file, index + 2)
+                    add_started = time.perf_counter()
+                    with trace_span("adicionar", "passo"):
+                        await self._main_menu.click_add_button_in_iframe(self._current_iframe_frame) # CLICA ADICIONAR ENTRE REGISTROS
+                        await self._main_menu.wait_for_record_form(self._current_iframe_frame) # Em vez de pausa fixa
+                    self._progress.step_finished("adicionar", time.perf_counter() - add_started)
                 except AutomationError as e:
                     # Se 'Adicionar' falha e o usuário clica 'Continuar', significa que ele resolveu o problema
                     # do botão 'Adicionar' e quer que o fluxo siga para o próximo registro.
-                    logger.warning(f"Erro recuperável no clique em 'Adicionar' após registro {index + 1} (usuário clicou 'Continuar'). Assume-se correção manual. Prosseguindo para o próximo registro.")
-                    self._processed_count_total += 1 # Conta o registro anterior como processado, mesmo com um problema no "Adicionar" (assumindo que o usuário corrigiu).
+                    logger.warning("Erro recuperável no clique em 'Adicionar' após registro %s (usuário clicou 'Continuar'). Assume-se correção manual. Prosseguindo para o próximo registro.", index + 1)
                     await asyncio.sleep(1) # Pequena pausa para o usuário ter tempo de corrigir.
                 except SkipRecordException:
                     self._skipped_count_total += 1
-                    logger.warning(f"Clique em 'Adicionar' após registro {index + 1} pulado conforme solicitação do usuário.")
-                    self._processed_count_total += 1 # O registro anterior foi processado, mesmo que "Adicionar" tenha sido pulado.
+                    logger.warning("Clique em 'Adicionar' após registro %s pulado conforme solicitação do usuário.", index + 1)
                 except AbortAutomationException:
-                    logger.error(f"Automação abortada pelo usuário no clique em 'Adicionar' após registro {index + 1}.")
+                    logger.error("Automação abortada pelo usuário no clique em 'Adicionar' após registro %s.", index + 1)
                     raise
 
             # --- Se for o último registro deste arquivo (index == total_rows_this_file - 1) ---
             # Não clica Adicionar. O loop 'for index' termina.
             if record_processed_successfully and index == total_rows_this_file - 1:
-                self._processed_count_total += 1
-                logger.info(f"Último registro ({index + 1}/{total_rows_this_file}) processado. Não clicando em 'Adicionar'.")
+                logger.info("Último registro (%s/%s) processado. Não clicando em 'Adicionar'.", index + 1, total_rows_this_file)
+
+            self._roundtrips.end_row()
+            self._finish_span(row_span)
+            self._progress.finish_row(skipped=row_skipped, skip_class=skip_class)
+            if self._trace:
+                # Linha com erro ou pulada: guarda o trace dela e das anteriores (o contexto que levou à falha)
+                reason = f"Registro pulado ({skip_class})" if row_skipped else "Erro recuperável durante o registro (retentado)" if row_had_error else None
+                await self._trace.finish_row(failed=row_skipped or row_had_error, reason=reason)
+
+            if record_processed_successfully and AppConfig.page_health_sample_every_rows:
+                self._rows_since_health_sample += 1
+                if self._rows_since_health_sample >= AppConfig.page_health_sample_every_rows:
+                    self._rows_since_health_sample = 0
+                    await self._page_health.sample()
+
+        logger.info("Média de round trips por registro na sessão: %.1f", self._roundtrips.average_per_row)
+        logger.debug("Cache de seletores: %s acertos, %s resoluções.", self._selector_cache.hits, self._selector_cache.misses)
+
+    @traced("passo")
+    async def _finalize_lot(self):
+        """
+        Clica 'Finalizar registros' (via _finalize_task da tarefa) e grava no diário os registros do lote
+        como aceitos, mais uma entrada do próprio lote. Depois disso eles não são reenviados em uma retomada.
+
+        Um 'Finalizar' não confirmado (timeout, message-box, 'Continuar' do operador) não derruba a execução:
+        se o botão sumiu, o lote foi gravado; se continua visível, o clique é repetido até _FINALIZE_MAX_ATTEMPTS
+        vezes e depois o operador confirma (Continuar = finalizou manualmente). 'Pular' também conta como
+        finalizado manualmente, como no clique em 'Adicionar'.
+        """
+        lot_rows = self._confirmed_rows[self._lot_start:]
+        self._handler.reset_recovery_attempts()
+        attempts = 0
+        while True:
+            try:
+                await self._finalize_task()
+                break
+            except SkipRecordException:
+                logger.warning("'Finalizar registros' pulado conforme solicitação do usuário. Assume-se que o lote foi finalizado manualmente.")
+                break
+            except AutomationError as e:
+                # O handler já foi acionado (política de recuperação ou operador mandou continuar)
+                if not await self._main_menu.is_finalize_pending(self._current_iframe_frame):
+                    logger.info("'Finalizar registros' concluído após a recuperação (o botão não está mais visível).")
+                    break
+                attempts += 1
+                if attempts < self._FINALIZE_MAX_ATTEMPTS:
+                    logger.warning("'Finalizar registros' não confirmado (tentativa %s/%s). Clicando novamente: %s", attempts, self._FINALIZE_MAX_ATTEMPTS, e)
+                    continue
+                try:
+                    await self._handler.handle_error(e, step_description=f"'Finalizar registros' não confirmado após {attempts} tentativas. Finalize o lote manualmente e clique em 'Continuar'",
+                                                     automatic_recovery=False)
+                except SkipRecordException:
+                    pass
+                logger.warning("'Finalizar registros': operador confirmou a finalização manual do lote.")
+                break
+        for original_index, row_values in lot_rows:
+            self._journal.record(self._task_name, self._current_file_name, original_index, RunJournal.STATUS_OK, row_data=row_values,
+                                 fingerprint=self._current_file_fingerprint)
+        self._journal.record(self._task_name, self._current_file_name, None, RunJournal.STATUS_LOT_FINALIZED,
+                             detail=f"{len(lot_rows)} registro(s)", main_date=self._current_main_date, fingerprint=self._current_file_fingerprint)
+        self._lot_start = len(self._confirmed_rows)
+        self._processed_count_total += len(lot_rows) # Só o que foi finalizado conta (uma retomada refaz o resto)
+        self._progress_rows_kept += len(lot_rows)
+        logger.info("Lote finalizado: %s registro(s) de %s gravados no diário.", len(lot_rows), self._current_file_name)
+
+    @traced("passo")
+    async def _open_ficha_for_file(self, file_name: str, main_date: str):
+        """
+        Abre a ficha de um arquivo: 'Adicionar', data principal e 'Adicionar' de novo para o primeiro registro.
+        Usado no início de cada arquivo e ao reabrir o arquivo depois de um re-login.
+        """
+        # --- 4c. CLICAR NO BOTÃO "Adicionar" para abrir a primeira ficha DESTE ARQUIVO ---
+        # Este clique acontece UMA VEZ POR ARQUIVO (após entrar na tela da ficha).
+        logger.info("Clicando no botão 'Adicionar' na tela da ficha para abrir a primeira ficha vazia deste arquivo.")
+        add_initial_clicked_successful = False # Flag para retentativa manual deste clique
+        while not add_initial_clicked_successful:
+            try:
+                await self._main_menu.click_add_button_in_iframe(self._current_iframe_frame) # CLICA ADICIONAR INICIAL
+                await asyncio.sleep(1.5) # Espera após o clique Adicionar
+                add_initial_clicked_successful = True # Sucesso
+
+            except SkipRecordException: raise # Propaga Skip
+            except AbortAutomationException: raise # Propaga Abort
+            except SessionRecoveredException: raise # Re-login: o arquivo é reaberto
+            except Exception as e:
+                logger.error("Erro no clique inicial em 'Adicionar' para o arquivo %s. Tentando novamente após possível correção manual: %s", file_name, e)
+                await self._handler.handle_error(e, step_description=f"Clique inicial em 'Adicionar' para arquivo {file_name}")
+                # O loop while continuará.
+
+
+        # --- 4d. Preencher Data Principal PARA ESTE ARQUIVO ---
+        logger.info("Iniciando preenchimento da data principal para este arquivo: %s", main_date)
+        # Mover o mouse (opcional, mas útil)
+        page_width = self._page.viewport_size['width'] if self._page.viewport_size else 1280
+        page_height = self._page.viewport_size['height'] if self._page.viewport_size else 720
+        center_x = page_width // 2
+        center_y = page_height // 2
+        logger.debug("Movendo mouse para o centro da tela (%s, %s)...", center_x, center_y)
+        await self._page.mouse.move(center_x, center_y)
+        await asyncio.sleep(0.5)
+        logger.debug("Mouse movido.")
+
+        # Preencher a data
+        await self._common_forms.fill_date_field(self._current_iframe_frame, main_date)
+        logger.info("Data principal '%s' preenchida com sucesso para este arquivo.", main_date)
+
+        # ** NOVO PASSO: CLICAR NO BOTÃO "Adicionar" APÓS PREENCHER A DATA PRINCIPAL **
+        # Isso faz o sistema entender que o cabeçalho da ficha foi preenchido
+        # e prepara a área para os dados do PRIMEIRO PACIENTE.
+        logger.info("Clicando em 'Adicionar' para preparar o formulário para o primeiro registro do arquivo.")
+        add_for_first_record_successful = False # Flag para retentativa
+        while not add_for_first_record_successful:
+            try:
+                await self._main_menu.click_add_button_in_iframe(self._current_iframe_frame) # CLICA ADICIONAR
+                await self._main_menu.wait_for_record_form(self._current_iframe_frame) # Espera o formulário do paciente aparecer
+                add_for_first_record_successful = True
+            except SkipRecordException: raise
+            except AbortAutomationException: raise
+            except SessionRecoveredException: raise
+            except Exception as e:
+                logger.error("Erro no clique em 'Adicionar' após data principal para arquivo %s. Tentando novamente: %s", file_name, e)
+                await self._handler.handle_error(e, step_description=f"Clique 'Adicionar' após data principal para arquivo {file_name}")
+
+    async def _reacquire_task_iframe(self):
+        """
+        Recuperação de iframe obsoleto: espera o iframe do e-SUS estar anexado de novo e a máscara
+        de carregamento sumir, e descarta os seletores em cache (os elementos antigos não valem mais).
+        Não navega pelo menu, para não perder os registros já confirmados da ficha atual.
+        """
+        logger.info("Recuperação: readquirindo o iframe da ficha.")
+        await self._page.locator('iframe[title="e-sus"]').wait_for(state="attached", timeout=15000)
+        await self._page.locator('div.ext-el-mask').wait_for(state="hidden", timeout=15000)
+        self._selector_cache.clear()
+
+    async def _step(self, name: str, action, *args):
+        """
+        Executa um passo do registro com ponto de controle: se 'name' já foi concluído nesta linha
+        (retentativa após erro), o passo é pulado. Os nomes precisam ser únicos dentro de process_row.
+        """
+        if name in self._row_checkpoints:
+            logger.debug("Passo '%s' já concluído neste registro. Pulando.", name)
+            return None
+        self._current_step = name
+        if self._watchdog and self._watchdog.problem:
+            # Não envia mais ações a uma sessão morta: a política de recuperação decide (re-login ou operador)
+            problem = self._watchdog.problem
+            await self._handler.handle_error(AutomationError(problem, step=name), step_description=f"Watchdog de sessão antes do passo '{name}'")
+            self._watchdog.arm() # O operador clicou 'Continuar' (diz que resolveu): volta a vigiar com o estado limpo
+        self._form_was_reset = False
+        step_started = time.perf_counter()
+        with trace_span(name, "passo", passo=name):
+            result = await action(*args)
+        self._progress.step_finished(name, time.perf_counter() - step_started)
+        if self._form_was_reset:
+            # O handler limpou a ficha durante o passo (ação 'refill'): o registro precisa recomeçar do início
+            raise AutomationError(f"Ficha reiniciada durante o passo '{name}'. Preenchendo o registro novamente.", step=name)
+        self._row_checkpoints.add(name)
+        return result
+
+    async def _reset_current_form(self):
+        """
+        Ação 'refill': limpa o formulário do cidadão e descarta os pontos de controle do registro,
+        para que process_row preencha tudo de novo em uma ficha limpa.
+        """
+        logger.info("Recuperação: limpando a ficha para preencher o registro novamente.")
+        self._row_checkpoints = set()
+        self._form_was_reset = True
+        self._selector_cache.clear()
+        await self._common_forms.reset_patient_form(self._current_iframe_frame)
+
+    async def _recover_session(self):
+        """
+        Ação 'relogin': espera o servidor do e-SUS voltar, faz o login de novo, seleciona o perfil e volta
+        à área da tarefa. Termina com SessionRecoveredException para o loop de arquivos reabrir o arquivo
+        atual (data principal restaurada) a partir do próximo registro não confirmado.
+        """
+        if self._recovering_session or not self._login_config:
+            # Falha durante o próprio re-login: fica com o operador (evita recursão de re-logins)
+            raise AutomationError("Falha durante o re-login automático.", step="Re-login")
+        self._recovering_session = True
+        try:
+            logger.warning("Recuperação: sessão do e-SUS perdida ou servidor indisponível. Iniciando re-login.")
+            self._watchdog.disarm()
+            await self._watchdog.wait_for_server()
+            await self._reopen_task_area(login=True)
+            logger.info("Recuperação: re-login concluído e área da tarefa aberta.")
+        finally:
+            self._recovering_session = False
+        raise SessionRecoveredException("Sessão restabelecida após re-login.")
+
+    async def _reopen_task_area(self, login: bool):
+        """Refaz (se pedido) o login e a seleção de perfil e volta à área da tarefa, com o watchdog rearmado."""
+        if login:
+            await self._login_page.navigate_and_login(self._login_config["url"], self._login_config["usuario"], self._login_config["senha"])
+            if self._manual_login:
+                logger.warning("LOGIN MANUAL ATIVADO. Pausando por 5 segundos para seleção de perfil/equipe após o novo login.")
+                await asyncio.sleep(5)
+            else:
+                await self._perform_pre_navigation_steps()
+        self._selector_cache.clear()
+        self._current_iframe_frame = await self._navigate_to_task_area()
+        if not self._current_iframe_frame:
+            raise AutomationError("Falha ao navegar para a área da tarefa.", step="Reabrir área da tarefa")
+        if self._watchdog:
+            self._watchdog.arm()
+
+    async def _maybe_recycle_page(self):
+        """
+        Ponto seguro (logo após 'Finalizar registros', sem registros pendentes no navegador): se a amostra
+        de saúde da página passou do limite, recarrega a página (DOM e heap JS do ExtJS voltam ao tamanho
+        inicial) e volta à área da tarefa, logando de novo se o reload cair na tela de login.
+        """
+        if not self._page_health.needs_recycle:
+            return
+        before = self._page_health.last_sample
+        recycled = False
+        while not recycled:
+            try:
+                logger.info("Recarregando a página do e-SUS para liberar memória (ponto seguro entre lotes).")
+                if self._watchdog:
+                    self._watchdog.disarm()
+                await self._page.reload(wait_until="domcontentloaded")
+                await self._reopen_task_area(login="/login" in self._page.url.lower())
+                recycled = True
+            except (SkipRecordException, AbortAutomationException, SessionRecoveredException):
+                raise
+            except Exception as e:
+                logger.error("Erro ao recarregar a página do e-SUS: %s", e)
+                await self._handler.handle_error(e, step_description="Recarregar página do e-SUS (reciclagem de memória)")
+        self._page_health.reset()
+        after = await self._page_health.sample()
+        if before and after:
+            logger.info("Página recarregada: %s -> %s nós, %.0f -> %.0f MB de heap JS.",
+                        before['dom_nodes'], after['dom_nodes'], before['js_heap_mb'], after['js_heap_mb'])
+
+    def _record_run_history(self):
+        """Grava o resumo da execução no RunHistory e registra no log as regressões em relação às anteriores."""
+        progress = self._progress
+        if not AppConfig.run_history_enabled or not progress.run_rows:
+            return
+        browser_name = browser_version = None
+        try:
+            browser = self._page.context.browser
+            if browser:
+                browser_name, browser_version = browser.browser_type.name, browser.version
+        except Exception:
+            pass # Navegador já fechado/caído: grava sem ele
+        try:
+            history = RunHistory()
+            run_id = history.record_run(
+                self._task_name, progress.started_at, time.monotonic() - progress.started, progress.run_rows,
+                progress.skipped_rows, progress.status, progress.step_durations, dict(progress.errors_by_class),
+                dict(progress.skips_by_class), browser_name, browser_version, AppConfig.current_pec_version())
+            for finding in history.regressions(run_id, AppConfig.regression_baseline_days, AppConfig.regression_threshold):
+                logger.warning("Regressão de desempenho: %s", finding)
+        except Exception as e:
+            logger.error("Não foi possível gravar a execução no histórico: %s", e)
+
+    def _quarantine_row(self, index: int, data_row: list, error_class: str, error: AutomationError = None, message: str = None):
+        """Guarda a linha 'index' (posição no _process_all_rows) na quarentena com o contexto do erro."""
+        self._quarantine.add(
+            task=self._task_name,
+            file_name=self._current_file_name,
+            row_index=self._file_row_indexes[index],
+            row_data=data_row,
+            error_class=error_class,
+            step=error.step if error else None,
+            screenshot_path=error.screenshot_path if error else None,
+            main_date=self._current_main_date,
+            message=message or (error.message if error else None),
+        )
+
+    def _mark_file_as_processed(self, file_manager: FileManager, file_path):
+        """Marca o arquivo como processado e encerra o histórico dele no diário (o nome pode voltar com outros dados)."""
+        self._journal.mark_file_done(self._task_name, file_path.name, self._current_file_fingerprint)
+        file_manager.mark_file_as_processed(file_path)
 
+    def _pending_rows(self, data_df: pd.DataFrame) -> list:
+        """Linhas [(índice no CSV, valores)] do arquivo atual (mesmo conteúdo, ainda não concluído) que o diário não registra como aceitas."""
+        done = self._journal.completed_rows(self._current_file_name, self._task_name, self._current_file_fingerprint)
+        return [(index, [None if pd.isna(x) else x for x in row.tolist()])
+                for index, row in data_df.iterrows() if index not in done]
 
     @abstractmethod
     async def _navigate_to_task_area(self) -> Locator:
@@ -380,20 +804,20 @@ class BaseTask(ABC): # Herda de ABC para ser uma classe abstrata
 
          # Verifique se row_data tem tamanho suficiente antes de acessar índices
          if len(row_data) > 0:
-             await self._common_forms.select_period(iframe_frame, str(row_data[0]))
+             await self._step("periodo", self._common_forms.select_period, iframe_frame, str(row_data[0]))
          if len(row_data) > 1:
-             await self._common_forms.fill_cpf_cns(iframe_frame, str(row_data[1]))
+             await self._step("cpf_cns", self._common_forms.fill_cpf_cns, iframe_frame, str(row_data[1]))
          if len(row_data) > 2:
-             await self._common_forms.fill_date_of_birth(iframe_frame, str(row_data[2]))
+             await self._step("data_nascimento", self._common_forms.fill_date_of_birth, iframe_frame, str(row_data[2]))
          if len(row_data) > 3:
              # Converte para int com tratamento básico de erro
              try:
                   gender_int = int(row_data[3])
-                  await self._common_forms.select_gender_02(iframe_frame, gender_int)
+                  await self._step("sexo", self._common_forms.select_gender_02, iframe_frame, gender_int)
              except (ValueError, TypeError):
-                  logger.warning(f"Valor inválido para Gênero na linha: {row_data[3]}. Pulando seleção de gênero.")
+                  logger.warning("Valor inválido para Gênero na linha: %s. Pulando seleção de gênero.", row_data[3])
          if len(row_data) > 4:
-             await self._common_forms.select_local_atendimento_02(iframe_frame, str(row_data[4]))
+             await self._step("local_atendimento", self._common_forms.select_local_atendimento_02, iframe_frame, str(row_data[4]))
 
          # Pausa opcional após preencher campos comuns
          # await asyncio.sleep(1)
@@ -411,26 +835,26 @@ class BaseTask(ABC): # Herda de ABC para ser uma classe abstrata
 
         # Reutiliza a lógica já existente para os campos compartilhados
         if len(row_data) > 0:
-            await self._common_forms.select_period(iframe_frame, str(row_data[0]))
+            await self._step("periodo", self._common_forms.select_period, iframe_frame, str(row_data[0]))
         if len(row_data) > 1:
-            await self._common_forms.fill_cpf_cns(iframe_frame, str(row_data[1]))
+            await self._step("cpf_cns", self._common_forms.fill_cpf_cns, iframe_frame, str(row_data[1]))
         if len(row_data) > 2:
-            await self._common_forms.fill_date_of_birth(iframe_frame, str(row_data[2]))
+            await self._step("data_nascimento", self._common_forms.fill_date_of_birth, iframe_frame, str(row_data[2]))
         if len(row_data) > 3:
             try:
                 gender_int = int(row_data[3])
-                await self._acs_form.select_gender_acs(iframe_frame, gender_int) # Teste clica sexo ACS
+                await self._step("sexo", self._acs_form.select_gender_acs, iframe_frame, gender_int) # Teste clica sexo ACS
             except (ValueError, TypeError):
-                logger.warning(f"Valor inválido para Gênero na linha: {row_data[3]}. Pulando seleção.")
+                logger.warning("Valor inválido para Gênero na linha: %s. Pulando seleção.", row_data[3])
 
         # --- ALTERAÇÃO: Chamando os novos métodos do acs_form.py ---
         if len(row_data) > 4:
             # Chama o método que criamos em acs_form.py
-            await self._acs_form.fill_micro_area(iframe_frame, str(row_data[4]))
+            await self._step("micro_area", self._acs_form.fill_micro_area, iframe_frame, str(row_data[4]))
         if len(row_data) > 8:
             # Chama o método de seleção, passando o código do CSV e o texto esperado.
             # Assumindo que o código '01' sempre corresponde a 'DOMICÍLIO'
             imovel_code = str(row_data[8])
             imovel_description = "DOMICÍLIO" # Pode ser adaptado se houver outros tipos
-            await self._acs_form.select_tipo_imovel(iframe_frame, imovel_code, imovel_description)
+            await self._step("tipo_imovel", self._acs_form.select_tipo_imovel, iframe_frame, imovel_code, imovel_description)
     # --- FIM DA NOVA FUNÇÃO ---
\ No newline at end of file
@@ -28,7 +28,7 @@ class HipertensoProcedimentoTask(BaseTask):
         Implementa o método abstrato da BaseTask.
         Recebe o FrameLocator do iframe e os dados da linha.
         """
-        logger.info(f"Processando linha para Hipertenso/Procedimento: {row_data[1]} (CPF/CNS)")
+        logger.info("Processando linha para Hipertenso/Procedimento: %s (CPF/CNS)", row_data[1])
 
         # -- Passo 1: Registrar Atendimento Hipertenso --
 
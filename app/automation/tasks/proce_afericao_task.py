@@ -66,29 +66,29 @@ class ProcedimentoAfericaoTask(BaseTask):
         Processa uma única linha de dados para registrar procedimentos de Aferição
         (dois códigos SIGTAP).
         """
-        logger.debug(f"Processando linha para Procedimento Aferição: {row_data}")
+        logger.debug("Processando linha para Procedimento Aferição: %s", row_data)
 
         # Preenche os campos comuns do paciente
         await self._fill_common_patient_data(iframe_frame, row_data)
 
         # --- Preenche o PRIMEIRO Código SIGTAP ---
         sigtap_code_1 = "0301100039"
-        logger.info(f"Preenchendo PRIMEIRO Código SIGTAP: {sigtap_code_1}")
-        await self._procedimento_form.fill_sigtap_code(iframe_frame, sigtap_code_1)
+        logger.info("Preenchendo PRIMEIRO Código SIGTAP: %s", sigtap_code_1)
+        await self._step("sigtap_1", self._procedimento_form.fill_sigtap_code, iframe_frame, sigtap_code_1)
         await asyncio.sleep(0.5)
         # Após esta chamada, o procedimento 1 deve ter sido adicionado à lista e o campo limpo.
 
 
         # --- Preenche o SEGUNDO Código SIGTAP ---
         sigtap_code_2 = "0101040024"
-        logger.info(f"Preenchendo SEGUNDO Código SIGTAP: {sigtap_code_2}")
+        logger.info("Preenchendo SEGUNDO Código SIGTAP: %s", sigtap_code_2)
         # Chama fill_sigtap_code novamente. Ele vai limpar o campo (se tiver algo) e preencher o segundo.
-        await self._procedimento_form.fill_sigtap_code(iframe_frame, sigtap_code_2)
+        await self._step("sigtap_2", self._procedimento_form.fill_sigtap_code, iframe_frame, sigtap_code_2)
         await asyncio.sleep(0.5)
 
 
         # --- Clica no botão "Confirmar" da ficha de Procedimentos (APÓS AMBOS OS SIGTAPS) ---
-        await self._procedimento_form.click_confirm_button(iframe_frame)
+        await self._step("confirmar", self._procedimento_form.click_confirm_button, iframe_frame)
         logger.debug("Campos específicos de Procedimento Aferição (dois SIGTAP) preenchidos e Confirmar clicado.")
 
     async def _finalize_task(self):
@@ -100,7 +100,6 @@ class ProcedimentoAfericaoTask(BaseTask):
         # Usa o botão "Salvar" do iframe principal
         await self._main_menu.click_finalize_records_button_in_iframe(self._current_iframe_frame)
         # Pode ser necessário adicionar uma espera ou lidar com popup após finalizar.
-        await asyncio.sleep(3) # Ajuste conforme necessário
 
         # Se necessário clicar em "Finalizar registros" para o lote, a lógica deve estar no Worker da GUI.
         # await self._main_menu.click_finalize_records_button_in_iframe(self._current_iframe_frame)
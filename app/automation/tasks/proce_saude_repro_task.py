@@ -25,19 +25,19 @@ class ProcedimentoSaudeReproTask(BaseTask):
         Implementa o método abstrato da BaseTask.
         Recebe o FrameLocator do iframe e os dados da linha.
         """
-        logger.debug(f"Processando linha para Procedimento Saúde Sexual: {row_data}")
+        logger.debug("Processando linha para Procedimento Saúde Sexual: %s", row_data)
 
         # Preenche os campos comuns do paciente (Período, CPF, Data Nasc, Gênero, Local)
         # Verifique no seu site real se a ficha de Procedimentos tem esses campos comuns.
         await self._fill_common_patient_data(iframe_frame, row_data)
 
-        await self._procedimento_form.select_exame_do_colo_uterino(iframe_frame)
+        await self._step("exame_colo_uterino", self._procedimento_form.select_exame_do_colo_uterino, iframe_frame)
         await asyncio.sleep(1.5)
 
 
         # Clica no botão "Confirmar" da ficha de Procedimentos principal
         # Este método já lida com possíveis alertas (como "Campos duplicados")
-        await self._procedimento_form.click_confirm_button(iframe_frame)
+        await self._step("confirmar", self._procedimento_form.click_confirm_button, iframe_frame)
 
         logger.debug("Campos específicos de Procedimento Saúde Sexual preenchidos e Confirmar clicado.")
 
@@ -54,7 +54,6 @@ class ProcedimentoSaudeReproTask(BaseTask):
         # Usa o botão "Salvar" do iframe principal
         await self._main_menu.click_finalize_records_button_in_iframe(self._current_iframe_frame)
         # Pode ser necessário adicionar uma espera ou lidar com popup após finalizar.
-        await asyncio.sleep(3) # Ajuste conforme necessário
 
         # Se necessário clicar em "Finalizar registros" para o lote, a lógica deve estar no Worker da GUI.
         # await self._main_menu.click_finalize_records_button_in_iframe(self._current_iframe_frame)
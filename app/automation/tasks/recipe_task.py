@@ -0,0 +1,67 @@
+# Arquivo: app/automation/tasks/recipe_task.py
+import asyncio
+from playwright.async_api import Locator
+from app.automation.tasks.base_task import BaseTask
+from app.automation.recipes.compiler import StepPlan
+from app.core.logger import logger
+
+
+class RecipeTask(BaseTask):
+    """
+    Tarefa genérica que executa um plano compilado a partir de uma receita (resources/recipes).
+    Cada receita vira uma subclasse com o atributo PLAN (ver for_plan), para caber no TASK_MAP
+    do worker sem mudar a forma como as tarefas são instanciadas.
+    """
+    PLAN: StepPlan = None
+
+    _NAVIGATION_BY_AREA = {
+        "atendimento_individual": "navigate_to_atendimento_individual",
+        "procedimentos": "navigate_to_procedimentos",
+        "acs_visita_domiciliar": "navigate_to_acs_visita_domiciliar",
+    }
+
+    @classmethod
+    def for_plan(cls, plan: StepPlan) -> type:
+        """Cria a classe de tarefa para um plano (uma por receita)."""
+        class_name = "RecipeTask_" + "".join(ch if ch.isalnum() else "_" for ch in plan.name)
+        return type(class_name, (cls,), {"PLAN": plan})
+
+    async def _perform_pre_navigation_steps(self):
+        """Seleciona o perfil definido na receita (padrão: ENFERMEIRO)."""
+        profile = self.PLAN.profile
+        logger.info("Executando passo de pré-navegação da receita '%s': perfil '%s'.", self.PLAN.name, profile)
+        profile_selected = await self._login_page.select_profile_and_unidade_optional(profile_name_to_select=profile)
+        if not profile_selected:
+            logger.warning("Não foi possível selecionar o perfil '%s'. A automação continuará com o perfil carregado.", profile)
+
+    async def _navigate_to_task_area(self) -> Locator:
+        logger.info("Navegando para a área '%s' (receita '%s').", self.PLAN.area, self.PLAN.name)
+        navigate = getattr(self._main_menu, self._NAVIGATION_BY_AREA[self.PLAN.area])
+        return await navigate()
+
+    async def process_row(self, iframe_frame: Locator, row_data: list):
+        """Executa os passos do plano para uma linha."""
+        logger.debug("Processando linha pela receita '%s': %s", self.PLAN.name, row_data)
+        values = self.PLAN.read_row(row_data)
+
+        for position, step in enumerate(self.PLAN.steps):
+            primitive = getattr(getattr(self, step.form_attr), step.method)
+            checkpoint = f"{position}:{step.field}" # Campos podem se repetir na receita; a posição desambigua
+            if step.takes_value:
+                value = values.get(step.value_key)
+                if value is None and step.optional:
+                    logger.debug("Campo '%s' sem valor nesta linha. Passo ignorado.", step.field)
+                    continue
+                await self._step(checkpoint, primitive, iframe_frame, value)
+            else:
+                await self._step(checkpoint, primitive, iframe_frame)
+            if step.wait_after:
+                await asyncio.sleep(step.wait_after)
+
+        logger.debug("Linha processada pela receita '%s'.", self.PLAN.name)
+
+    async def _finalize_task(self):
+        logger.info("Finalizando tarefa da receita '%s'.", self.PLAN.name)
+        await self._main_menu.click_finalize_records_button_in_iframe(self._current_iframe_frame)
+        if self.PLAN.finalize_wait:
+            await asyncio.sleep(self.PLAN.finalize_wait)
@@ -0,0 +1,138 @@
+# Arquivo: app/automation/trace_recorder.py
+import shutil
+import sys
+import tempfile
+import weakref
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from playwright.async_api import BrowserContext, Page
+from app.core.logger import logger
+from app.core.app_config import AppConfig
+
+
+def _safe_name(text: str) -> str:
+    return "".join(char if char.isalnum() or char in "-_" else "_" for char in text)[:80]
+
+
+class TraceRecorder:
+    """
+    Trace do Playwright em anel: um trecho (chunk) por linha, guardando só os das últimas
+    AppConfig.trace_keep_rows linhas numa pasta temporária. Quando uma linha falha ou é pulada,
+    os trechos guardados (a linha e as anteriores) são copiados para logs/traces, prontos para
+    'playwright show-trace'. O custo fica limitado a N trechos em disco, em vez do trace da execução inteira.
+
+    Desligado por padrão: só grava com AppConfig.trace_keep_rows > 0 (configuração do operador).
+    Criado pelo BrowserManager (launch_browser com enable_trace); a BaseTask pega o da página com for_page().
+    """
+    if getattr(sys, 'frozen', False):
+        BASE_DIR = Path(sys.executable).parent
+    else:
+        BASE_DIR = Path(__file__).resolve().parents[2]
+
+    TRACES_DIR = BASE_DIR / "logs" / "traces"
+    MAX_SAVED = 50 # Pastas de falha mantidas em logs/traces (as mais antigas são apagadas)
+
+    _instances = weakref.WeakKeyDictionary() # Page -> TraceRecorder
+
+    def __init__(self, context: BrowserContext, keep_rows: int):
+        self._context = context
+        self._chunks = deque() # (arquivo .zip, rótulo) das últimas linhas
+        self._keep_rows = keep_rows
+        self._temp_dir = Path(tempfile.mkdtemp(prefix="botcds_trace_"))
+        self._sequence = 0
+        self._open_label: str = None # Rótulo do trecho aberto (linha em andamento)
+        self._broken = False # Tracing falhou (navegador caiu): para de tentar
+
+    @classmethod
+    async def attach(cls, page: Page, context: BrowserContext) -> "TraceRecorder | None":
+        """Inicia o tracing no contexto e associa o gravador à página (None se falhar ou estiver desligado)."""
+        if AppConfig.trace_keep_rows <= 0:
+            return None
+        recorder = cls(context, AppConfig.trace_keep_rows)
+        try:
+            await context.tracing.start(screenshots=AppConfig.trace_screenshots, snapshots=True)
+        except Exception as e:
+            logger.warning("Não foi possível iniciar o trace do Playwright: %s. Seguindo sem trace em anel.", e)
+            recorder._cleanup()
+            return None
+        cls._instances[page] = recorder
+        logger.info("Trace em anel ativo: últimas %s linha(s), salvas em %s quando uma linha falha.", recorder._keep_rows, cls.TRACES_DIR)
+        return recorder
+
+    @classmethod
+    def for_page(cls, page: Page) -> "TraceRecorder | None":
+        return cls._instances.get(page)
+
+    # --- Trechos por linha ---
+
+    async def start_row(self, label: str):
+        if self._broken:
+            return
+        if self._open_label is not None:
+            await self.finish_row(failed=False) # Trecho anterior não foi fechado (não deveria acontecer)
+        try:
+            await self._context.tracing.start_chunk(title=label)
+            self._open_label = label
+        except Exception as e:
+            self._fail(e)
+
+    async def finish_row(self, failed: bool, reason: str = None) -> Path | None:
+        """Fecha o trecho da linha; se 'failed', salva os trechos guardados e retorna a pasta."""
+        if self._broken or self._open_label is None:
+            return None
+        label, self._open_label = self._open_label, None
+        self._sequence += 1
+        chunk_path = self._temp_dir / f"{self._sequence:06d}.zip"
+        try:
+            await self._context.tracing.stop_chunk(path=chunk_path)
+        except Exception as e:
+            self._fail(e)
+            return None
+        self._chunks.append((chunk_path, label))
+        while len(self._chunks) > self._keep_rows:
+            oldest, _ = self._chunks.popleft()
+            oldest.unlink(missing_ok=True)
+        return self._save(label, reason) if failed else None
+
+    def _save(self, label: str, reason: str = None) -> Path | None:
+        target = self.TRACES_DIR / f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{_safe_name(label)}"
+        try:
+            target.mkdir(parents=True, exist_ok=True)
+            for position, (chunk_path, chunk_label) in enumerate(self._chunks, start=1):
+                shutil.copy2(chunk_path, target / f"{position:02d}_{_safe_name(chunk_label)}.zip")
+            if reason:
+                (target / "motivo.txt").write_text(reason, encoding="utf-8")
+        except OSError as e:
+            logger.error("Não foi possível salvar o trace da linha em %s: %s", target, e)
+            return None
+        self._prune_saved()
+        logger.warning("Trace das últimas %s linha(s) salvo em %s (abrir com: playwright show-trace <arquivo.zip>).", len(self._chunks), target)
+        return target
+
+    def _prune_saved(self):
+        saved = sorted(path for path in self.TRACES_DIR.iterdir() if path.is_dir())
+        for path in saved[:-self.MAX_SAVED]:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def _fail(self, error: Exception):
+        logger.warning("Trace em anel desativado nesta sessão (o tracing falhou: %s).", error)
+        self._broken = True
+        self._open_label = None
+
+    # --- Encerramento ---
+
+    async def close(self, failed_reason: str = None):
+        """Fecha o trecho aberto (salvando-o se a execução terminou no meio da linha), para o tracing e limpa os temporários."""
+        if self._open_label is not None:
+            await self.finish_row(failed=bool(failed_reason), reason=failed_reason)
+        if not self._broken:
+            try:
+                await self._context.tracing.stop()
+            except Exception:
+                pass # Contexto já fechado
+        self._cleanup()
+
+    def _cleanup(self):
+        shutil.rmtree(self._temp_dir, ignore_errors=True)
+        self._chunks.clear()
@@ -0,0 +1,230 @@
+# Arquivo: app/benchmark/log_miner.py
+import argparse
+import glob
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+import pandas as pd
+from app.core.logger import open_log_file, is_log_file
+
+
+if getattr(sys, 'frozen', False):
+    BASE_DIR = Path(sys.executable).parent
+else:
+    BASE_DIR = Path(__file__).resolve().parents[2]
+
+DEFAULT_LOGS = str(BASE_DIR / "logs" / "botcds_*.log*") # Inclui as partes rotacionadas (.log.gz)
+DEFAULT_OUTPUT_DIR = BASE_DIR / "logs" / "mineracao"
+
+# Formato de app/core/logger.py: '%(asctime)s - %(name)s - %(levelname)s - %(message)s' (resolução de 1 s).
+# Linhas sem esse prefixo (tracebacks, planos de passos) são continuação da anterior e são ignoradas.
+_LINE = re.compile(r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) - \S+ - (DEBUG|INFO|WARNING|ERROR|CRITICAL) - (.*)$")
+_TASK_START = re.compile(r"^Iniciando execução da tarefa: (\S+)")
+_FILE_START = re.compile(r"^Iniciando processamento do arquivo: (.+)$")
+_ROW_START = re.compile(r"^Iniciando processamento do registro (\d+)/(\d+)")
+_ROW_FILLED = re.compile(r"^Processamento da linha (\d+) concluído")
+_ROW_RETRY = re.compile(r"^Erro recuperável (para|no clique em 'Adicionar' após) registro (\d+)")
+_ROW_SKIPPED = re.compile(r"^Registro (\d+) pulado")
+_PAUSE = re.compile(r"^Worker: Solicitando ação do usuário")
+
+# Nome do passo = mensagem sem os valores: corta em ': ' / ' com: ' e troca números por '#'
+_STEP_VALUE = re.compile(r"(:| com:)\s.*$")
+_DIGITS = re.compile(r"\d+")
+
+
+def step_name(message: str) -> str:
+    """'Preenchendo campo 'CIAP2 - 01' com: T90' -> "Preenchendo campo 'CIAP# - #'"; mensagens de um mesmo passo viram a mesma chave."""
+    name = _STEP_VALUE.sub("", message).rstrip(" .")
+    return _DIGITS.sub("#", name)[:120]
+
+
+def mine_log_file(path: str, max_row_s: float = 600) -> tuple:
+    """
+    Lê um botcds_<data>.log (ou parte .log.gz) em fluxo e reconstrói as linhas e os passos. Retorna (linhas, passos), listas de dicts.
+
+    Linha: de 'Iniciando processamento do registro N/T' até o início do registro seguinte (inclui 'Adicionar'), ou até
+    a última mensagem dela quando o seguinte não vem em sequência (fim do arquivo de dados, queda, intervenção).
+    Passo: cada mensagem INFO dentro da linha abre um passo, que dura até a próxima (ou o fim da linha); o trecho
+    antes da primeira é '(início do registro)' e o depois de 'Processamento da linha N concluído' é o 'Adicionar'.
+    Com resolução de 1 s, os passos curtos aparecem como 0 s: o que vale é a média sobre muitas linhas.
+    """
+    log_name = Path(path).name
+    rows, steps = [], []
+    task = data_file = None
+    row = step = None # Linha e passo abertos
+    last_moment = None
+
+    def close_step(moment):
+        nonlocal step
+        if step is not None:
+            step["duracao_s"] = (moment - step["inicio"]).total_seconds()
+            steps.append(step)
+            step = None
+
+    def close_row(moment, next_row_continues: bool):
+        nonlocal row
+        if row is None:
+            return
+        end = moment if next_row_continues else last_moment
+        close_step(end)
+        row["fim"] = end
+        row["duracao_s"] = (end - row["inicio"]).total_seconds()
+        row["completa"] = next_row_continues
+        if row["duracao_s"] <= max_row_s or row["pausas"]:
+            rows.append(row)
+        row = None
+
+    with open_log_file(path) as f:
+        for line in f:
+            match = _LINE.match(line.rstrip("\n"))
+            if not match:
+                continue
+            moment = datetime.strptime(match.group(1), "%Y-%m-%d %H:%M:%S")
+            level, message = match.group(2), match.group(3)
+
+            if (found := _ROW_START.match(message)):
+                number, total = int(found.group(1)), int(found.group(2))
+                continues = row is not None and row["total"] == total and number == row["registro"] + 1
+                close_row(moment, continues)
+                row = {"log": log_name, "tarefa": task, "arquivo": data_file, "registro": number, "total": total,
+                       "inicio": moment, "preenchimento_s": None, "retentativas": 0, "pausas": 0, "pulado": False}
+                step = {"log": log_name, "tarefa": task, "arquivo": data_file, "registro": number,
+                        "passo": "(início do registro)", "inicio": moment}
+            elif (found := _TASK_START.match(message)):
+                close_row(moment, False)
+                task, data_file = found.group(1), None
+            elif (found := _FILE_START.match(message)):
+                close_row(moment, False)
+                data_file = found.group(1).strip()
+            elif row is not None:
+                if _ROW_FILLED.match(message):
+                    row["preenchimento_s"] = (moment - row["inicio"]).total_seconds()
+                elif _ROW_RETRY.match(message):
+                    row["retentativas"] += 1
+                elif _ROW_SKIPPED.match(message):
+                    row["pulado"] = True
+                elif _PAUSE.match(message):
+                    row["pausas"] += 1
+                if level == "INFO":
+                    close_step(moment)
+                    name = "(confirmado -> próximo registro)" if _ROW_FILLED.match(message) else step_name(message)
+                    step = {"log": log_name, "tarefa": task, "arquivo": data_file, "registro": row["registro"],
+                            "passo": name, "inicio": moment}
+            last_moment = moment
+    if last_moment is not None:
+        close_row(last_moment, False)
+    return rows, steps
+
+
+def _mine(args: tuple) -> tuple:
+    return mine_log_file(*args)
+
+
+def mine_logs(log_files: list, processes: int = None, max_row_s: float = 600) -> tuple:
+    """Minera os logs em paralelo (um processo por arquivo). Retorna (DataFrame de linhas, DataFrame de passos)."""
+    all_rows, all_steps = [], []
+    jobs = [(str(path), max_row_s) for path in log_files]
+    if len(jobs) > 1 and processes != 1:
+        with ProcessPoolExecutor(max_workers=processes or min(len(jobs), os.cpu_count() or 1)) as executor:
+            results = list(executor.map(_mine, jobs))
+    else:
+        results = [_mine(job) for job in jobs]
+    for rows, steps in results:
+        all_rows += rows
+        all_steps += steps
+    return pd.DataFrame(all_rows), pd.DataFrame(all_steps)
+
+
+def summary_tables(rows: pd.DataFrame, steps: pd.DataFrame) -> dict:
+    """Tabelas de resumo: por tarefa (linhas), por tarefa e passo, e por dia (ritmo ao longo dos meses)."""
+    def stats(series: pd.Series) -> pd.Series:
+        return pd.Series({"n": series.count(), "media_s": series.mean(), "p50_s": series.quantile(0.5),
+                          "p90_s": series.quantile(0.9), "p95_s": series.quantile(0.95), "max_s": series.max()})
+
+    tables = {}
+    if not rows.empty:
+        complete = rows[rows["completa"] & ~rows["pulado"] & (rows["pausas"] == 0)]
+        by_task = complete.groupby("tarefa", dropna=False)["duracao_s"].apply(stats).unstack()
+        by_task["retentativas"] = rows.groupby("tarefa", dropna=False)["retentativas"].sum()
+        by_task["pulados"] = rows.groupby("tarefa", dropna=False)["pulado"].sum()
+        by_task["registros_por_minuto"] = 60 / by_task["media_s"]
+        tables["linhas_por_tarefa"] = by_task.round(2).reset_index()
+
+        daily = complete.assign(dia=complete["inicio"].dt.date).groupby(["dia", "tarefa"], dropna=False)["duracao_s"]
+        by_day = daily.agg(n="count", media_s="mean", p95_s=lambda s: s.quantile(0.95))
+        by_day["registros_por_minuto"] = 60 / by_day["media_s"]
+        tables["linhas_por_dia"] = by_day.round(2).reset_index()
+    if not steps.empty:
+        by_step = steps.groupby(["tarefa", "passo"], dropna=False)["duracao_s"].apply(stats).unstack()
+        by_step["total_s"] = steps.groupby(["tarefa", "passo"], dropna=False)["duracao_s"].sum()
+        tables["passos"] = by_step.round(2).reset_index().sort_values(["tarefa", "total_s"], ascending=[True, False])
+    return tables
+
+
+def write_table(df: pd.DataFrame, path: Path, table_format: str) -> Path:
+    """Grava em Parquet (requer pyarrow ou fastparquet) ou CSV (';', utf-8-sig, abre direto no Excel)."""
+    if table_format == "parquet":
+        target = path.with_suffix(".parquet")
+        df.to_parquet(target, index=False)
+    else:
+        target = path.with_suffix(".csv")
+        df.to_csv(target, sep=";", index=False, encoding="utf-8-sig")
+    return target
+
+
+def _parquet_available() -> bool:
+    for module in ("pyarrow", "fastparquet"):
+        try:
+            __import__(module)
+            return True
+        except ImportError:
+            continue
+    return False
+
+
+def main(argv: list = None) -> int:
+    # Uso: python -m app.benchmark.log_miner [--logs "logs/botcds_*.log"] [--desde 2025-01-01] [--saida logs/mineracao]
+    parser = argparse.ArgumentParser(description="Minera os logs botcds_*.log: duração de cada linha e de cada passo, com tabelas de resumo.")
+    parser.add_argument("--logs", default=DEFAULT_LOGS, help="Padrão glob dos logs")
+    parser.add_argument("--desde", help="Só logs a partir desta data (AAAA-MM-DD, pelo nome do arquivo)")
+    parser.add_argument("--saida", default=str(DEFAULT_OUTPUT_DIR), help="Pasta de saída")
+    parser.add_argument("--formato", choices=("auto", "parquet", "csv"), default="auto", help="auto = Parquet se pyarrow/fastparquet estiver instalado, senão CSV")
+    parser.add_argument("--processos", type=int, help="Processos em paralelo (padrão: um por núcleo)")
+    parser.add_argument("--max-linha-s", type=float, default=600, help="Linhas mais longas que isso (sem intervenção) são descartadas")
+    args = parser.parse_args(argv)
+
+    log_files = sorted(path for path in glob.glob(args.logs) if is_log_file(path))
+    if args.desde:
+        log_files = [path for path in log_files if Path(path).stem.split("_")[-1] >= args.desde]
+    if not log_files:
+        print(f"Nenhum log encontrado em {args.logs}.")
+        return 1
+    table_format = args.formato
+    if table_format == "auto":
+        table_format = "parquet" if _parquet_available() else "csv"
+    elif table_format == "parquet" and not _parquet_available():
+        parser.error("Parquet requer 'pip install pyarrow' (ou fastparquet). Use --formato csv.")
+
+    rows, steps = mine_logs(log_files, args.processos, args.max_linha_s)
+    output_dir = Path(args.saida)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    written = [write_table(rows, output_dir / "linhas", table_format), write_table(steps, output_dir / "passos", table_format)]
+    tables = summary_tables(rows, steps)
+    for name, table in tables.items():
+        written.append(write_table(table, output_dir / f"resumo_{name}", "csv"))
+
+    print(f"{len(log_files)} log(s), {len(rows)} linha(s), {len(steps)} passo(s).")
+    if "linhas_por_tarefa" in tables:
+        print(tables["linhas_por_tarefa"].to_string(index=False))
+    if "passos" in tables:
+        print("\nPassos com mais tempo total:")
+        print(tables["passos"].sort_values("total_s", ascending=False).head(15).to_string(index=False))
+    print("\nArquivos gerados:\n" + "\n".join(f"  {path}" for path in written))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
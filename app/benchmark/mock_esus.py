@@ -0,0 +1,426 @@
+# Arquivo: app/benchmark/mock_esus.py
+import argparse
+import json
+import random
+import secrets
+import sys
+import threading
+import time
+import unicodedata
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+from app.core.logger import logger
+
+
+# Perfil padrão de cada endpoint do servidor simulado.
+#   latency_ms    -> atraso fixo da resposta
+#   jitter_ms     -> atraso extra aleatório (0..jitter_ms)
+#   failure_rate  -> fração das requisições que falham (0.0 a 1.0)
+#   failure       -> tipo da falha: erro_servidor (HTTP 503), sessao (HTTP 401), duplicado/validacao
+#                    (message-box do PEC; só no 'confirmar') ou travamento (responde após 'hang_seconds')
+DEFAULT_ENDPOINTS = {
+    "paginas": {"latency_ms": 30, "jitter_ms": 0, "failure_rate": 0.0, "failure": "erro_servidor"},
+    "login": {"latency_ms": 200, "jitter_ms": 0, "failure_rate": 0.0, "failure": "erro_servidor"},
+    "sugestoes": {"latency_ms": 60, "jitter_ms": 0, "failure_rate": 0.0, "failure": "erro_servidor"},
+    "cidadao": {"latency_ms": 150, "jitter_ms": 0, "failure_rate": 0.0, "failure": "erro_servidor"},
+    "confirmar": {"latency_ms": 200, "jitter_ms": 0, "failure_rate": 0.0, "failure": "duplicado"},
+    "graphql": {"latency_ms": 400, "jitter_ms": 0, "failure_rate": 0.0, "failure": "erro_servidor"},
+}
+FAILURE_KINDS = ("erro_servidor", "sessao", "duplicado", "validacao", "travamento")
+
+FAILURE_MESSAGES = {
+    "duplicado": "Registro duplicado: já existe um registro para este cidadão nesta ficha.",
+    "validacao": "Existem campos obrigatórios não preenchidos ou inválidos.",
+}
+
+# Listas de sugestão dos combos da ficha (o filtro ignora acentos e maiúsculas)
+SUGGESTIONS = {
+    "sexo": ["Masculino", "Feminino", "Indeterminado"],
+    "local": ["UBS", "Unidade móvel", "Rua", "Domicílio", "Escola/Creche", "Outros", "Polo (Academia da Saúde)",
+              "Instituição/Abrigo", "Unidade prisional ou congêneres", "Unidade socioeducativa", "Hospital",
+              "Unidade de pronto atendimento", "CACON/UNACON"],
+    "imovel": ["01 - DOMICÍLIO", "02 - COMÉRCIO", "03 - TERRENO BALDIO", "04 - PONTO ESTRATÉGICO", "05 - ESCOLA",
+               "06 - CRECHE", "07 - ABRIGO", "08 - INSTITUIÇÃO DE LONGA PERMANÊNCIA PARA IDOSOS",
+               "09 - UNIDADE PRISIONAL", "10 - UNIDADE DE MEDIDA SOCIOEDUCATIVA", "11 - DELEGACIA",
+               "12 - ESTABELECIMENTO RELIGIOSO", "99 - OUTROS"],
+    "sigtap": ["0101040024 - AVALIAÇÃO ANTROPOMÉTRICA", "0202010473 - DOSAGEM DE GLICOSE",
+               "0202010503 - DOSAGEM DE HEMOGLOBINA GLICOSILADA", "0203010086 - EXAME CITOPATOLÓGICO CÉRVICO-VAGINAL/MICROFLORA-RASTREAMENTO",
+               "0204030188 - MAMOGRAFIA BILATERAL PARA RASTREAMENTO", "0214010015 - GLICEMIA CAPILAR",
+               "0301100039 - AFERIÇÃO DE PRESSÃO ARTERIAL", "0301100152 - RETIRADA DE PONTOS DE CIRURGIAS BÁSICAS"],
+}
+
+# Campos que o 'Confirmar' exige, por tipo de ficha (mesma ideia da validação do PEC)
+REQUIRED_FIELDS = {
+    "atendimento": ("periodo", "cpf", "nascimento", "sexo", "local", "tipo_atendimento"),
+    "procedimentos": ("periodo", "cpf", "nascimento", "sexo", "local"),
+    "visita": ("periodo", "cpf", "nascimento", "sexo", "micro_area", "tipo_imovel", "desfecho"),
+}
+
+
+def _normalize(text: str) -> str:
+    return unicodedata.normalize('NFD', text or "").encode('ascii', 'ignore').decode('utf-8').lower().strip()
+
+
+class MockEsusServer:
+    """
+    Servidor local que imita as partes do e-SUS PEC usadas pelas páginas da automação: login
+    (data-cy="LoginForm.access-button"), cartões de perfil/unidade, menu lateral (data-cy="SideMenu.*")
+    e o iframe[title="e-sus"] com a ficha no estilo ExtJS (combos com lista de sugestão, máscara
+    div.ext-el-mask, message-box, lista do lote div.x-grid3-row e 'Finalizar registros').
+
+    Serve para medir a automação sem PEC real nem credenciais. Cada endpoint tem latência e taxa
+    de falha configuráveis (DEFAULT_ENDPOINTS, resources/config/mock_esus.json ou parâmetros).
+    'Finalizar registros' envia uma mutação GraphQL para /api/graphql, então o envio direto pode
+    ser apontado para cá (AppConfig.direct_submit_endpoint).
+    """
+    if getattr(sys, 'frozen', False):
+        BASE_DIR = Path(sys.executable).parent
+    else:
+        BASE_DIR = Path(__file__).resolve().parents[2]
+
+    STATIC_DIR = BASE_DIR / "resources" / "mock_esus"
+    PROFILE_FILE = BASE_DIR / "resources" / "config" / "mock_esus.json"
+
+    _PAGES = {"/login": "login.html", "/acesso": "acesso.html", "/inicio": "inicio.html", "/ficha": "ficha.html"}
+    _PROTECTED_PAGES = ("/acesso", "/inicio", "/ficha")
+    _CONTENT_TYPES = {".html": "text/html; charset=utf-8", ".js": "application/javascript; charset=utf-8",
+                      ".css": "text/css; charset=utf-8"}
+    _SESSION_COOKIE = "MOCKSESSION"
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, endpoints: dict = None,
+                 session_lifetime_s: float = 0, hang_seconds: float = 20, seed: int = None):
+        self.endpoints = {name: dict(profile) for name, profile in DEFAULT_ENDPOINTS.items()}
+        for name, profile in (endpoints or {}).items():
+            if name not in self.endpoints:
+                logger.warning(f"Servidor simulado: endpoint desconhecido '{name}' ignorado.")
+                continue
+            if profile.get("failure", self.endpoints[name]["failure"]) not in FAILURE_KINDS:
+                logger.warning(f"Servidor simulado: tipo de falha inválido para '{name}': {profile}. Mantendo o padrão.")
+                continue
+            self.endpoints[name].update(profile)
+        self.session_lifetime_s = session_lifetime_s # 0 = a sessão não expira
+        self.hang_seconds = hang_seconds
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._sessions = {} # token -> instante do login (monotonic)
+        self.stats = {}
+        self.reset_stats()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread: threading.Thread = None
+
+    @classmethod
+    def load_profile(cls, profile_file: Path = None) -> dict:
+        """Lê o perfil dos endpoints (mesmas chaves de DEFAULT_ENDPOINTS). Sem arquivo, retorna {}."""
+        profile_file = Path(profile_file) if profile_file else cls.PROFILE_FILE
+        if not profile_file.exists():
+            return {}
+        try:
+            with open(profile_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            logger.error(f"Erro ao carregar o perfil do servidor simulado em {profile_file}: {e}. Usando padrões.")
+            return {}
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> "MockEsusServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="mock-esus", daemon=True)
+        self._thread.start()
+        logger.info(f"Servidor e-SUS simulado em {self.url}")
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join(timeout=5)
+        logger.info("Servidor e-SUS simulado encerrado.")
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {
+                "requisicoes": {name: 0 for name in self.endpoints},
+                "falhas_injetadas": {name: 0 for name in self.endpoints},
+                "logins": 0,
+                "registros_confirmados": 0,
+                "registros_recusados": 0,
+                "fichas_finalizadas": 0,
+                "registros_gravados": 0,
+                "primeiro_confirmar": None, # time.monotonic() do primeiro Confirmar aceito
+                "ultimo_confirmar": None,
+                "intervalos_linha_s": [], # Tempo entre Confirmar aceitos seguidos da mesma sessão (latência por linha)
+            }
+            self._last_confirm_by_session = {}
+
+    def snapshot_stats(self) -> dict:
+        with self._lock:
+            return json.loads(json.dumps(self.stats))
+
+    # --- Sessão ---
+
+    def _new_session(self) -> str:
+        token = secrets.token_hex(16)
+        with self._lock:
+            self._sessions[token] = time.monotonic()
+            self.stats["logins"] += 1
+        return token
+
+    def _session_valid(self, token: str) -> bool:
+        with self._lock:
+            started = self._sessions.get(token)
+            if started is None:
+                return False
+            if self.session_lifetime_s and time.monotonic() - started > self.session_lifetime_s:
+                del self._sessions[token]
+                return False
+            return True
+
+    # --- Latência e falhas ---
+
+    def _delay_and_pick_failure(self, endpoint: str) -> str | None:
+        """Aplica a latência do endpoint e sorteia se esta requisição falha (retorna o tipo da falha)."""
+        profile = self.endpoints[endpoint]
+        with self._lock:
+            self.stats["requisicoes"][endpoint] += 1
+            jitter = self._random.uniform(0, profile.get("jitter_ms", 0))
+            failed = self._random.random() < profile.get("failure_rate", 0.0)
+            if failed:
+                self.stats["falhas_injetadas"][endpoint] += 1
+        time.sleep((profile.get("latency_ms", 0) + jitter) / 1000)
+        return profile.get("failure", "erro_servidor") if failed else None
+
+    # --- Regras da ficha ---
+
+    def suggestions(self, field: str, query: str) -> list:
+        query = _normalize(query)
+        if not query:
+            return []
+        return [item for item in SUGGESTIONS.get(field, []) if query in _normalize(item)]
+
+    def validate_record(self, ficha: dict, record: dict) -> str | None:
+        """Mensagem do message-box se o registro não pode ser confirmado, ou None."""
+        missing = [name for name in REQUIRED_FIELDS.get(ficha.get("tipo"), ()) if not record.get(name)]
+        if ficha.get("tipo") == "procedimentos" and not (record.get("procedimentos") or record.get("sigtap")):
+            missing.append("procedimento")
+        if missing:
+            return f"Existem campos obrigatórios não preenchidos: {', '.join(missing)}."
+        cpf = "".join(ch for ch in str(record.get("cpf")) if ch.isdigit())
+        if len(cpf) not in (11, 15):
+            return "CPF / CNS do cidadão inválido."
+        if cpf in (ficha.get("cpfs") or []):
+            return FAILURE_MESSAGES["duplicado"]
+        return None
+
+    def confirm_record(self, ficha: dict, record: dict, failure: str = None, session: str = None) -> dict:
+        if failure in FAILURE_MESSAGES:
+            message = FAILURE_MESSAGES[failure]
+        else:
+            message = self.validate_record(ficha, record)
+        with self._lock:
+            if message:
+                self.stats["registros_recusados"] += 1
+                return {"ok": False, "mensagem": message}
+            now = time.monotonic()
+            self.stats["registros_confirmados"] += 1
+            self.stats["primeiro_confirmar"] = self.stats["primeiro_confirmar"] or now
+            self.stats["ultimo_confirmar"] = now
+            previous = self._last_confirm_by_session.get(session)
+            if previous is not None:
+                self.stats["intervalos_linha_s"].append(round(now - previous, 3))
+            self._last_confirm_by_session[session] = now
+            return {"ok": True, "registro": self.stats["registros_confirmados"]}
+
+    def save_ficha(self, payload: dict) -> dict:
+        """Resposta GraphQL da mutação de 'Finalizar registros' (ou do envio direto)."""
+        query = (payload.get("query") or "").lstrip()
+        if not query.startswith("mutation"):
+            return {"errors": [{"message": "Apenas mutações são aceitas pelo servidor simulado."}]}
+        variables = payload.get("variables") or {}
+        ficha = variables.get("input") if isinstance(variables.get("input"), dict) else variables
+        records = ficha.get("registros") if isinstance(ficha.get("registros"), list) else None
+        count = len(records) if records is not None else 1
+        with self._lock:
+            self.stats["fichas_finalizadas"] += 1
+            self.stats["registros_gravados"] += count
+            ficha_id = self.stats["fichas_finalizadas"]
+        operation = payload.get("operationName") or "salvarFichaCds"
+        return {"data": {operation[0].lower() + operation[1:]: {"id": ficha_id, "registros": count}}}
+
+    # --- HTTP ---
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass # As requisições do navegador não vão para o log da automação
+
+            def _session_token(self) -> str | None:
+                cookie = SimpleCookie(self.headers.get("Cookie", ""))
+                morsel = cookie.get(server._SESSION_COOKIE)
+                return morsel.value if morsel else None
+
+            def _send(self, status: int, body: bytes, content_type: str, headers: dict = None):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Cache-Control", "no-store")
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            def _send_json(self, status: int, data: dict, headers: dict = None):
+                self._send(status, json.dumps(data, ensure_ascii=False).encode("utf-8"), "application/json; charset=utf-8", headers)
+
+            def _redirect(self, location: str):
+                self._send(302, b"", "text/plain", {"Location": location})
+
+            def _read_json(self) -> dict:
+                length = int(self.headers.get("Content-Length") or 0)
+                if not length:
+                    return {}
+                try:
+                    return json.loads(self.rfile.read(length).decode("utf-8"))
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    return {}
+
+            def _send_failure(self, failure: str) -> bool:
+                """Responde a falha injetada de transporte. Retorna False se a falha é de negócio (message-box)."""
+                if failure == "erro_servidor":
+                    self._send_json(503, {"mensagem": "Erro no servidor (503): serviço indisponível."})
+                elif failure == "sessao":
+                    self._send_json(401, {"mensagem": "Sessão expirada. Faça o login novamente."})
+                elif failure == "travamento":
+                    time.sleep(server.hang_seconds)
+                    self._send_json(504, {"mensagem": "Erro no servidor (504): tempo de resposta excedido."})
+                else:
+                    return False
+                return True
+
+            def do_HEAD(self):
+                self.do_GET()
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                path = parts.path.rstrip("/") or "/"
+                query = parse_qs(parts.query)
+
+                if path == "/":
+                    return self._redirect("/login")
+                if path == "/api/estatisticas":
+                    return self._send_json(200, server.snapshot_stats())
+                if path.startswith("/static/") or path in server._PAGES:
+                    failure = server._delay_and_pick_failure("paginas")
+                    if path in server._PROTECTED_PAGES and not server._session_valid(self._session_token()):
+                        return self._redirect("/login")
+                    if failure and self._send_failure(failure):
+                        return
+                    file_name = server._PAGES.get(path) or path[len("/static/"):]
+                    file_path = (server.STATIC_DIR / file_name).resolve()
+                    if server.STATIC_DIR.resolve() not in file_path.parents or not file_path.is_file():
+                        return self._send_json(404, {"mensagem": "Não encontrado."})
+                    content_type = server._CONTENT_TYPES.get(file_path.suffix, "application/octet-stream")
+                    return self._send(200, file_path.read_bytes(), content_type)
+
+                if path in ("/api/sugestoes", "/api/cidadao"):
+                    endpoint = "sugestoes" if path == "/api/sugestoes" else "cidadao"
+                    failure = server._delay_and_pick_failure(endpoint)
+                    if not server._session_valid(self._session_token()):
+                        return self._send_json(401, {"mensagem": "Sessão expirada. Faça o login novamente."})
+                    if failure and self._send_failure(failure):
+                        return
+                    if endpoint == "sugestoes":
+                        items = server.suggestions(query.get("campo", [""])[0], query.get("q", [""])[0])
+                        return self._send_json(200, {"itens": items})
+                    cpf = query.get("cpf", [""])[0]
+                    return self._send_json(200, {"nome": f"Cidadão {cpf[-4:]}" if cpf else ""})
+
+                self._send_json(404, {"mensagem": "Não encontrado."})
+
+            def do_POST(self):
+                path = urlsplit(self.path).path.rstrip("/")
+                payload = self._read_json()
+
+                if path == "/api/login":
+                    failure = server._delay_and_pick_failure("login")
+                    if failure and self._send_failure(failure):
+                        return
+                    if not payload.get("usuario") or not payload.get("senha"):
+                        return self._send_json(200, {"ok": False, "mensagem": "Usuário ou senha inválidos."})
+                    token = server._new_session()
+                    return self._send_json(200, {"ok": True}, {"Set-Cookie": f"{server._SESSION_COOKIE}={token}; Path=/; HttpOnly"})
+
+                if path in ("/api/confirmar", "/api/graphql"):
+                    endpoint = "confirmar" if path == "/api/confirmar" else "graphql"
+                    failure = server._delay_and_pick_failure(endpoint)
+                    if not server._session_valid(self._session_token()):
+                        return self._send_json(401, {"mensagem": "Sessão expirada. Faça o login novamente."})
+                    if failure and self._send_failure(failure):
+                        return
+                    if endpoint == "confirmar":
+                        return self._send_json(200, server.confirm_record(payload.get("ficha") or {}, payload.get("registro") or {},
+                                                                         failure, self._session_token()))
+                    if failure in FAILURE_MESSAGES:
+                        return self._send_json(200, {"errors": [{"message": FAILURE_MESSAGES[failure]}]})
+                    return self._send_json(200, server.save_ficha(payload))
+
+                self._send_json(404, {"mensagem": "Não encontrado."})
+
+        return Handler
+
+
+def _parse_endpoint_overrides(latencies: list, failures: list) -> dict:
+    """'--latencia confirmar=300' e '--falha confirmar=0.05:duplicado' -> perfil por endpoint."""
+    overrides = {}
+    for item in latencies or []:
+        name, _, value = item.partition("=")
+        overrides.setdefault(name, {})["latency_ms"] = float(value)
+    for item in failures or []:
+        name, _, value = item.partition("=")
+        rate, _, kind = value.partition(":")
+        overrides.setdefault(name, {})["failure_rate"] = float(rate)
+        if kind:
+            overrides[name]["failure"] = kind
+    return overrides
+
+
+def add_server_arguments(parser: argparse.ArgumentParser):
+    """Parâmetros do servidor simulado (compartilhados com o comando de benchmark)."""
+    parser.add_argument("--perfil", help="JSON com o perfil dos endpoints (padrão: resources/config/mock_esus.json, se existir)")
+    parser.add_argument("--latencia", action="append", metavar="ENDPOINT=MS", help="Latência de um endpoint (pode repetir)")
+    parser.add_argument("--falha", action="append", metavar="ENDPOINT=TAXA[:TIPO]", help="Taxa e tipo de falha de um endpoint (pode repetir)")
+    parser.add_argument("--sessao-expira", type=float, default=0, metavar="SEGUNDOS", help="Expira a sessão N segundos após o login (0 = nunca)")
+    parser.add_argument("--semente", type=int, help="Semente do sorteio de latência/falhas (execuções reproduzíveis)")
+
+
+def server_from_arguments(args, port: int = 0) -> MockEsusServer:
+    endpoints = MockEsusServer.load_profile(args.perfil)
+    for name, profile in _parse_endpoint_overrides(args.latencia, args.falha).items():
+        endpoints.setdefault(name, {}).update(profile)
+    return MockEsusServer(port=port, endpoints=endpoints, session_lifetime_s=args.sessao_expira, seed=args.semente)
+
+
+if __name__ == '__main__':
+    # Sobe o servidor para uso manual (ex: apontar configuracao.csv para ele e rodar a interface)
+    # Uso: python -m app.benchmark.mock_esus [--porta 8090] [--latencia confirmar=300] [--falha confirmar=0.05:duplicado]
+    parser = argparse.ArgumentParser(description="Servidor e-SUS PEC simulado para testes e benchmarks offline.")
+    parser.add_argument("--porta", type=int, default=8090)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+    mock = server_from_arguments(args, port=args.porta).start()
+    print(f"e-SUS simulado em {mock.url} (qualquer usuário/senha). Ctrl+C para encerrar.")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        mock.stop()
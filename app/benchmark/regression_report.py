@@ -0,0 +1,77 @@
+# Arquivo: app/benchmark/regression_report.py
+import argparse
+from datetime import datetime, timedelta
+from pathlib import Path
+from app.core.app_config import AppConfig
+from app.data.run_history import RunHistory
+
+
+def format_runs(runs: list) -> str:
+    header = f"{'Id':>5} {'Início':<19} {'Tarefa':<28} {'Navegador':<10} {'PEC':<8} {'Linhas':>6} {'Pul.':>5} {'Erros':>5} {'Min':>6} {'Reg/min':>8}"
+    lines = [header, "-" * len(header)]
+    for run in runs:
+        lines.append(f"{run['id']:>5} {run['inicio'].replace('T', ' '):<19} {run['tarefa'][:28]:<28} {(run['navegador'] or '-')[:10]:<10} "
+                     f"{(run['versao_pec'] or '-')[:8]:<8} {run['linhas']:>6} {run['puladas']:>5} {sum(run['erros_por_classe'].values()):>5} "
+                     f"{run['duracao_s'] / 60:>6.1f} {run['registros_por_minuto']:>8.1f}")
+    return "\n".join(lines)
+
+
+def format_steps(run: dict) -> str:
+    header = f"  {'Passo':<32} {'N':>5} {'Média':>7} {'p50':>7} {'p95':>7} {'Máx':>7}"
+    lines = [header]
+    for step, stats in sorted(run["passos"].items(), key=lambda item: -item[1]["p95_s"]):
+        lines.append(f"  {step[:32]:<32} {stats['n']:>5} {stats['media_s']:>7.2f} {stats['p50_s']:>7.2f} {stats['p95_s']:>7.2f} {stats['max_s']:>7.2f}")
+    return "\n".join(lines)
+
+
+def build_report(history: RunHistory, task: str = None, run_id: int = None, days: int = 14, browser_days: int = 7,
+                 threshold: float = 1.5) -> tuple:
+    """Texto do relatório e a quantidade de regressões apontadas."""
+    runs = history.runs(task, since=datetime.now() - timedelta(days=days))
+    sections = [f"Execuções dos últimos {days} dias:", format_runs(runs) if runs else "  (nenhuma)"]
+
+    if run_id is None:
+        # Sem execução escolhida: a última de cada tarefa
+        run_ids = [history.last_run_id(name) for name in sorted({run["tarefa"] for run in runs})]
+    else:
+        run_ids = [run_id]
+    findings = []
+    for current_id in filter(None, run_ids):
+        run = history.run(current_id)
+        if run is None:
+            sections.append(f"\nExecução {current_id} não encontrada.")
+            continue
+        sections += [f"\nExecução {current_id} ({run['tarefa']}, {run['inicio'].replace('T', ' ')}):", format_steps(run)]
+        regressions = history.regressions(current_id, days, threshold)
+        findings += regressions
+        sections += [f"  ! {finding}" for finding in regressions] or ["  Sem regressão em relação às execuções de referência."]
+
+    tasks = [task] if task else sorted({run["tarefa"] for run in runs})
+    version_findings = [finding for name in tasks for finding in history.version_comparison(name, threshold)]
+    browser_findings = history.browser_comparison(browser_days)
+    findings += version_findings + browser_findings
+    sections += ["\nVersões do PEC (atual x anterior):"] + ([f"  ! {finding}" for finding in version_findings] or ["  Sem diferença relevante."])
+    sections += [f"\nNavegadores (últimos {browser_days} dias):"] + ([f"  ! {finding}" for finding in browser_findings] or ["  Sem diferença relevante."])
+    return "\n".join(sections), len(findings)
+
+
+def main(argv: list = None) -> int:
+    # Uso: python -m app.benchmark.regression_report [--tarefa "Atend. Hipertenso"] [--execucao 42] [--dias 14]
+    parser = argparse.ArgumentParser(description="Relatório do histórico de execuções: percentis por passo e regressões em relação às execuções anteriores.")
+    parser.add_argument("--tarefa", help="Só esta tarefa (padrão: todas)")
+    parser.add_argument("--execucao", type=int, help="Id da execução a comparar (padrão: a última de cada tarefa)")
+    parser.add_argument("--dias", type=int, default=AppConfig.regression_baseline_days, help="Janela das execuções de referência")
+    parser.add_argument("--dias-navegadores", type=int, default=7, help="Janela da comparação entre navegadores")
+    parser.add_argument("--limite", type=float, default=AppConfig.regression_threshold, help="Razão atual/referência que conta como regressão")
+    parser.add_argument("--banco", help="Arquivo SQLite do histórico (padrão: o do aplicativo)")
+    parser.add_argument("--falhar-se-regressao", action="store_true", help="Código de saída 1 se houver regressão (uso em agendador/CI)")
+    args = parser.parse_args(argv)
+
+    history = RunHistory(Path(args.banco)) if args.banco else RunHistory()
+    report, count = build_report(history, args.tarefa, args.execucao, args.dias, args.dias_navegadores, args.limite)
+    print(report)
+    return 1 if count and args.falhar_se_regressao else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
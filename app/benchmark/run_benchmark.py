@@ -0,0 +1,247 @@
+# Arquivo: app/benchmark/run_benchmark.py
+import argparse
+import asyncio
+import json
+import random
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from app.core.logger import logger
+from app.core.app_config import AppConfig
+from app.automation.browser import BrowserManager
+from app.automation.error_handler import AutomationErrorHandler, AbortAutomationException
+from app.automation.direct.direct_engine import DirectSubmitEngine
+from app.automation.pages.selector_registry import SelectorRegistry
+from app.data.config_loader import ConfigLoader
+from app.data.date_sequencer import DateSequencer
+from app.data.file_manager import FileManager
+from app.data.quarantine import QuarantineStore
+from app.data.run_journal import RunJournal
+from app.data.run_history import RunHistory
+from app.benchmark.mock_esus import MockEsusServer, add_server_arguments, server_from_arguments
+
+
+# Caminhos (atributos de classe) redirecionados para a pasta temporária do benchmark,
+# para a execução não tocar nos dados, no diário nem no ranking de seletores reais.
+_WORKSPACE_PATHS = (
+    (FileManager, "DATA_DIR", "resources/data_input"),
+    (FileManager, "ARCHIVE_DIR", "resources/data_input/arquivos_processados"),
+    (FileManager, "PROCESSED_REGISTRY", "resources/data_input/arquivos/registro.json"),
+    (DateSequencer, "REGISTRY_FILE", "resources/data_input/arquivos/dataseqregistro.json"),
+    (RunJournal, "JOURNAL_FILE", "resources/data_input/arquivos/journal.jsonl"),
+    (RunHistory, "DB_FILE", "resources/data_input/historico/run_history.sqlite3"),
+    (QuarantineStore, "DATA_DIR", "resources/data_input"),
+    (QuarantineStore, "QUARANTINE_FILE", "resources/data_input/quarentena/quarentena.jsonl"),
+    (QuarantineStore, "RETRY_LOT_DIR", "resources/data_input/arquivos"),
+    (ConfigLoader, "CONFIG_FILE", "resources/config/configuracao.csv"),
+    (SelectorRegistry, "RANKING_FILE", "resources/config/selector_ranking.json"),
+    (DirectSubmitEngine, "TEMPLATES_DIR", "resources/config/direct_templates"),
+    (AppConfig, "BASE_DIR", ""), # name_UBS.json (lido e escrito a partir de AppConfig.BASE_DIR)
+)
+
+
+@contextmanager
+def isolated_workspace(root: Path):
+    """Aponta os arquivos de dados/estado da automação para 'root' enquanto o bloco roda."""
+    saved = [(cls, name, getattr(cls, name)) for cls, name, _ in _WORKSPACE_PATHS]
+    try:
+        for cls, name, relative in _WORKSPACE_PATHS:
+            setattr(cls, name, root / relative if relative else root)
+        SelectorRegistry._instance = None
+        yield root
+    finally:
+        for cls, name, value in saved:
+            setattr(cls, name, value)
+        SelectorRegistry._instance = None
+
+
+def _cpf(rng: random.Random) -> str:
+    """CPF sintético com dígitos verificadores válidos."""
+    digits = [rng.randint(0, 9) for _ in range(9)]
+    for size in (10, 11):
+        total = sum(d * w for d, w in zip(digits, range(size, 1, -1)))
+        digits.append((total * 10) % 11 % 10)
+    return "".join(str(d) for d in digits)
+
+
+def synthetic_rows(count: int, rng: random.Random, used_cpfs: set) -> list:
+    """
+    Linhas no layout dos dados*.csv (ver BaseTask._fill_common_patient_data / _fill_common_patient_acs):
+    período, CPF, nascimento, sexo, local (microárea no ACS), tipo de atendimento, condição, conduta, tipo de imóvel.
+    """
+    rows = []
+    while len(rows) < count:
+        cpf = _cpf(rng)
+        if cpf in used_cpfs:
+            continue
+        used_cpfs.add(cpf)
+        birth = datetime(1940, 1, 1) + timedelta(days=rng.randint(0, 60 * 365))
+        rows.append([rng.choice(["manha", "tarde"]), cpf, birth.strftime("%d/%m/%Y"), rng.choice(["1", "2"]), "UBS",
+                     "Consulta no dia", "Hipertensão arterial", "Retorno para consulta agendada", "01"])
+    return rows
+
+
+def write_inputs(root: Path, url: str, rows_per_file: int, files: int, seed: int = None):
+    """Cria configuracao.csv, data.csv e os arquivos dados<N>.csv na pasta isolada."""
+    rng = random.Random(seed)
+    config_dir = root / "resources" / "config"
+    data_dir = root / "resources" / "data_input"
+    (data_dir / "arquivos").mkdir(parents=True, exist_ok=True)
+    config_dir.mkdir(parents=True, exist_ok=True)
+    (config_dir / "configuracao.csv").write_text(f"{url}\nbenchmark\nbenchmark\n", encoding="utf-8")
+    (data_dir / "data.csv").write_text(f"data\n{datetime.now().strftime('%d/%m/%Y')}\n", encoding="utf-8")
+    used_cpfs = set()
+    for number in range(1, files + 1):
+        rows = synthetic_rows(rows_per_file, rng, used_cpfs)
+        with open(data_dir / "arquivos" / f"dados{number}.csv", "w", encoding="ISO-8859-1", newline="") as f:
+            f.writelines(";".join(row) + "\n" for row in rows)
+
+
+def load_task_map() -> dict:
+    """TASK_MAP da interface (tarefas em Python + receitas). Importado aqui porque traz o PyQt5 junto."""
+    from app.gui.worker import TASK_MAP
+    return TASK_MAP
+
+
+async def run_task(task_name: str, task_class, url: str, args, server: MockEsusServer = None) -> dict:
+    """
+    Roda uma tarefa do começo ao fim contra o e-SUS simulado em 'url', em uma pasta isolada.
+    Sem 'server' (servidor em outro processo, ver app.benchmark.scaling) só os números do lado da tarefa são medidos.
+    """
+    workspace = Path(tempfile.mkdtemp(prefix="botcds_benchmark_"))
+    interventions = []
+
+    async def skip_on_intervention(error, user_info=None) -> str:
+        # Sem ninguém para responder: o que escalaria para a interface vira 'Pular' (fica na quarentena)
+        interventions.append(error.step if hasattr(error, "step") else str(error))
+        logger.warning(f"Benchmark: intervenção pedida em '{interventions[-1]}'. Pulando o registro.")
+        return "skip"
+
+    result = {"tarefa": task_name, "status": "ok", "linhas": args.linhas * args.arquivos}
+    browser_manager = BrowserManager()
+    task = None
+    with isolated_workspace(workspace):
+        write_inputs(workspace, url, args.linhas, args.arquivos, args.semente)
+        if server:
+            server.reset_stats()
+        started = time.monotonic()
+        try:
+            page = await browser_manager.launch_browser(headless=not args.visivel, enable_trace=False, use_chrome=args.chrome)
+            handler = AutomationErrorHandler(page, pause_callback=skip_on_intervention, relaunch_on_crash=False)
+            task = task_class(page, handler, manual_login=False)
+            await task.run()
+        except AbortAutomationException as e:
+            result["status"] = f"abortada: {e}"
+        except Exception as e:
+            logger.error(f"Benchmark: tarefa '{task_name}' terminou com erro: {e}", exc_info=True)
+            result["status"] = f"erro: {e}"
+        finally:
+            elapsed = time.monotonic() - started
+            await browser_manager.close_browser()
+    if not args.manter_workspace:
+        shutil.rmtree(workspace, ignore_errors=True)
+    else:
+        result["workspace"] = str(workspace)
+
+    result.update({
+        "processados": task._processed_count_total if task else 0,
+        "pulados": task._skipped_count_total if task else 0,
+        "intervencoes": len(interventions),
+        "segundos": round(elapsed, 2),
+    })
+    if not server:
+        return result
+
+    stats = server.snapshot_stats()
+    confirmed = stats["registros_confirmados"]
+    first, last = stats["primeiro_confirmar"], stats["ultimo_confirmar"]
+    result.update({
+        "confirmados": confirmed,
+        "recusados": stats["registros_recusados"],
+        "gravados": stats["registros_gravados"],
+        "fichas_finalizadas": stats["fichas_finalizadas"],
+        # Login, perfil e navegação até a ficha: tempo até o primeiro registro aceito
+        "segundos_ate_primeiro": round(first - started, 2) if first else None,
+        "registros_por_minuto": round(confirmed / elapsed * 60, 2) if elapsed else 0.0,
+        # Ritmo entre o primeiro e o último Confirmar (sem o custo fixo de login/navegação)
+        "registros_por_minuto_regime": round((confirmed - 1) / (last - first) * 60, 2) if confirmed > 1 and last > first else None,
+        "requisicoes": stats["requisicoes"],
+        "falhas_injetadas": stats["falhas_injetadas"],
+    })
+    return result
+
+
+async def run_all(task_map: dict, task_names: list, url: str, args, server: MockEsusServer = None) -> list:
+    results = []
+    for task_name in task_names:
+        logger.info(f"Benchmark: iniciando '{task_name}' ({args.arquivos} arquivo(s) x {args.linhas} linha(s)).")
+        result = await run_task(task_name, task_map[task_name], url, args, server)
+        logger.info(f"Benchmark: '{task_name}' -> {result['processados']} registros em {result['segundos']} s.")
+        results.append(result)
+    return results
+
+
+def format_report(results: list) -> str:
+    header = f"{'Tarefa':<28} {'Status':<10} {'Conf.':>6} {'Pul.':>5} {'Interv.':>7} {'Tempo(s)':>9} {'Reg/min':>8} {'Regime':>8}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        status = r["status"] if len(r["status"]) <= 10 else r["status"][:9] + "…"
+        confirmed = r.get("confirmados", "-")
+        per_minute = r.get("registros_por_minuto")
+        regime = r.get("registros_por_minuto_regime")
+        lines.append(f"{r['tarefa'][:28]:<28} {status:<10} {confirmed:>6} {r['pulados']:>5} {r['intervencoes']:>7} "
+                     f"{r['segundos']:>9.1f} {per_minute if per_minute is not None else '-':>8} {regime if regime is not None else '-':>8}")
+    return "\n".join(lines)
+
+
+def main(argv: list = None) -> int:
+    # Uso: python -m app.benchmark.run_benchmark [--tarefas "Atend. Hipertenso" ...] [--linhas 20] [--arquivos 1]
+    #                                            [--latencia confirmar=300] [--falha confirmar=0.05:duplicado] [--saida resultado.json]
+    parser = argparse.ArgumentParser(description="Benchmark offline: roda as tarefas do TASK_MAP contra o e-SUS simulado e mede registros por minuto.")
+    parser.add_argument("--tarefas", nargs="+", metavar="TAREFA", help="Tarefas do TASK_MAP a medir (padrão: todas)")
+    parser.add_argument("--linhas", type=int, default=20, help="Linhas por arquivo de dados")
+    parser.add_argument("--arquivos", type=int, default=1, help="Arquivos dados<N>.csv por tarefa")
+    parser.add_argument("--chrome", action="store_true", help="Usa o Chrome em vez do Firefox")
+    parser.add_argument("--visivel", action="store_true", help="Mostra o navegador (padrão: headless)")
+    parser.add_argument("--saida", help="Salva o resultado em JSON")
+    parser.add_argument("--manter-workspace", action="store_true", help="Não apaga a pasta temporária de cada tarefa (logs de dados, diário)")
+    parser.add_argument("--servidor", metavar="URL", help="Usa um e-SUS simulado já em execução (não sobe o próprio; sem estatísticas do servidor)")
+    add_server_arguments(parser)
+    args = parser.parse_args(argv)
+
+    task_map = load_task_map()
+    task_names = args.tarefas or list(task_map)
+    unknown = [name for name in task_names if name not in task_map]
+    if unknown:
+        parser.error(f"Tarefa(s) desconhecida(s): {', '.join(unknown)}. Disponíveis: {', '.join(task_map)}")
+
+    # O benchmark mede o preenchimento pela interface; o envio direto (calibração GraphQL) fica desligado
+    AppConfig.direct_submit_enabled = False
+    # A lista do lote do e-SUS simulado tem seletor conhecido: liga a conferência da lista no Confirmar
+    AppConfig.lot_grid_row_selector = "div.x-grid3-row"
+
+    if args.servidor:
+        server = None
+        results = asyncio.run(run_all(task_map, task_names, args.servidor, args))
+    else:
+        server = server_from_arguments(args).start()
+        try:
+            results = asyncio.run(run_all(task_map, task_names, server.url, args, server))
+        finally:
+            server.stop()
+
+    print(format_report(results))
+    if args.saida:
+        report = {"data": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "linhas": args.linhas, "arquivos": args.arquivos,
+                  "servidor": args.servidor or server.url, "endpoints": server.endpoints if server else None, "resultados": results}
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4, ensure_ascii=False)
+        print(f"Resultado salvo em {args.saida}")
+    return 0 if all(r["status"] == "ok" for r in results) else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,312 @@
+# Arquivo: app/benchmark/scaling.py
+import argparse
+import csv
+import glob
+import json
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from app.core.logger import logger, open_log_file
+from app.core.utils import percentile
+from app.benchmark.mock_esus import MockEsusServer, DEFAULT_ENDPOINTS
+
+try:
+    import psutil # Opcional: sem ele a varredura roda, mas sem as colunas de CPU e memória
+except ImportError:
+    psutil = None
+
+
+if getattr(sys, 'frozen', False):
+    BASE_DIR = Path(sys.executable).parent
+else:
+    BASE_DIR = Path(__file__).resolve().parents[2]
+
+PROFILES_FILE = BASE_DIR / "resources" / "config" / "latency_profiles.json"
+
+SESSION_COUNTS = (1, 2, 4, 8, 16)
+ENGINES = ("firefox", "chrome") # Mesmas opções de BrowserManager.launch_browser (use_chrome)
+
+# Perfis de latência do servidor simulado (sobrescrevem DEFAULT_ENDPOINTS). 'boa' é o próprio padrão.
+# Perfis extras (ou ajustados pelos logs, ver fit_profile_from_logs) ficam em resources/config/latency_profiles.json.
+LATENCY_PROFILES = {
+    "local": {name: {"latency_ms": 0, "jitter_ms": 0} for name in DEFAULT_ENDPOINTS},
+    "boa": {},
+    "regular": {
+        "paginas": {"latency_ms": 120, "jitter_ms": 60}, "login": {"latency_ms": 600, "jitter_ms": 300},
+        "sugestoes": {"latency_ms": 250, "jitter_ms": 150}, "cidadao": {"latency_ms": 500, "jitter_ms": 300},
+        "confirmar": {"latency_ms": 700, "jitter_ms": 400}, "graphql": {"latency_ms": 1500, "jitter_ms": 800},
+    },
+    "ruim": {
+        "paginas": {"latency_ms": 400, "jitter_ms": 300}, "login": {"latency_ms": 2000, "jitter_ms": 1000},
+        "sugestoes": {"latency_ms": 800, "jitter_ms": 600}, "cidadao": {"latency_ms": 1500, "jitter_ms": 1000},
+        "confirmar": {"latency_ms": 2500, "jitter_ms": 1500}, "graphql": {"latency_ms": 5000, "jitter_ms": 3000},
+    },
+}
+
+# Endpoints chamados durante o preenchimento de cada linha (o resto é login/navegação/finalização)
+ROW_ENDPOINTS = ("sugestoes", "cidadao", "confirmar")
+
+CSV_COLUMNS = ("data", "tarefa", "motor", "headless", "perfil_latencia", "sessoes", "linhas_por_sessao",
+               "registros_confirmados", "registros_recusados", "sessoes_com_erro", "segundos",
+               "registros_por_minuto", "registros_por_minuto_por_sessao", "linha_p50_s", "linha_p95_s",
+               "cpu_s", "cpu_pct", "rss_pico_mb")
+
+_ROW_START = re.compile(r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) - \S+ - INFO - Iniciando processamento do registro (\d+)/(\d+)")
+
+
+def load_latency_profiles() -> dict:
+    """Perfis embutidos + os de resources/config/latency_profiles.json (que têm prioridade)."""
+    profiles = dict(LATENCY_PROFILES)
+    if PROFILES_FILE.exists():
+        try:
+            with open(PROFILES_FILE, 'r', encoding='utf-8') as f:
+                profiles.update(json.load(f))
+        except (json.JSONDecodeError, IOError) as e:
+            logger.error(f"Erro ao carregar perfis de latência em {PROFILES_FILE}: {e}. Usando só os embutidos.")
+    return profiles
+
+
+def save_latency_profile(name: str, profile: dict):
+    profiles = {}
+    if PROFILES_FILE.exists():
+        try:
+            with open(PROFILES_FILE, 'r', encoding='utf-8') as f:
+                profiles = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            profiles = {}
+    profiles[name] = profile
+    PROFILES_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(PROFILES_FILE, 'w', encoding='utf-8') as f:
+        json.dump(profiles, f, indent=4, ensure_ascii=False)
+    logger.info(f"Perfil de latência '{name}' salvo em {PROFILES_FILE}.")
+
+
+def row_durations_from_logs(log_files: list, max_row_s: float = 600) -> list:
+    """
+    Duração de cada linha nos logs reais: intervalo entre 'Iniciando processamento do registro N/T'
+    e o 'N+1/T' seguinte. Intervalos acima de 'max_row_s' (pausa para intervenção) são descartados.
+    """
+    durations = []
+    for log_file in log_files:
+        previous = None # (instante, registro, total)
+        with open_log_file(log_file) as f:
+            for line in f:
+                match = _ROW_START.match(line)
+                if not match:
+                    continue
+                moment = datetime.strptime(match.group(1), "%Y-%m-%d %H:%M:%S")
+                number, total = int(match.group(2)), int(match.group(3))
+                if previous and previous[2] == total and number == previous[1] + 1:
+                    seconds = (moment - previous[0]).total_seconds()
+                    if 0 < seconds <= max_row_s:
+                        durations.append(seconds)
+                previous = (moment, number, total)
+    return durations
+
+
+def fit_profile_from_logs(log_files: list, local_row_s: float, requests_per_row: float) -> dict | None:
+    """
+    Ajusta um perfil de latência aos logs reais. Os logs só têm resolução de segundos e não trazem o tempo
+    de cada requisição, então o ajuste é pela linha inteira:
+      latência por requisição = (p50 da linha real - p50 da linha contra o servidor 'local') / requisições por linha
+    e a variação (jitter) vem da distância entre o p95 e o p50 reais. Os endpoints guardam a proporção de DEFAULT_ENDPOINTS.
+    """
+    durations = row_durations_from_logs(log_files)
+    if len(durations) < 10 or not requests_per_row:
+        logger.warning(f"Ajuste pelos logs: {len(durations)} linha(s) encontradas, são necessárias ao menos 10.")
+        return None
+    p50, p95 = percentile(durations, 0.5), percentile(durations, 0.95)
+    excess_s = max(0.0, p50 - local_row_s)
+    per_request_ms = excess_s / requests_per_row * 1000
+    jitter_ratio = min(3.0, (p95 - p50) / excess_s) if excess_s else 0.0
+    reference_ms = sum(DEFAULT_ENDPOINTS[name]["latency_ms"] for name in ROW_ENDPOINTS) / len(ROW_ENDPOINTS)
+    factor = per_request_ms / reference_ms
+    logger.info(f"Ajuste pelos logs: {len(durations)} linhas, p50 {p50:.1f} s, p95 {p95:.1f} s (local: {local_row_s:.1f} s, "
+                f"{requests_per_row:.1f} requisições/linha) -> {per_request_ms:.0f} ms por requisição.")
+    return {name: {"latency_ms": round(profile["latency_ms"] * factor), "jitter_ms": round(profile["latency_ms"] * factor * jitter_ratio)}
+            for name, profile in DEFAULT_ENDPOINTS.items()}
+
+
+class ProcessTreeSampler:
+    """Soma CPU e memória (RSS) dos processos de sessão e de tudo o que eles abrem (navegadores). Requer psutil."""
+
+    def __init__(self, pids: list):
+        self._roots = [psutil.Process(pid) for pid in pids if psutil.pid_exists(pid)]
+        self._cpu_by_pid = {} # pid -> maior tempo de CPU visto (o processo pode sumir antes do fim)
+        self.peak_rss_mb = 0.0
+
+    def sample(self):
+        rss = 0
+        for root in self._roots:
+            try:
+                processes = [root] + root.children(recursive=True)
+            except psutil.Error:
+                continue
+            for process in processes:
+                try:
+                    cpu = process.cpu_times()
+                    rss += process.memory_info().rss
+                    self._cpu_by_pid[process.pid] = max(self._cpu_by_pid.get(process.pid, 0.0), cpu.user + cpu.system)
+                except psutil.Error:
+                    continue
+        self.peak_rss_mb = max(self.peak_rss_mb, rss / (1024 * 1024))
+
+    @property
+    def cpu_seconds(self) -> float:
+        return sum(self._cpu_by_pid.values())
+
+
+def _session_command(task: str, url: str, rows: int, seed: int, output: Path, engine: str, headless: bool) -> list:
+    command = [sys.executable, "-m", "app.benchmark.run_benchmark", "--servidor", url, "--tarefas", task,
+               "--linhas", str(rows), "--arquivos", "1", "--semente", str(seed), "--saida", str(output)]
+    if engine == "chrome":
+        command.append("--chrome")
+    if not headless:
+        command.append("--visivel")
+    return command
+
+
+def run_configuration(task: str, engine: str, headless: bool, profile_name: str, profile: dict, sessions: int,
+                      rows: int, seed: int, time_limit_s: float) -> dict:
+    """
+    Sobe um servidor simulado com o perfil de latência e roda 'sessions' sessões em paralelo, cada uma em
+    um processo próprio (os caminhos de dados são atributos de classe, então sessões não dividem processo).
+    """
+    server = MockEsusServer(endpoints=profile, seed=seed).start()
+    work_dir = Path(tempfile.mkdtemp(prefix="botcds_escala_"))
+    outputs = [work_dir / f"sessao_{number}.json" for number in range(sessions)]
+    logger.info(f"Escala: '{task}' | {engine} | {'headless' if headless else 'com janela'} | perfil '{profile_name}' | {sessions} sessão(ões).")
+    started = time.monotonic()
+    processes = [subprocess.Popen(_session_command(task, server.url, rows, seed + number, output, engine, headless),
+                                  cwd=BASE_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                 for number, output in enumerate(outputs)]
+    sampler = ProcessTreeSampler([p.pid for p in processes]) if psutil else None
+    try:
+        while any(p.poll() is None for p in processes):
+            if time.monotonic() - started > time_limit_s:
+                logger.error(f"Escala: limite de {time_limit_s:.0f} s excedido. Encerrando as sessões.")
+                for process in processes:
+                    process.kill()
+                break
+            if sampler:
+                sampler.sample()
+            time.sleep(0.5)
+        elapsed = time.monotonic() - started
+    finally:
+        for process in processes:
+            process.wait()
+        stats = server.snapshot_stats()
+        server.stop()
+
+    failed_sessions = 0
+    for output in outputs:
+        try:
+            with open(output, 'r', encoding='utf-8') as f:
+                results = json.load(f)["resultados"]
+            failed_sessions += sum(1 for r in results if r["status"] != "ok")
+        except (IOError, json.JSONDecodeError, KeyError):
+            failed_sessions += 1 # A sessão nem chegou a gravar o resultado
+        output.unlink(missing_ok=True)
+    work_dir.rmdir()
+
+    confirmed = stats["registros_confirmados"]
+    intervals = stats["intervalos_linha_s"]
+    per_minute = confirmed / elapsed * 60 if elapsed else 0.0
+    p50, p95 = percentile(intervals, 0.5), percentile(intervals, 0.95)
+    row_endpoint_requests = sum(stats["requisicoes"][name] for name in ROW_ENDPOINTS)
+    return {
+        "data": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "tarefa": task,
+        "motor": engine,
+        "headless": headless,
+        "perfil_latencia": profile_name,
+        "sessoes": sessions,
+        "linhas_por_sessao": rows,
+        "registros_confirmados": confirmed,
+        "registros_recusados": stats["registros_recusados"],
+        "sessoes_com_erro": failed_sessions,
+        "segundos": round(elapsed, 1),
+        "registros_por_minuto": round(per_minute, 2),
+        "registros_por_minuto_por_sessao": round(per_minute / sessions, 2),
+        "linha_p50_s": round(p50, 2) if p50 is not None else None,
+        "linha_p95_s": round(p95, 2) if p95 is not None else None,
+        "cpu_s": round(sampler.cpu_seconds, 1) if sampler else None,
+        "cpu_pct": round(sampler.cpu_seconds / elapsed * 100, 1) if sampler and elapsed else None, # 100% = um núcleo inteiro
+        "rss_pico_mb": round(sampler.peak_rss_mb) if sampler else None,
+        "_requisicoes_por_linha": row_endpoint_requests / confirmed if confirmed else 0.0,
+    }
+
+
+def main(argv: list = None) -> int:
+    # Uso: python -m app.benchmark.scaling [--sessoes 1 2 4] [--motores firefox chrome] [--com-janela]
+    #                                      [--perfis local boa ruim] [--logs "logs/botcds_*.log"] [--saida escala.csv]
+    parser = argparse.ArgumentParser(description="Varredura de escala: sessões paralelas x navegador x modo x perfil de latência, contra o e-SUS simulado.")
+    parser.add_argument("--tarefa", default="Atend. Hipertenso", help="Tarefa do TASK_MAP usada em todas as sessões")
+    parser.add_argument("--linhas", type=int, default=30, help="Linhas por sessão")
+    parser.add_argument("--sessoes", type=int, nargs="+", default=list(SESSION_COUNTS), help="Quantidades de sessões paralelas")
+    parser.add_argument("--motores", nargs="+", choices=ENGINES, default=["firefox"], help="Navegadores a medir")
+    parser.add_argument("--com-janela", action="store_true", help="Mede também com o navegador visível (além do headless)")
+    parser.add_argument("--perfis", nargs="+", help="Perfis de latência (padrão: todos os carregados)")
+    parser.add_argument("--logs", help="Padrão glob de logs reais (ex: 'logs/botcds_*.log') para ajustar e incluir o perfil 'logs'")
+    parser.add_argument("--limite-segundos", type=float, default=1800, help="Tempo máximo por configuração")
+    parser.add_argument("--semente", type=int, default=1, help="Semente dos dados e do sorteio de latência")
+    parser.add_argument("--saida", default=f"benchmark_escala_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv", help="Arquivo CSV de saída")
+    args = parser.parse_args(argv)
+
+    if getattr(sys, 'frozen', False):
+        parser.error("A varredura de escala abre sessões com 'python -m' e precisa rodar a partir do código-fonte.")
+    if psutil is None:
+        logger.warning("psutil não instalado: as colunas de CPU e memória ficarão vazias ('pip install psutil').")
+
+    profiles = load_latency_profiles()
+    profile_names = args.perfis or list(profiles)
+    unknown = [name for name in profile_names if name not in profiles and not (name == "logs" and args.logs)]
+    if unknown:
+        parser.error(f"Perfil(is) de latência desconhecido(s): {', '.join(unknown)}. Disponíveis: {', '.join(profiles)}")
+
+    modes = [True, False] if args.com_janela else [True]
+    output = Path(args.saida)
+    with open(output, 'w', encoding='utf-8-sig', newline='') as f:
+        csv.writer(f, delimiter=';').writerow(CSV_COLUMNS)
+
+    def record(row: dict):
+        # Grava cada configuração assim que termina: uma varredura interrompida mantém o que já mediu
+        with open(output, 'a', encoding='utf-8-sig', newline='') as f:
+            csv.writer(f, delimiter=';').writerow(["" if row[column] is None else row[column] for column in CSV_COLUMNS])
+
+    if args.logs:
+        log_files = sorted(glob.glob(args.logs))
+        # Referência: uma sessão contra o servidor sem latência, com o primeiro navegador/modo da varredura
+        baseline = run_configuration(args.tarefa, args.motores[0], modes[0], "local", profiles["local"], 1,
+                                     args.linhas, args.semente, args.limite_segundos)
+        record(baseline)
+        fitted = fit_profile_from_logs(log_files, baseline["linha_p50_s"] or 0.0, baseline["_requisicoes_por_linha"])
+        if fitted:
+            profiles["logs"] = fitted
+            save_latency_profile("logs", fitted)
+            if "logs" not in profile_names:
+                profile_names.append("logs")
+        elif "logs" in profile_names:
+            profile_names.remove("logs")
+
+    for engine in args.motores:
+        for headless in modes:
+            for profile_name in profile_names:
+                for sessions in args.sessoes:
+                    row = run_configuration(args.tarefa, engine, headless, profile_name, profiles[profile_name], sessions,
+                                            args.linhas, args.semente, args.limite_segundos)
+                    record(row)
+                    logger.info(f"Escala: {row['registros_por_minuto']} reg/min ({row['registros_por_minuto_por_sessao']} por sessão), "
+                                f"linha p50 {row['linha_p50_s']} s / p95 {row['linha_p95_s']} s, "
+                                f"CPU {row['cpu_pct']}%, RSS {row['rss_pico_mb']} MB, sessões com erro: {row['sessoes_com_erro']}.")
+
+    print(f"Resultado salvo em {output}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -18,8 +18,51 @@ class AppConfig:
 
     # Valores padrão da configuração
     delete_file_after_completion = False
+    pec_version = "5.4.22" # Versão do PEC (e-SUS) configurada; usada quando a versão não é lida da página no login
+    detected_pec_version = "" # Versão lida da página do PEC no login (só em memória, não vai para o config.json)
+    direct_submit_enabled = False # Envio direto das fichas (GraphQL) após calibração pela interface
+    direct_submit_batch_size = 50 # Registros por mutação no modo 'lote'
+    direct_submit_concurrency = 4 # Requisições simultâneas no envio direto
+    direct_submit_endpoint = "" # Se preenchido, substitui a URL gravada (ex: servidor local de teste)
+    intervention_auto_skip_minutes = 0 # Pula itens da fila de intervenções sem resposta após N minutos (0 = desativado)
+    recovery_policies_enabled = True # Recuperação automática por classe de erro antes de pedir intervenção
+    quarantine_retry_lot_at_end = False # Ao fim da execução, gera dados_retry_<tarefa>_<data>_*.csv com as linhas em quarentena (exceto duplicados e pulados pelo operador)
+    row_step_checkpoints_enabled = True # Ao retentar um registro, retoma do passo que falhou (passos já concluídos não são refeitos)
+    session_watchdog_interval_seconds = 30 # Intervalo da sonda do watchdog de sessão ao servidor do e-SUS (0 = só detecta 401/redirecionamento)
+    session_watchdog_max_wait_minutes = 60 # Tempo máximo esperando o servidor voltar antes de pedir intervenção (0 = sem limite)
+    browser_max_restarts_per_hour = 3 # Reinícios automáticos do navegador após queda, por hora (0 = queda encerra a automação)
+    page_health_sample_every_rows = 25 # Amostra nós do DOM/heap JS da página a cada N registros (0 = desativado)
+    page_recycle_dom_nodes = 60000 # Recarrega a página do e-SUS no próximo ponto seguro acima deste número de nós no DOM (0 = ignora)
+    page_recycle_heap_mb = 700 # Recarrega a página do e-SUS no próximo ponto seguro acima deste heap JS em MB (0 = ignora)
+    browser_console_logging = False # Repassa o console do navegador ao log (debug). Desligado por padrão: custa tempo em execuções longas
+    lot_finalize_every_rows = 50 # Clica 'Finalizar registros' a cada N registros confirmados e reabre a ficha com a mesma data (0 = só no fim do arquivo)
+    span_trace_format = "" # Spans de tempo (execução/arquivo/linha/passo/primitivas) em logs/spans: '' desativado, 'jsonl' ou 'chrome' (chrome://tracing / Perfetto)
+    progress_update_interval_s = 1.0 # Intervalo mínimo (s) entre atualizações do painel de progresso (a GUI não é inundada de sinais)
+    progress_window_rows = 20 # Linhas consideradas no ritmo (reg/min), na previsão de término e nos passos mais lentos do painel
+    metrics_port = 0 # Porta do endpoint local /metrics (formato Prometheus) com linhas, ritmo, latência dos passos, pausa e memória (0 = desativado)
+    metrics_host = "127.0.0.1" # Endereço do endpoint /metrics ('0.0.0.0' para o Prometheus coletar de outra máquina)
+    metrics_textfile = "" # Arquivo .prom reescrito a cada linha para o textfile collector do node_exporter ('' = desativado)
+    heartbeat_file = "logs/heartbeat.json" # Batimento (JSON) reescrito a cada linha e a cada pausa, relativo à pasta do app ('' = desativado)
+    run_history_enabled = True # Grava o resumo de cada execução no histórico (SQLite) e compara com as anteriores
+    regression_threshold = 1.5 # Razão (atual/referência) a partir da qual um passo ou o ritmo é apontado como regressão
+    regression_baseline_days = 14 # Janela (dias) das execuções usadas como referência na comparação
+    loop_lag_threshold_ms = 100 # Com o diagnóstico ligado, callbacks do loop do Worker mais longos que isso são registrados com a pilha
+    profiler_interval_ms = 1 # Intervalo de amostragem do perfilador (pyinstrument) no diagnóstico de desempenho
+    log_level = "INFO" # Nível do log do app (DEBUG formata e grava cada primitiva: use só para investigar)
+    log_module_levels = {} # Níveis por módulo, ex: {"app.automation.pages": "WARNING", "app.automation.tasks": "DEBUG"}
+    log_json = False # Grava também logs/botcds_<data>.jsonl (um JSON por registro, com sessão, arquivo e linha)
+    log_max_mb = 50 # Tamanho máximo do log do dia antes de rotacionar (as partes fechadas são compactadas em .gz)
+    log_retention_days = 30 # Logs (e partes .gz) mais antigos que isso são apagados
+    trace_keep_rows = 0 # Trace do Playwright em anel (opcional): com N > 0 guarda os trechos das últimas N linhas e salva em logs/traces quando uma linha falha ou é pulada (0 = desligado)
+    trace_screenshots = True # Inclui screenshots (filmstrip) nos traces em anel; os snapshots do DOM sempre vão
+    lot_grid_row_selector = "" # Seletor das linhas da lista do lote, conferido no PEC em uso; quando preenchido, o Confirmar também confere se a lista cresceu (vazio = desligado)
     # Adicione outras configurações globais aqui conforme necessário
 
+    @staticmethod
+    def current_pec_version() -> str:
+        """Versão do PEC em uso: a lida da página no login ou, sem ela, a configurada (pec_version)."""
+        return AppConfig.detected_pec_version or AppConfig.pec_version
+
     @staticmethod
     def load_config():
         """Carrega as configurações do arquivo JSON."""
@@ -33,6 +76,43 @@ class AppConfig:
                 config_data = json.load(f)
                 # Carrega cada configuração, usando o valor padrão se não encontrar no arquivo
                 AppConfig.delete_file_after_completion = config_data.get('delete_file_after_completion', AppConfig.delete_file_after_completion)
+                AppConfig.pec_version = config_data.get('pec_version', AppConfig.pec_version)
+                AppConfig.direct_submit_enabled = config_data.get('direct_submit_enabled', AppConfig.direct_submit_enabled)
+                AppConfig.direct_submit_batch_size = config_data.get('direct_submit_batch_size', AppConfig.direct_submit_batch_size)
+                AppConfig.direct_submit_concurrency = config_data.get('direct_submit_concurrency', AppConfig.direct_submit_concurrency)
+                AppConfig.direct_submit_endpoint = config_data.get('direct_submit_endpoint', AppConfig.direct_submit_endpoint)
+                AppConfig.intervention_auto_skip_minutes = config_data.get('intervention_auto_skip_minutes', AppConfig.intervention_auto_skip_minutes)
+                AppConfig.recovery_policies_enabled = config_data.get('recovery_policies_enabled', AppConfig.recovery_policies_enabled)
+                AppConfig.quarantine_retry_lot_at_end = config_data.get('quarantine_retry_lot_at_end', AppConfig.quarantine_retry_lot_at_end)
+                AppConfig.row_step_checkpoints_enabled = config_data.get('row_step_checkpoints_enabled', AppConfig.row_step_checkpoints_enabled)
+                AppConfig.session_watchdog_interval_seconds = config_data.get('session_watchdog_interval_seconds', AppConfig.session_watchdog_interval_seconds)
+                AppConfig.session_watchdog_max_wait_minutes = config_data.get('session_watchdog_max_wait_minutes', AppConfig.session_watchdog_max_wait_minutes)
+                AppConfig.browser_max_restarts_per_hour = config_data.get('browser_max_restarts_per_hour', AppConfig.browser_max_restarts_per_hour)
+                AppConfig.page_health_sample_every_rows = config_data.get('page_health_sample_every_rows', AppConfig.page_health_sample_every_rows)
+                AppConfig.page_recycle_dom_nodes = config_data.get('page_recycle_dom_nodes', AppConfig.page_recycle_dom_nodes)
+                AppConfig.page_recycle_heap_mb = config_data.get('page_recycle_heap_mb', AppConfig.page_recycle_heap_mb)
+                AppConfig.browser_console_logging = config_data.get('browser_console_logging', AppConfig.browser_console_logging)
+                AppConfig.lot_finalize_every_rows = config_data.get('lot_finalize_every_rows', AppConfig.lot_finalize_every_rows)
+                AppConfig.span_trace_format = config_data.get('span_trace_format', AppConfig.span_trace_format)
+                AppConfig.progress_update_interval_s = config_data.get('progress_update_interval_s', AppConfig.progress_update_interval_s)
+                AppConfig.progress_window_rows = config_data.get('progress_window_rows', AppConfig.progress_window_rows)
+                AppConfig.metrics_port = config_data.get('metrics_port', AppConfig.metrics_port)
+                AppConfig.metrics_host = config_data.get('metrics_host', AppConfig.metrics_host)
+                AppConfig.metrics_textfile = config_data.get('metrics_textfile', AppConfig.metrics_textfile)
+                AppConfig.heartbeat_file = config_data.get('heartbeat_file', AppConfig.heartbeat_file)
+                AppConfig.run_history_enabled = config_data.get('run_history_enabled', AppConfig.run_history_enabled)
+                AppConfig.regression_threshold = config_data.get('regression_threshold', AppConfig.regression_threshold)
+                AppConfig.regression_baseline_days = config_data.get('regression_baseline_days', AppConfig.regression_baseline_days)
+                AppConfig.loop_lag_threshold_ms = config_data.get('loop_lag_threshold_ms', AppConfig.loop_lag_threshold_ms)
+                AppConfig.profiler_interval_ms = config_data.get('profiler_interval_ms', AppConfig.profiler_interval_ms)
+                AppConfig.log_level = config_data.get('log_level', AppConfig.log_level)
+                AppConfig.log_module_levels = config_data.get('log_module_levels', AppConfig.log_module_levels)
+                AppConfig.log_json = config_data.get('log_json', AppConfig.log_json)
+                AppConfig.log_max_mb = config_data.get('log_max_mb', AppConfig.log_max_mb)
+                AppConfig.log_retention_days = config_data.get('log_retention_days', AppConfig.log_retention_days)
+                AppConfig.trace_keep_rows = config_data.get('trace_keep_rows', AppConfig.trace_keep_rows)
+                AppConfig.trace_screenshots = config_data.get('trace_screenshots', AppConfig.trace_screenshots)
+                AppConfig.lot_grid_row_selector = config_data.get('lot_grid_row_selector', AppConfig.lot_grid_row_selector)
                 # Carregar outras configurações aqui
         except (json.JSONDecodeError, FileNotFoundError) as e:
             print(f"Erro ao carregar arquivo de configuração {AppConfig.CONFIG_FILE}: {e}")
@@ -46,6 +126,43 @@ class AppConfig:
         """Salva as configurações atuais para o arquivo JSON."""
         config_data = {
             'delete_file_after_completion': AppConfig.delete_file_after_completion,
+            'pec_version': AppConfig.pec_version,
+            'direct_submit_enabled': AppConfig.direct_submit_enabled,
+            'direct_submit_batch_size': AppConfig.direct_submit_batch_size,
+            'direct_submit_concurrency': AppConfig.direct_submit_concurrency,
+            'direct_submit_endpoint': AppConfig.direct_submit_endpoint,
+            'intervention_auto_skip_minutes': AppConfig.intervention_auto_skip_minutes,
+            'recovery_policies_enabled': AppConfig.recovery_policies_enabled,
+            'quarantine_retry_lot_at_end': AppConfig.quarantine_retry_lot_at_end,
+            'row_step_checkpoints_enabled': AppConfig.row_step_checkpoints_enabled,
+            'session_watchdog_interval_seconds': AppConfig.session_watchdog_interval_seconds,
+            'session_watchdog_max_wait_minutes': AppConfig.session_watchdog_max_wait_minutes,
+            'browser_max_restarts_per_hour': AppConfig.browser_max_restarts_per_hour,
+            'page_health_sample_every_rows': AppConfig.page_health_sample_every_rows,
+            'page_recycle_dom_nodes': AppConfig.page_recycle_dom_nodes,
+            'page_recycle_heap_mb': AppConfig.page_recycle_heap_mb,
+            'browser_console_logging': AppConfig.browser_console_logging,
+            'lot_finalize_every_rows': AppConfig.lot_finalize_every_rows,
+            'span_trace_format': AppConfig.span_trace_format,
+            'progress_update_interval_s': AppConfig.progress_update_interval_s,
+            'progress_window_rows': AppConfig.progress_window_rows,
+            'metrics_port': AppConfig.metrics_port,
+            'metrics_host': AppConfig.metrics_host,
+            'metrics_textfile': AppConfig.metrics_textfile,
+            'heartbeat_file': AppConfig.heartbeat_file,
+            'run_history_enabled': AppConfig.run_history_enabled,
+            'regression_threshold': AppConfig.regression_threshold,
+            'regression_baseline_days': AppConfig.regression_baseline_days,
+            'loop_lag_threshold_ms': AppConfig.loop_lag_threshold_ms,
+            'profiler_interval_ms': AppConfig.profiler_interval_ms,
+            'log_level': AppConfig.log_level,
+            'log_module_levels': AppConfig.log_module_levels,
+            'log_json': AppConfig.log_json,
+            'log_max_mb': AppConfig.log_max_mb,
+            'log_retention_days': AppConfig.log_retention_days,
+            'trace_keep_rows': AppConfig.trace_keep_rows,
+            'trace_screenshots': AppConfig.trace_screenshots,
+            'lot_grid_row_selector': AppConfig.lot_grid_row_selector,
             # Salvar outras configurações aqui
         }
         try:
@@ -1,9 +1,18 @@
 # Arquivo: app/core/logger.py
+import atexit
+import contextvars
+import copy
+import gzip
+import json
 import logging
-import os
+import queue
+import shutil
 import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 from datetime import datetime
+from app.core.app_config import AppConfig
 
 # Determina o diretório base do aplicativo
 if getattr(sys, 'frozen', False):
@@ -18,23 +27,248 @@ LOG_DIR.mkdir(parents=True, exist_ok=True) # Garante que a pasta de logs existe
 LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
 
-# Define o nome do arquivo de log diário
-LOG_FILE = LOG_DIR / f"botcds_{datetime.now().strftime('%Y-%m-%d')}.log"
-
-# Configura o logger raiz
-logging.basicConfig(
-    level=logging.INFO, # Nível mínimo de log a ser registrado (INFO, DEBUG, WARNING, ERROR, CRITICAL)
-    format=LOG_FORMAT,
-    datefmt=DATE_FORMAT,
-    handlers=[
-        logging.FileHandler(LOG_FILE, encoding='utf-8'), # Salva logs em arquivo
-        logging.StreamHandler(sys.stdout) # Exibe logs no console
-    ]
-)
-
-# Cria um logger específico para o seu aplicativo
+# Nome do arquivo de log diário (botcds_<data>.log; as partes rotacionadas viram botcds_<data>.<n>.log.gz)
+LOG_PREFIX = "botcds"
+LOG_FILE = LOG_DIR / f"{LOG_PREFIX}_{datetime.now().strftime('%Y-%m-%d')}.log"
+
+# Contexto da automação anexado a cada registro (cada tarefa asyncio/thread vê o seu)
+_log_session = contextvars.ContextVar("log_sessao", default=None)
+_log_file = contextvars.ContextVar("log_arquivo", default=None)
+_log_row = contextvars.ContextVar("log_linha", default=None)
+_UNSET = object()
+
+
+def set_log_context(session=_UNSET, file=_UNSET, row=_UNSET):
+    """Define sessão, arquivo de dados e linha atuais (só os informados) para os próximos registros de log."""
+    if session is not _UNSET:
+        _log_session.set(session)
+    if file is not _UNSET:
+        _log_file.set(file)
+    if row is not _UNSET:
+        _log_row.set(row)
+
+
+def open_log_file(path):
+    """Abre um log para leitura em texto, compactado (.gz, partes rotacionadas) ou não."""
+    if str(path).endswith(".gz"):
+        return gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+    return open(path, 'r', encoding='utf-8', errors='replace')
+
+
+def is_log_file(path) -> bool:
+    """True para os logs de texto do app: botcds_<data>.log e as partes botcds_<data>.<n>.log.gz."""
+    name = Path(path).name
+    return name.startswith(f"{LOG_PREFIX}_") and (name.endswith(".log") or name.endswith(".log.gz"))
+
+
+class ContextFilter(logging.Filter):
+    """Copia o contexto (contextvars) para o registro. Roda na thread que loga, antes da fila."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.sessao = _log_session.get()
+        record.arquivo = _log_file.get()
+        record.linha = _log_row.get()
+        return True
+
+
+class ModuleLevelFilter(logging.Filter):
+    """
+    Nível por módulo (AppConfig.log_module_levels, prefixo pontilhado -> nível; vale o prefixo mais longo).
+    Todo o app loga no logger 'BotCDS', então o módulo vem do caminho do arquivo que chamou.
+    """
+
+    def __init__(self, default_level: int, module_levels: dict):
+        super().__init__()
+        self.default_level = default_level
+        levels = ((prefix, logging.getLevelName(str(level).upper())) for prefix, level in module_levels.items())
+        self.module_levels = sorted(((prefix, level) for prefix, level in levels if isinstance(level, int)), key=lambda item: -len(item[0]))
+        self._cache = {} # pathname -> nível
+
+    def _module_name(self, pathname: str) -> str:
+        try:
+            return ".".join(Path(pathname).resolve().relative_to(BASE_DIR).with_suffix("").parts)
+        except ValueError:
+            return ""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not record.name.startswith("BotCDS"):
+            return True
+        level = self._cache.get(record.pathname)
+        if level is None:
+            module = self._module_name(record.pathname)
+            level = next((lvl for prefix, lvl in self.module_levels if module == prefix or module.startswith(prefix + ".")),
+                         self.default_level)
+            self._cache[record.pathname] = level
+        return record.levelno >= level
+
+
+class LazyQueueHandler(QueueHandler):
+    """
+    Só enfileira: a formatação (data, exceção, JSON) e a escrita ficam com a thread do QueueListener.
+    Diferente do QueueHandler padrão, não formata o registro aqui; só resolve o '%' da mensagem
+    (os argumentos podem mudar depois) e mantém o exc_info para a thread de escrita.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """Um objeto JSON por registro, com o contexto da automação (sessão, arquivo, linha)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "modulo": record.module,
+            "funcao": record.funcName,
+            "mensagem": record.getMessage(),
+            "sessao": getattr(record, "sessao", None),
+            "arquivo": getattr(record, "arquivo", None),
+            "linha": getattr(record, "linha", None),
+            "thread": record.threadName,
+        }
+        if record.exc_info:
+            entry["excecao"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DailyRotatingFileHandler(logging.FileHandler):
+    """
+    Arquivo por dia (botcds_<data><sufixo>) com limite de tamanho: passando de 'max_bytes', a parte atual vira
+    botcds_<data>.<n><sufixo>.gz e o arquivo do dia recomeça. Na virada do dia o arquivo anterior é compactado.
+    Arquivos com mais de 'retention_days' são apagados. Roda na thread do QueueListener (não atrasa quem loga).
+    """
+
+    def __init__(self, suffix: str, max_bytes: int, retention_days: int):
+        self.suffix = suffix
+        self.max_bytes = max_bytes
+        self.retention_days = retention_days
+        self._day = datetime.now().strftime('%Y-%m-%d')
+        super().__init__(self._path_for(self._day), encoding='utf-8', delay=True)
+        self._housekeeping()
+
+    def _path_for(self, day: str) -> Path:
+        return LOG_DIR / f"{LOG_PREFIX}_{day}{self.suffix}"
+
+    def emit(self, record: logging.LogRecord):
+        day = datetime.fromtimestamp(record.created).strftime('%Y-%m-%d')
+        if day != self._day:
+            self._switch_day(day)
+        elif self.max_bytes and self.stream is not None and self.stream.tell() >= self.max_bytes:
+            self._rotate_part()
+        super().emit(record)
+
+    def _switch_day(self, day: str):
+        self.close()
+        previous = Path(self.baseFilename)
+        self._day = day
+        self.baseFilename = str(self._path_for(day))
+        self._compress(previous, previous.with_name(previous.name + ".gz"))
+        self._housekeeping()
+
+    def _rotate_part(self):
+        self.close()
+        current = Path(self.baseFilename)
+        part = 1
+        while (target := current.with_name(f"{LOG_PREFIX}_{self._day}.{part}{self.suffix}.gz")).exists():
+            part += 1
+        self._compress(current, target)
+
+    @staticmethod
+    def _compress(source: Path, target: Path):
+        # Outro processo (sessão paralela) pode estar com o arquivo aberto: se falhar, fica sem compactar
+        try:
+            if not source.exists():
+                return
+            temp = source.with_name(source.name + ".rotacionando")
+            source.rename(temp)
+            with open(temp, 'rb') as f_in, gzip.open(target, 'wb') as f_out:
+                shutil.copyfileobj(f_in, f_out)
+            temp.unlink()
+        except OSError as e:
+            sys.stderr.write(f"Não foi possível rotacionar o log {source}: {e}\n")
+
+    def _housekeeping(self):
+        """Compacta os logs de dias anteriores ainda em texto e apaga os que passaram da retenção."""
+        cutoff = time.time() - self.retention_days * 86400 if self.retention_days else None
+        for path in LOG_DIR.glob(f"{LOG_PREFIX}_*{self.suffix}*"):
+            try:
+                if cutoff and path.stat().st_mtime < cutoff:
+                    path.unlink()
+                elif path.name.endswith(self.suffix) and path.name != Path(self.baseFilename).name \
+                        and path.name[len(LOG_PREFIX) + 1:len(LOG_PREFIX) + 11] < self._day \
+                        and time.time() - path.stat().st_mtime > 3600: # Parado há 1 h: nenhuma sessão ainda escreve nele
+                    self._compress(path, path.with_name(path.name + ".gz"))
+            except OSError:
+                continue
+
+
+_listener: QueueListener = None
+
+
+def configure_logging():
+    """
+    Monta (ou remonta) o pipeline a partir do AppConfig: quem loga só enfileira (LazyQueueHandler); uma
+    thread (QueueListener) formata e grava no arquivo do dia, no console e, com AppConfig.log_json, no .jsonl.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+
+    level = logging.getLevelName(str(AppConfig.log_level).upper())
+    level = level if isinstance(level, int) else logging.INFO
+    module_filter = ModuleLevelFilter(level, AppConfig.log_module_levels or {})
+    max_bytes = int(AppConfig.log_max_mb * 1024 * 1024) if AppConfig.log_max_mb else 0
+
+    text_formatter = logging.Formatter(LOG_FORMAT, datefmt=DATE_FORMAT)
+    file_handler = DailyRotatingFileHandler(".log", max_bytes, AppConfig.log_retention_days) # Salva logs em arquivo
+    file_handler.setFormatter(text_formatter)
+    console_handler = logging.StreamHandler(sys.stdout) # Exibe logs no console
+    console_handler.setFormatter(text_formatter)
+    handlers = [file_handler, console_handler]
+    if AppConfig.log_json:
+        json_handler = DailyRotatingFileHandler(".jsonl", max_bytes, AppConfig.log_retention_days)
+        json_handler.setFormatter(JsonFormatter())
+        handlers.append(json_handler)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = LazyQueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+    queue_handler.addFilter(module_filter)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    root.addHandler(queue_handler)
+    root.setLevel(logging.INFO) # Bibliotecas de terceiros
+
+    # O nível do logger do app é o mais baixo configurado, para o filtro por módulo poder liberar DEBUG onde pedido
+    app_logger = logging.getLogger("BotCDS")
+    app_logger.setLevel(min([level] + [lvl for _, lvl in module_filter.module_levels]))
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging():
+    """Esvazia a fila e para a thread de escrita (chamado na saída do processo)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+configure_logging()
+atexit.register(shutdown_logging)
+
+# Cria um logger específico para o seu aplicativo (nível em AppConfig.log_level / log_module_levels)
 logger = logging.getLogger("BotCDS")
-logger.setLevel(logging.DEBUG) # Você pode definir um nível de detalhe diferente para o logger do app
 
 # Exemplo de uso:
 if __name__ == "__main__":
@@ -42,4 +276,4 @@ if __name__ == "__main__":
     logger.info("Esta é uma mensagem informativa.")
     logger.warning("Esta é uma mensagem de aviso.")
     logger.error("Esta é uma mensagem de erro.")
-    logger.critical("Esta é uma mensagem crítica.")
\ No newline at end of file
+    logger.critical("Esta é uma mensagem crítica.")
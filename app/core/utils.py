@@ -13,4 +13,14 @@ def normalize_text_for_selection(text: str) -> str:
 
     # Remove acentos (NFD) e caracteres combinados (ASCII), converte para minúsculas
     normalized = unicodedata.normalize('NFD', text).encode('ascii', 'ignore').decode('utf-8').lower()
-    return normalized
\ No newline at end of file
+    return normalized
+
+def percentile(values: list, fraction: float) -> float | None:
+    """Percentil por interpolação linear (fraction entre 0 e 1). Lista vazia -> None."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
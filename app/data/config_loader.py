@@ -16,14 +16,14 @@ class ConfigLoader:
     def load_config(self):
         """Carrega configurações de URL, usuário e senha do CSV."""
         if not self.CONFIG_FILE.exists():
-            logger.error(f"Arquivo de configuração não encontrado: {self.CONFIG_FILE}")
+            logger.error("Arquivo de configuração não encontrado: %s", self.CONFIG_FILE)
             return None # Retorna None se o arquivo não existir
 
         try:
             # Lê o CSV sem cabeçalho, esperando 3 linhas
             df = pd.read_csv(self.CONFIG_FILE, header=None, nrows=3)
             if df.shape[0] < 3:
-                 logger.error(f"Arquivo de configuração incompleto: {self.CONFIG_FILE}. Esperado 3 linhas (URL, Usuário, Senha).")
+                 logger.error("Arquivo de configuração incompleto: %s. Esperado 3 linhas (URL, Usuário, Senha).", self.CONFIG_FILE)
                  return None
 
             url = df.iloc[0, 0] if not pd.isna(df.iloc[0, 0]) else ""
@@ -34,10 +34,10 @@ class ConfigLoader:
             return {"url": url, "usuario": usuario, "senha": senha}
 
         except FileNotFoundError:
-             logger.error(f"Arquivo de configuração não encontrado: {self.CONFIG_FILE}")
+             logger.error("Arquivo de configuração não encontrado: %s", self.CONFIG_FILE)
              return None
         except Exception as e:
-            logger.error(f"Erro ao carregar arquivo de configuração {self.CONFIG_FILE}: {e}")
+            logger.error("Erro ao carregar arquivo de configuração %s: %s", self.CONFIG_FILE, e)
             return None
 
 # Exemplo de uso:
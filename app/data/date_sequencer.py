@@ -22,7 +22,7 @@ class DateSequencer:
     def _load_state(self):
         """Carrega o estado de datas do arquivo JSON."""
         if not self.REGISTRY_FILE.exists():
-            logger.info(f"Arquivo de registro de datas não encontrado em: {self.REGISTRY_FILE}. Inicializando com estado padrão.")
+            logger.info("Arquivo de registro de datas não encontrado em: %s. Inicializando com estado padrão.", self.REGISTRY_FILE)
             self._state = {'datas_usadas': [], 'datas_seq': [], 'datas_a_ignorar': [], 'ultima_data_usada': None}
             self._save_state() # Cria o arquivo com estado inicial
             return
@@ -37,7 +37,7 @@ class DateSequencer:
                 # 'ultima_data_usada' pode ser None
             logger.info("Estado do sequenciador de datas carregado.")
         except (json.JSONDecodeError, IOError) as e:
-            logger.error(f"Erro ao carregar estado do sequenciador de datas {self.REGISTRY_FILE}: {e}")
+            logger.error("Erro ao carregar estado do sequenciador de datas %s: %s", self.REGISTRY_FILE, e)
             # Em caso de erro, inicializa o estado para evitar problemas futuros
             self._state = {'datas_usadas': [], 'datas_seq': [], 'datas_a_ignorar': [], 'ultima_data_usada': None}
             logger.warning("Estado do sequenciador de datas resetado devido a erro de leitura.")
@@ -50,7 +50,7 @@ class DateSequencer:
                 json.dump(self._state, f, indent=4)
             # logger.debug("Estado do sequenciador de datas salvo.") # Pode gerar muito log se salvar frequentemente
         except IOError as e:
-            logger.error(f"Erro ao salvar estado do sequenciador de datas {self.REGISTRY_FILE}: {e}")
+            logger.error("Erro ao salvar estado do sequenciador de datas %s: %s", self.REGISTRY_FILE, e)
 
     def _is_weekend(self, date: datetime):
         """Verifica se uma data é final de semana."""
@@ -131,13 +131,13 @@ class DateSequencer:
         if start_date_override:
             try:
                 start_gen_date_obj = datetime.strptime(start_date_override, '%d/%m/%Y')
-                logger.info(f"Usando data de override '{start_date_override}' para iniciar a geração da sequência.")
+                logger.info("Usando data de override '%s' para iniciar a geração da sequência.", start_date_override)
             except ValueError:
-                logger.error(f"Formato inválido para start_date_override: {start_date_override}. Ignorando override.")
+                logger.error("Formato inválido para start_date_override: %s. Ignorando override.", start_date_override)
                 start_gen_date_obj = self._get_last_used_date_obj() # Fallback
         elif self._state.get('ultima_data_usada'):
             start_gen_date_obj = self._get_last_used_date_obj()
-            logger.info(f"Usando 'ultima_data_usada' '{self._state['ultima_data_usada']}' para iniciar a geração da sequência.")
+            logger.info("Usando 'ultima_data_usada' '%s' para iniciar a geração da sequência.", self._state['ultima_data_usada'])
         else:
             start_gen_date_obj = datetime.today()
             logger.warning("Nenhuma data inicial ou última data usada encontrada. Iniciando geração a partir de hoje.")
@@ -158,9 +158,9 @@ class DateSequencer:
                 new_sequence.append(start_date_override_str)
                 dates_to_avoid_str.add(start_date_override_str) # Adiciona para evitar duplicidade
                 current_date = start_date_override_normalized # O próximo cálculo começará a partir dela.
-                logger.debug(f"Adicionando '{start_date_override_str}' como primeira data da sequência (override).")
+                logger.debug("Adicionando '%s' como primeira data da sequência (override).", start_date_override_str)
             else:
-                logger.debug(f"Data de override '{start_date_override_str}' não é útil ou já está em uso. Gerando a partir do próximo dia útil.")
+                logger.debug("Data de override '%s' não é útil ou já está em uso. Gerando a partir do próximo dia útil.", start_date_override_str)
                 # Se a data de override não puder ser a primeira, o current_date já está setado para ela,
                 # e o loop abaixo vai para o próximo dia útil.
         
@@ -177,12 +177,12 @@ class DateSequencer:
             else:
                 # Isso não deveria acontecer se _proxima_data_util está correto,
                 # mas é uma salvaguarda para evitar loops infinitos se _proxima_data_util falhar.
-                logger.warning(f"Data '{date_str}' já está na lista a evitar, pulando para a próxima tentativa.")
+                logger.warning("Data '%s' já está na lista a evitar, pulando para a próxima tentativa.", date_str)
                 current_date += timedelta(days=1) # Tenta a próxima data imediatamente
 
         self._state['datas_seq'].extend(new_sequence)
         self._save_state()
-        logger.info(f"Sequência de {len(self._state['datas_seq'])} datas gerada/atualizada.")
+        logger.info("Sequência de %s datas gerada/atualizada.", len(self._state['datas_seq']))
         return self._state['datas_seq']
 
     def get_next_sequence_date(self):
@@ -198,7 +198,7 @@ class DateSequencer:
         self._state['datas_usadas'].append(next_date_str) # Adiciona às datas usadas
         self._state['ultima_data_usada'] = next_date_str # Atualiza a última data usada
         self._save_state()
-        logger.info(f"Próxima data da sequência utilizada: {next_date_str}")
+        logger.info("Próxima data da sequência utilizada: %s", next_date_str)
         return next_date_str
 
     def _get_last_used_date_obj(self):
@@ -208,7 +208,7 @@ class DateSequencer:
             try:
                 return datetime.strptime(last_date_str, '%d/%m/%Y')
             except ValueError:
-                logger.error(f"Formato inválido para ultima_data_usada no registro: {last_date_str}. Usando data de hoje como fallback.")
+                logger.error("Formato inválido para ultima_data_usada no registro: %s. Usando data de hoje como fallback.", last_date_str)
                 return datetime.today()
         else:
              logger.info("Nenhuma 'ultima_data_usada' encontrada no registro. Usando data de hoje como fallback.")
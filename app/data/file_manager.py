@@ -8,6 +8,7 @@ import re
 from pathlib import Path
 from app.core.logger import logger
 from app.core.app_config import AppConfig # Para verificar a configuração de apagar arquivo
+from app.data.quarantine import QuarantineStore
 
 class FileManager:
     # Determina o diretório base do aplicativo
@@ -20,7 +21,10 @@ class FileManager:
     ARCHIVE_DIR = DATA_DIR / "arquivos_processados" # Nova pasta para arquivos arquivados
     PROCESSED_REGISTRY = DATA_DIR / "arquivos" / "registro.json" # Mantém o registro onde já estava
 
-    def __init__(self):
+    def __init__(self, task_name: str = None):
+        # Com a tarefa, os lotes de reprocessamento (dados_retry_<tarefa>_...) de outras tarefas ficam fora da fila:
+        # cada tarefa tem o seu layout de colunas
+        self._task_name = task_name
         # Garante que as pastas de dados e arquivo existam
         self.DATA_DIR.mkdir(parents=True, exist_ok=True)
         self.ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
@@ -36,6 +40,11 @@ class FileManager:
         match = re.search(r'(\d+)\.csv$', filename)
         return int(match.group(1)) if match else -1
 
+    def _is_other_task_retry_lot(self, filename: str) -> bool:
+        """True para um lote de reprocessamento da quarentena gerado por outra tarefa."""
+        prefix = QuarantineStore.RETRY_LOT_PREFIX
+        return bool(self._task_name) and filename.startswith(prefix) and not filename.startswith(f"{prefix}{self._task_name}_")
+
     def _is_file_processed(self, filename: str) -> bool:
         """Verifica se um arquivo (pelo nome) já está registrado como processado."""
         processed_files = self._load_processed_registry()
@@ -50,7 +59,7 @@ class FileManager:
             with open(self.PROCESSED_REGISTRY, 'r', encoding='utf-8') as f:
                 return json.load(f)
         except (json.JSONDecodeError, IOError) as e:
-            logger.error(f"Erro ao carregar registro de arquivos processados {self.PROCESSED_REGISTRY}: {e}")
+            logger.error("Erro ao carregar registro de arquivos processados %s: %s", self.PROCESSED_REGISTRY, e)
             return [] # Retorna lista vazia em caso de erro
 
     def _save_processed_registry(self, processed_files):
@@ -59,7 +68,7 @@ class FileManager:
             with open(self.PROCESSED_REGISTRY, 'w', encoding='utf-8') as f:
                 json.dump(processed_files, f, indent=4)
         except IOError as e:
-            logger.error(f"Erro ao salvar registro de arquivos processados {self.PROCESSED_REGISTRY}: {e}")
+            logger.error("Erro ao salvar registro de arquivos processados %s: %s", self.PROCESSED_REGISTRY, e)
 
     def find_next_file_to_process(self) -> Path | None:
         """
@@ -72,7 +81,7 @@ class FileManager:
         main_data_file_name = "dados.csv"
         main_data_file_path = self.DATA_DIR / main_data_file_name
         if main_data_file_path.exists() and main_data_file_name not in processed_files:
-            logger.info(f"Próximo arquivo a processar encontrado: {main_data_file_name}")
+            logger.info("Próximo arquivo a processar encontrado: %s", main_data_file_name)
             return main_data_file_path
 
         # 2. Listar e ordenar arquivos na subpasta 'arquivos'
@@ -80,6 +89,7 @@ class FileManager:
         files_in_archive_dir = [
             f.name for f in (self.DATA_DIR / "arquivos").iterdir() 
             if f.is_file() and f.name.startswith('dados') and f.name.lower().endswith('.csv')
+            and not self._is_other_task_retry_lot(f.name)
         ]
         # Ordena usando a nova função _natural_sort_key
         files_in_archive_dir_sorted = sorted(files_in_archive_dir, key=self._natural_sort_key)
@@ -87,7 +97,7 @@ class FileManager:
 
         for filename in files_in_archive_dir_sorted: # Itera sobre a lista ORDENADA
             if filename not in processed_files:
-                logger.info(f"Próximo arquivo a processar encontrado: {filename}")
+                logger.info("Próximo arquivo a processar encontrado: %s", filename)
                 return (self.DATA_DIR / "arquivos" / filename)
         
         logger.info("Nenhum arquivo dados*.csv não processado encontrado.")
@@ -97,18 +107,18 @@ class FileManager:
     def load_data_file(self, file_path: Path):
         """Carrega os dados de um arquivo CSV específico."""
         if not file_path.exists():
-            logger.error(f"Arquivo de dados não encontrado: {file_path}")
+            logger.error("Arquivo de dados não encontrado: %s", file_path)
             return None
         try:
             # Adiciona dtype={1: str} para garantir que o CPF seja lido como string
             df = pd.read_csv(file_path, sep=';', encoding='ISO-8859-1', header=None, dtype=str)
-            logger.info(f"Arquivo de dados carregado com sucesso: {file_path.name}")
+            logger.info("Arquivo de dados carregado com sucesso: %s", file_path.name)
             return df
         except FileNotFoundError:
-             logger.error(f"Arquivo de dados não encontrado: {file_path}")
+             logger.error("Arquivo de dados não encontrado: %s", file_path)
              return None
         except Exception as e:
-            logger.error(f"Erro ao carregar arquivo de dados {file_path}: {e}")
+            logger.error("Erro ao carregar arquivo de dados %s: %s", file_path, e)
             return None
 
     def mark_file_as_processed(self, file_path: Path):
@@ -119,49 +129,49 @@ class FileManager:
         if filename not in processed_files:
             processed_files.append(filename)
             self._save_processed_registry(processed_files)
-            logger.info(f"Arquivo {filename} marcado como processado.")
+            logger.info("Arquivo %s marcado como processado.", filename)
 
         # Lida com o arquivo fisicamente (move ou deleta)
         if AppConfig.delete_file_after_completion:
             try:
                 file_path.unlink() # Deleta o arquivo
-                logger.info(f"Arquivo {filename} deletado conforme configuração.")
+                logger.info("Arquivo %s deletado conforme configuração.", filename)
             except Exception as e:
-                logger.error(f"Erro ao deletar arquivo {filename}: {e}")
+                logger.error("Erro ao deletar arquivo %s: %s", filename, e)
         else:
             try:
                 archive_path = self.ARCHIVE_DIR / filename
                 shutil.move(str(file_path), str(archive_path)) # Move o arquivo
-                logger.info(f"Arquivo {filename} movido para {self.ARCHIVE_DIR}.")
+                logger.info("Arquivo %s movido para %s.", filename, self.ARCHIVE_DIR)
             except shutil.Error as e:
-                logger.warning(f"Arquivo {filename} já existe em {self.ARCHIVE_DIR} ou erro ao mover: {e}")
+                logger.warning("Arquivo %s já existe em %s ou erro ao mover: %s", filename, self.ARCHIVE_DIR, e)
             except Exception as e:
-                logger.error(f"Erro inesperado ao mover arquivo {filename}: {e}")
+                logger.error("Erro inesperado ao mover arquivo %s: %s", filename, e)
 
 
     def load_main_date_file(self):
         """Carrega a data principal do arquivo data.csv."""
         date_file = self.DATA_DIR / "data.csv"
         if not date_file.exists():
-            logger.error(f"Arquivo de data principal não encontrado: {date_file}")
+            logger.error("Arquivo de data principal não encontrado: %s", date_file)
             return None
         try:
             df = pd.read_csv(date_file, header=None)
             if df.empty or df.shape[0] < 2 or df.shape[1] == 0:
-                logger.error(f"Arquivo de data principal incompleto ou vazio: {date_file}. Esperado cabeçalho + 1 linha de dados.")
+                logger.error("Arquivo de data principal incompleto ou vazio: %s. Esperado cabeçalho + 1 linha de dados.", date_file)
                 return None
             date_str = str(df.iloc[1, 0]).strip()
-            logger.info(f"Data principal carregada: {date_str}")
+            logger.info("Data principal carregada: %s", date_str)
             return date_str
         except Exception as e:
-            logger.error(f"Erro ao carregar data principal de {date_file}: {e}")
+            logger.error("Erro ao carregar data principal de %s: %s", date_file, e)
             return None
     
     # ** NOVO MÉTODO: CONTA TODOS OS ARQUIVOS DE DADOS NÃO PROCESSADOS **
-    def count_all_unprocessed_files(self) -> int:
+    def list_unprocessed_files(self) -> list:
         """
-        Conta todos os arquivos de dados que ainda não foram marcados como processados,
-        usando a mesma lógica de ordenação.
+        Lista (na ordem de processamento) todos os arquivos de dados que ainda não foram marcados
+        como processados, usando a mesma lógica de ordenação.
         """
         processed_files = self._load_processed_registry()
         all_unprocessed_names_found = []
@@ -176,6 +186,7 @@ class FileManager:
         files_in_archive_dir = [
             f.name for f in (self.DATA_DIR / "arquivos").iterdir() 
             if f.is_file() and f.name.startswith('dados') and f.name.lower().endswith('.csv')
+            and not self._is_other_task_retry_lot(f.name)
         ]
         # --- ALTERAÇÃO AQUI: Usando a chave de ordenação natural ---
         files_in_archive_dir_sorted = sorted(files_in_archive_dir, key=self._natural_sort_key)
@@ -185,4 +196,18 @@ class FileManager:
             if filename not in processed_files:
                 all_unprocessed_names_found.append(filename)
         
-        return len(all_unprocessed_names_found)
\ No newline at end of file
+        return [self.DATA_DIR / name if name == main_data_file_name else self.DATA_DIR / "arquivos" / name
+                for name in all_unprocessed_names_found]
+
+    def count_all_unprocessed_files(self) -> int:
+        """Conta todos os arquivos de dados que ainda não foram marcados como processados."""
+        return len(self.list_unprocessed_files())
+
+    def count_all_unprocessed_rows(self) -> int:
+        """Total de linhas nos arquivos ainda não processados (para o progresso e a previsão de término)."""
+        total = 0
+        for file_path in self.list_unprocessed_files():
+            data_df = self.load_data_file(file_path)
+            if data_df is not None:
+                total += len(data_df)
+        return total
\ No newline at end of file
@@ -0,0 +1,148 @@
+# Arquivo: app/data/quarantine.py
+import csv
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+from app.core.logger import logger
+from app.data.run_journal import RunJournal
+
+
+class QuarantineStore:
+    """
+    Quarentena dos registros pulados ou com falha: cada linha é guardada com a classe do erro,
+    o passo, o screenshot e o arquivo/data de origem (quarentena.jsonl).
+
+    generate_retry_lots() junta as linhas ainda não reenviadas em lotes dados_retry_<tarefa>_<data>_<carimbo>.csv
+    na pasta 'arquivos' (um por tarefa e data principal de origem), que entram na fila do FileManager da
+    mesma tarefa (mesmo formato dos CSVs de entrada). Duplicados e registros pulados de propósito pelo
+    operador ficam só no histórico: reenviá-los repetiria o mesmo resultado a cada execução.
+    """
+    if getattr(sys, 'frozen', False):
+        BASE_DIR = Path(sys.executable).parent
+    else:
+        BASE_DIR = Path(__file__).resolve().parents[2]
+
+    DATA_DIR = BASE_DIR / "resources" / "data_input"
+    QUARANTINE_FILE = DATA_DIR / "quarentena" / "quarentena.jsonl"
+    RETRY_LOT_DIR = DATA_DIR / "arquivos"
+    RETRY_LOT_PREFIX = "dados_retry_"
+    RETRY_EXCLUDED_CLASSES = ("duplicado", "pulado_pelo_operador")
+
+    def __init__(self, quarantine_file: Path = None):
+        self.quarantine_file = quarantine_file or self.QUARANTINE_FILE
+        self.quarantine_file.parent.mkdir(parents=True, exist_ok=True)
+
+    def add(self, task: str, file_name: str, row_index: int, row_data: list, error_class: str,
+            step: str = None, screenshot_path: str = None, main_date: str = None, message: str = None):
+        """Coloca uma linha em quarentena."""
+        entry = {
+            "ts": datetime.now().isoformat(timespec="seconds"),
+            "task": task,
+            "file": file_name,
+            "row": row_index,
+            "main_date": main_date,
+            "error_class": error_class,
+            "step": step,
+            "screenshot": screenshot_path,
+            "message": (message or "").strip().splitlines()[0][:300] if message else None,
+            "row_data": ["" if value is None else str(value) for value in (row_data or [])],
+            "retry_lot": None, # Nome do dados_retry_*.csv quando a linha for reenviada
+        }
+        try:
+            with open(self.quarantine_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            logger.warning("Registro %s de %s em quarentena (%s: %s).", row_index + 1, file_name, error_class, step)
+        except IOError as e:
+            logger.error("Erro ao gravar na quarentena %s: %s", self.quarantine_file, e)
+
+    def entries(self) -> list:
+        if not self.quarantine_file.exists():
+            return []
+        result = []
+        try:
+            with open(self.quarantine_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        result.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue
+        except IOError as e:
+            logger.error("Erro ao ler a quarentena %s: %s", self.quarantine_file, e)
+        return result
+
+    def _retryable(self, entry: dict, task: str = None) -> bool:
+        return (not entry.get("retry_lot") and entry.get("error_class") not in self.RETRY_EXCLUDED_CLASSES
+                and (task is None or entry.get("task") == task))
+
+    def pending(self, task: str = None) -> list:
+        """Entradas que ainda podem ir para um lote de reprocessamento (sem lote e fora de RETRY_EXCLUDED_CLASSES)."""
+        return [e for e in self.entries() if self._retryable(e, task)]
+
+    def _rewrite(self, entries: list):
+        temp_file = self.quarantine_file.with_suffix(".tmp")
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        temp_file.replace(self.quarantine_file)
+
+    @classmethod
+    def retry_lot_name(cls, task: str, main_date: str, stamp: str) -> str:
+        """dados_retry_<tarefa>_<data principal AAAAMMDD>_<carimbo>.csv (o carimbo no fim mantém a ordem natural do FileManager)."""
+        try:
+            date_part = datetime.strptime(main_date, "%d/%m/%Y").strftime("%Y%m%d")
+        except (TypeError, ValueError):
+            date_part = "semdata"
+        return f"{cls.RETRY_LOT_PREFIX}{task}_{date_part}_{stamp}.csv"
+
+    def generate_retry_lots(self, task: str = None, journal: RunJournal = None) -> list:
+        """
+        Gera um lote por tarefa e data principal de origem em resources/data_input/arquivos
+        (';' e ISO-8859-1, sem cabeçalho, como os demais arquivos) e marca as linhas como reenviadas.
+        Com 'journal', cada lote já entra no diário aberto com a data de origem: a tarefa o reprocessa
+        com essa data em vez de consumir a próxima da sequência. Retorna os caminhos dos lotes gerados.
+        """
+        entries = self.entries()
+        groups = {}
+        for entry in entries:
+            if self._retryable(entry, task):
+                groups.setdefault((entry.get("task"), entry.get("main_date")), []).append(entry)
+        if not groups:
+            return []
+
+        stamp = datetime.now().strftime('%Y%m%d%H%M%S')
+        lots = []
+        try:
+            self.RETRY_LOT_DIR.mkdir(parents=True, exist_ok=True)
+            for (lot_task, main_date), group in groups.items():
+                lot_path = self.RETRY_LOT_DIR / self.retry_lot_name(lot_task, main_date, stamp)
+                with open(lot_path, 'w', encoding='ISO-8859-1', errors='replace', newline='') as f:
+                    writer = csv.writer(f, delimiter=';')
+                    for entry in group:
+                        writer.writerow(entry["row_data"])
+                for entry in group:
+                    entry["retry_lot"] = lot_path.name
+                if journal is not None and main_date:
+                    journal.record(lot_task, lot_path.name, None, RunJournal.STATUS_OPENED, main_date=main_date,
+                                   fingerprint=RunJournal.file_fingerprint(lot_path))
+                lots.append(lot_path)
+                logger.info("Lote de reprocessamento gerado: %s (%s registro(s) da quarentena, data %s).", lot_path.name, len(group), main_date)
+        except IOError as e:
+            logger.error("Erro ao gerar lote de reprocessamento em %s: %s", self.RETRY_LOT_DIR, e)
+        finally:
+            if lots:
+                self._rewrite(entries)
+        return lots
+
+
+if __name__ == '__main__':
+    # Gera manualmente o lote de reprocessamento (ex: depois de corrigir a causa dos erros)
+    # Uso: python -m app.data.quarantine [NomeDaTarefa]
+    task_filter = sys.argv[1] if len(sys.argv) > 1 else None
+    store = QuarantineStore()
+    print(f"Registros pendentes na quarentena: {len(store.pending(task_filter))}")
+    lots = store.generate_retry_lots(task_filter, RunJournal())
+    print("\n".join(f"Lote gerado: {lot}" for lot in lots) if lots else "Nada a reprocessar.")
@@ -0,0 +1,213 @@
+# Arquivo: app/data/run_history.py
+import json
+import socket
+import sqlite3
+import sys
+from contextlib import closing
+from datetime import datetime, timedelta
+from pathlib import Path
+from statistics import median
+from app.core.logger import logger
+from app.core.utils import percentile
+
+
+class RunHistory:
+    """
+    Histórico de desempenho das execuções (SQLite): um resumo por execução (tarefa, linhas, duração, ritmo,
+    navegador e versão, versão do PEC, erros e pulos por classe) e os percentis de cada passo.
+
+    Serve para notar a lentidão que cresce aos poucos (mudança nossa, atualização do PEC, servidor do
+    município): regressions() compara uma execução com as anteriores da mesma tarefa e navegador,
+    browser_comparison() compara os navegadores e version_comparison() as versões do PEC.
+    O relatório completo é o app.benchmark.regression_report.
+    """
+    if getattr(sys, 'frozen', False):
+        BASE_DIR = Path(sys.executable).parent
+    else:
+        BASE_DIR = Path(__file__).resolve().parents[2]
+
+    DB_FILE = BASE_DIR / "resources" / "data_input" / "historico" / "run_history.sqlite3"
+
+    MIN_ROWS = 5 # Execuções com menos linhas não entram como referência (percentis sem sentido)
+    MIN_STEP_DELTA_S = 0.3 # Diferença mínima no p95 de um passo para apontar regressão (ruído de passos rápidos)
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS execucoes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            inicio TEXT NOT NULL,
+            fim TEXT NOT NULL,
+            tarefa TEXT NOT NULL,
+            status TEXT,
+            linhas INTEGER,
+            puladas INTEGER,
+            duracao_s REAL,
+            registros_por_minuto REAL,
+            navegador TEXT,
+            versao_navegador TEXT,
+            versao_pec TEXT,
+            maquina TEXT,
+            erros_por_classe TEXT,
+            pulos_por_classe TEXT
+        );
+        CREATE TABLE IF NOT EXISTS passos (
+            execucao_id INTEGER NOT NULL REFERENCES execucoes(id) ON DELETE CASCADE,
+            passo TEXT NOT NULL,
+            n INTEGER,
+            media_s REAL,
+            p50_s REAL,
+            p90_s REAL,
+            p95_s REAL,
+            max_s REAL,
+            PRIMARY KEY (execucao_id, passo)
+        );
+        CREATE INDEX IF NOT EXISTS idx_execucoes_tarefa ON execucoes (tarefa, inicio);
+    """
+
+    def __init__(self, db_file: Path = None):
+        self.db_file = db_file or self.DB_FILE
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(self._SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_file, timeout=10) # Sessões paralelas gravam no mesmo arquivo
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    # --- Gravação ---
+
+    def record_run(self, task: str, started_at: datetime, duration_s: float, rows: int, skipped: int, status: str,
+                   step_durations: dict, errors_by_class: dict = None, skips_by_class: dict = None,
+                   browser: str = None, browser_version: str = None, pec_version: str = None) -> int:
+        """Grava uma execução; 'step_durations' é {passo: [segundos de cada ocorrência]}. Retorna o id."""
+        rows_per_minute = rows / duration_s * 60 if duration_s > 0 else 0.0
+        with closing(self._connect()) as conn, conn:
+            cursor = conn.execute(
+                "INSERT INTO execucoes (inicio, fim, tarefa, status, linhas, puladas, duracao_s, registros_por_minuto, navegador,"
+                " versao_navegador, versao_pec, maquina, erros_por_classe, pulos_por_classe) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (started_at.isoformat(timespec="seconds"), datetime.now().isoformat(timespec="seconds"), task, status, rows, skipped,
+                 round(duration_s, 1), round(rows_per_minute, 2), browser, browser_version, pec_version, socket.gethostname(),
+                 json.dumps(errors_by_class or {}, ensure_ascii=False), json.dumps(skips_by_class or {}, ensure_ascii=False)))
+            run_id = cursor.lastrowid
+            conn.executemany(
+                "INSERT INTO passos (execucao_id, passo, n, media_s, p50_s, p90_s, p95_s, max_s) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(run_id, step, len(values), round(sum(values) / len(values), 3), round(percentile(values, 0.5), 3),
+                  round(percentile(values, 0.9), 3), round(percentile(values, 0.95), 3), round(max(values), 3))
+                 for step, values in step_durations.items() if values])
+        logger.info("Execução %s gravada no histórico: %s, %s linha(s) em %.1f min (%.1f reg/min).", run_id, task, rows, duration_s / 60, rows_per_minute)
+        return run_id
+
+    # --- Consultas ---
+
+    def runs(self, task: str = None, since: datetime = None, until: datetime = None, browser: str = None,
+             min_rows: int = 0, run_id: int = None) -> list:
+        """Execuções (dicts, mais antigas primeiro), com 'passos' = {passo: {n, media_s, p50_s, p90_s, p95_s, max_s}}."""
+        query, params = "SELECT * FROM execucoes WHERE linhas >= ?", [min_rows]
+        for clause, value in (("tarefa = ?", task), ("inicio >= ?", since and since.isoformat(timespec="seconds")),
+                              ("inicio < ?", until and until.isoformat(timespec="seconds")), ("navegador = ?", browser), ("id = ?", run_id)):
+            if value is not None:
+                query += f" AND {clause}"
+                params.append(value)
+        with closing(self._connect()) as conn:
+            runs = [dict(row) for row in conn.execute(query + " ORDER BY inicio, id", params)]
+            for run in runs:
+                run["erros_por_classe"] = json.loads(run["erros_por_classe"] or "{}")
+                run["pulos_por_classe"] = json.loads(run["pulos_por_classe"] or "{}")
+                run["passos"] = {row["passo"]: {key: row[key] for key in ("n", "media_s", "p50_s", "p90_s", "p95_s", "max_s")}
+                                 for row in conn.execute("SELECT * FROM passos WHERE execucao_id = ?", (run["id"],))}
+        return runs
+
+    def run(self, run_id: int) -> dict | None:
+        runs = self.runs(run_id=run_id)
+        return runs[0] if runs else None
+
+    def last_run_id(self, task: str = None) -> int | None:
+        query, params = "SELECT id FROM execucoes", ()
+        if task:
+            query, params = query + " WHERE tarefa = ?", (task,)
+        with closing(self._connect()) as conn:
+            row = conn.execute(query + " ORDER BY inicio DESC, id DESC LIMIT 1", params).fetchone()
+        return row["id"] if row else None
+
+    # --- Comparações ---
+
+    @staticmethod
+    def _error_rate(run: dict) -> float:
+        return sum(run["erros_por_classe"].values()) / run["linhas"] if run["linhas"] else 0.0
+
+    def regressions(self, run_id: int, baseline_days: int = 14, threshold: float = 1.5) -> list:
+        """
+        Compara a execução com as dos 'baseline_days' dias anteriores (mesma tarefa e navegador, pelo menos
+        MIN_ROWS linhas). Referência = mediana das execuções. Aponta o p95 de passo, o ritmo e a taxa de erros
+        que pioraram 'threshold' vezes ou mais. Retorna frases prontas para log/relatório (vazio = sem regressão).
+        """
+        run = self.run(run_id)
+        if run is None or run["linhas"] < self.MIN_ROWS:
+            return []
+        start = datetime.fromisoformat(run["inicio"])
+        baseline = [r for r in self.runs(run["tarefa"], since=start - timedelta(days=baseline_days), until=start,
+                                         browser=run["navegador"], min_rows=self.MIN_ROWS) if r["id"] != run_id]
+        if not baseline:
+            return []
+
+        since_upgrade = ""
+        if baseline[-1]["versao_pec"] and run["versao_pec"] and baseline[-1]["versao_pec"] != run["versao_pec"]:
+            since_upgrade = f" desde a atualização do PEC {baseline[-1]['versao_pec']} -> {run['versao_pec']}"
+        label = f"{run['tarefa']} ({run['navegador'] or 'navegador ?'})"
+        findings = []
+
+        for step, stats in sorted(run["passos"].items()):
+            reference = [r["passos"][step]["p95_s"] for r in baseline if step in r["passos"]]
+            if not reference:
+                continue
+            base, current = median(reference), stats["p95_s"]
+            if base > 0 and current / base >= threshold and current - base >= self.MIN_STEP_DELTA_S:
+                findings.append(f"{label}: passo '{step}' p95 foi de {base:.1f}s para {current:.1f}s{since_upgrade} "
+                                f"({len(reference)} execução(ões) de referência).")
+
+        base_rate = median(r["registros_por_minuto"] for r in baseline)
+        if run["registros_por_minuto"] and base_rate / run["registros_por_minuto"] >= threshold:
+            findings.append(f"{label}: ritmo caiu de {base_rate:.1f} para {run['registros_por_minuto']:.1f} reg/min{since_upgrade}.")
+
+        base_errors, current_errors = median(self._error_rate(r) for r in baseline), self._error_rate(run)
+        if current_errors >= 0.05 and current_errors >= max(base_errors, 0.01) * threshold:
+            top = ", ".join(f"{name} ({count})" for name, count in sorted(run["erros_por_classe"].items(), key=lambda item: -item[1])[:3])
+            findings.append(f"{label}: {current_errors:.0%} de erros por linha (referência {base_errors:.0%}){since_upgrade}: {top}.")
+        return findings
+
+    def browser_comparison(self, days: int = 7, threshold: float = 1.1) -> list:
+        """Por tarefa, mediana do reg/min de cada navegador nos últimos 'days' dias; aponta quando um é 'threshold' vezes mais lento."""
+        by_task = {}
+        for run in self.runs(since=datetime.now() - timedelta(days=days), min_rows=self.MIN_ROWS):
+            if run["navegador"]:
+                by_task.setdefault(run["tarefa"], {}).setdefault(run["navegador"], []).append(run["registros_por_minuto"])
+        findings = []
+        for task, browsers in sorted(by_task.items()):
+            if len(browsers) < 2:
+                continue
+            rates = sorted(((median(values), name, len(values)) for name, values in browsers.items()), reverse=True)
+            fastest_rate, fastest, _ = rates[0]
+            for rate, name, count in rates[1:]:
+                if rate and fastest_rate / rate >= threshold:
+                    findings.append(f"{task}: {name} {1 - rate / fastest_rate:.0%} mais lento que {fastest} nos últimos {days} dias "
+                                    f"({rate:.1f} x {fastest_rate:.1f} reg/min, {count} x {len(browsers[fastest])} execução(ões)).")
+        return findings
+
+    def version_comparison(self, task: str, threshold: float = 1.5) -> list:
+        """Mediana do p95 de cada passo na versão do PEC atual x na anterior (as duas mais recentes no histórico)."""
+        by_version = {} # versão -> execuções; ordem = versão da execução mais recente por último
+        for run in self.runs(task, min_rows=self.MIN_ROWS):
+            if run["versao_pec"]:
+                by_version[run["versao_pec"]] = by_version.pop(run["versao_pec"], []) + [run]
+        if len(by_version) < 2:
+            return []
+        (previous, previous_runs), (current, current_runs) = list(by_version.items())[-2:]
+        findings = []
+        for step in sorted({step for run in current_runs for step in run["passos"]}):
+            before = [r["passos"][step]["p95_s"] for r in previous_runs if step in r["passos"]]
+            after = [r["passos"][step]["p95_s"] for r in current_runs if step in r["passos"]]
+            if before and after and median(before) > 0 and median(after) / median(before) >= threshold \
+                    and median(after) - median(before) >= self.MIN_STEP_DELTA_S:
+                findings.append(f"{task}: passo '{step}' p95 foi de {median(before):.1f}s (PEC {previous}) para "
+                                f"{median(after):.1f}s (PEC {current}).")
+        return findings
@@ -0,0 +1,150 @@
+# Arquivo: app/data/run_journal.py
+import hashlib
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+from app.core.logger import logger
+
+
+class RunJournal:
+    """
+    Diário de execução: uma linha JSON por registro tratado (processado, pulado ou com falha),
+    tanto pela interface (modo 'ui') quanto pelo envio direto (modo 'direto').
+
+    O registro.json do FileManager diz quais ARQUIVOS terminaram; o diário diz quais LINHAS de
+    cada arquivo já foram enviadas, para que um arquivo interrompido no meio possa ser retomado
+    sem reenviar (e duplicar) as fichas que o servidor já aceitou.
+
+    O nome do arquivo não basta para identificá-lo (o operador reaproveita 'dados1.csv'): cada entrada
+    leva a impressão digital do conteúdo, e a entrada 'arquivo_concluido' (gravada quando o arquivo é
+    marcado como processado) encerra o histórico daquele nome. A retomada só considera as entradas
+    do mesmo conteúdo posteriores à última conclusão; as anteriores são removidas do diário nessa
+    hora, de modo que ele só guarda os arquivos ainda em aberto.
+    """
+    if getattr(sys, 'frozen', False):
+        BASE_DIR = Path(sys.executable).parent
+    else:
+        BASE_DIR = Path(__file__).resolve().parents[2]
+
+    JOURNAL_FILE = BASE_DIR / "resources" / "data_input" / "arquivos" / "journal.jsonl"
+
+    STATUS_OK = "ok"
+    STATUS_SKIPPED = "pulado"
+    STATUS_FAILED = "falha"
+    STATUS_OPENED = "aberto" # Arquivo aberto com uma data principal (linha None); permite retomar com a mesma data
+    STATUS_LOT_FINALIZED = "lote_finalizado" # 'Finalizar registros' concluído (linha None; detail com o tamanho do lote)
+    STATUS_FILE_DONE = "arquivo_concluido" # Arquivo marcado como processado (linha None): as entradas anteriores não valem mais
+
+    def __init__(self, journal_file: Path = None):
+        self.journal_file = journal_file or self.JOURNAL_FILE
+        self.journal_file.parent.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def file_fingerprint(file_path: Path) -> str | None:
+        """Impressão digital do conteúdo do arquivo de dados (None se não puder ser lido)."""
+        try:
+            return hashlib.sha1(Path(file_path).read_bytes()).hexdigest()[:16]
+        except OSError as e:
+            logger.error("Não foi possível ler %s para o diário de execução: %s", file_path, e)
+            return None
+
+    def record(self, task: str, file_name: str, row_index: int, status: str, mode: str = "ui",
+               row_data: list = None, detail: str = None, main_date: str = None, fingerprint: str = None):
+        """Acrescenta uma entrada ao diário."""
+        entry = {
+            "ts": datetime.now().isoformat(timespec="seconds"),
+            "task": task,
+            "file": file_name,
+            "row": row_index,
+            "status": status,
+            "mode": mode,
+        }
+        if fingerprint:
+            entry["fingerprint"] = fingerprint
+        if row_data is not None and len(row_data) > 1:
+            entry["cpf_cns"] = None if row_data[1] is None else str(row_data[1])
+        if detail:
+            entry["detail"] = detail
+        if main_date:
+            entry["main_date"] = main_date
+        try:
+            with open(self.journal_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except IOError as e:
+            logger.error("Erro ao gravar no diário de execução %s: %s", self.journal_file, e)
+
+    def entries(self, file_name: str = None, task: str = None) -> list:
+        """Lê as entradas do diário, opcionalmente filtradas por arquivo e tarefa."""
+        if not self.journal_file.exists():
+            return []
+        result = []
+        try:
+            with open(self.journal_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue # Linha truncada (queda durante a escrita): ignora
+                    if file_name is not None and entry.get("file") != file_name:
+                        continue
+                    if task is not None and entry.get("task") != task:
+                        continue
+                    result.append(entry)
+        except IOError as e:
+            logger.error("Erro ao ler o diário de execução %s: %s", self.journal_file, e)
+        return result
+
+    def open_entries(self, file_name: str, task: str, fingerprint: str) -> list:
+        """
+        Entradas do arquivo ainda em aberto: as do mesmo conteúdo ('fingerprint') gravadas depois da última
+        conclusão desse nome. Entradas sem impressão digital (diário antigo) ou de outro conteúdo são ignoradas.
+        """
+        current = []
+        for entry in self.entries(file_name, task):
+            if entry.get("status") == self.STATUS_FILE_DONE:
+                current = []
+            elif fingerprint and entry.get("fingerprint") == fingerprint:
+                current.append(entry)
+        return current
+
+    def completed_rows(self, file_name: str, task: str, fingerprint: str) -> set:
+        """Índices das linhas do arquivo (este conteúdo, ainda não concluído) que já foram aceitas (status 'ok')."""
+        return {e["row"] for e in self.open_entries(file_name, task, fingerprint) if e.get("status") == self.STATUS_OK}
+
+    def file_main_date(self, file_name: str, task: str, fingerprint: str) -> str | None:
+        """Data principal com que o arquivo (este conteúdo, ainda não concluído) foi aberto pela última vez, ou None."""
+        dates = [e["main_date"] for e in self.open_entries(file_name, task, fingerprint) if e.get("main_date")]
+        return dates[-1] if dates else None
+
+    def mark_file_done(self, task: str, file_name: str, fingerprint: str = None):
+        """
+        Encerra o histórico do arquivo: um novo arquivo com o mesmo nome começa do zero.
+        As entradas anteriores desse nome (e o CPF/CNS de cada linha) são removidas do diário.
+        """
+        self.record(task, file_name, None, self.STATUS_FILE_DONE, fingerprint=fingerprint)
+        self._compact(task, file_name)
+
+    def _compact(self, task: str, file_name: str):
+        """Reescreve o diário sem as entradas do arquivo anteriores à sua última conclusão (que não valem mais)."""
+        entries = self.entries()
+        done_positions = [i for i, e in enumerate(entries)
+                          if e.get("task") == task and e.get("file") == file_name and e.get("status") == self.STATUS_FILE_DONE]
+        if not done_positions:
+            return # Leitura falhou (a conclusão acabou de ser gravada): não arrisca apagar o diário
+        last_done = done_positions[-1]
+        kept = [e for i, e in enumerate(entries)
+                if i >= last_done or e.get("task") != task or e.get("file") != file_name]
+        if len(kept) == len(entries):
+            return
+        temp_file = self.journal_file.with_suffix(".tmp")
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                for entry in kept:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            temp_file.replace(self.journal_file)
+        except OSError as e:
+            logger.error("Erro ao compactar o diário de execução %s: %s", self.journal_file, e)
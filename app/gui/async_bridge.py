@@ -0,0 +1,67 @@
+# Arquivo: app/gui/async_bridge.py
+import asyncio
+import itertools
+from app.core.logger import logger
+
+
+class AsyncReplyBridge:
+    """
+    Ponte entre a thread da GUI e o loop asyncio de um Worker.
+
+    O Worker cria um asyncio.Future no próprio loop (request) e fica em 'await' sem consumir CPU.
+    A GUI responde com resolve(), de qualquer thread: o resultado é entregue ao loop com
+    loop.call_soon_threadsafe, que é a única forma segura de mexer em um Future de outra thread.
+    Cada pedido tem um id, então várias sessões (ou vários pedidos) podem ficar pendentes ao mesmo tempo.
+    """
+    _ids = itertools.count(1)
+
+    def __init__(self):
+        self._loop: asyncio.AbstractEventLoop = None
+        self._pending: dict = {} # id -> Future (acessado só pelo loop do Worker)
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop):
+        """Chamado pelo Worker, na thread dele, logo após criar o loop."""
+        self._loop = loop
+
+    def request(self) -> tuple:
+        """Cria um pedido pendente. Deve ser chamado de dentro do loop do Worker. Retorna (id, future)."""
+        request_id = next(self._ids)
+        future = self._loop.create_future()
+        self._pending[request_id] = future
+        future.add_done_callback(lambda _: self._pending.pop(request_id, None))
+        return request_id, future
+
+    def resolve(self, request_id: int, value) -> bool:
+        """Entrega a resposta de um pedido (thread-safe). Retorna False se o loop já não existe."""
+        return self._call_in_loop(self._set_result, request_id, value)
+
+    def resolve_all(self, value) -> bool:
+        """Responde todos os pedidos pendentes com o mesmo valor (ex: 'abort' ao fechar o app)."""
+        return self._call_in_loop(self._set_all, value)
+
+    def _call_in_loop(self, callback, *args) -> bool:
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            logger.debug("AsyncReplyBridge: loop do Worker indisponível; resposta descartada.")
+            return False
+        try:
+            loop.call_soon_threadsafe(callback, *args)
+            return True
+        except RuntimeError: # Loop fechado entre a verificação e a chamada
+            return False
+
+    def _set_result(self, request_id: int, value):
+        future = self._pending.get(request_id)
+        if future is None or future.done():
+            logger.debug("AsyncReplyBridge: pedido %s já respondido ou cancelado.", request_id)
+            return
+        future.set_result(value)
+
+    def _set_all(self, value):
+        for future in list(self._pending.values()):
+            if not future.done():
+                future.set_result(value)
+
+    @property
+    def pending_ids(self) -> list:
+        return list(self._pending.keys())
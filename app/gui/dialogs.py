@@ -1,5 +1,6 @@
 # Arquivo: app/gui/dialogs.py - Version: 1f - Layout UBS/User Correto
-from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTextEdit, QGroupBox, QWidget)
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTextEdit, QGroupBox, QWidget,
+                             QListWidget, QCheckBox)
 from PyQt5.QtGui import QPixmap
 from PyQt5.QtCore import Qt, QByteArray, QBuffer, QIODevice, QTimer
 from app.core.errors import AutomationError # Importamos nossa exceção de erro
@@ -117,4 +118,106 @@ class ErrorDialog(QDialog):
 
     def get_result(self):
         """Retorna a ação escolhida pelo usuário."""
-        return self.result
\ No newline at end of file
+        return self.result
+
+class InterventionQueueWindow(QWidget):
+    """
+    Janela (não modal) da fila de intervenções: lista os erros pendentes de todas as sessões e
+    permite responder um por vez, enquanto as outras sessões continuam rodando.
+    """
+    def __init__(self, queue, parent=None):
+        super().__init__(parent, Qt.Window | Qt.WindowStaysOnTopHint)
+        self.setWindowTitle("Fila de Intervenções")
+        self._queue = queue
+        self._queue.changed.connect(self.refresh)
+
+        layout = QHBoxLayout()
+
+        self.items_list = QListWidget()
+        self.items_list.currentRowChanged.connect(self._show_item)
+        layout.addWidget(self.items_list, 1)
+
+        details_layout = QVBoxLayout()
+        self.user_info_label = QLabel("")
+        self.user_info_label.setTextFormat(Qt.RichText)
+        details_layout.addWidget(self.user_info_label)
+
+        self.error_details_textedit = QTextEdit()
+        self.error_details_textedit.setReadOnly(True)
+        details_layout.addWidget(self.error_details_textedit)
+
+        self.screenshot_display = QLabel()
+        self.screenshot_display.setAlignment(Qt.AlignCenter)
+        details_layout.addWidget(self.screenshot_display)
+
+        self.apply_similar_checkbox = QCheckBox("Aplicar a erros semelhantes")
+        details_layout.addWidget(self.apply_similar_checkbox)
+
+        auto_skip = AppConfig.intervention_auto_skip_minutes
+        auto_skip_text = f"Itens sem resposta são pulados após {auto_skip} min." if auto_skip else "Pulo automático desativado."
+        details_layout.addWidget(QLabel(auto_skip_text))
+
+        button_layout = QHBoxLayout()
+        self.continue_button = QPushButton("Continuar (Após correção manual)")
+        self.continue_button.clicked.connect(lambda: self._answer("continue"))
+        button_layout.addWidget(self.continue_button)
+
+        self.skip_button = QPushButton("Pular Registro")
+        self.skip_button.clicked.connect(lambda: self._answer("skip"))
+        button_layout.addWidget(self.skip_button)
+
+        self.abort_button = QPushButton("Abortar Sessão")
+        self.abort_button.clicked.connect(lambda: self._answer("abort"))
+        button_layout.addWidget(self.abort_button)
+        details_layout.addLayout(button_layout)
+
+        layout.addLayout(details_layout, 2)
+        self.setLayout(layout)
+        self.resize(1000, 600)
+
+    def refresh(self):
+        """Recarrega a lista; mostra a janela se houver pendências e a esconde quando a fila esvazia."""
+        current = self.items_list.currentRow()
+        self.items_list.blockSignals(True)
+        self.items_list.clear()
+        for item in self._queue.items:
+            self.items_list.addItem(item.label())
+        self.items_list.blockSignals(False)
+
+        if not self._queue.items:
+            self.hide()
+            return
+        self.items_list.setCurrentRow(min(max(current, 0), self.items_list.count() - 1))
+        self._show_item(self.items_list.currentRow())
+        if not self.isVisible():
+            self.show()
+            self.raise_()
+            self.activateWindow()
+
+    def _current_item(self):
+        row = self.items_list.currentRow()
+        items = self._queue.items
+        return items[row] if 0 <= row < len(items) else None
+
+    def _show_item(self, row: int):
+        item = self._current_item()
+        if item is None:
+            return
+        info = item.user_info
+        self.user_info_label.setText(
+            f"<b>Sessão:</b> {item.session} &nbsp; <b>UBS:</b> {info.get('nome_ubs_curto', 'N/A')} &nbsp; "
+            f"<b>Profissional:</b> {info.get('nome_profissional', 'N/A')}")
+        self.error_details_textedit.setPlainText(str(item.error))
+
+        self.screenshot_display.clear()
+        if item.error.screenshot_path and Path(item.error.screenshot_path).exists():
+            pixmap = QPixmap(item.error.screenshot_path)
+            if not pixmap.isNull():
+                self.screenshot_display.setPixmap(pixmap.scaled(600, 400, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+
+    def _answer(self, action: str):
+        item = self._current_item()
+        if item is None:
+            return
+        self._queue.answer(item, action, apply_to_similar=self.apply_similar_checkbox.isChecked())
+        self.apply_similar_checkbox.setChecked(False)
@@ -0,0 +1,110 @@
+# Arquivo: app/gui/intervention_queue.py
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from PyQt5.QtCore import QObject, pyqtSignal, QTimer
+from app.core.app_config import AppConfig
+from app.core.errors import AutomationError
+from app.core.logger import logger
+
+
+@dataclass(eq=False)
+class Intervention:
+    """Um pedido de intervenção de uma sessão pausada."""
+    worker: object # Worker que está esperando a resposta
+    session: str # Nome da sessão exibido na fila (tarefa + número)
+    request_id: int
+    error: AutomationError
+    user_info: dict = field(default_factory=dict)
+    created_at: datetime = field(default_factory=datetime.now)
+
+    @property
+    def signature(self) -> tuple:
+        """Chave de 'erro semelhante': mesmo passo e mesma primeira linha da mensagem (números ignorados)."""
+        first_line = (self.error.message or "").strip().splitlines()[0] if self.error.message else ""
+        return (self.error.step, re.sub(r"\d+", "#", first_line)[:160])
+
+    @property
+    def cpf_cns(self) -> str:
+        data = self.error.data
+        return str(data[1]) if data and len(data) > 1 and data[1] is not None else "N/A"
+
+    def label(self) -> str:
+        return f"[{self.session}] {self.created_at.strftime('%H:%M:%S')} - {self.error.step or 'Passo desconhecido'} - CPF/CNS {self.cpf_cns}"
+
+
+class InterventionQueue(QObject):
+    """
+    Fila central de intervenções. Cada sessão pausada posta aqui seu erro (com screenshot e linha)
+    e continua esperando só a SUA resposta; as demais sessões seguem rodando. O operador responde
+    um item por vez na InterventionQueueWindow.
+
+    - Auto-pular: itens sem resposta há mais de AppConfig.intervention_auto_skip_minutes são pulados (0 = desativado).
+    - Aplicar a semelhantes: a resposta vale para os itens pendentes com a mesma assinatura. Para 'skip',
+      vira também regra para os próximos erros semelhantes nesta execução do aplicativo. 'continue' não vira
+      regra, pois retentar automaticamente o mesmo erro poderia prender a sessão em um laço.
+    """
+    changed = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._items: list = []
+        self._skip_rules: set = set() # Assinaturas que são puladas automaticamente
+        self._session_numbers: dict = {} # id(worker) -> número da sessão
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self._auto_skip_expired)
+        self._timer.start(15000)
+
+    @property
+    def items(self) -> list:
+        return list(self._items)
+
+    def session_name(self, worker) -> str:
+        number = self._session_numbers.setdefault(id(worker), len(self._session_numbers) + 1)
+        return f"{getattr(worker, 'task_type', 'Sessão')} #{number}"
+
+    def post(self, worker, request_id: int, error: AutomationError, user_info: dict = None):
+        item = Intervention(worker, self.session_name(worker), request_id, error, user_info or {})
+        if item.signature in self._skip_rules:
+            logger.info("Fila de intervenções: erro semelhante a um já pulado pelo operador. Pulando automaticamente: %s", item.label())
+            worker.submit_user_action(request_id, "skip")
+            return
+        self._items.append(item)
+        logger.warning("Fila de intervenções: novo item (%s pendente(s)): %s", len(self._items), item.label())
+        self.changed.emit()
+
+    def answer(self, item: Intervention, action: str, apply_to_similar: bool = False):
+        """Responde um item (e, se pedido, os semelhantes). 'abort' encerra todos os itens da mesma sessão."""
+        targets = [item]
+        if action == "abort":
+            targets = [i for i in self._items if i.worker is item.worker]
+        elif apply_to_similar:
+            targets = [i for i in self._items if i.signature == item.signature]
+            if action == "skip":
+                self._skip_rules.add(item.signature)
+        for target in targets:
+            if target in self._items:
+                self._items.remove(target)
+                target.worker.submit_user_action(target.request_id, action)
+        logger.info("Fila de intervenções: '%s' aplicado a %s item(ns).", action, len(targets))
+        self.changed.emit()
+
+    def discard_session(self, worker):
+        """Remove os itens de uma sessão que terminou (não há mais quem responder)."""
+        before = len(self._items)
+        self._items = [i for i in self._items if i.worker is not worker]
+        if len(self._items) != before:
+            self.changed.emit()
+
+    def _auto_skip_expired(self):
+        minutes = AppConfig.intervention_auto_skip_minutes
+        if not minutes or not self._items:
+            return
+        now = datetime.now()
+        expired = [i for i in self._items if (now - i.created_at).total_seconds() >= minutes * 60]
+        for item in expired:
+            logger.warning("Fila de intervenções: sem resposta há %s min. Pulando automaticamente: %s", minutes, item.label())
+            self._items.remove(item)
+            item.worker.submit_user_action(item.request_id, "skip")
+        if expired:
+            self.changed.emit()
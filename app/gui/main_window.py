@@ -3,7 +3,7 @@ from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox,
     QLineEdit, QPushButton, QCheckBox, QFrame, QGridLayout, QMessageBox
 )
-from PyQt5.QtCore import Qt, QDate, QThread, pyqtSignal
+from PyQt5.QtCore import Qt, QDate, QThread
 from PyQt5.QtGui import QFont, QColor, QPalette
 
 import csv
@@ -19,7 +19,9 @@ from app.core.logger import logger # Usaremos o logger configurado
 from app.core.errors import AutomationError # Para type hinting no signal
 from app.automation.error_handler import SkipRecordException, AbortAutomationException # Para type hinting
 from app.gui.worker import Worker, TASK_MAP # Importa o Worker e o mapa de tarefas
-from app.gui.dialogs import ErrorDialog # Importa o diálogo de erro
+from app.gui.dialogs import InterventionQueueWindow # Janela da fila de intervenções
+from app.gui.intervention_queue import InterventionQueue
+from app.gui.progress_dashboard import ProgressDashboard # Painel de progresso (linhas, ritmo, término)
 from app.data.file_manager import FileManager # Para lidar com o arquivo de data
 
 class MovableLabel(QLabel):
@@ -33,23 +35,26 @@ class MovableLabel(QLabel):
 
 class MainWindow(QWidget):
 
-    user_action_signal = pyqtSignal(str)
 
-    def __init__(self):
+    def __init__(self, profiling: bool = False):
         super().__init__()
         self._automation_thread = None
         self._automation_worker: Worker = None
         self._use_chrome_browser = False
+        self._profiling_default = profiling
 
         self.main_layout = None
         self._file_manager = FileManager()
+        # Fila central de intervenções: sessões pausadas esperam aqui sem bloquear as demais
+        self._intervention_queue = InterventionQueue(self)
+        self._intervention_window = InterventionQueueWindow(self._intervention_queue)
         self.initUI()
         self._load_initial_date()
 
     def initUI(self):
         #Atualização de Texto de Título de Versões ambos.
         versao = "6.1.D-19"
-        pec_versao = "5.4.22"
+        pec_versao = AppConfig.pec_version # Configurada; no login a versão lida da página do PEC tem prioridade
 
         """Configura a interface gráfica principal."""
         # Configurar a imagem de fundo (chame ANTES de configurar o layout principal se for manual)
@@ -245,6 +250,13 @@ class MainWindow(QWidget):
         self.checkbox_use_chrome.stateChanged.connect(self.on_checkbox_use_chrome_changed)
         action_layout.addWidget(self.checkbox_use_chrome) # Adiciona ao layout do CARD AÇÕES
 
+        # --- Diagnóstico de desempenho (perfilador + monitor de atraso do loop; também via 'main.py --perfilar') ---
+        self.checkbox_profiling = QCheckBox("Diagnóstico de desempenho (perfil)")
+        self.checkbox_profiling.setFont(QFont('Segoe UI', 11))
+        self.checkbox_profiling.setToolTip("Salva um perfil da automação em logs/perfis e registra no log os travamentos do loop com a pilha.")
+        self.checkbox_profiling.setChecked(self._profiling_default)
+        action_layout.addWidget(self.checkbox_profiling)
+
 
         action_layout.addWidget(self.checkbox_manual_login)
         action_layout.addWidget(self.checkboxDeleteFile)
@@ -272,6 +284,10 @@ class MainWindow(QWidget):
         content_grid.addWidget(action_card, 1, 0, 1, 2)
         main_layout.addLayout(content_grid)
 
+        # --- PAINEL DE PROGRESSO (aparece ao iniciar a automação) ---
+        self.progress_dashboard = ProgressDashboard()
+        main_layout.addWidget(self.progress_dashboard)
+
         # Rodapé
         footer = QHBoxLayout()
         copyright = QLabel("© 2025 Kʎɐꓘ")
@@ -482,7 +498,8 @@ class MainWindow(QWidget):
         self._automation_thread = QThread()
         # Cria o objeto Worker e o move para a thread
         # self._automation_worker = Worker(selected_task_name, manual_login=is_manual_login)
-        self._automation_worker = Worker(selected_task_name, manual_login=is_manual_login, use_chrome_browser=use_chrome)
+        self._automation_worker = Worker(selected_task_name, manual_login=is_manual_login, use_chrome_browser=use_chrome,
+                                         profiling=self.checkbox_profiling.isChecked())
         self._automation_worker.moveToThread(self._automation_thread)
 
         # Conecta sinais do Worker aos slots na MainWindow
@@ -498,10 +515,13 @@ class MainWindow(QWidget):
         # Este sinal é emitido pelo worker e recebido na THREAD PRINCIPAL (MainWindow)
         self._automation_worker.request_error_dialog.connect(self.handle_error_dialog_request)
 
+        # Progresso da sessão (linhas, ritmo, término) para o painel
+        self.progress_dashboard.clear()
+        self._automation_worker.progress.connect(self.on_progress)
+
         # Conecta o sinal finished do Worker a um método na MainWindow para lidar com o resultado
         self._automation_worker.finished.connect(self.on_automation_finished)
 
-        self.user_action_signal.connect(self._automation_worker._handle_user_action_signal)
         # Inicia a thread
         self._automation_thread.start()
         logger.info("Thread de automação iniciada.")
@@ -517,37 +537,35 @@ class MainWindow(QWidget):
         # Se houver outros botões de iniciar tarefa, desabilitar todos eles
         # Se houver uma área de log, talvez habilitar (log_text_edit.setEnabled(True))
 
-    def handle_error_dialog_request(self, error_obj: object, user_info: dict = None):
+    def handle_error_dialog_request(self, request_id: int, error_obj: object, user_info: dict = None):
         """
-        Slot chamado pelo Worker (na thread principal) para exibir o diálogo de erro.
-        Recebe a instância da AutomationError e as informações do usuário/UBS.
+        Slot chamado pelo Worker (na thread principal) quando uma sessão pausa em um erro.
+        Em vez de abrir um diálogo modal, posta o pedido na fila de intervenções: a sessão
+        espera a sua resposta e as outras sessões continuam rodando.
         """
-        logger.warning("MainWindow: Recebido request_error_dialog signal. Exibindo diálogo...")
-        # O objeto recebido pelo sinal é a instância da AutomationError
+        worker = self.sender() or self._automation_worker
+        if worker is None:
+            logger.error("MainWindow: pedido de intervenção sem Worker associado!")
+            return
         error: AutomationError = error_obj
+        logger.warning(f"MainWindow: pedido de intervenção {request_id} recebido. Enviando para a fila.")
+        self._intervention_queue.post(worker, request_id, error, user_info)
 
-        # Exibe o diálogo modal. exec_() bloqueia A THREAD PRINCIPAL.
-        dialog = ErrorDialog(error, user_info, self) # Passa 'self' como parent
-        result_code = dialog.exec_() # Bloqueia aqui
-
-        # Quando o diálogo é fechado, obtém a ação escolhida pelo usuário
-        user_action = dialog.get_result()
-        logger.info(f"MainWindow: Diálogo de erro fechado. Ação escolhida: {user_action}")
-
-        # Envia a ação escolhida de volta para o Worker usando o sinal
-        # Este sinal será recebido pelo slot user_action_received no Worker
-        # que rodará na thread do Worker.
-        if self._automation_worker: # Garante que o worker ainda existe
-             self.user_action_signal.emit(user_action) # Emite o sinal com a ação
-             logger.debug(f"MainWindow: Sinal user_action_signal emitido com '{user_action}'.")
-        else:
-             logger.error("MainWindow: Worker não existe ao tentar enviar ação do usuário!")
-             # Se o worker não existe, a automação já deve ter terminado ou abortado de outra forma.
+    def on_progress(self, snapshot: dict):
+        """Slot do sinal Worker.progress: atualiza a linha da sessão no painel de progresso."""
+        worker = self.sender() or self._automation_worker
+        if worker is None:
+            return
+        self.progress_dashboard.update_session(self._intervention_queue.session_name(worker), snapshot)
 
     def on_automation_finished(self, result_message: str):
         """Slot chamado quando o Worker termina (sinal finished)."""
         logger.info(f"MainWindow: Automação finalizada com resultado: {result_message}")
 
+        # Itens pendentes desta sessão não têm mais quem os responda
+        if self._automation_worker:
+            self._intervention_queue.discard_session(self._automation_worker)
+
         # Habilita a UI principal novamente
         self._set_ui_enabled(True)
 
@@ -575,7 +593,7 @@ class MainWindow(QWidget):
              if self._automation_worker:
                   # Se o Worker estiver esperando por ação do usuário no diálogo,
                   # emitir 'abort' vai quebrar a espera e o loop principal.
-                  self.user_action_signal.emit("abort") # Sinaliza para abortar
+                  self._automation_worker.abort_pending_actions() # Sinaliza para abortar
 
              # Espera um pouco para a thread encerrar
              if not self._automation_thread.wait(2000): # Espera até 2 segundos
@@ -0,0 +1,88 @@
+# Arquivo: app/gui/progress_dashboard.py
+from PyQt5.QtWidgets import QFrame, QVBoxLayout, QLabel, QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QFont
+from datetime import datetime, timedelta
+
+
+def _format_duration(seconds) -> str:
+    if seconds is None:
+        return "-"
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    return f"{hours}h{rest // 60:02d}" if hours else f"{rest // 60}min{rest % 60:02d}"
+
+
+class ProgressDashboard(QFrame):
+    """
+    Painel de progresso das sessões em execução: uma linha por sessão com linhas feitas/total,
+    arquivo e data atuais, ritmo (reg/min), previsão de término, pulos e erros; abaixo, os passos
+    mais lentos nas últimas linhas da sessão atualizada por último. Recebe os snapshots do
+    ProgressTracker (sinal Worker.progress), que já chegam com intervalo mínimo entre eles.
+    """
+    COLUMNS = ("Sessão", "Linhas", "Arquivo", "Data", "Reg/min", "Término", "Pulados", "Erros", "Status")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setStyleSheet("QFrame { background-color: white; border-radius: 10px; padding: 6px; }")
+        self._rows = {} # nome da sessão -> linha da tabela
+
+        layout = QVBoxLayout(self)
+        layout.setSpacing(4)
+        layout.addWidget(QLabel('<span style="font-size:14px; font-weight:bold;">Progresso</span>'), alignment=Qt.AlignLeft)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionMode(QAbstractItemView.NoSelection)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
+        self.table.setFont(QFont('Segoe UI', 9))
+        self.table.setMaximumHeight(140)
+        layout.addWidget(self.table)
+
+        self.slow_steps_label = QLabel("")
+        self.slow_steps_label.setTextFormat(Qt.RichText)
+        self.slow_steps_label.setWordWrap(True)
+        self.slow_steps_label.setFont(QFont('Segoe UI', 9))
+        layout.addWidget(self.slow_steps_label)
+        self.hide() # Aparece na primeira atualização
+
+    def update_session(self, session: str, snapshot: dict):
+        row = self._rows.get(session)
+        if row is None:
+            row = self._rows[session] = self.table.rowCount()
+            self.table.insertRow(row)
+
+        done, total = snapshot.get("linhas_feitas", 0), snapshot.get("linhas_total", 0)
+        percent = f" ({done / total:.0%})" if total else ""
+        file_text = snapshot.get("arquivo") or "-"
+        if snapshot.get("arquivos_total"):
+            file_text += f" [{snapshot.get('arquivo_numero', 0)}/{snapshot['arquivos_total']}]"
+        eta = snapshot.get("eta_segundos")
+        finish_text = "-"
+        if eta is not None and snapshot.get("status") == "executando":
+            finish_text = f"{_format_duration(eta)} ({(datetime.now() + timedelta(seconds=eta)).strftime('%H:%M')})"
+
+        values = (session, f"{done}/{total}{percent}", file_text, snapshot.get("data") or "-",
+                  f"{snapshot.get('registros_por_minuto', 0):.1f}", finish_text,
+                  str(snapshot.get("pulados", 0)), str(snapshot.get("erros", 0)), snapshot.get("status", ""))
+        for column, value in enumerate(values):
+            item = self.table.item(row, column)
+            if item is None:
+                self.table.setItem(row, column, QTableWidgetItem(value))
+            elif item.text() != value:
+                item.setText(value)
+
+        steps = snapshot.get("passos_lentos") or []
+        if steps:
+            steps_text = ", ".join(f"{name} <b>{seconds:.1f}s</b>" for name, seconds in steps)
+            self.slow_steps_label.setText(f"Passos mais lentos ({session}, média nas últimas linhas): {steps_text}")
+        if not self.isVisible():
+            self.show()
+
+    def clear(self):
+        self._rows.clear()
+        self.table.setRowCount(0)
+        self.slow_steps_label.setText("")
@@ -1,10 +1,13 @@
 # Arquivo: app/gui/worker.py - Version: 1c - Passa info UBS/User para ErrorDialo
 
 from PyQt5.QtCore import QObject, pyqtSignal, QThread
-from PyQt5.QtWidgets import QApplication
 import asyncio
+import time
+from collections import deque
 from app.automation.browser import BrowserManager
-from app.automation.error_handler import AutomationErrorHandler, AbortAutomationException
+from app.automation.error_handler import AutomationErrorHandler, AbortAutomationException, BrowserCrashedException
+from app.gui.async_bridge import AsyncReplyBridge
+from app.automation.loop_diagnostics import LoopLagMonitor, LoopProfiler
 # Importe as classes das suas Tarefas específicas aqui
 from app.automation.tasks.atend_hipertenso_task import AtendimentoHipertensoTask
 from app.automation.tasks.atend_diabetico_task import AtendimentoDiabeticoTask
@@ -19,9 +22,14 @@ from app.automation.tasks.proce_diabetes_task import ProcedimentoDiabeticoTask
 # Importe ACS - ATD - HIPERTENSO Task
 from app.automation.tasks.acs_atd_hipertenso_task import AcsAtdHipertensoTask
 
+# Tarefas declarativas (receitas em resources/recipes)
+from app.automation.tasks.recipe_task import RecipeTask
+from app.automation.recipes.recipe_loader import load_recipe_plans
+
 
 from app.core.logger import logger
 from app.core.errors import AutomationError
+from app.core.app_config import AppConfig
 
 # Define um dicionário para mapear o tipo de tarefa selecionado na GUI
 # para a classe da tarefa correspondente
@@ -40,6 +48,14 @@ TASK_MAP = {
     # Adicione outras tarefas aqui
 }
 
+# Cada receita de resources/recipes vira uma entrada do TASK_MAP (sem nova classe em Python).
+# Receitas não sobrescrevem tarefas já existentes com o mesmo nome.
+for _recipe_name, _recipe_plan in load_recipe_plans().items():
+    if _recipe_name in TASK_MAP:
+        logger.warning("Receita '%s' tem o mesmo nome de uma tarefa existente. Ignorando a receita.", _recipe_name)
+        continue
+    TASK_MAP[_recipe_name] = RecipeTask.for_plan(_recipe_plan)
+
 
 class Worker(QObject):
     """
@@ -47,30 +63,37 @@ class Worker(QObject):
     Usa sinais para se comunicar com a GUI principal.
     """
     finished = pyqtSignal(str)
-    request_error_dialog = pyqtSignal(object, dict)
-    # user_action_received = pyqtSignal(str)
+    request_error_dialog = pyqtSignal(int, object, dict) # (id do pedido, erro, info do usuário/UBS)
+    progress = pyqtSignal(dict) # Snapshot do ProgressTracker da tarefa (painel de progresso da MainWindow)
 
-    def __init__(self, task_type: str, manual_login: bool, use_chrome_browser: bool):
+    def __init__(self, task_type: str, manual_login: bool, use_chrome_browser: bool, profiling: bool = False):
         super().__init__(None)
         self._task_type = task_type
         self._manual_login = manual_login
         self._use_chrome_browser = use_chrome_browser
+        self._profiling = profiling # Diagnóstico de desempenho: perfilador + monitor de atraso do loop
         self._browser_manager = BrowserManager()
         self._error_handler: AutomationErrorHandler = None
-        self._user_action_event = asyncio.Event()
-        self._user_action = None
-        # self.user_action_received.connect(self._handle_user_action_signal)
-        logger.debug(f"Worker initialized for task '{task_type}'. user_action_received signal connected in Worker. Using Chrome: {use_chrome_browser}")
-    
-    # Este método agora é o SLOT direto para MainWindow.user_action_signal
-    def _handle_user_action_signal(self, action: str):
+        self._reply_bridge = AsyncReplyBridge() # Respostas da GUI chegam ao loop asyncio deste Worker
+        logger.debug("Worker initialized for task '%s'. Using Chrome: %s", task_type, use_chrome_browser)
+
+    @property
+    def task_type(self) -> str:
+        return self._task_type
+
+    def submit_user_action(self, request_id: int, action: str):
         """
-        Slot que recebe a ação do usuário da GUI e libera o worker.
+        Chamado pela GUI (thread principal) com a ação escolhida no ErrorDialog.
+        Não depende do laço de eventos Qt desta thread (que está ocupada pelo asyncio):
+        a resposta é entregue ao loop do Worker pela AsyncReplyBridge.
         """
-        logger.info(f"Worker {id(self)}: Recebido sinal de ação do usuário no slot: {action}.")
-        self._user_action = action
-        self._user_action_event.set()
-        logger.debug(f"Worker {id(self)}: _user_action_event set for action '{action}'.")
+        logger.info("Worker %s: ação do usuário recebida para o pedido %s: %s.", id(self), request_id, action)
+        if not self._reply_bridge.resolve(request_id, action):
+            logger.warning("Worker %s: loop já encerrado; ação '%s' descartada.", id(self), action)
+
+    def abort_pending_actions(self):
+        """Responde 'abort' a qualquer pedido pendente (usado ao fechar o aplicativo)."""
+        self._reply_bridge.resolve_all("abort")
 
     def run_automation(self):
         """
@@ -81,10 +104,23 @@ class Worker(QObject):
             # É uma boa prática criar um novo loop de eventos para a QThread
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
-            loop.run_until_complete(self._async_run())
+            self._reply_bridge.bind_loop(loop)
+            profiler = lag_monitor = None
+            if self._profiling:
+                lag_monitor = LoopLagMonitor(loop, AppConfig.loop_lag_threshold_ms / 1000)
+                lag_monitor.start()
+                profiler = LoopProfiler(self._task_type)
+                profiler.start()
+            try:
+                loop.run_until_complete(self._async_run())
+            finally:
+                if profiler:
+                    profiler.stop()
+                if lag_monitor:
+                    lag_monitor.stop()
             loop.close()
         except Exception as e:
-            logger.critical(f"Exceção fatal no loop asyncio do Worker: {e}", exc_info=True)
+            logger.critical("Exceção fatal no loop asyncio do Worker: %s", e, exc_info=True)
             self.finished.emit(f"Erro fatal: {e}")
         finally:
             logger.info("Worker thread finalizada.")
@@ -92,24 +128,38 @@ class Worker(QObject):
     async def _async_run(self):
         """Lógica principal assíncrona que inicia o navegador e a tarefa."""
         page = None
+        crash_restarts = deque() # Instantes (monotonic) dos reinícios após queda, para o limite por hora
         try:
             headless = False
             page = await self._browser_manager.launch_browser(headless=headless, use_chrome=self._use_chrome_browser)
-            self._error_handler = AutomationErrorHandler(page, pause_callback=self._request_gui_action)
-
-            # --- CORREÇÃO: A lógica de loop de arquivos foi removida daqui ---
-            # A MainWindow já verificou se há arquivos, e a BaseTask gerenciará todo o fluxo.
 
             TaskClass = TASK_MAP.get(self._task_type)
             if not TaskClass:
                 raise AutomationError(f"Tipo de tarefa desconhecido: {self._task_type}")
 
-            logger.info(f"Criando instância da tarefa: {TaskClass.__name__}")
-            task_instance = TaskClass(page, self._error_handler, manual_login=self._manual_login)
-
-            # Executa a tarefa principal. O método .run() da BaseTask agora contém
-            # toda a lógica: login, navegação, loop de arquivos e loop de registros.
-            await task_instance.run()
+            while True:
+                # --- CORREÇÃO: A lógica de loop de arquivos foi removida daqui ---
+                # A MainWindow já verificou se há arquivos, e a BaseTask gerenciará todo o fluxo.
+                self._error_handler = AutomationErrorHandler(page, pause_callback=self._request_gui_action,
+                                                             relaunch_on_crash=AppConfig.browser_max_restarts_per_hour > 0)
+
+                logger.info("Criando instância da tarefa: %s", TaskClass.__name__)
+                task_instance = TaskClass(page, self._error_handler, manual_login=self._manual_login)
+                task_instance.set_progress_callback(self.progress.emit) # Emitir de outra thread é seguro (conexão enfileirada)
+
+                # Executa a tarefa principal. O método .run() da BaseTask agora contém
+                # toda a lógica: login, navegação, loop de arquivos e loop de registros.
+                try:
+                    await task_instance.run()
+                    break
+                except Exception as e:
+                    crashed = isinstance(e, BrowserCrashedException) or self._browser_manager.is_crashed()
+                    if not crashed or not self._can_restart_after_crash(crash_restarts):
+                        raise
+                    # Navegador morto: reinicia na mesma sessão. A nova instância da tarefa refaz o login e
+                    # retoma pelo diário (arquivo atual, data principal e próximo registro não finalizado).
+                    logger.critical("Navegador caiu durante a tarefa (%s). Reiniciando (%s/%s na última hora).", e, len(crash_restarts), AppConfig.browser_max_restarts_per_hour)
+                    page = await self._browser_manager.relaunch_browser()
 
             # Se task_instance.run() terminar sem exceções, a automação foi bem-sucedida.
             logger.info("Tarefa de automação concluída com sucesso.")
@@ -117,7 +167,7 @@ class Worker(QObject):
             self.finished.emit("Sucesso")
 
         except AbortAutomationException as e:
-            logger.warning(f"Automação interrompida pelo usuário: {e}")
+            logger.warning("Automação interrompida pelo usuário: %s", e)
             if page:
                 try: await page.close()
                 except: pass
@@ -125,7 +175,7 @@ class Worker(QObject):
             self.finished.emit(f"Terminada pelo usuário")
 
         except AutomationError as e:
-            logger.error(f"Erro de automação fatal: {e}")
+            logger.error("Erro de automação fatal: %s", e)
             if page:
                 try: await page.close()
                 except: pass
@@ -133,41 +183,34 @@ class Worker(QObject):
             self.finished.emit(f"Falha na automação: {e.message}")
 
         except Exception as e:
-            logger.critical(f"Erro INESPERADO e fatal durante a automação: {e}", exc_info=True)
+            logger.critical("Erro INESPERADO e fatal durante a automação: %s", e, exc_info=True)
             if page:
                 try: await page.close()
                 except: pass
             await self._browser_manager.close_browser()
             self.finished.emit(f"Erro inesperado e fatal: {e}")
 
+    @staticmethod
+    def _can_restart_after_crash(crash_restarts: deque) -> bool:
+        """Registra um reinício se ainda couber no limite de AppConfig.browser_max_restarts_per_hour."""
+        now = time.monotonic()
+        while crash_restarts and now - crash_restarts[0] > 3600:
+            crash_restarts.popleft()
+        if len(crash_restarts) >= AppConfig.browser_max_restarts_per_hour:
+            logger.critical("Limite de %s reinício(s) do navegador por hora atingido. Encerrando a automação.", AppConfig.browser_max_restarts_per_hour)
+            return False
+        crash_restarts.append(now)
+        return True
+
 
     async def _request_gui_action(self, error: AutomationError, user_info: dict = None) -> str:
         """
-        Callback chamado pelo ErrorHandler. Emite um sinal para a GUI e espera a resposta.
+        Callback chamado pelo ErrorHandler. Emite um sinal para a GUI e espera a resposta
+        em um Future (sem polling: a sessão pausada não consome CPU).
         """
-        logger.info("Worker: Solicitando ação do usuário via GUI...")
-        self._user_action_event.clear()
-        self._user_action = None
-        self.request_error_dialog.emit(error, user_info)
-        logger.debug("Worker: _request_gui_action emitted request_error_dialog. Waiting for user action event...")
-
-        # --- INÍCIO DA MODIFICAÇÃO CRÍTICA PARA PROCESSAR EVENTOS QT ---
-        # Enquanto o evento não for setado, processa eventos da Qt na thread do Worker
-        while not self._user_action_event.is_set():
-            app = QApplication.instance()
-            if app:
-                # Processa eventos do aplicativo principal. Isso pode incluir sinais
-                # direcionados a objetos nesta thread worker.
-                app.processEvents() 
-            else:
-                logger.error("QApplication instance not found in worker thread. Cannot process Qt events.")
-                # Se não há QApplication, não há como processar sinais Qt.
-                # Não podemos esperar aqui indefinidamente. Uma saída forçada pode ser necessária.
-                # Por enquanto, vamos apenas logar e dormir para evitar loop infinito de CPU.
-            
-            await asyncio.sleep(0.05) # Pequena pausa para não consumir CPU em excesso
-
-        logger.debug(f"Worker: _request_gui_action received user action event. Action: {self._user_action}")
-        return self._user_action
-
-    
\ No newline at end of file
+        request_id, future = self._reply_bridge.request()
+        logger.info("Worker: Solicitando ação do usuário via GUI (pedido %s)...", request_id)
+        self.request_error_dialog.emit(request_id, error, user_info or {})
+        action = await future
+        logger.debug("Worker: pedido %s respondido. Action: %s", request_id, action)
+        return action
@@ -10,20 +10,14 @@ from app.core.app_config import AppConfig
 
 # Importa o logger para garantir que a configuração inicial seja aplicada v
 from app.core.logger import logger
-import logging
 
 if __name__ == '__main__':
     # Carrega as configurações do aplicativo (incluindo caminho base)
     # Isso já é feito na importação do AppConfig, mas chamar explicitamente garante.
 
 
-    # Para desenvolvimento, use logging.DEBUG para ver todas as mensagens.
-    # Para produção, mude para logging.INFO, logging.WARNING ou logging.ERROR
-    # O nível INFO é um bom compromisso para produção, mostrando o progresso principal.
-    
-    # logger.setLevel(logging.INFO) #Ajuste para Produção
-    # logger.setLevel(logging.WARNING) # Se quiser apenas erros e alertas, use logging.WARNING.
-    logger.setLevel(logging.DEBUG) # Para 'DEV' Se quiser ver todas as mensagens, use logging.DEBUG.
+    # O nível do log vem de AppConfig.log_level (padrão INFO) e AppConfig.log_module_levels, aplicados em app/core/logger.py.
+    # Para investigar, use "log_level": "DEBUG" no config.json (ou só no módulo, ex: {"app.automation.tasks": "DEBUG"}).
 
     AppConfig.load_config()
     logger.info("Aplicação iniciada.")
@@ -33,7 +27,8 @@ if __name__ == '__main__':
     app = QApplication(sys.argv)
 
     # Cria a janela principal
-    main_window = MainWindow()
+    # --perfilar: já abre com o 'Diagnóstico de desempenho' marcado (perfil do Worker + monitor de atraso do loop)
+    main_window = MainWindow(profiling="--perfilar" in sys.argv)
 
     # Exibe a janela
     main_window.show()
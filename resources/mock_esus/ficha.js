@@ -0,0 +1,435 @@
+// Arquivo: resources/mock_esus/ficha.js - comportamento da ficha CDS simulada (iframe e-sus).
+// Estados: lista (só 'Adicionar') -> cabeçalho (Data, lista do lote, 'Finalizar registros') -> registro (formulário do cidadão).
+// O formulário do registro é criado uma vez por ficha e reaproveitado entre os registros (limpo e escondido
+// após cada 'Confirmar'), como o ExtJS faz; ele só sai do DOM quando a ficha é finalizada.
+"use strict";
+
+const TIPO = new URLSearchParams(window.location.search).get("tipo") || "atendimento";
+const TITULOS = {
+    atendimento: "Ficha de Atendimento Individual",
+    procedimentos: "Ficha de Procedimentos",
+    visita: "Ficha de Visita Domiciliar e Territorial",
+};
+const PEID_FORM = {
+    atendimento: "FichaAtendimentoIndividualChildForm",
+    procedimentos: "FichaProcedimentosChildForm",
+    visita: "FichaVisitaDomiciliarChildForm",
+};
+const PEID_CONFIRMAR = {
+    atendimento: "FichaAtendimentoIndividualDetailChildViewImpl.Confirmar",
+    procedimentos: "FichaProcedimentosDetailChildViewImpl.Confirmar",
+    visita: "FichaVisitaDomiciliarDetailChildViewImpl.Confirmar",
+};
+
+const TIPOS_ATENDIMENTO = ["Consulta agendada programada / Cuidado continuado", "Consulta agendada", "Escuta inicial / Orientação",
+    "Consulta no dia", "Atendimento de urgência"];
+const CONDICOES = ["Asma", "Desnutrição", "Diabetes", "DPOC", "Hipertensão arterial", "Obesidade", "Pré-natal", "Puericultura",
+    "Puerpério (até 42 dias)", "Saúde sexual e reprodutiva", "Tabagismo", "Usuário de álcool", "Usuário de outras drogas",
+    "Saúde mental", "Reabilitação", "Câncer do colo do útero", "Câncer de mama", "Risco cardiovascular"];
+// A 10ª linha é 'Hemoglobina glicada' (AtendimentoForm.select_exame marca o 10º 'S')
+const EXAMES = ["Colesterol total", "Creatinina", "EAS / EQU", "Eletrocardiograma", "Eletroforese de hemoglobina", "Espirometria",
+    "Exame de escarro", "Glicemia", "HDL", "Hemoglobina glicada", "Hemograma", "LDL", "Retinografia / Fundo de olho",
+    "Sorologia de sífilis (VDRL)", "Teste de gravidez", "Ultrassonografia obstétrica", "Urocultura"];
+const CONDUTAS = ["Retorno para consulta agendada", "Retorno para cuidado continuado / programado", "Agendamento para grupos",
+    "Agendamento para NASF", "Alta do episódio", "Encaminhamento interno no dia", "Encaminhamento para serviço especializado"];
+const PROCEDIMENTOS = ["Acupuntura com inserção de agulhas", "Administração de vitamina A", "Cateterismo vesical de alívio",
+    "Cauterização química de pequenas lesões", "Cirurgia de unha (cantoplastia)", "Coleta de citopatológico de colo uterino",
+    "Curativo especial", "Drenagem de abscesso", "Exame do pé diabético", "Fundoscopia", "Infiltração em cavidade sinovial",
+    "Remoção de cerume", "Retirada de pontos de cirurgias básicas", "Sutura simples", "Triagem oftalmológica"];
+const MOTIVOS_VISITA = ["Cadastramento / Atualização", "Visita periódica", "Busca ativa: consulta", "Busca ativa: exame",
+    "Busca ativa: vacina", "Acompanhamento: egresso de internação", "Controle ambiental / vetorial", "Orientação / Prevenção"];
+const ACOMPANHAMENTOS = ["Gestante", "Puérpera", "Recém-nascido", "Criança", "Pessoa com desnutrição",
+    "Pessoa em reabilitação ou com deficiência", "Pessoa com hipertensão", "Pessoa com diabetes", "Pessoa com asma",
+    "Pessoa com DPOC / enfisema", "Pessoa com câncer", "Pessoa com hanseníase", "Pessoa com tuberculose"];
+const DESFECHOS = ["Visita realizada", "Visita recusada", "Ausente"];
+
+let estado = "lista";
+let formulario = null; // Formulário do registro (criado uma vez por ficha)
+let lote = []; // Registros confirmados da ficha aberta
+let ocupado = false;
+let proximoId = 1;
+
+const $ = (id) => document.getElementById(id);
+
+// --- Construção do DOM (estilo ExtJS) ---
+
+function el(tag, attrs = {}, ...filhos) {
+    const node = document.createElement(tag);
+    for (const [nome, valor] of Object.entries(attrs)) {
+        if (nome === "text") node.textContent = valor;
+        else if (nome === "className") node.className = valor;
+        else node.setAttribute(nome, valor);
+    }
+    filhos.forEach(filho => filho && node.appendChild(filho));
+    return node;
+}
+
+// Item de lista já adicionado (SIGTAP, outros exames), com o botão de excluir do PEC
+function itemAdicionado(texto) {
+    const excluir = el("button", {type: "button", title: "Excluir", className: "x-item-excluir", text: "×"});
+    const item = el("div", {"data-valor": texto}, el("span", {text: texto}), excluir);
+    excluir.addEventListener("click", () => item.remove());
+    return item;
+}
+
+function opcao(tipo, nome, texto, valor = texto) {
+    const id = `ext-comp-${proximoId++}`;
+    return el("div", {className: "x-form-check-wrap"},
+        el("input", {type: tipo, id, name: nome, value: valor, className: "x-form-field"}),
+        el("label", {for: id, className: "x-form-cb-label", text: texto}));
+}
+
+function campoTexto(rotulo, nome, classesExtras = "") {
+    return el("div", {className: "x-form-item"},
+        el("label", {text: rotulo}),
+        el("input", {type: "text", name: nome, className: `x-form-text x-form-field ${classesExtras}`.trim()}));
+}
+
+function campoCombo(rotulo, nome, campo, modo = "valor", classesExtras = "") {
+    const input = el("input", {type: "text", name: nome, className: `x-form-text x-form-field ${classesExtras}`.trim(),
+        "data-combo": campo, "data-modo": modo});
+    const limpar = el("span", {class: "x-form-clear-trigger"});
+    limpar.addEventListener("click", () => { limparCombo(input); esconderLista(); });
+    ligarCombo(input);
+    return el("div", {className: "x-form-item"}, rotulo ? el("label", {text: rotulo}) : null, input, limpar);
+}
+
+function grupo(titulo, attrs, filhos) {
+    return el("div", {className: "x-fieldset", ...attrs}, el("div", {className: "x-fieldset-header", text: titulo}), ...filhos);
+}
+
+function blocoPaciente() {
+    const cpf = campoTexto("CPF / CNS do cidadão", "cpf");
+    const nome = el("span", {className: "cidadao-nome"});
+    cpf.appendChild(nome);
+    cpf.querySelector("input").addEventListener("change", () => buscarCidadao(cpf.querySelector("input").value, nome));
+    return [
+        grupo("Período", {}, [opcao("radio", "periodo", "Manhã", "manha"), opcao("radio", "periodo", "Tarde", "tarde"),
+            opcao("radio", "periodo", "Noite", "noite")]),
+        cpf,
+        campoTexto("Data de nascimento", "nascimento"),
+        campoCombo("Sexo", "sexo", "sexo"),
+    ];
+}
+
+function blocoAtendimento() {
+    const exames = EXAMES.map(exame => el("div", {className: "x-exame-row"},
+        el("span", {className: "x-exame-nome", text: exame}),
+        opcao("checkbox", "exames", "S", `${exame}:S`), opcao("checkbox", "exames", "A", `${exame}:A`)));
+    const outrosAdicionados = el("div", {className: "x-lista-adicionados", "data-name": "outros_exames"});
+    const outrosConfirmar = el("button", {type: "button", text: "Confirmar"});
+    outrosConfirmar.addEventListener("click", () => confirmarOutrosExames(outrosAdicionados));
+    return [
+        campoCombo("Local de atendimento", "local", "local"),
+        grupo("Tipo de atendimento", {}, TIPOS_ATENDIMENTO.map(t => opcao("radio", "tipo_atendimento", t))),
+        grupo("Problema / Condição avaliada", {peid: "ProblemaCondicaoAvaliadaAIForm.problemasCondicoesAvaliadas"},
+            CONDICOES.map(c => opcao("checkbox", "condicoes", c))),
+        grupo("Exames solicitados (S) / avaliados (A)", {peid: "FichaAtendimentoIndividualChildForm.examesSolicitados"}, exames),
+        el("div", {className: "x-fieldset"},
+            el("div", {className: "x-fieldset-header", peid: "FieldSetPanel.outrosexames(codigodosigtap)", text: "Outros exames (código do SIGTAP)"}),
+            campoCombo("", "_outros_exame", "sigtap", "busca"),
+            el("div", {peid: "OutrosSiaForm.status"}, opcao("radio", "_outros_status", "S"), opcao("radio", "_outros_status", "A")),
+            el("div", {peid: "OutrosSiaAtendimentoIndividualComponentFlexList.Confirmar"}, outrosConfirmar),
+            outrosAdicionados),
+        grupo("Conduta", {}, CONDUTAS.map(c => opcao("checkbox", "conduta", c))),
+    ];
+}
+
+function blocoProcedimentos() {
+    return [
+        campoCombo("Local de atendimento", "local", "local"),
+        grupo("Procedimentos / Pequenas cirurgias", {peid: "FichaProcedimentosChildForm.procedimentos"},
+            PROCEDIMENTOS.map(p => opcao("checkbox", "procedimentos", p))),
+        el("div", {className: "x-fieldset"},
+            campoCombo("Código do SIGTAP", "_sigtap", "sigtap", "procedimento", "x-form-no-radius-right"),
+            el("div", {className: "x-lista-adicionados", "data-name": "sigtap"})),
+    ];
+}
+
+function blocoVisita() {
+    const microArea = el("div", {peid: "FichaVisitaDomiciliarChildForm.microArea"}, campoTexto("Microárea", "micro_area"));
+    const tipoImovel = el("div", {peid: "FichaVisitaDomiciliarChildForm.tipoDeImovel"}, campoCombo("Tipo de imóvel", "tipo_imovel", "imovel"));
+    return [
+        microArea,
+        tipoImovel,
+        grupo("Motivo da visita", {}, MOTIVOS_VISITA.map(m => opcao("checkbox", "motivos", m))),
+        grupo("Acompanhamento", {}, ACOMPANHAMENTOS.map(a => opcao("checkbox", "acompanhamentos", a))),
+        grupo("Desfecho", {peid: "FichaVisitaDomiciliarChildForm.desfechoDbEnum"}, DESFECHOS.map(d => opcao("radio", "desfecho", d))),
+    ];
+}
+
+function criarFormulario() {
+    const especificos = {atendimento: blocoAtendimento, procedimentos: blocoProcedimentos, visita: blocoVisita}[TIPO]();
+    const confirmar = el("button", {type: "button", className: "primario", text: "Confirmar"});
+    confirmar.addEventListener("click", confirmarRegistro);
+    return el("div", {peid: PEID_FORM[TIPO]}, ...blocoPaciente(), ...especificos,
+        el("div", {peid: PEID_CONFIRMAR[TIPO]}, confirmar));
+}
+
+function limparFormulario(form) {
+    form.querySelectorAll("input").forEach(input => {
+        if (input.type === "checkbox" || input.type === "radio") input.checked = false;
+        else { input.value = ""; input.dataset.valor = ""; }
+    });
+    form.querySelectorAll(".x-lista-adicionados, .cidadao-nome").forEach(node => { node.innerHTML = ""; });
+}
+
+function lerRegistro(form) {
+    const registro = {};
+    form.querySelectorAll("input[name]").forEach(input => {
+        if (input.name.startsWith("_")) return;
+        if (input.type === "checkbox") {
+            registro[input.name] = registro[input.name] || [];
+            if (input.checked) registro[input.name].push(input.value);
+        } else if (input.type === "radio") {
+            if (input.checked) registro[input.name] = input.value;
+        } else {
+            registro[input.name] = input.dataset.combo ? (input.dataset.valor || "") : input.value.trim();
+        }
+    });
+    form.querySelectorAll(".x-lista-adicionados").forEach(lista => {
+        registro[lista.dataset.name] = [...lista.children].map(item => item.dataset.valor);
+    });
+    return registro;
+}
+
+// --- Servidor ---
+
+async function api(caminho, opcoes = {}) {
+    const resposta = await fetch(caminho, {credentials: "same-origin", ...opcoes});
+    if (resposta.status === 401) {
+        window.top.location.href = "/login"; // Sessão expirada: o PEC volta para o login
+        throw new Error("Sessão expirada. Faça o login novamente.");
+    }
+    const dados = await resposta.json().catch(() => ({}));
+    if (!resposta.ok) throw new Error(dados.mensagem || `Erro no servidor (${resposta.status}).`);
+    return dados;
+}
+
+function postJson(caminho, corpo) {
+    return api(caminho, {method: "POST", headers: {"Content-Type": "application/json"}, body: JSON.stringify(corpo)});
+}
+
+async function buscarCidadao(cpf, destino) {
+    try {
+        const dados = await api(`/api/cidadao?cpf=${encodeURIComponent(cpf)}`);
+        destino.textContent = dados.nome || "";
+    } catch (e) {
+        destino.textContent = "";
+    }
+}
+
+// --- Combos com lista de sugestão ---
+
+const lista = el("div", {className: "x-combo-list", hidden: ""}, el("div", {className: "x-combo-list-inner"}));
+document.body.appendChild(lista);
+let comboAtivo = null;
+let indiceSelecionado = -1;
+let buscaAtual = 0;
+
+function esconderLista() {
+    lista.hidden = true;
+    lista.firstChild.innerHTML = "";
+    comboAtivo = null;
+    indiceSelecionado = -1;
+}
+
+function limparCombo(input) {
+    input.value = "";
+    input.dataset.valor = "";
+}
+
+function itensDaLista() {
+    return [...lista.firstChild.children];
+}
+
+function destacar(indice) {
+    const itens = itensDaLista();
+    itens.forEach(item => item.classList.remove("x-combo-selected"));
+    indiceSelecionado = Math.max(0, Math.min(indice, itens.length - 1));
+    if (itens[indiceSelecionado]) itens[indiceSelecionado].classList.add("x-combo-selected");
+}
+
+function escolher(input, texto) {
+    const modo = input.dataset.modo;
+    if (modo === "procedimento") {
+        // SIGTAP da ficha de procedimentos: cada escolha é adicionada à lista e o campo volta a ficar vazio
+        input.closest(".x-fieldset").querySelector(".x-lista-adicionados").appendChild(itemAdicionado(texto));
+        limparCombo(input);
+    } else {
+        input.value = texto;
+        input.dataset.valor = texto;
+    }
+    esconderLista();
+}
+
+function mostrarItens(input, itens) {
+    const inner = lista.firstChild;
+    inner.innerHTML = "";
+    itens.forEach(texto => {
+        const item = el("div", {className: input.dataset.combo === "sigtap" ? "x-combo-list-item search-item" : "x-combo-list-item"});
+        const [codigo, ...resto] = texto.split(" - ");
+        if (input.dataset.combo === "sigtap" && resto.length) {
+            item.appendChild(el("b", {text: codigo}));
+            item.appendChild(document.createTextNode(` - ${resto.join(" - ")}`));
+        } else {
+            item.textContent = texto;
+        }
+        item.addEventListener("mousedown", (event) => event.preventDefault()); // Mantém o foco no campo
+        item.addEventListener("click", () => escolher(input, texto));
+        inner.appendChild(item);
+    });
+    const caixa = input.getBoundingClientRect();
+    lista.style.left = `${caixa.left + window.scrollX}px`;
+    lista.style.top = `${caixa.bottom + window.scrollY}px`;
+    comboAtivo = input;
+    indiceSelecionado = -1;
+    lista.hidden = itens.length === 0;
+}
+
+function ligarCombo(input) {
+    let espera = null;
+    input.addEventListener("input", () => {
+        input.dataset.valor = "";
+        clearTimeout(espera);
+        const termo = input.value.trim();
+        if (!termo) { esconderLista(); return; }
+        espera = setTimeout(async () => {
+            const busca = ++buscaAtual;
+            try {
+                const dados = await api(`/api/sugestoes?campo=${input.dataset.combo}&q=${encodeURIComponent(termo)}`);
+                if (busca === buscaAtual && document.activeElement === input) mostrarItens(input, dados.itens || []);
+            } catch (e) {
+                if (busca === buscaAtual) esconderLista(); // Falha na busca: a lista simplesmente não aparece
+            }
+        }, 120);
+    });
+    input.addEventListener("keydown", (event) => {
+        if (comboAtivo !== input || lista.hidden) return;
+        if (event.key === "ArrowDown") { event.preventDefault(); destacar(indiceSelecionado + 1); }
+        else if (event.key === "ArrowUp") { event.preventDefault(); destacar(indiceSelecionado - 1); }
+        else if (event.key === "Enter" && indiceSelecionado >= 0) {
+            event.preventDefault();
+            escolher(input, itensDaLista()[indiceSelecionado].textContent);
+        } else if (event.key === "Escape") esconderLista();
+    });
+}
+
+document.addEventListener("mousedown", (event) => {
+    if (!lista.hidden && !lista.contains(event.target) && event.target !== comboAtivo) esconderLista();
+});
+
+// --- Máscara e message-box ---
+
+function mascara(visivel) {
+    $("mascara").hidden = !visivel;
+}
+
+function mensagem(texto) {
+    document.querySelectorAll('div[peid="message-box"]').forEach(box => box.remove());
+    const ok = el("button", {type: "button", text: "OK"});
+    const box = el("div", {peid: "message-box", className: "x-window"}, el("div", {className: "x-window-body", text: texto}), ok);
+    ok.addEventListener("click", () => box.remove());
+    document.body.appendChild(box);
+}
+
+// --- Ações da ficha ---
+
+function abrirRegistro() {
+    if (!formulario) {
+        formulario = criarFormulario();
+        $("registro-host").appendChild(formulario);
+    } else {
+        limparFormulario(formulario);
+    }
+    formulario.hidden = false;
+    estado = "registro";
+}
+
+function fecharFicha() {
+    if (formulario) formulario.remove();
+    formulario = null;
+    lote = [];
+    $("lote-linhas").innerHTML = "";
+    $("data-ficha").value = "";
+    ["cabecalho", "lote", "btn-finalizar"].forEach(id => { $(id).hidden = true; });
+    $("lista-fichas").hidden = false;
+    estado = "lista";
+}
+
+$("btn-adicionar").addEventListener("click", () => {
+    if (ocupado) return;
+    if (estado === "lista") {
+        ["cabecalho", "lote", "btn-finalizar"].forEach(id => { $(id).hidden = false; });
+        $("lista-fichas").hidden = true;
+        estado = "cabecalho";
+    } else if (!$("data-ficha").value.trim()) {
+        mensagem("Existem campos obrigatórios não preenchidos: Data.");
+    } else {
+        abrirRegistro(); // No estado 'registro', descarta o registro aberto e começa um em branco
+    }
+});
+
+function confirmarOutrosExames(destino) {
+    const bloco = destino.closest(".x-fieldset");
+    const exame = bloco.querySelector('input[name="_outros_exame"]');
+    const status = bloco.querySelector('input[name="_outros_status"]:checked');
+    if (!exame.dataset.valor || !status) {
+        mensagem("Existem campos obrigatórios não preenchidos: Exame e Status.");
+        return;
+    }
+    destino.appendChild(itemAdicionado(`${exame.dataset.valor} (${status.value})`));
+    limparCombo(exame);
+    status.checked = false;
+}
+
+async function confirmarRegistro() {
+    if (ocupado || !formulario) return;
+    ocupado = true;
+    mascara(true);
+    const registro = lerRegistro(formulario);
+    try {
+        const dados = await postJson("/api/confirmar", {
+            ficha: {tipo: TIPO, data: $("data-ficha").value, cpfs: lote.map(r => (r.cpf || "").replace(/\D/g, ""))},
+            registro,
+        });
+        if (dados.ok) {
+            lote.push(registro);
+            $("lote-linhas").appendChild(el("div", {className: "x-grid3-row"},
+                el("div", {text: String(lote.length)}), el("div", {text: registro.cpf}),
+                el("div", {text: registro.nascimento}), el("div", {text: registro.sexo})));
+            limparFormulario(formulario);
+            formulario.hidden = true;
+        } else {
+            mensagem(dados.mensagem || "Não foi possível confirmar o registro.");
+        }
+    } catch (e) {
+        mensagem(e.message);
+    } finally {
+        mascara(false);
+        ocupado = false;
+    }
+}
+
+$("btn-finalizar").addEventListener("click", async () => {
+    if (ocupado) return;
+    if (!lote.length) { fecharFicha(); return; } // Sem registros confirmados a ficha só é fechada
+    ocupado = true;
+    mascara(true);
+    try {
+        const resposta = await postJson("/api/graphql", {
+            operationName: "SalvarFichaCds",
+            query: "mutation SalvarFichaCds($input: FichaCdsInput!) { salvarFichaCds(input: $input) { id registros } }",
+            variables: {input: {tipo: TIPO, data: $("data-ficha").value, registros: lote}},
+        });
+        if (resposta.errors && resposta.errors.length) mensagem(resposta.errors[0].message);
+        else fecharFicha();
+    } catch (e) {
+        mensagem(e.message);
+    } finally {
+        mascara(false);
+        ocupado = false;
+    }
+});
+
+$("titulo-ficha").textContent = TITULOS[TIPO] || TITULOS.atendimento;
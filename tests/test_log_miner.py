@@ -0,0 +1,90 @@
+# Arquivo: tests/test_log_miner.py
+import gzip
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("pandas")
+
+from app.benchmark.log_miner import mine_log_file, step_name
+
+START = datetime(2025, 3, 10, 8, 0, 0)
+
+
+def _log(tmp_path, events, name="botcds_2025-03-10.log", compress=False):
+    """events: (segundos desde START, nível, mensagem)."""
+    lines = [f"{(START + timedelta(seconds=s)).strftime('%Y-%m-%d %H:%M:%S')} - botcds - {level} - {message}\n"
+             for s, level, message in events]
+    path = tmp_path / name
+    if compress:
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            f.writelines(lines)
+    else:
+        path.write_text("".join(lines), encoding="utf-8")
+    return path
+
+
+def test_step_name_drops_values_and_digits():
+    assert step_name("Preenchendo campo 'CIAP2 - 01' com: T90") == "Preenchendo campo 'CIAP# - #'"
+    assert step_name("Preenchendo CPF/CNS: 12345678901.") == "Preenchendo CPF/CNS"
+
+
+def test_rows_and_steps_are_rebuilt_from_the_log(tmp_path):
+    path = _log(tmp_path, [
+        (0, "INFO", "Iniciando execução da tarefa: AtendHipertenso"),
+        (1, "INFO", "Iniciando processamento do arquivo: dados1.csv"),
+        (2, "INFO", "Iniciando processamento do registro 1/2"),
+        (3, "INFO", "Preenchendo CPF/CNS: 123"),
+        (5, "DEBUG", "Clicado com sucesso em: CPF"),
+        (6, "INFO", "Processamento da linha 1 concluído"),
+        (8, "INFO", "Iniciando processamento do registro 2/2"),
+        (9, "WARNING", "Erro recuperável para registro 2: timeout"),
+        (10, "INFO", "Worker: Solicitando ação do usuário"),
+        (20, "INFO", "Registro 2 pulado pelo operador"),
+    ])
+    rows, steps = mine_log_file(str(path))
+
+    first, second = rows
+    assert (first["tarefa"], first["arquivo"], first["registro"]) == ("AtendHipertenso", "dados1.csv", 1)
+    assert first["completa"] and first["duracao_s"] == 6 and first["preenchimento_s"] == 4
+    assert second["retentativas"] == 1 and second["pausas"] == 1 and second["pulado"]
+    assert not second["completa"] and second["duracao_s"] == 12 # Último registro: termina na última mensagem
+
+    first_steps = [(s["passo"], s["duracao_s"]) for s in steps if s["registro"] == 1]
+    assert first_steps == [("(início do registro)", 1), ("Preenchendo CPF/CNS", 3), ("(confirmado -> próximo registro)", 2)]
+
+
+def test_reused_file_name_and_new_task_do_not_chain_rows(tmp_path):
+    path = _log(tmp_path, [
+        (0, "INFO", "Iniciando execução da tarefa: AtendHipertenso"),
+        (1, "INFO", "Iniciando processamento do arquivo: dados1.csv"),
+        (2, "INFO", "Iniciando processamento do registro 1/2"),
+        (4, "INFO", "Processamento da linha 1 concluído"),
+        (100, "INFO", "Iniciando execução da tarefa: AtendDiabetico"),
+        (101, "INFO", "Iniciando processamento do arquivo: dados1.csv"),
+        (102, "INFO", "Iniciando processamento do registro 2/2"),
+        (104, "INFO", "Processamento da linha 2 concluído"),
+    ])
+    rows, _ = mine_log_file(str(path))
+    assert [(r["tarefa"], r["registro"], r["completa"]) for r in rows] == [("AtendHipertenso", 1, False), ("AtendDiabetico", 2, False)]
+    assert rows[0]["duracao_s"] == 2 # Fecha na última mensagem dela, sem somar o intervalo até a nova tarefa
+
+
+def test_long_rows_without_pause_are_dropped(tmp_path):
+    path = _log(tmp_path, [
+        (0, "INFO", "Iniciando processamento do registro 1/3"),
+        (700, "INFO", "Iniciando processamento do registro 2/3"),
+        (705, "INFO", "Worker: Solicitando ação do usuário"),
+        (1500, "INFO", "Iniciando processamento do registro 3/3"),
+    ])
+    rows, _ = mine_log_file(str(path), max_row_s=600)
+    assert [r["registro"] for r in rows] == [2, 3]
+
+
+def test_rotated_gz_parts_are_read(tmp_path):
+    path = _log(tmp_path, [
+        (0, "INFO", "Iniciando processamento do registro 1/1"),
+        (3, "INFO", "Processamento da linha 1 concluído"),
+    ], name="botcds_2025-03-10.1.log.gz", compress=True)
+    rows, _ = mine_log_file(str(path))
+    assert [(r["log"], r["registro"]) for r in rows] == [("botcds_2025-03-10.1.log.gz", 1)]
@@ -0,0 +1,97 @@
+# Arquivo: tests/test_quarantine.py
+import csv
+
+import pytest
+
+from app.data.quarantine import QuarantineStore
+from app.data.run_journal import RunJournal
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(QuarantineStore, "RETRY_LOT_DIR", tmp_path / "arquivos")
+    return QuarantineStore(tmp_path / "quarentena" / "quarentena.jsonl")
+
+
+def _add(store, task, row, error_class, main_date="01/03/2025", file_name="dados1.csv"):
+    store.add(task, file_name, row, ["1", f"cpf{row}", "01/01/1960", "0"], error_class, step="Confirmar", main_date=main_date)
+
+
+def _read_lot(path):
+    with open(path, newline="", encoding="ISO-8859-1") as f:
+        return list(csv.reader(f, delimiter=";"))
+
+
+def test_retry_lot_name_carries_task_and_original_date():
+    assert QuarantineStore.retry_lot_name("AtendHipertenso", "01/03/2025", "20250310120000") == \
+        "dados_retry_AtendHipertenso_20250301_20250310120000.csv"
+    assert QuarantineStore.retry_lot_name("AtendHipertenso", None, "1") == "dados_retry_AtendHipertenso_semdata_1.csv"
+
+
+def test_duplicates_and_operator_skips_are_not_retried(store):
+    _add(store, "AtendHipertenso", 0, "timeout_transitorio")
+    _add(store, "AtendHipertenso", 1, "duplicado")
+    _add(store, "AtendHipertenso", 2, "pulado_pelo_operador")
+    assert [e["row"] for e in store.pending()] == [0]
+
+    lots = store.generate_retry_lots()
+    assert len(lots) == 1
+    assert [row[1] for row in _read_lot(lots[0])] == ["cpf0"]
+
+
+def test_one_lot_per_task_and_original_date(store):
+    _add(store, "AtendHipertenso", 0, "timeout_transitorio", main_date="01/03/2025")
+    _add(store, "AtendHipertenso", 1, "timeout_transitorio", main_date="02/03/2025")
+    _add(store, "AtendHipertenso", 2, "timeout_transitorio", main_date="01/03/2025")
+    _add(store, "AtendDiabetico", 3, "timeout_transitorio", main_date="01/03/2025")
+
+    lots = {path.name.rsplit("_", 1)[0]: path for path in store.generate_retry_lots()}
+    assert sorted(lots) == ["dados_retry_AtendDiabetico_20250301", "dados_retry_AtendHipertenso_20250301",
+                            "dados_retry_AtendHipertenso_20250302"]
+    assert [row[1] for row in _read_lot(lots["dados_retry_AtendHipertenso_20250301"])] == ["cpf0", "cpf2"]
+
+
+def test_task_filter_leaves_other_tasks_pending(store):
+    _add(store, "AtendHipertenso", 0, "timeout_transitorio")
+    _add(store, "AtendDiabetico", 1, "timeout_transitorio")
+
+    lots = store.generate_retry_lots("AtendHipertenso")
+    assert [path.name.split("_")[2] for path in lots] == ["AtendHipertenso"]
+    assert [e["task"] for e in store.pending()] == ["AtendDiabetico"]
+    assert store.pending("AtendHipertenso") == []
+
+
+def test_lines_are_sent_to_a_retry_lot_only_once(store):
+    _add(store, "AtendHipertenso", 0, "timeout_transitorio")
+    lots = store.generate_retry_lots()
+    assert store.entries()[0]["retry_lot"] == lots[0].name
+    assert store.generate_retry_lots() == []
+
+
+def test_journal_opens_each_lot_with_its_original_date(store, tmp_path):
+    journal = RunJournal(tmp_path / "journal.jsonl")
+    _add(store, "AtendHipertenso", 0, "timeout_transitorio", main_date="01/03/2025")
+    _add(store, "AtendHipertenso", 1, "timeout_transitorio", main_date=None)
+
+    lots = {path.name.split("_")[3]: path for path in store.generate_retry_lots("AtendHipertenso", journal)}
+    dated = lots["20250301"]
+    assert journal.file_main_date(dated.name, "AtendHipertenso", RunJournal.file_fingerprint(dated)) == "01/03/2025"
+    assert journal.entries(lots["semdata"].name) == [] # Sem data de origem: a tarefa usa a próxima da sequência
+
+
+def test_file_manager_skips_retry_lots_of_other_tasks(tmp_path, monkeypatch):
+    pytest.importorskip("pandas")
+    from app.data.file_manager import FileManager
+
+    monkeypatch.setattr(FileManager, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(FileManager, "ARCHIVE_DIR", tmp_path / "arquivos_processados")
+    monkeypatch.setattr(FileManager, "PROCESSED_REGISTRY", tmp_path / "arquivos" / "registro.json")
+    (tmp_path / "arquivos").mkdir()
+    for name in ("dados_retry_AtendDiabetico_20250301_1.csv", "dados_retry_AtendHipertenso_20250301_1.csv", "dados2.csv"):
+        (tmp_path / "arquivos" / name).write_text("1;cpf;01/01/1960;0\n", encoding="ISO-8859-1")
+
+    listed = [path.name for path in FileManager("AtendHipertenso").list_unprocessed_files()]
+    assert "dados_retry_AtendDiabetico_20250301_1.csv" not in listed
+    assert "dados_retry_AtendHipertenso_20250301_1.csv" in listed
+    assert "dados2.csv" in listed
+    assert len(FileManager().list_unprocessed_files()) == 3 # Sem tarefa (GUI): lista tudo
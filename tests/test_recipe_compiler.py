@@ -0,0 +1,96 @@
+# Arquivo: tests/test_recipe_compiler.py
+import pytest
+
+from app.automation.recipes.compiler import COMMON_PATIENT_STEPS, RecipeError, compile_recipe
+
+
+def _recipe(steps, **extra):
+    recipe = {"name": "teste", "area": "atendimento_individual", "steps": steps}
+    recipe.update(extra)
+    return recipe
+
+
+def test_common_patient_fields_are_expanded_before_the_recipe_steps():
+    plan = compile_recipe(_recipe([{"field": "ciap", "primitive": "atendimento.fill_ciap", "source": {"column": 5}}],
+                                  common_fields="patient"))
+    assert [step.field for step in plan.steps] == [s["field"] for s in COMMON_PATIENT_STEPS] + ["ciap"]
+    assert plan.columns["col3_int"] == (3, "int")
+    assert plan.profile == "ENFERMEIRO"
+
+
+def test_reorderable_block_runs_rerendering_steps_last():
+    plan = compile_recipe(_recipe([
+        {"field": "ciap", "primitive": "atendimento.fill_ciap", "source": {"column": 5}, "reorderable": True},
+        {"field": "exame", "primitive": "atendimento.select_exame", "source": {"column": 6}, "reorderable": True},
+        {"field": "confirmar", "primitive": "atendimento.click_confirm_button"},
+    ]))
+    assert [step.field for step in plan.steps] == ["exame", "ciap", "confirmar"]
+    assert any(note.startswith("reordenado") for note in plan.optimizations)
+
+
+def test_steps_outside_a_reorderable_block_keep_their_order():
+    plan = compile_recipe(_recipe([
+        {"field": "ciap", "primitive": "atendimento.fill_ciap", "source": {"column": 5}},
+        {"field": "exame", "primitive": "atendimento.select_exame", "source": {"column": 6}},
+    ]))
+    assert [step.field for step in plan.steps] == ["ciap", "exame"]
+    assert not plan.optimizations
+
+
+def test_only_waits_after_a_rerender_survive():
+    plan = compile_recipe(_recipe([
+        {"field": "exame", "primitive": "atendimento.select_exame", "source": {"column": 6}, "wait_after": 1},
+        {"field": "ciap", "primitive": "atendimento.fill_ciap", "source": {"column": 5}, "wait_after": 1},
+        {"field": "conduta", "primitive": "atendimento.select_conduta", "source": {"column": 7}, "wait_after": 2, "keep_wait": True},
+        {"field": "confirmar", "primitive": "atendimento.click_confirm_button", "wait_after": 1},
+    ]))
+    waits = {step.field: step.wait_after for step in plan.steps}
+    assert waits == {"exame": 0.0, "ciap": 1.0, "conduta": 2.0, "confirmar": 0.0}
+    assert "2 pausa(s) redundante(s) removida(s)" in plan.optimizations
+
+
+def test_repeated_columns_and_constants_are_read_once():
+    plan = compile_recipe(_recipe([
+        {"field": "ciap", "primitive": "atendimento.fill_ciap", "source": {"column": 5}},
+        {"field": "outros", "primitive": "atendimento.fill_outros_exames_sigtap", "source": {"column": 5}},
+        {"field": "tipo", "primitive": "atendimento.select_tipo_atendimento", "source": {"const": "Consulta agendada"}},
+        {"field": "conduta", "primitive": "atendimento.select_conduta", "source": {"const": "Consulta agendada"}},
+    ]))
+    assert plan.columns == {"col5": (5, "str")}
+    assert plan.constants == {"const0": "Consulta agendada"}
+    assert {step.value_key for step in plan.steps} == {"col5", "const0"}
+    assert "2 leituras de coluna unificadas em 1" in plan.optimizations
+
+
+def test_read_row_converts_types_and_treats_blank_or_invalid_values_as_missing():
+    plan = compile_recipe(_recipe([
+        {"field": "sexo", "primitive": "common.select_gender", "source": {"column": 3, "type": "int"}},
+        {"field": "ciap", "primitive": "atendimento.fill_ciap", "source": {"column": 5}},
+        {"field": "tipo", "primitive": "atendimento.select_tipo_atendimento", "source": {"const": "Consulta agendada"}},
+    ]))
+    assert plan.read_row(["", "", "", "1", "", "T90"]) == {"col3_int": 1, "col5": "T90", "const0": "Consulta agendada"}
+    assert plan.read_row(["", "", "", "x", "", "  "]) == {"col3_int": None, "col5": None, "const0": "Consulta agendada"}
+    assert plan.read_row(["", "", "", "0"])["col5"] is None # Coluna além do fim da linha
+
+
+def test_column_steps_are_optional_by_default_and_constants_are_not():
+    plan = compile_recipe(_recipe([
+        {"field": "ciap", "primitive": "atendimento.fill_ciap", "source": {"column": 5}},
+        {"field": "tipo", "primitive": "atendimento.select_tipo_atendimento", "source": {"const": "Consulta agendada"}},
+    ]))
+    assert [step.optional for step in plan.steps] == [True, False]
+
+
+@pytest.mark.parametrize("recipe, message", [
+    ({"area": "atendimento_individual", "steps": [{"primitive": "atendimento.click_confirm_button"}]}, "sem 'name'"),
+    (_recipe([{"primitive": "atendimento.click_confirm_button"}], area="odonto"), "'area'"),
+    (_recipe([]), "não tem passos"),
+    (_recipe([{"primitive": "atendimento.nao_existe"}]), "primitiva desconhecida"),
+    (_recipe([{"primitive": "atendimento.fill_ciap"}]), "'source' é obrigatório"),
+    (_recipe([{"primitive": "atendimento.fill_ciap", "source": {"column": -1}}]), "coluna inválida"),
+    (_recipe([{"primitive": "atendimento.fill_ciap", "source": {"campo": 1}}]), "'column' ou 'const'"),
+    (_recipe([{"primitive": "atendimento.click_confirm_button"}], common_fields="todos"), "common_fields desconhecido"),
+])
+def test_invalid_recipes_are_rejected(recipe, message):
+    with pytest.raises(RecipeError, match=message):
+        compile_recipe(recipe)
@@ -0,0 +1,56 @@
+# Arquivo: tests/test_recovery_policy.py
+import asyncio
+
+import pytest
+
+pytest.importorskip("playwright")
+
+from app.automation.recovery_policy import RecoveryPolicy
+from playwright._impl._errors import TimeoutError
+
+
+@pytest.mark.parametrize("message, context_text, expected", [
+    ("net::ERR_CONNECTION_REFUSED at http://esus/", "", "servidor_indisponivel"),
+    ("Resposta 502 do servidor", "", "servidor_indisponivel"),
+    ("Falha no clique", "Sua sessão expirou. Faça o login novamente.", "sessao_perdida"),
+    ("Confirmar Procedimentos não foi aceito pelo e-SUS", "Registro duplicado: já existe um registro para este cidadão.", "duplicado"),
+    ("Confirmar Atendimento não foi aceito pelo e-SUS", "Existem campos obrigatórios não preenchidos.", "validacao_rejeitada"),
+    ("Confirmar", "O campo Data de nascimento foi preenchido de forma incorreta.", "validacao_rejeitada"),
+    ("Confirmar", "Preencha o campo CPF/CNS.", "validacao_rejeitada"),
+    ("Frame was detached", "", "iframe_obsoleto"),
+    ("Execution context was destroyed, most likely because of a navigation", "", "iframe_obsoleto"),
+    ("Timeout 10000ms exceeded", "", "timeout_transitorio"),
+    ("Algo inesperado", "", "desconhecido"),
+])
+def test_classify_by_message_and_message_box_text(message, context_text, expected):
+    assert RecoveryPolicy.classify(Exception(message), context_text) == expected
+
+
+def test_generic_invalid_selector_error_is_not_a_validation_rejection():
+    error = Exception("Error: strict mode violation / invalid selector 'xpath=//div['")
+    assert RecoveryPolicy.classify(error) == "desconhecido"
+
+
+def test_login_url_means_the_session_was_lost():
+    assert RecoveryPolicy.classify(Exception("Timeout 10000ms exceeded"), page_url="https://esus/#/login") == "sessao_perdida"
+
+
+@pytest.mark.parametrize("error", [TimeoutError("aguardando"), asyncio.TimeoutError()])
+def test_timeout_types_without_timeout_text_are_transient(error):
+    assert RecoveryPolicy.classify(error) == "timeout_transitorio"
+
+
+def test_decide_escalates_after_max_attempts_with_exponential_backoff():
+    policy = RecoveryPolicy()
+    assert policy.decide("timeout_transitorio", 1) == ("retry", 2.0)
+    assert policy.decide("timeout_transitorio", 3) == ("retry", 8.0)
+    assert policy.decide("timeout_transitorio", 4)[0] == "escalate"
+    assert policy.decide("classe_que_nao_existe", 1)[0] == "escalate"
+
+
+def test_invalid_overrides_keep_the_defaults():
+    policy = RecoveryPolicy({"duplicado": {"action": "apagar"}, "classe_nova": {"action": "retry"},
+                             "validacao_rejeitada": {"action": "escalate"}})
+    assert policy.decide("duplicado", 1)[0] == "quarantine"
+    assert policy.decide("validacao_rejeitada", 1)[0] == "escalate"
+    assert "classe_nova" not in policy.policies
@@ -0,0 +1,68 @@
+# Arquivo: tests/test_run_history.py
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.data.run_history import RunHistory
+
+TASK = "AtendHipertenso"
+
+
+@pytest.fixture
+def history(tmp_path):
+    return RunHistory(tmp_path / "run_history.sqlite3")
+
+
+def _record(history, days_ago, cpf_p95=1.0, rows=20, duration_s=600, errors=None, browser="chromium", pec="5.4.22"):
+    started_at = datetime.now() - timedelta(days=days_ago)
+    return history.record_run(TASK, started_at, duration_s, rows, 0, "concluida", {"Preencher CPF": [cpf_p95] * 10},
+                              errors_by_class=errors, browser=browser, pec_version=pec)
+
+
+def _baseline(history, **kwargs):
+    for days_ago in (5, 4, 3):
+        _record(history, days_ago, **kwargs)
+
+
+def test_no_regression_when_the_run_matches_the_baseline(history):
+    _baseline(history)
+    assert history.regressions(_record(history, 0)) == []
+
+
+def test_slower_step_is_reported(history):
+    _baseline(history)
+    findings = history.regressions(_record(history, 0, cpf_p95=2.0))
+    assert len(findings) == 1
+    assert "passo 'Preencher CPF' p95 foi de 1.0s para 2.0s" in findings[0]
+    assert "desde a atualização" not in findings[0]
+
+
+def test_small_absolute_step_changes_are_ignored(history):
+    _baseline(history, cpf_p95=0.1)
+    assert history.regressions(_record(history, 0, cpf_p95=0.3)) == []
+
+
+def test_pec_upgrade_is_named_in_the_finding(history):
+    _baseline(history, pec="5.4.22")
+    findings = history.regressions(_record(history, 0, cpf_p95=2.0, pec="5.4.23"))
+    assert findings and "desde a atualização do PEC 5.4.22 -> 5.4.23" in findings[0]
+
+
+def test_pace_and_error_rate_regressions(history):
+    _baseline(history, errors={"timeout_transitorio": 0})
+    findings = history.regressions(_record(history, 0, duration_s=1200, errors={"timeout_transitorio": 4, "duplicado": 1}))
+    assert any("ritmo caiu de 2.0 para 1.0 reg/min" in f for f in findings)
+    assert any("25% de erros por linha" in f and "timeout_transitorio (4)" in f for f in findings)
+
+
+def test_baseline_ignores_other_browsers_old_runs_and_small_runs(history):
+    _record(history, 3, browser="firefox")
+    _record(history, 30)
+    _record(history, 2, rows=RunHistory.MIN_ROWS - 1)
+    assert history.regressions(_record(history, 0, cpf_p95=5.0)) == []
+
+
+def test_small_or_unknown_runs_are_not_compared(history):
+    _baseline(history)
+    assert history.regressions(_record(history, 0, cpf_p95=5.0, rows=RunHistory.MIN_ROWS - 1)) == []
+    assert history.regressions(9999) == []
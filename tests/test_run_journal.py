@@ -0,0 +1,95 @@
+# Arquivo: tests/test_run_journal.py
+import pytest
+
+from app.data.run_journal import RunJournal
+
+TASK = "AtendHipertenso"
+FILE = "dados1.csv"
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return RunJournal(tmp_path / "journal.jsonl")
+
+
+def test_file_fingerprint_follows_the_content(tmp_path):
+    data_file = tmp_path / FILE
+    data_file.write_bytes(b"1;123;01/01/1960\n")
+    first = RunJournal.file_fingerprint(data_file)
+    data_file.write_bytes(b"1;456;02/02/1970\n")
+    assert RunJournal.file_fingerprint(data_file) != first
+    assert RunJournal.file_fingerprint(tmp_path / "nao_existe.csv") is None
+
+
+def test_completed_rows_only_counts_accepted_rows(journal):
+    journal.record(TASK, FILE, 0, RunJournal.STATUS_OK, fingerprint="a")
+    journal.record(TASK, FILE, 1, RunJournal.STATUS_SKIPPED, fingerprint="a")
+    journal.record(TASK, FILE, 2, RunJournal.STATUS_FAILED, fingerprint="a")
+    journal.record(TASK, FILE, 3, RunJournal.STATUS_OK, fingerprint="a")
+    assert journal.completed_rows(FILE, TASK, "a") == {0, 3}
+
+
+def test_reused_file_name_with_new_content_starts_from_scratch(journal):
+    journal.record(TASK, FILE, 0, RunJournal.STATUS_OK, fingerprint="antigo")
+    journal.record(TASK, FILE, 1, RunJournal.STATUS_OK, fingerprint="antigo")
+    assert journal.completed_rows(FILE, TASK, "novo") == set()
+
+
+def test_same_content_is_not_resumed_after_the_file_was_completed(journal):
+    journal.record(TASK, FILE, 0, RunJournal.STATUS_OK, fingerprint="a")
+    journal.mark_file_done(TASK, FILE, "a")
+    assert journal.completed_rows(FILE, TASK, "a") == set()
+
+    journal.record(TASK, FILE, 0, RunJournal.STATUS_OK, fingerprint="a")
+    assert journal.completed_rows(FILE, TASK, "a") == {0}
+
+
+def test_entries_of_another_task_are_ignored(journal):
+    journal.record("AtendDiabetico", FILE, 0, RunJournal.STATUS_OK, fingerprint="a")
+    assert journal.completed_rows(FILE, TASK, "a") == set()
+
+
+def test_legacy_entries_without_fingerprint_are_ignored(journal):
+    journal.record(TASK, FILE, 0, RunJournal.STATUS_OK)
+    assert journal.completed_rows(FILE, TASK, "a") == set()
+    assert journal.completed_rows(FILE, TASK, None) == set()
+
+
+def test_file_main_date_is_the_last_one_opened_for_this_content(journal):
+    journal.record(TASK, FILE, None, RunJournal.STATUS_OPENED, main_date="01/03/2025", fingerprint="a")
+    journal.record(TASK, FILE, None, RunJournal.STATUS_OPENED, main_date="02/03/2025", fingerprint="a")
+    journal.record(TASK, FILE, None, RunJournal.STATUS_OPENED, main_date="09/03/2025", fingerprint="b")
+    assert journal.file_main_date(FILE, TASK, "a") == "02/03/2025"
+
+    journal.mark_file_done(TASK, FILE, "a")
+    assert journal.file_main_date(FILE, TASK, "a") is None
+
+
+def test_truncated_lines_are_skipped(journal):
+    journal.record(TASK, FILE, 0, RunJournal.STATUS_OK, fingerprint="a")
+    with open(journal.journal_file, "a", encoding="utf-8") as f:
+        f.write('{"task": "AtendHipertenso", "file": "dados1.csv", "ro')
+    assert journal.completed_rows(FILE, TASK, "a") == {0}
+
+
+def test_record_keeps_cpf_detail_and_main_date(journal):
+    journal.record(TASK, FILE, 4, RunJournal.STATUS_FAILED, row_data=["1", 12345678901], detail="timeout",
+                   main_date="01/03/2025", fingerprint="a")
+    entry = journal.entries(FILE, TASK)[0]
+    assert entry["cpf_cns"] == "12345678901"
+    assert entry["detail"] == "timeout"
+    assert entry["main_date"] == "01/03/2025"
+    assert entry["mode"] == "ui"
+
+
+def test_mark_file_done_drops_the_closed_history_from_the_journal(journal):
+    journal.record(TASK, FILE, 0, RunJournal.STATUS_OK, row_data=["1", "12345678901"], fingerprint="a")
+    journal.record(TASK, "dados2.csv", 0, RunJournal.STATUS_OK, fingerprint="b")
+    journal.record("AtendDiabetico", FILE, 0, RunJournal.STATUS_OK, fingerprint="a")
+    journal.mark_file_done(TASK, FILE, "a")
+    journal.mark_file_done(TASK, FILE, "a")
+
+    assert [e["status"] for e in journal.entries(FILE, TASK)] == [RunJournal.STATUS_FILE_DONE]
+    assert "12345678901" not in journal.journal_file.read_text(encoding="utf-8")
+    assert journal.completed_rows("dados2.csv", TASK, "b") == {0}
+    assert journal.completed_rows(FILE, "AtendDiabetico", "a") == {0}